@@ -14,13 +14,23 @@ from core.qt_project import (
     run_ui_test,
     TestRecorder,
     analyze_test_failure,
+    run_unit_test_suite,
+    analyze_impact,
+    run_affected_tests,
+    run_flakiness_check,
+    BenchmarkTracker,
+    TimeoutPolicy,
+    EnvProfileManager,
 )
 from core.database import TestDatabase
-from core.services import VisualAgent
+from core.services import VisualAgent, JobManager, JobEvent, run_pipeline_batch
 from backend.static_analysis_api import StaticAnalysisAPI
 from core.utils.logger import logger
+import json
 import platform
 import sys
+import threading
+import time
 
 
 class API:
@@ -36,10 +46,16 @@ class API:
         # 初始化测试数据库和记录器
         self.test_db = TestDatabase()
         self.test_recorder = TestRecorder(self.test_db)
+        # 根据历史耗时计算各测试的超时
+        self.timeout_policy = TimeoutPolicy(self.test_db)
         # 初始化视觉测试代理
         self.visual_agent = VisualAgent()
         # 初始化静态分析 API
         self.static_analysis_api = StaticAnalysisAPI()
+        # 后台任务（Pipeline 等耗时操作），进度事件通过 evaluate_js 推送给前端
+        self._window = None  # 由 create_window 设置
+        self.job_manager = JobManager()
+        self.job_manager.set_push(self._push_job_event)
         logger.info("API 初始化完成")
 
     # ==================== 计算器 API ====================
@@ -220,7 +236,15 @@ class API:
         tests = scan_unit_tests(project_path)
         return [test.to_dict() for test in tests]
     
-    def run_unit_test(self, executable_path: str, test_name: str, project_path: str) -> Dict:
+    def run_unit_test(
+        self,
+        executable_path: str,
+        test_name: str,
+        project_path: str,
+        benchmark_backend: str = None,
+        regression_threshold: float = None,
+        env_profile: str = "auto"
+    ) -> Dict:
         """
         运行单元测试并记录
         
@@ -228,12 +252,54 @@ class API:
             executable_path: 测试可执行文件路径
             test_name: 测试名称
             project_path: 项目路径
+            benchmark_backend: QBENCHMARK 测量后端（walltime / tickcounter / eventcounter / callgrind）
+            regression_threshold: benchmark 回归阈值（比例），默认 0.1
+            env_profile: 运行环境 offscreen / xvfb / desktop，auto 时自动选择并按测试缓存
             
         Returns:
-            测试结果（含 run_id）
+            测试结果（含 run_id 和使用的 env_profile；有 QBENCHMARK 时含 benchmark_comparisons 和 benchmark_regressions）
         """
+        try:
+            return self._run_unit_test(
+                executable_path, test_name, project_path,
+                benchmark_backend=benchmark_backend,
+                regression_threshold=regression_threshold,
+                env_profile=env_profile
+            )
+        except ValueError as e:
+            logger.error(f"运行单元测试错误: {e}")
+            return {"success": False, "error": str(e)}
+    
+    def _run_unit_test(
+        self,
+        executable_path: str,
+        test_name: str,
+        project_path: str,
+        job=None,
+        benchmark_backend: str = None,
+        regression_threshold: float = None,
+        env_profile: str = "auto"
+    ) -> Dict:
+        """运行单元测试并记录（同步执行，job 为后台任务上下文，用于推送输出和用例结果）"""
         logger.info(f"运行单元测试: {test_name}, 项目路径: {project_path}")
-        result = run_unit_test(executable_path, test_name)
+        timeout = self.timeout_policy.timeout_for(project_path, test_name, 'unit')
+        callbacks = self._test_stream_callbacks(test_name, job)
+        with EnvProfileManager(self.test_db) as profiles:
+            result, env_profile, cost_ms = profiles.run(
+                project_path,
+                test_name,
+                executable_path,
+                lambda env: run_unit_test(
+                    executable_path,
+                    test_name,
+                    benchmark_backend=benchmark_backend,
+                    timeout=timeout.timeout_s,
+                    env=env,
+                    **callbacks
+                ),
+                env_profile
+            )
+        self._record_timeout(project_path, 'unit', test_name, timeout.timeout_s, cost_ms, result.duration)
         logger.info(f"测试执行完成: {test_name}, 状态: {result.status}")
         
         # 记录到数据库（不包含 AI 分析）
@@ -243,10 +309,197 @@ class API:
         
         result_dict = result.to_dict()
         result_dict["run_id"] = run_id
+        result_dict["timeout"] = timeout.to_dict()
+        result_dict["env_profile"] = env_profile
+        
+        # QBENCHMARK 结果写入时间序列并与滚动基线比较（超时/取消的运行不记录）
+        if result.benchmarks and result.status != 'error':
+            try:
+                comparisons = self._benchmark_tracker(regression_threshold).record(
+                    project_path, test_name, result.benchmarks, run_id
+                )
+                result_dict["benchmark_comparisons"] = [c.to_dict() for c in comparisons]
+                result_dict["benchmark_regressions"] = sum(1 for c in comparisons if c.status == 'regression')
+            except Exception as e:
+                logger.error(f"记录 benchmark 结果失败: {e}")
         
         return result_dict
     
-    def run_ui_test_with_record(self, executable_path: str, test_name: str, project_path: str) -> Dict:
+    def _record_timeout(
+        self,
+        project_path: str,
+        test_type: str,
+        test_name: str,
+        timeout_s: float,
+        cost_ms: float,
+        duration: str
+    ):
+        """记录一次运行的超时时间和进程耗时（取消的运行不记录）"""
+        if duration == 'cancelled':
+            return
+        self.timeout_policy.record(project_path, test_type, [
+            (test_name, timeout_s, cost_ms, duration == 'timeout', False)
+        ])
+    
+    def _benchmark_tracker(self, regression_threshold: float = None) -> BenchmarkTracker:
+        if regression_threshold is None:
+            return BenchmarkTracker(self.test_db)
+        return BenchmarkTracker(self.test_db, threshold=regression_threshold)
+    
+    @staticmethod
+    def _test_stream_callbacks(test_name: str, job=None) -> Dict:
+        """后台任务中运行测试时，把用例结果和输出作为 test_case / output 事件推送"""
+        if job is None:
+            return {}
+        cancel_event = threading.Event()
+        job.on_cancel(cancel_event.set)
+        return {
+            "on_case": lambda case: job.emit("test_case", test_name=test_name, case=case.to_dict()),
+            "on_output": lambda lines: job.emit("output", test_name=test_name, lines=lines),
+            "cancel_event": cancel_event,
+        }
+    
+    def run_unit_test_suite(
+        self,
+        project_path: str,
+        max_workers: int = None,
+        test_names: List[str] = None,
+        shard_functions: bool = True,
+        force: bool = False,
+        env_profile: str = "auto"
+    ) -> Dict:
+        """
+        并行运行项目的全部单元测试并批量记录
+        
+        Args:
+            project_path: 项目路径
+            max_workers: 同时运行的测试进程数，默认取 CPU 核数
+            test_names: 只运行这些测试，默认运行全部
+            shard_functions: 是否把耗时测试按测试函数拆成多个分片并行运行
+            force: 忽略结果缓存（默认跳过可执行文件和源文件都没有变化、且上次通过的测试）
+            env_profile: 运行环境 offscreen / xvfb / desktop，auto 时按测试自动选择并缓存
+            
+        Returns:
+            套件报告（含各测试结果、墙钟耗时、串行累计耗时和加速比；命中缓存的测试 cached 为 true）
+        """
+        try:
+            logger.info(f"运行单元测试套件: {project_path}")
+            return run_unit_test_suite(
+                project_path,
+                self.test_db,
+                max_workers,
+                test_names,
+                shard_functions=shard_functions,
+                force=force,
+                env_profile=env_profile
+            )
+        except Exception as e:
+            logger.error(f"运行单元测试套件错误: {e}")
+            return {"success": False, "error": str(e)}
+    
+    def analyze_test_impact(self, project_path: str, changed_files: List[str] = None, base: str = "HEAD") -> Dict:
+        """
+        影响分析：找出受改动影响的测试
+        
+        Args:
+            project_path: 项目路径
+            changed_files: 改动的文件（绝对路径或相对项目目录），默认从 git diff 获取
+            base: 从 git 获取改动时比较的提交
+            
+        Returns:
+            受影响/未受影响的测试及原因
+        """
+        try:
+            return {"success": True, **analyze_impact(project_path, changed_files, base).to_dict()}
+        except Exception as e:
+            logger.error(f"测试影响分析错误: {e}")
+            return {"success": False, "error": str(e)}
+    
+    def run_affected_tests(
+        self,
+        project_path: str,
+        changed_files: List[str] = None,
+        base: str = "HEAD",
+        max_workers: int = None,
+        force: bool = False,
+        env_profile: str = "auto"
+    ) -> Dict:
+        """
+        只运行受改动影响的单元测试并批量记录
+        
+        Args:
+            project_path: 项目路径
+            changed_files: 改动的文件，默认从 git diff 获取
+            base: 从 git 获取改动时比较的提交
+            max_workers: 同时运行的测试进程数
+            force: 忽略结果缓存
+            env_profile: 运行环境，auto 时按测试自动选择并缓存
+            
+        Returns:
+            套件报告，附加 impact 和 skipped_tests（未受影响而跳过的测试数）
+        """
+        try:
+            logger.info(f"运行受影响的单元测试: {project_path}")
+            return run_affected_tests(
+                project_path,
+                self.test_db,
+                changed_files,
+                base,
+                max_workers=max_workers,
+                force=force,
+                env_profile=env_profile
+            )
+        except Exception as e:
+            logger.error(f"运行受影响的单元测试错误: {e}")
+            return {"success": False, "error": str(e)}
+    
+    def rerun_unit_test(
+        self,
+        executable_path: str,
+        test_name: str,
+        project_path: str,
+        runs: int = 10,
+        function_name: str = None,
+        max_workers: int = None,
+        env_profile: str = "auto"
+    ) -> Dict:
+        """
+        把测试并发重复运行 N 次，检测是否不稳定
+        
+        Args:
+            executable_path: 测试可执行文件路径
+            test_name: 测试名称
+            project_path: 项目路径
+            runs: 运行次数
+            function_name: 只运行该测试函数，默认运行全部
+            max_workers: 同时运行的测试进程数
+            env_profile: 运行环境，auto 时使用测试缓存的 profile
+            
+        Returns:
+            通过率、耗时分布（p50/p95/max）、不稳定度、各用例失败次数和各次运行结果
+        """
+        try:
+            return run_flakiness_check(
+                project_path,
+                self.test_db,
+                executable_path,
+                test_name,
+                runs,
+                function_name,
+                max_workers=max_workers,
+                env_profile=env_profile
+            )
+        except Exception as e:
+            logger.error(f"重复运行测试错误: {e}")
+            return {"success": False, "error": str(e)}
+    
+    def run_ui_test_with_record(
+        self,
+        executable_path: str,
+        test_name: str,
+        project_path: str,
+        env_profile: str = "desktop"
+    ) -> Dict:
         """
         运行 UI 测试并记录（含截图）
         
@@ -254,17 +507,47 @@ class API:
             executable_path: 测试可执行文件路径
             test_name: 测试名称
             project_path: 项目路径
+            env_profile: 运行环境 desktop / xvfb / offscreen（offscreen 下截图是空白的）
             
         Returns:
             测试结果（含 run_id）
         """
+        try:
+            return self._run_ui_test(executable_path, test_name, project_path, env_profile=env_profile)
+        except ValueError as e:
+            logger.error(f"运行 UI 测试错误: {e}")
+            return {"success": False, "error": str(e)}
+    
+    def _run_ui_test(
+        self,
+        executable_path: str,
+        test_name: str,
+        project_path: str,
+        job=None,
+        env_profile: str = "desktop"
+    ) -> Dict:
+        """运行 UI 测试并记录（同步执行，job 为后台任务上下文）"""
         logger.info(f"运行 UI 测试: {test_name}")
-        result = run_ui_test(executable_path, test_name, project_path)
+        timeout = self.timeout_policy.timeout_for(project_path, test_name, 'ui')
+        start = time.perf_counter()
+        # UI 测试要截图，不自动选择 profile
+        with EnvProfileManager() as profiles, profiles.environment(env_profile, executable_path) as env:
+            result = run_ui_test(
+                executable_path,
+                test_name,
+                project_path,
+                timeout=timeout.timeout_s,
+                env=env,
+                **self._test_stream_callbacks(test_name, job)
+            )
+        self._record_timeout(
+            project_path, 'ui', test_name, timeout.timeout_s, (time.perf_counter() - start) * 1000, result.duration
+        )
         
         # 记录到数据库（含截图）
         run_id = self.test_recorder.record_ui_test(project_path, result)
         
-        return {**result.to_dict(), "run_id": run_id}
+        return {**result.to_dict(), "run_id": run_id, "timeout": timeout.to_dict(), "env_profile": env_profile}
     
     def analyze_test_failure(
         self, 
@@ -441,6 +724,123 @@ class API:
         logger.info(f"获取测试统计: {project_path}")
         return self.test_db.get_statistics(project_path)
     
+    def get_test_flakiness(self, project_path: str, test_name: str = None) -> Dict:
+        """
+        获取各测试最近一次重复运行的不稳定度统计（历史视图据此标记不稳定的测试）
+        
+        Args:
+            project_path: 项目路径
+            test_name: 只查询该测试
+            
+        Returns:
+            统计列表，按不稳定度从高到低排列
+        """
+        try:
+            records = self.test_db.get_flakiness(project_path, test_name)
+            return {"success": True, "records": [r.to_dict() for r in records]}
+        except Exception as e:
+            logger.error(f"获取不稳定度统计错误: {e}")
+            return {"success": False, "error": str(e)}
+    
+    def get_benchmark_trend(
+        self,
+        project_path: str,
+        test_name: str,
+        function_name: str = None,
+        data_tag: str = None,
+        metric: str = None,
+        limit: int = 50,
+        regression_threshold: float = None
+    ) -> Dict:
+        """
+        获取 QBENCHMARK 趋势（每个点附带滚动基线和回归判断）
+        
+        Args:
+            project_path: 项目路径
+            test_name: 测试名称
+            function_name: 只查询该函数
+            data_tag: 只查询该数据行（空字符串表示没有数据行）
+            metric: 只查询该度量
+            limit: 每个序列返回的点数
+            regression_threshold: 回归阈值（比例），默认 0.1
+            
+        Returns:
+            各序列的趋势
+        """
+        try:
+            series = self._benchmark_tracker(regression_threshold).trend(
+                project_path, test_name, function_name, data_tag, metric, limit
+            )
+            return {"success": True, "series": series}
+        except Exception as e:
+            logger.error(f"获取 benchmark 趋势错误: {e}")
+            return {"success": False, "error": str(e)}
+    
+    def get_test_timeouts(self, project_path: str) -> Dict:
+        """
+        获取各测试当前的超时及运行统计（用于调整超时策略）
+        
+        Args:
+            project_path: 项目路径
+            
+        Returns:
+            策略参数，以及各测试的超时、依据的 p99 耗时、运行次数、超时次数和耗时与超时之比的最大值
+        """
+        try:
+            return {"success": True, **self.timeout_policy.summary(project_path)}
+        except Exception as e:
+            logger.error(f"获取测试超时错误: {e}")
+            return {"success": False, "error": str(e)}
+    
+    def get_test_env_profiles(self, project_path: str) -> Dict:
+        """
+        获取可用的运行环境及各测试缓存的 profile
+        
+        Args:
+            project_path: 项目路径
+            
+        Returns:
+            available（当前系统可用的 profile）和 tests（{测试名称: profile}）
+        """
+        try:
+            return {
+                "success": True,
+                "available": EnvProfileManager().available_profiles(),
+                "tests": self.test_db.get_test_env_profiles(project_path),
+            }
+        except Exception as e:
+            logger.error(f"获取测试运行环境错误: {e}")
+            return {"success": False, "error": str(e)}
+    
+    def set_test_env_profile(self, project_path: str, test_name: str, profile: str = None) -> Dict:
+        """
+        指定测试的运行环境（auto 模式下使用）
+        
+        Args:
+            project_path: 项目路径
+            test_name: 测试名称
+            profile: offscreen / xvfb / desktop，为 None 时清除缓存，下次运行重新选择
+        """
+        try:
+            if profile is None:
+                self.test_db.delete_test_env_profile(project_path, test_name)
+            elif profile not in EnvProfileManager().available_profiles():
+                return {"success": False, "error": f"运行环境不可用: {profile}"}
+            else:
+                self.test_db.save_test_env_profile(project_path, test_name, profile)
+            return {"success": True}
+        except Exception as e:
+            logger.error(f"设置测试运行环境错误: {e}")
+            return {"success": False, "error": str(e)}
+    
+    def get_benchmark_tests(self, project_path: str) -> Dict:
+        """获取项目中有 QBENCHMARK 结果的测试"""
+        try:
+            return {"success": True, "tests": self.test_db.get_benchmark_tests(project_path)}
+        except Exception as e:
+            logger.error(f"获取 benchmark 测试列表错误: {e}")
+            return {"success": False, "error": str(e)}
+    
     def cleanup_old_tests(self, days: int = 30) -> Dict:
         """
         清理旧测试记录
@@ -756,6 +1156,14 @@ class API:
             logger.error(f"压力测试错误: {e}")
             return {"success": False, "error": str(e)}
     
+    def benchmark_action_backends(self, iterations: int = 20, batch_size: int = 10) -> Dict:
+        """测量各动作后端的分发延迟"""
+        try:
+            return self.visual_agent.benchmark_action_backends(iterations, batch_size)
+        except Exception as e:
+            logger.error(f"动作后端基准测试错误: {e}")
+            return {"success": False, "error": str(e)}
+    
     def execute_ai_command(self, command: str) -> Dict:
         """执行 AI 自然语言指令"""
         try:
@@ -921,7 +1329,9 @@ class API:
         self,
         json_path: str,
         entry: str,
-        resource_dir: str = None
+        resource_dir: str = None,
+        record_dir: str = None,
+        auto_roi: bool = False
     ) -> Dict:
         """
         从 JSON 文件运行 Pipeline
@@ -930,13 +1340,77 @@ class API:
             json_path: Pipeline 配置文件路径
             entry: 入口节点名
             resource_dir: 资源目录
+            record_dir: 录制目录（可选），录制的截图和动作可用于回放
+            auto_roi: 未设置 roi 的节点先在历史命中位置附近识别
         """
         try:
-            return self.visual_agent.run_pipeline_from_file(json_path, entry, resource_dir)
+            return self.visual_agent.run_pipeline_from_file(
+                json_path, entry, resource_dir, record_dir, auto_roi=auto_roi
+            )
         except Exception as e:
             logger.error(f"Pipeline 文件错误: {e}")
             return {"success": False, "error": str(e)}
 
+    def run_pipeline_replay(
+        self,
+        json_path: str,
+        entry: str,
+        source: str,
+        resource_dir: str = None,
+        repeat: int = 3
+    ) -> Dict:
+        """
+        在录制的帧序列上回放 Pipeline，返回各节点耗时和准确率报告
+        
+        Args:
+            json_path: Pipeline 配置文件路径
+            entry: 入口节点名
+            source: 帧目录或视频文件
+            resource_dir: 资源目录
+            repeat: 回放次数
+        """
+        try:
+            return self.visual_agent.run_pipeline_replay(json_path, entry, source, resource_dir, repeat)
+        except Exception as e:
+            logger.error(f"Pipeline 回放错误: {e}")
+            return {"success": False, "error": str(e)}
+
+    def scan_scene_inventory(
+        self,
+        templates,
+        resource_dir: str = None,
+        threshold: float = 0.8,
+        roi: List[int] = None
+    ) -> Dict:
+        """
+        场景清单：一次扫描找出屏幕上所有已知图标的全部实例
+        
+        Args:
+            templates: 模板目录、文件或通配符（字符串或列表）
+            resource_dir: 资源目录
+            threshold: 记录实例的最低分数
+            roi: 只返回中心点在该区域内的实例
+        """
+        try:
+            return self.visual_agent.scan_scene_inventory(templates, resource_dir, threshold, roi)
+        except Exception as e:
+            logger.error(f"场景清单扫描错误: {e}")
+            return {"success": False, "error": str(e)}
+
+    def suggest_pipeline_rois(self, json_path: str, min_samples: int = 3) -> Dict:
+        """
+        根据历史命中位置为 Pipeline 节点推荐 ROI（附预计加速比）
+        
+        Args:
+            json_path: Pipeline 配置文件路径
+            min_samples: 至少命中多少次才给出建议
+        """
+        try:
+            return self.visual_agent.suggest_pipeline_rois(json_path, min_samples)
+        except Exception as e:
+            logger.error(f"ROI 建议错误: {e}")
+            return {"success": False, "error": str(e)}
+
     def get_vision_capabilities(self) -> Dict:
         """获取视觉识别能力信息"""
         try:
@@ -1020,7 +1494,8 @@ class API:
         pipeline_path: str,
         entry: str,
         launch_app: bool = True,
-        resource_dir: str = None
+        resource_dir: str = None,
+        auto_roi: bool = False
     ) -> Dict:
         """
         运行 Pipeline 测试
@@ -1030,73 +1505,363 @@ class API:
             entry: 入口节点名
             launch_app: 是否先启动被测应用
             resource_dir: 资源目录（模板图片等），不提供则使用 pipeline 所在目录
+            auto_roi: 未设置 roi 的节点先在历史命中位置附近识别
         """
         try:
-            import time
-            import json
-            from pathlib import Path
-            
-            result = {
+            return self._run_pipeline_test(pipeline_path, entry, launch_app, resource_dir, auto_roi=auto_roi)
+        except Exception as e:
+            logger.error(f"运行 Pipeline 测试错误: {e}")
+            return {
                 "success": False,
-                "pipeline_path": pipeline_path,
-                "entry": entry,
-                "app_launched": False,
-                "pipeline_result": None,
-                "resource_dir": None,
-                "error": None
+                "error": str(e)
             }
-            
-            # 可选：先启动应用
-            if launch_app:
-                launch_result = self.visual_agent.launch_target_app()
-                result["app_launched"] = launch_result.get("success", False)
-                if result["app_launched"]:
-                    time.sleep(2)  # 等待应用启动
-            
-            # 智能确定资源目录
-            pipeline_file = Path(pipeline_path)
-            
-            if resource_dir:
-                # 使用提供的资源目录
-                final_resource_dir = resource_dir
-            else:
-                # 尝试从 pipeline 配置文件读取 $resource_base
-                try:
-                    with open(pipeline_file, 'r', encoding='utf-8') as f:
-                        config = json.load(f)
-                    resource_base = config.get('$resource_base')
-                    if resource_base:
-                        # 相对路径：基于 pipeline 文件所在目录解析
-                        resource_path = Path(resource_base)
-                        if not resource_path.is_absolute():
-                            resource_path = (pipeline_file.parent / resource_base).resolve()
-                        final_resource_dir = str(resource_path)
-                    else:
-                        final_resource_dir = str(pipeline_file.parent)
-                except:
-                    final_resource_dir = str(pipeline_file.parent)
-            
-            result["resource_dir"] = final_resource_dir
-            logger.info(f"Pipeline 资源目录: {final_resource_dir}")
-            
-            # 运行 Pipeline
-            pipeline_result = self.visual_agent.run_pipeline_from_file(
-                pipeline_path, 
-                entry, 
-                final_resource_dir
+    
+    def _run_pipeline_test(
+        self,
+        pipeline_path: str,
+        entry: str,
+        launch_app: bool,
+        resource_dir: str = None,
+        job=None,
+        auto_roi: bool = False
+    ) -> Dict:
+        """运行 Pipeline 测试（同步执行，job 为后台任务上下文）"""
+        from core.vision.plan import resolve_resource_dir
+        
+        result = {
+            "success": False,
+            "pipeline_path": pipeline_path,
+            "entry": entry,
+            "app_launched": False,
+            "pipeline_result": None,
+            "resource_dir": None,
+            "error": None
+        }
+        
+        # 可选：先启动应用
+        if launch_app:
+            launch_result = self.visual_agent.launch_target_app()
+            result["app_launched"] = launch_result.get("success", False)
+            if job is not None:
+                job.emit("launch", **launch_result)
+        
+        # 智能确定资源目录：优先使用提供的目录，其次 $resource_base，最后 pipeline 所在目录
+        final_resource_dir = resource_dir or resolve_resource_dir(pipeline_path)
+        
+        result["resource_dir"] = final_resource_dir
+        logger.info(f"Pipeline 资源目录: {final_resource_dir}")
+        
+        if job is not None and job.cancelled:
+            result["error"] = "任务已取消"
+            return result
+        
+        # 运行 Pipeline
+        pipeline_result = self.visual_agent.run_pipeline_from_file(
+            pipeline_path, 
+            entry, 
+            final_resource_dir,
+            job=job,
+            auto_roi=auto_roi
+        )
+        
+        result["pipeline_result"] = pipeline_result
+        result["success"] = pipeline_result.get("success", False)
+        
+        return result
+    
+    def run_pipeline_batch(
+        self,
+        jobs: List[Dict],
+        workers: int = None,
+        use_xvfb: bool = True
+    ) -> Dict:
+        """
+        批量并行运行 Pipeline 测试（每个工作进程使用独立的 Xvfb 显示）
+        
+        Args:
+            jobs: 任务列表 [{"pipeline_path": "...", "entry": "...", "resource_dir": "...", "launch_app": true}]
+            workers: 并行进程数，默认取 CPU 核数
+            use_xvfb: 是否使用 Xvfb，不可用时在当前桌面串行执行
+        """
+        try:
+            return run_pipeline_batch(
+                jobs,
+                workers=workers,
+                target_exe=str(self.visual_agent.target_exe),
+                use_xvfb=use_xvfb
+            )
+        except Exception as e:
+            logger.error(f"批量运行 Pipeline 错误: {e}")
+            return {"success": False, "error": str(e)}
+    
+    # ==================== 后台任务 API ====================
+    
+    def start_pipeline_job(
+        self,
+        config: Dict,
+        entry: str,
+        resource_dir: str = None
+    ) -> Dict:
+        """
+        在后台运行视觉测试流水线，立即返回任务 ID
+        
+        进度通过 poll_job 轮询或前端的 pyjobevent 事件获取
+        """
+        try:
+            job = self.job_manager.submit(
+                "pipeline",
+                lambda job: self.visual_agent.run_pipeline(config, entry, resource_dir, job=job),
+                {"entry": entry}
+            )
+            return {"success": True, "job_id": job.id}
+        except Exception as e:
+            logger.error(f"启动 Pipeline 任务错误: {e}")
+            return {"success": False, "error": str(e)}
+    
+    def start_pipeline_test_job(
+        self,
+        pipeline_path: str,
+        entry: str,
+        launch_app: bool = True,
+        resource_dir: str = None,
+        auto_roi: bool = False
+    ) -> Dict:
+        """
+        在后台运行 Pipeline 测试（同 run_pipeline_test），立即返回任务 ID
+        """
+        try:
+            job = self.job_manager.submit(
+                "pipeline_test",
+                lambda job: self._run_pipeline_test(
+                    pipeline_path, entry, launch_app, resource_dir, job=job, auto_roi=auto_roi
+                ),
+                {"pipeline_path": pipeline_path, "entry": entry, "launch_app": launch_app, "auto_roi": auto_roi}
+            )
+            return {"success": True, "job_id": job.id}
+        except Exception as e:
+            logger.error(f"启动 Pipeline 测试任务错误: {e}")
+            return {"success": False, "error": str(e)}
+    
+    def start_unit_test_job(
+        self,
+        executable_path: str,
+        test_name: str,
+        project_path: str,
+        benchmark_backend: str = None,
+        regression_threshold: float = None,
+        env_profile: str = "auto"
+    ) -> Dict:
+        """
+        在后台运行单元测试（同 run_unit_test），立即返回任务 ID
+        
+        运行中产生 test_case 事件（每个用例的结果）和 output 事件（新的输出行），
+        取消任务会结束测试进程
+        """
+        try:
+            job = self.job_manager.submit(
+                "unit_test",
+                lambda job: self._run_unit_test(
+                    executable_path, test_name, project_path, job=job,
+                    benchmark_backend=benchmark_backend,
+                    regression_threshold=regression_threshold,
+                    env_profile=env_profile
+                ),
+                {"test_name": test_name, "executable_path": executable_path}
+            )
+            return {"success": True, "job_id": job.id}
+        except Exception as e:
+            logger.error(f"启动单元测试任务错误: {e}")
+            return {"success": False, "error": str(e)}
+    
+    def start_ui_test_job(
+        self,
+        executable_path: str,
+        test_name: str,
+        project_path: str,
+        env_profile: str = "desktop"
+    ) -> Dict:
+        """
+        在后台运行 UI 测试（同 run_ui_test_with_record），立即返回任务 ID
+        
+        事件同 start_unit_test_job
+        """
+        try:
+            job = self.job_manager.submit(
+                "ui_test",
+                lambda job: self._run_ui_test(
+                    executable_path, test_name, project_path, job=job, env_profile=env_profile
+                ),
+                {"test_name": test_name, "executable_path": executable_path}
             )
+            return {"success": True, "job_id": job.id}
+        except Exception as e:
+            logger.error(f"启动 UI 测试任务错误: {e}")
+            return {"success": False, "error": str(e)}
+    
+    def start_unit_test_suite_job(
+        self,
+        project_path: str,
+        max_workers: int = None,
+        test_names: List[str] = None,
+        shard_functions: bool = True,
+        force: bool = False,
+        env_profile: str = "auto"
+    ) -> Dict:
+        """
+        在后台运行单元测试套件（同 run_unit_test_suite），立即返回任务 ID
+        
+        每个测试结束时产生 test_result 事件（该测试的结果和累计统计），运行中每个用例的结果产生
+        test_case 事件；取消后不再启动新的测试
+        """
+        try:
+            def run(job):
+                cancel_event = threading.Event()
+                job.on_cancel(cancel_event.set)
+                return run_unit_test_suite(
+                    project_path,
+                    self.test_db,
+                    max_workers,
+                    test_names,
+                    on_result=lambda data: job.emit("test_result", **data),
+                    cancel_event=cancel_event,
+                    shard_functions=shard_functions,
+                    on_case=lambda data: job.emit("test_case", **data),
+                    force=force,
+                    env_profile=env_profile,
+                )
             
-            result["pipeline_result"] = pipeline_result
-            result["success"] = pipeline_result.get("success", False)
+            job = self.job_manager.submit(
+                "unit_test_suite",
+                run,
+                {"project_path": project_path, "max_workers": max_workers}
+            )
+            return {"success": True, "job_id": job.id}
+        except Exception as e:
+            logger.error(f"启动单元测试套件任务错误: {e}")
+            return {"success": False, "error": str(e)}
+    
+    def start_affected_tests_job(
+        self,
+        project_path: str,
+        changed_files: List[str] = None,
+        base: str = "HEAD",
+        max_workers: int = None,
+        force: bool = False,
+        env_profile: str = "auto"
+    ) -> Dict:
+        """
+        在后台运行受影响的单元测试（同 run_affected_tests），事件同 start_unit_test_suite_job
+        """
+        try:
+            def run(job):
+                cancel_event = threading.Event()
+                job.on_cancel(cancel_event.set)
+                return run_affected_tests(
+                    project_path,
+                    self.test_db,
+                    changed_files,
+                    base,
+                    max_workers=max_workers,
+                    force=force,
+                    on_result=lambda data: job.emit("test_result", **data),
+                    cancel_event=cancel_event,
+                    on_case=lambda data: job.emit("test_case", **data),
+                    env_profile=env_profile,
+                )
             
-            return result
+            job = self.job_manager.submit(
+                "affected_tests",
+                run,
+                {"project_path": project_path, "base": base}
+            )
+            return {"success": True, "job_id": job.id}
+        except Exception as e:
+            logger.error(f"启动受影响测试任务错误: {e}")
+            return {"success": False, "error": str(e)}
+    
+    def start_rerun_unit_test_job(
+        self,
+        executable_path: str,
+        test_name: str,
+        project_path: str,
+        runs: int = 10,
+        function_name: str = None,
+        max_workers: int = None,
+        env_profile: str = "auto"
+    ) -> Dict:
+        """
+        在后台重复运行测试（同 rerun_unit_test），每次运行结束产生 rerun_result 事件；
+        取消后不再启动新的运行
+        """
+        try:
+            def run(job):
+                cancel_event = threading.Event()
+                job.on_cancel(cancel_event.set)
+                return run_flakiness_check(
+                    project_path,
+                    self.test_db,
+                    executable_path,
+                    test_name,
+                    runs,
+                    function_name,
+                    max_workers=max_workers,
+                    on_run=lambda data: job.emit("rerun_result", **data),
+                    cancel_event=cancel_event,
+                    env_profile=env_profile,
+                )
             
+            job = self.job_manager.submit(
+                "rerun_unit_test",
+                run,
+                {"test_name": test_name, "runs": runs, "function_name": function_name}
+            )
+            return {"success": True, "job_id": job.id}
         except Exception as e:
-            logger.error(f"运行 Pipeline 测试错误: {e}")
-            return {
-                "success": False,
-                "error": str(e)
-            }
+            logger.error(f"启动重复运行任务错误: {e}")
+            return {"success": False, "error": str(e)}
+    
+    def poll_job(self, job_id: str, cursor: int = 0) -> Dict:
+        """
+        增量获取任务状态和进度事件
+        
+        Args:
+            job_id: 任务 ID
+            cursor: 上次返回的 cursor，只返回之后的新事件
+        """
+        try:
+            return {"success": True, **self.job_manager.poll(job_id, cursor)}
+        except KeyError as e:
+            return {"success": False, "error": str(e)}
+        except Exception as e:
+            logger.error(f"查询任务错误: {e}")
+            return {"success": False, "error": str(e)}
+    
+    def cancel_job(self, job_id: str) -> Dict:
+        """取消任务（Pipeline 会在当前步骤结束后停止）"""
+        try:
+            if not self.job_manager.cancel(job_id):
+                return {"success": False, "error": f"任务不存在或已结束: {job_id}"}
+            return {"success": True}
+        except Exception as e:
+            logger.error(f"取消任务错误: {e}")
+            return {"success": False, "error": str(e)}
+    
+    def list_jobs(self) -> Dict:
+        """列出最近的任务"""
+        try:
+            return {"success": True, "jobs": self.job_manager.list_jobs()}
+        except Exception as e:
+            logger.error(f"列出任务错误: {e}")
+            return {"success": False, "error": str(e)}
+    
+    def _push_job_event(self, event: JobEvent):
+        """通过 evaluate_js 把任务事件推送给前端 (window 上的 pyjobevent 事件)"""
+        if self._window is None:
+            return
+        detail = json.dumps(event.to_dict(), ensure_ascii=False, default=str)
+        self._window.evaluate_js(
+            f"window.dispatchEvent(new CustomEvent('pyjobevent', {{ detail: {detail} }}))"
+        )
     
     # ==================== 编辑器集成 API ====================
     
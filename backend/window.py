@@ -55,6 +55,9 @@ def create_window(dev: bool = False) -> webview.Window:
         background_color="#FFFFFF",
     )
 
+    # 后台任务的进度事件通过 window.evaluate_js 推送
+    api._window = window
+
     logger.info("窗口创建成功")
     return window
 
@@ -2,11 +2,12 @@
 测试数据库管理器
 使用 SQLite 存储测试历史和截图
 """
+import json
 import sqlite3
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
-from .models import TestRun, TestCaseDetail, Screenshot, TestRunDetail
+from .models import TestRun, TestCaseDetail, Screenshot, TestRunDetail, FlakinessRecord
 from core.utils.logger import logger
 
 
@@ -58,6 +59,10 @@ class TestDatabase:
                     case_name TEXT NOT NULL,
                     status TEXT NOT NULL,
                     message TEXT,
+                    data_tag TEXT,
+                    duration_ms REAL,
+                    file TEXT,
+                    line INTEGER,
                     FOREIGN KEY (run_id) REFERENCES test_runs(id) ON DELETE CASCADE
                 )
             """)
@@ -75,11 +80,162 @@ class TestDatabase:
                 )
             """)
             
+            # 旧数据库补充新增的列
+            self._add_missing_columns(cursor, 'test_case_details', {
+                'data_tag': 'TEXT',
+                'duration_ms': 'REAL',
+                'file': 'TEXT',
+                'line': 'INTEGER',
+            })
+            
+            # 测试函数耗时表（函数级分片调度使用）
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS test_function_durations (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    project_path TEXT NOT NULL,
+                    test_name TEXT NOT NULL,
+                    function_name TEXT NOT NULL,
+                    duration_ms REAL NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            
+            # 测试结果缓存表（每个测试最近一次通过的运行及其内容指纹）
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS test_result_cache (
+                    project_path TEXT NOT NULL,
+                    test_name TEXT NOT NULL,
+                    fingerprint TEXT NOT NULL,
+                    run_id INTEGER NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (project_path, test_name)
+                )
+            """)
+            
+            # 不稳定度统计表（重复运行的汇总，不含逐次运行记录）
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS test_flakiness (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    project_path TEXT NOT NULL,
+                    test_name TEXT NOT NULL,
+                    function_name TEXT NOT NULL DEFAULT '',
+                    runs INTEGER NOT NULL,
+                    passed INTEGER NOT NULL,
+                    failed INTEGER NOT NULL,
+                    pass_rate REAL NOT NULL,
+                    flakiness REAL NOT NULL,
+                    p50_ms REAL,
+                    p95_ms REAL,
+                    max_ms REAL,
+                    failing_cases TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            
+            # QBENCHMARK 结果时间序列表
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS benchmark_results (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    project_path TEXT NOT NULL,
+                    test_name TEXT NOT NULL,
+                    function_name TEXT NOT NULL,
+                    data_tag TEXT NOT NULL DEFAULT '',
+                    metric TEXT NOT NULL,
+                    value REAL NOT NULL,
+                    iterations INTEGER NOT NULL,
+                    run_id INTEGER,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            
+            # 各测试当前的超时（根据历史耗时计算）
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS test_timeouts (
+                    project_path TEXT NOT NULL,
+                    test_name TEXT NOT NULL,
+                    test_type TEXT NOT NULL,
+                    timeout_s REAL NOT NULL,
+                    source TEXT NOT NULL,
+                    p99_ms REAL,
+                    samples INTEGER DEFAULT 0,
+                    timeout_streak INTEGER DEFAULT 0,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (project_path, test_name, test_type)
+                )
+            """)
+            
+            # 每次运行的超时时间和实际耗时（计算超时和调整策略使用）
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS test_timeout_log (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    project_path TEXT NOT NULL,
+                    test_name TEXT NOT NULL,
+                    test_type TEXT NOT NULL,
+                    timeout_s REAL NOT NULL,
+                    duration_ms REAL NOT NULL,
+                    timed_out INTEGER NOT NULL,
+                    partial INTEGER NOT NULL DEFAULT 0,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            
+            # 各测试可用的运行环境 profile（offscreen / xvfb / desktop）
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS test_env_profiles (
+                    project_path TEXT NOT NULL,
+                    test_name TEXT NOT NULL,
+                    profile TEXT NOT NULL,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (project_path, test_name)
+                )
+            """)
+            
+            # Pipeline 节点的历史命中框（跨运行的 ROI 学习）
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS match_boxes (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    pipeline TEXT NOT NULL,
+                    node TEXT NOT NULL,
+                    template TEXT NOT NULL,
+                    screen_width INTEGER NOT NULL,
+                    screen_height INTEGER NOT NULL,
+                    x INTEGER NOT NULL,
+                    y INTEGER NOT NULL,
+                    width INTEGER NOT NULL,
+                    height INTEGER NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            
             # 创建索引
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_match_boxes_key 
+                ON match_boxes(pipeline, node, template, screen_width, screen_height, id DESC)
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_timeout_log_test 
+                ON test_timeout_log(project_path, test_name, test_type)
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_benchmark_series 
+                ON benchmark_results(project_path, test_name, function_name, data_tag, metric)
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_flakiness_test 
+                ON test_flakiness(project_path, test_name)
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_function_durations_test 
+                ON test_function_durations(project_path, test_name)
+            """)
             cursor.execute("""
                 CREATE INDEX IF NOT EXISTS idx_test_runs_project 
                 ON test_runs(project_path)
             """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_test_runs_test 
+                ON test_runs(project_path, test_type, test_name, id DESC)
+            """)
             cursor.execute("""
                 CREATE INDEX IF NOT EXISTS idx_test_runs_created 
                 ON test_runs(created_at DESC)
@@ -91,6 +247,16 @@ class TestDatabase:
             
             conn.commit()
     
+    @staticmethod
+    def _add_missing_columns(cursor: sqlite3.Cursor, table: str, columns: Dict[str, str]):
+        """为已存在的表补充缺少的列（ALTER TABLE 迁移）"""
+        cursor.execute(f"PRAGMA table_info({table})")
+        existing = {row[1] for row in cursor.fetchall()}
+        for name, column_type in columns.items():
+            if name not in existing:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}")
+                logger.info(f"数据库迁移: {table} 新增列 {name}")
+    
     def save_test_run(self, run: TestRun) -> int:
         """
         保存测试运行记录
@@ -124,12 +290,541 @@ class TestDatabase:
             cursor = conn.cursor()
             for detail in details:
                 cursor.execute("""
-                    INSERT INTO test_case_details (run_id, case_name, status, message)
-                    VALUES (?, ?, ?, ?)
-                """, (run_id, detail.case_name, detail.status, detail.message))
+                    INSERT INTO test_case_details (
+                        run_id, case_name, status, message, data_tag, duration_ms, file, line
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """, (
+                    run_id, detail.case_name, detail.status, detail.message,
+                    detail.data_tag, detail.duration_ms, detail.file, detail.line
+                ))
             conn.commit()
             logger.info(f"保存 {len(details)} 个测试用例详情")
     
+    def save_test_runs_batch(self, items: List[Tuple[TestRun, List[TestCaseDetail]]]) -> List[int]:
+        """
+        在一个事务中批量保存测试运行记录及其用例详情
+        
+        Args:
+            items: [(测试运行记录, 用例详情列表), ...]，详情的 run_id 会被自动填充
+            
+        Returns:
+            各记录的 run_id（与 items 顺序一致）
+        """
+        run_ids = []
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            for run, details in items:
+                cursor.execute("""
+                    INSERT INTO test_runs (
+                        project_path, test_name, test_type, status,
+                        total, passed, failed, skipped, duration, output, ai_analysis
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (
+                    run.project_path, run.test_name, run.test_type, run.status,
+                    run.total, run.passed, run.failed, run.skipped,
+                    run.duration, run.output, run.ai_analysis
+                ))
+                run_id = cursor.lastrowid
+                run_ids.append(run_id)
+                cursor.executemany("""
+                    INSERT INTO test_case_details (
+                        run_id, case_name, status, message, data_tag, duration_ms, file, line
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """, [
+                    (run_id, d.case_name, d.status, d.message, d.data_tag, d.duration_ms, d.file, d.line)
+                    for d in details
+                ])
+            conn.commit()
+        logger.info(f"批量保存 {len(run_ids)} 条测试记录")
+        return run_ids
+    
+    def get_recent_durations(
+        self,
+        project_path: str,
+        test_type: str = 'unit',
+        per_test: int = 5
+    ) -> Dict[str, List[str]]:
+        """
+        获取各测试最近几次运行的耗时（用于调度）
+        
+        Args:
+            project_path: 项目路径
+            test_type: 测试类型
+            per_test: 每个测试最多返回的记录数
+            
+        Returns:
+            {测试名称: [耗时文本, ...]}，新的在前
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT test_name, duration FROM (
+                    SELECT test_name, duration, id,
+                           ROW_NUMBER() OVER (PARTITION BY test_name ORDER BY id DESC) AS rn
+                    FROM test_runs
+                    WHERE project_path = ? AND test_type = ? AND status != 'error'
+                )
+                WHERE rn <= ?
+                ORDER BY test_name, id DESC
+            """, (project_path, test_type, per_test))
+            durations: Dict[str, List[str]] = {}
+            for test_name, duration in cursor.fetchall():
+                durations.setdefault(test_name, []).append(duration)
+            return durations
+    
+    def save_function_durations(self, project_path: str, test_name: str, durations: Dict[str, float]):
+        """
+        保存一次运行中各测试函数的耗时
+        
+        Args:
+            project_path: 项目路径
+            test_name: 测试名称
+            durations: {函数名: 耗时毫秒}
+        """
+        if not durations:
+            return
+        with sqlite3.connect(self.db_path) as conn:
+            conn.executemany("""
+                INSERT INTO test_function_durations (project_path, test_name, function_name, duration_ms)
+                VALUES (?, ?, ?, ?)
+            """, [(project_path, test_name, name, ms) for name, ms in durations.items()])
+            conn.commit()
+    
+    def get_function_durations(
+        self,
+        project_path: str,
+        test_name: str,
+        per_function: int = 5
+    ) -> Dict[str, List[float]]:
+        """
+        获取某个测试各函数最近几次的耗时（用于分片）
+        
+        Args:
+            project_path: 项目路径
+            test_name: 测试名称
+            per_function: 每个函数最多返回的记录数
+            
+        Returns:
+            {函数名: [耗时毫秒, ...]}，新的在前
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT function_name, duration_ms FROM (
+                    SELECT function_name, duration_ms, id,
+                           ROW_NUMBER() OVER (PARTITION BY function_name ORDER BY id DESC) AS rn
+                    FROM test_function_durations
+                    WHERE project_path = ? AND test_name = ?
+                )
+                WHERE rn <= ?
+                ORDER BY function_name, id DESC
+            """, (project_path, test_name, per_function))
+            durations: Dict[str, List[float]] = {}
+            for function_name, duration_ms in cursor.fetchall():
+                durations.setdefault(function_name, []).append(duration_ms)
+            return durations
+    
+    def get_cached_run(self, project_path: str, test_name: str, fingerprint: str) -> Optional[int]:
+        """
+        查询指纹相同且仍然存在的已通过运行
+        
+        Args:
+            project_path: 项目路径
+            test_name: 测试名称
+            fingerprint: 测试可执行文件和源文件的内容指纹
+            
+        Returns:
+            run_id；没有缓存或指纹不一致时返回 None
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT c.run_id FROM test_result_cache c
+                JOIN test_runs r ON r.id = c.run_id
+                WHERE c.project_path = ? AND c.test_name = ? AND c.fingerprint = ?
+                  AND r.status = 'passed'
+            """, (project_path, test_name, fingerprint))
+            row = cursor.fetchone()
+            return row[0] if row else None
+    
+    def save_cached_runs(self, entries: List[Tuple[str, str, str, int]]):
+        """
+        批量更新测试结果缓存
+        
+        Args:
+            entries: [(项目路径, 测试名称, 指纹, run_id), ...]
+        """
+        if not entries:
+            return
+        with sqlite3.connect(self.db_path) as conn:
+            conn.executemany("""
+                INSERT OR REPLACE INTO test_result_cache (project_path, test_name, fingerprint, run_id)
+                VALUES (?, ?, ?, ?)
+            """, entries)
+            conn.commit()
+    
+    def delete_cached_runs(self, project_path: str, test_names: List[str]):
+        """删除测试的结果缓存（测试未通过时调用）"""
+        if not test_names:
+            return
+        with sqlite3.connect(self.db_path) as conn:
+            conn.executemany("""
+                DELETE FROM test_result_cache WHERE project_path = ? AND test_name = ?
+            """, [(project_path, name) for name in test_names])
+            conn.commit()
+    
+    def save_flakiness(self, record: FlakinessRecord) -> int:
+        """
+        保存一次重复运行的不稳定度统计
+        
+        Args:
+            record: 统计结果
+            
+        Returns:
+            记录 ID
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO test_flakiness
+                (project_path, test_name, function_name, runs, passed, failed,
+                 pass_rate, flakiness, p50_ms, p95_ms, max_ms, failing_cases)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                record.project_path, record.test_name, record.function_name,
+                record.runs, record.passed, record.failed,
+                record.pass_rate, record.flakiness,
+                record.p50_ms, record.p95_ms, record.max_ms,
+                json.dumps(record.failing_cases, ensure_ascii=False)
+            ))
+            conn.commit()
+            return cursor.lastrowid
+    
+    def get_flakiness(self, project_path: str, test_name: Optional[str] = None) -> List[FlakinessRecord]:
+        """
+        获取各测试（及测试函数）最近一次的不稳定度统计
+        
+        Args:
+            project_path: 项目路径
+            test_name: 只查询该测试，默认查询项目中的全部测试
+            
+        Returns:
+            统计列表，按不稳定度从高到低排列
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT * FROM test_flakiness
+                WHERE id IN (
+                    SELECT MAX(id) FROM test_flakiness
+                    WHERE project_path = ? AND (? IS NULL OR test_name = ?)
+                    GROUP BY test_name, function_name
+                )
+                ORDER BY flakiness DESC, test_name, function_name
+            """, (project_path, test_name, test_name))
+            records = []
+            for row in cursor.fetchall():
+                data = dict(row)
+                data['failing_cases'] = json.loads(data['failing_cases'] or '{}')
+                records.append(FlakinessRecord(**data))
+            return records
+    
+    def save_benchmark_results(
+        self,
+        project_path: str,
+        test_name: str,
+        run_id: Optional[int],
+        rows: List[Tuple[str, str, str, float, int]]
+    ):
+        """
+        保存一次运行的 QBENCHMARK 结果
+        
+        Args:
+            project_path: 项目路径
+            test_name: 测试名称
+            run_id: 测试运行 ID
+            rows: [(函数名, 数据行, 度量, 每次迭代的值, 迭代次数), ...]，没有数据行时为空字符串
+        """
+        if not rows:
+            return
+        with sqlite3.connect(self.db_path) as conn:
+            conn.executemany("""
+                INSERT INTO benchmark_results
+                (project_path, test_name, function_name, data_tag, metric, value, iterations, run_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, [(project_path, test_name, *row, run_id) for row in rows])
+            conn.commit()
+    
+    def get_benchmark_history(
+        self,
+        project_path: str,
+        test_name: str,
+        function_name: Optional[str] = None,
+        data_tag: Optional[str] = None,
+        metric: Optional[str] = None,
+        per_series: int = 50
+    ) -> Dict[Tuple[str, str, str], List[dict]]:
+        """
+        获取测试的 QBENCHMARK 时间序列
+        
+        Args:
+            project_path: 项目路径
+            test_name: 测试名称
+            function_name: 只查询该函数
+            data_tag: 只查询该数据行（空字符串表示没有数据行）
+            metric: 只查询该度量
+            per_series: 每个序列最多返回的记录数（最近的）
+            
+        Returns:
+            {(函数名, 数据行, 度量): [{value, iterations, run_id, created_at}, ...]}，旧的在前
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT function_name, data_tag, metric, value, iterations, run_id, created_at FROM (
+                    SELECT *, ROW_NUMBER() OVER (
+                        PARTITION BY function_name, data_tag, metric ORDER BY id DESC
+                    ) AS rn
+                    FROM benchmark_results
+                    WHERE project_path = ? AND test_name = ?
+                      AND (? IS NULL OR function_name = ?)
+                      AND (? IS NULL OR data_tag = ?)
+                      AND (? IS NULL OR metric = ?)
+                )
+                WHERE rn <= ?
+                ORDER BY function_name, data_tag, metric, id
+            """, (project_path, test_name, function_name, function_name, data_tag, data_tag, metric, metric, per_series))
+            series: Dict[Tuple[str, str, str], List[dict]] = {}
+            for function, tag, metric_name, value, iterations, run_id, created_at in cursor.fetchall():
+                series.setdefault((function, tag, metric_name), []).append({
+                    'value': value,
+                    'iterations': iterations,
+                    'run_id': run_id,
+                    'created_at': created_at,
+                })
+            return series
+    
+    def get_benchmark_tests(self, project_path: str) -> List[str]:
+        """获取项目中有 QBENCHMARK 结果的测试"""
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT DISTINCT test_name FROM benchmark_results
+                WHERE project_path = ? ORDER BY test_name
+            """, (project_path,))
+            return [row[0] for row in cursor.fetchall()]
+    
+    def get_timeout_history(
+        self,
+        project_path: str,
+        test_name: str,
+        test_type: str = 'unit',
+        limit: int = 20
+    ) -> Tuple[List[float], int]:
+        """
+        获取测试最近的进程耗时（用于计算超时）
+        
+        Args:
+            project_path: 项目路径
+            test_name: 测试名称
+            test_type: 测试类型
+            limit: 最多返回的耗时记录数
+            
+        Returns:
+            (完整运行且未超时的耗时毫秒列表（新的在前）, 最近连续超时的次数)
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT timed_out FROM test_timeout_log
+                WHERE project_path = ? AND test_name = ? AND test_type = ?
+                ORDER BY id DESC LIMIT ?
+            """, (project_path, test_name, test_type, limit))
+            streak = 0
+            for (timed_out,) in cursor.fetchall():
+                if not timed_out:
+                    break
+                streak += 1
+            cursor.execute("""
+                SELECT duration_ms FROM test_timeout_log
+                WHERE project_path = ? AND test_name = ? AND test_type = ?
+                  AND timed_out = 0 AND partial = 0
+                ORDER BY id DESC LIMIT ?
+            """, (project_path, test_name, test_type, limit))
+            return [row[0] for row in cursor.fetchall()], streak
+    
+    def save_test_timeout(self, project_path: str, test_name: str, test_type: str, decision: dict):
+        """
+        保存测试当前的超时
+        
+        Args:
+            project_path: 项目路径
+            test_name: 测试名称
+            test_type: 测试类型
+            decision: 超时及依据（timeout_s、source、p99_ms、samples、timeout_streak）
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO test_timeouts
+                (project_path, test_name, test_type, timeout_s, source, p99_ms, samples, timeout_streak, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            """, (
+                project_path, test_name, test_type,
+                decision['timeout_s'], decision['source'], decision['p99_ms'],
+                decision['samples'], decision['timeout_streak']
+            ))
+            conn.commit()
+    
+    def save_timeout_observations(
+        self,
+        project_path: str,
+        test_type: str,
+        observations: List[Tuple[str, float, float, bool, bool]]
+    ):
+        """
+        批量记录运行的超时时间和实际耗时
+        
+        Args:
+            project_path: 项目路径
+            test_type: 测试类型
+            observations: [(测试名称, 超时秒, 进程耗时毫秒, 是否超时, 是否只运行了部分函数), ...]
+        """
+        if not observations:
+            return
+        with sqlite3.connect(self.db_path) as conn:
+            conn.executemany("""
+                INSERT INTO test_timeout_log
+                (project_path, test_name, test_type, timeout_s, duration_ms, timed_out, partial)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, [
+                (project_path, name, test_type, timeout_s, duration_ms, int(timed_out), int(partial))
+                for name, timeout_s, duration_ms, timed_out, partial in observations
+            ])
+            conn.commit()
+    
+    def get_test_timeouts(self, project_path: str) -> List[dict]:
+        """
+        获取各测试当前的超时及运行统计（用于调整超时策略）
+        
+        Args:
+            project_path: 项目路径
+            
+        Returns:
+            [{test_name, test_type, timeout_s, source, p99_ms, samples, timeout_streak, updated_at,
+              runs, timeouts, max_duration_ms, max_ratio}, ...]，max_ratio 为完整运行的耗时与超时之比的最大值
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT t.test_name, t.test_type, t.timeout_s, t.source, t.p99_ms, t.samples,
+                       t.timeout_streak, t.updated_at,
+                       COUNT(l.id) AS runs,
+                       COALESCE(SUM(l.timed_out), 0) AS timeouts,
+                       MAX(CASE WHEN l.partial = 0 AND l.timed_out = 0 THEN l.duration_ms END) AS max_duration_ms,
+                       MAX(CASE WHEN l.partial = 0 AND l.timed_out = 0 THEN l.duration_ms / (l.timeout_s * 1000) END) AS max_ratio
+                FROM test_timeouts t
+                LEFT JOIN test_timeout_log l
+                  ON l.project_path = t.project_path AND l.test_name = t.test_name AND l.test_type = t.test_type
+                WHERE t.project_path = ?
+                GROUP BY t.test_name, t.test_type
+                ORDER BY t.test_type, t.test_name
+            """, (project_path,))
+            return [dict(row) for row in cursor.fetchall()]
+    
+    def get_test_env_profile(self, project_path: str, test_name: str) -> Optional[str]:
+        """获取测试缓存的运行环境 profile，没有缓存时返回 None"""
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT profile FROM test_env_profiles WHERE project_path = ? AND test_name = ?
+            """, (project_path, test_name))
+            row = cursor.fetchone()
+            return row[0] if row else None
+    
+    def get_test_env_profiles(self, project_path: str) -> Dict[str, str]:
+        """获取项目中各测试缓存的运行环境 profile（{测试名称: profile}）"""
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT test_name, profile FROM test_env_profiles WHERE project_path = ?
+                ORDER BY test_name
+            """, (project_path,))
+            return dict(cursor.fetchall())
+    
+    def save_test_env_profile(self, project_path: str, test_name: str, profile: str):
+        """保存测试可用的运行环境 profile"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO test_env_profiles (project_path, test_name, profile, updated_at)
+                VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+            """, (project_path, test_name, profile))
+            conn.commit()
+    
+    def delete_test_env_profile(self, project_path: str, test_name: str):
+        """删除测试缓存的运行环境 profile（下次运行时重新选择）"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("""
+                DELETE FROM test_env_profiles WHERE project_path = ? AND test_name = ?
+            """, (project_path, test_name))
+            conn.commit()
+    
+    def save_match_boxes(self, pipeline: str, rows: List[Tuple[str, str, int, int, int, int, int, int]]):
+        """
+        批量保存 Pipeline 节点的命中框（一个事务）
+        
+        Args:
+            pipeline: Pipeline 学习键
+            rows: [(节点, 模板键, 画面宽, 画面高, x, y, width, height), ...]
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            conn.executemany("""
+                INSERT INTO match_boxes (
+                    pipeline, node, template, screen_width, screen_height, x, y, width, height
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, [(pipeline, *row) for row in rows])
+            conn.commit()
+    
+    def get_match_boxes(
+        self,
+        pipeline: str,
+        per_key: int = 50
+    ) -> Dict[Tuple[str, str, int, int], List[Tuple[int, int, int, int]]]:
+        """
+        获取 Pipeline 各 (节点, 模板键, 画面宽, 画面高) 最近 per_key 次的命中框
+        
+        Returns:
+            {(节点, 模板键, 画面宽, 画面高): [(x, y, width, height), ...]}，新的在前
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT node, template, screen_width, screen_height, x, y, width, height
+                FROM (
+                    SELECT *, ROW_NUMBER() OVER (
+                        PARTITION BY node, template, screen_width, screen_height ORDER BY id DESC
+                    ) AS rn
+                    FROM match_boxes WHERE pipeline = ?
+                )
+                WHERE rn <= ?
+                ORDER BY node, template, screen_width, screen_height, id DESC
+            """, (pipeline, per_key))
+            groups: Dict[Tuple[str, str, int, int], List[Tuple[int, int, int, int]]] = {}
+            for node, template, sw, sh, x, y, w, h in cursor.fetchall():
+                groups.setdefault((node, template, sw, sh), []).append((x, y, w, h))
+            return groups
+    
+    def delete_match_boxes(self, pipeline: Optional[str] = None) -> int:
+        """删除某个 Pipeline（默认全部）的命中框，返回删除的记录数"""
+        with sqlite3.connect(self.db_path) as conn:
+            if pipeline is None:
+                cursor = conn.execute("DELETE FROM match_boxes")
+            else:
+                cursor = conn.execute("DELETE FROM match_boxes WHERE pipeline = ?", (pipeline,))
+            conn.commit()
+            return cursor.rowcount
+    
     def save_screenshot(self, run_id: int, step_number: int, step_name: str, image_data: bytes):
         """
         保存截图到数据库
@@ -253,6 +948,21 @@ class TestDatabase:
                 DELETE FROM test_runs WHERE created_at < ?
             """, (cutoff_date.isoformat(),))
             deleted = cursor.rowcount
+            cursor.execute("""
+                DELETE FROM test_function_durations WHERE created_at < ?
+            """, (cutoff_date.isoformat(),))
+            cursor.execute("""
+                DELETE FROM test_flakiness WHERE created_at < ?
+            """, (cutoff_date.isoformat(),))
+            cursor.execute("""
+                DELETE FROM benchmark_results WHERE created_at < ?
+            """, (cutoff_date.isoformat(),))
+            cursor.execute("""
+                DELETE FROM test_timeout_log WHERE created_at < ?
+            """, (cutoff_date.isoformat(),))
+            cursor.execute("""
+                DELETE FROM match_boxes WHERE created_at < ?
+            """, (cutoff_date.isoformat(),))
             conn.commit()
             logger.info(f"清理了 {deleted} 条 {days} 天前的记录")
             return deleted
@@ -1,8 +1,8 @@
 """
 数据模型
 """
-from dataclasses import dataclass, asdict
-from typing import Optional, List
+from dataclasses import dataclass, asdict, field
+from typing import Optional, List, Dict
 from datetime import datetime
 import base64
 
@@ -36,6 +36,10 @@ class TestCaseDetail:
     case_name: str = ""
     status: str = ""  # 'PASS' | 'FAIL' | 'SKIP'
     message: Optional[str] = None
+    data_tag: Optional[str] = None      # 数据驱动测试的数据行
+    duration_ms: Optional[float] = None
+    file: Optional[str] = None          # 失败/跳过的源码位置
+    line: Optional[int] = None
     
     def to_dict(self):
         return asdict(self)
@@ -82,3 +86,32 @@ class TestRunDetail:
             'details': [d.to_dict() for d in self.details],
             'screenshots': [s.to_base64_dict() for s in self.screenshots]
         }
+
+
+@dataclass
+class FlakinessRecord:
+    """不稳定度统计（同一测试重复运行 N 次的汇总）"""
+    id: Optional[int] = None
+    project_path: str = ""
+    test_name: str = ""
+    function_name: str = ""  # 空字符串表示整个测试可执行文件
+    runs: int = 0
+    passed: int = 0
+    failed: int = 0
+    pass_rate: float = 0.0
+    flakiness: float = 0.0  # 0 表示结果一致，1 表示通过和失败各占一半
+    p50_ms: Optional[float] = None
+    p95_ms: Optional[float] = None
+    max_ms: Optional[float] = None
+    failing_cases: Dict[str, int] = field(default_factory=dict)  # 用例 -> 失败次数
+    created_at: Optional[str] = None
+    
+    @property
+    def is_flaky(self) -> bool:
+        """既有通过也有失败"""
+        return 0 < self.passed < self.runs
+    
+    def to_dict(self):
+        result = asdict(self)
+        result['is_flaky'] = self.is_flaky
+        return result
@@ -8,6 +8,12 @@ from .unit_test_runner import run_unit_test, TestResult
 from .ui_test_runner import run_ui_test, UITestResult
 from .test_recorder import TestRecorder
 from .test_analyzer import analyze_test_failure
+from .test_suite_runner import TestSuiteRunner, SuiteReport, run_unit_test_suite
+from .test_impact import analyze_impact, run_affected_tests
+from .test_flakiness import FlakinessDetector, run_flakiness_check
+from .benchmark_tracker import BenchmarkTracker
+from .test_timeouts import TimeoutPolicy
+from .test_env_profiles import EnvProfileManager
 
 __all__ = [
     'scan_qt_projects', 'QtProjectInfo', 
@@ -16,5 +22,11 @@ __all__ = [
     'run_unit_test', 'TestResult',
     'run_ui_test', 'UITestResult',
     'TestRecorder',
-    'analyze_test_failure'
+    'analyze_test_failure',
+    'TestSuiteRunner', 'SuiteReport', 'run_unit_test_suite',
+    'analyze_impact', 'run_affected_tests',
+    'FlakinessDetector', 'run_flakiness_check',
+    'BenchmarkTracker',
+    'TimeoutPolicy',
+    'EnvProfileManager',
 ]
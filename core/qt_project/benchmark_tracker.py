@@ -0,0 +1,193 @@
+"""
+QBENCHMARK 性能回归跟踪
+把每次运行的 benchmark 结果写入时间序列，并与滚动基线比较
+
+- 序列按 (项目, 测试, 函数, 数据行, 度量) 区分；不同测量后端的度量不同（如 WalltimeMilliseconds、
+  CPUTicks、InstructionReads），互不混合
+- 基线取该序列之前最近 window 次结果的中位数，不受个别异常值影响；历史不足 MIN_BASELINE_SAMPLES
+  次时只记录不判断
+- QTest 的各种度量都是越小越好：超过基线 threshold（比例）为回归，低于基线 threshold 为改进
+"""
+import statistics
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.database import TestDatabase
+from core.utils.logger import logger
+from .unit_test_runner import BenchmarkResult
+
+# 滚动基线的窗口（次）
+BASELINE_WINDOW = 10
+# 判断回归所需的最少历史次数
+MIN_BASELINE_SAMPLES = 3
+# 默认回归阈值：比基线慢 10%
+DEFAULT_THRESHOLD = 0.10
+
+
+@dataclass
+class BenchmarkComparison:
+    """一个 benchmark 结果与基线的比较"""
+    function: str
+    data_tag: Optional[str]
+    metric: str
+    value: float
+    baseline: Optional[float] = None     # 历史不足时为 None
+    change: Optional[float] = None       # (value - baseline) / baseline
+    samples: int = 0                     # 基线使用的历史次数
+    status: str = 'baseline'             # 'baseline' | 'stable' | 'regression' | 'improvement'
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'function': self.function,
+            'data_tag': self.data_tag,
+            'metric': self.metric,
+            'value': self.value,
+            'baseline': self.baseline,
+            'change': round(self.change, 4) if self.change is not None else None,
+            'samples': self.samples,
+            'status': self.status,
+        }
+
+
+def compare_to_baseline(value: float, history: List[float], window: int, threshold: float) -> Tuple[Optional[float], Optional[float], int, str]:
+    """
+    与滚动基线比较
+
+    Args:
+        value: 本次结果
+        history: 之前的结果（旧的在前）
+        window: 基线窗口
+        threshold: 回归阈值（比例）
+
+    Returns:
+        (基线, 变化比例, 基线样本数, 状态)
+    """
+    recent = history[-window:]
+    if len(recent) < MIN_BASELINE_SAMPLES:
+        return None, None, len(recent), 'baseline'
+    baseline = statistics.median(recent)
+    if baseline <= 0:
+        return baseline, None, len(recent), 'stable'
+    change = (value - baseline) / baseline
+    if change > threshold:
+        status = 'regression'
+    elif change < -threshold:
+        status = 'improvement'
+    else:
+        status = 'stable'
+    return baseline, change, len(recent), status
+
+
+class BenchmarkTracker:
+    """QBENCHMARK 结果的记录和回归判断"""
+
+    def __init__(self, db: TestDatabase, window: int = BASELINE_WINDOW, threshold: float = DEFAULT_THRESHOLD):
+        """
+        Args:
+            db: 测试数据库
+            window: 滚动基线的窗口（次）
+            threshold: 回归阈值（比例），如 0.1 表示比基线慢 10% 以上为回归
+        """
+        self.db = db
+        self.window = max(1, window)
+        self.threshold = threshold
+
+    def record(
+        self,
+        project_path: str,
+        test_name: str,
+        benchmarks: List[BenchmarkResult],
+        run_id: Optional[int] = None
+    ) -> List[BenchmarkComparison]:
+        """
+        与基线比较后写入本次的 benchmark 结果
+
+        Args:
+            project_path: 项目路径
+            test_name: 测试名称
+            benchmarks: 本次运行的 benchmark 结果
+            run_id: 测试运行 ID
+
+        Returns:
+            各结果与基线的比较
+        """
+        if not benchmarks:
+            return []
+        history = self.db.get_benchmark_history(project_path, test_name, per_series=self.window)
+        comparisons = []
+        for bench in benchmarks:
+            key = (bench.function, bench.data_tag or '', bench.metric)
+            values = [point['value'] for point in history.get(key, [])]
+            baseline, change, samples, status = compare_to_baseline(bench.value, values, self.window, self.threshold)
+            comparisons.append(BenchmarkComparison(
+                function=bench.function,
+                data_tag=bench.data_tag,
+                metric=bench.metric,
+                value=bench.value,
+                baseline=baseline,
+                change=change,
+                samples=samples,
+                status=status,
+            ))
+
+        self.db.save_benchmark_results(project_path, test_name, run_id, [
+            (b.function, b.data_tag or '', b.metric, b.value, b.iterations) for b in benchmarks
+        ])
+        regressions = [c for c in comparisons if c.status == 'regression']
+        for c in regressions:
+            tag = f"({c.data_tag})" if c.data_tag else ''
+            logger.warning(
+                f"性能回归: {test_name}::{c.function}{tag} {c.metric} "
+                f"{c.value:g} (基线 {c.baseline:g}, +{c.change * 100:.1f}%)"
+            )
+        return comparisons
+
+    def trend(
+        self,
+        project_path: str,
+        test_name: str,
+        function_name: Optional[str] = None,
+        data_tag: Optional[str] = None,
+        metric: Optional[str] = None,
+        limit: int = 50
+    ) -> List[Dict[str, Any]]:
+        """
+        benchmark 趋势：每个点附带当时的滚动基线和判断结果
+
+        Args:
+            project_path: 项目路径
+            test_name: 测试名称
+            function_name: 只查询该函数
+            data_tag: 只查询该数据行（空字符串表示没有数据行）
+            metric: 只查询该度量
+            limit: 每个序列返回的点数
+
+        Returns:
+            [{function, data_tag, metric, points, latest}, ...]，
+            points 为 [{value, iterations, run_id, created_at, baseline, change, status}, ...]
+        """
+        history = self.db.get_benchmark_history(
+            project_path, test_name, function_name, data_tag, metric,
+            per_series=limit + self.window
+        )
+        series = []
+        for (function, tag, metric_name), points in sorted(history.items()):
+            values = [p['value'] for p in points]
+            trend_points = []
+            for i, point in enumerate(points):
+                baseline, change, _, status = compare_to_baseline(values[i], values[:i], self.window, self.threshold)
+                trend_points.append({
+                    **point,
+                    'baseline': baseline,
+                    'change': round(change, 4) if change is not None else None,
+                    'status': status,
+                })
+            trend_points = trend_points[-limit:]
+            series.append({
+                'function': function,
+                'data_tag': tag or None,
+                'metric': metric_name,
+                'points': trend_points,
+                'latest': trend_points[-1] if trend_points else None,
+            })
+        return series
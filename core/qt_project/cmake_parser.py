@@ -2,8 +2,9 @@
 CMakeLists.txt 解析器
 解析测试文件的依赖关系
 """
+import os
 from pathlib import Path
-from typing import List
+from typing import Dict, List
 import re
 
 
@@ -86,3 +87,60 @@ def get_source_files_for_test(project_path: str, test_name: str) -> List[str]:
                 source_files.append(str(header_path))
     
     return source_files
+
+
+def _split_cmake_args(block: str) -> List[str]:
+    """拆分 CMake 命令参数（去掉注释和引号）"""
+    block = re.sub(r'#[^\n]*', '', block)
+    return [arg.strip('"') for arg in block.split()]
+
+
+def parse_test_targets(tests_cmake_path: str) -> Dict[str, Dict[str, List[str]]]:
+    """
+    解析 tests/CMakeLists.txt 中的全部测试目标
+
+    与 parse_test_dependencies 不同，结果包含测试源文件本身、test_globals.cpp 等全部源文件，
+    以及 target_include_directories 声明的头文件搜索目录（用于影响分析）。
+
+    Args:
+        tests_cmake_path: tests/CMakeLists.txt 路径
+
+    Returns:
+        {测试名称: {'sources': [绝对路径, ...], 'include_dirs': [绝对路径, ...]}}
+    """
+    cmake_file = Path(tests_cmake_path)
+    if not cmake_file.exists():
+        return {}
+
+    tests_dir = cmake_file.parent
+    try:
+        content = cmake_file.read_text(encoding='utf-8', errors='ignore')
+    except Exception as e:
+        print(f"解析 CMakeLists.txt 失败: {e}")
+        return {}
+
+    def resolve(arg: str) -> str:
+        arg = arg.replace('${CMAKE_CURRENT_SOURCE_DIR}', str(tests_dir))
+        path = Path(arg)
+        if not path.is_absolute():
+            path = tests_dir / path
+        return os.path.normpath(str(path))
+
+    targets: Dict[str, Dict[str, List[str]]] = {}
+    for match in re.finditer(r'(?:qt_add_executable|add_executable)\(\s*(\w+)\s+(.*?)\)', content, re.DOTALL):
+        sources = [
+            resolve(arg) for arg in _split_cmake_args(match.group(2))
+            if not arg.isupper() and re.search(r'\.(cpp|cc|cxx|c|h|hpp|ui|qrc)$', arg)
+        ]
+        targets[match.group(1)] = {'sources': sources, 'include_dirs': []}
+
+    for match in re.finditer(r'target_include_directories\(\s*(\w+)\s+(.*?)\)', content, re.DOTALL):
+        target = targets.get(match.group(1))
+        if target is None:
+            continue
+        for arg in _split_cmake_args(match.group(2)):
+            if arg in ('PRIVATE', 'PUBLIC', 'INTERFACE', 'SYSTEM', 'BEFORE', 'AFTER'):
+                continue
+            target['include_dirs'].append(resolve(arg))
+
+    return targets
@@ -0,0 +1,148 @@
+"""
+测试结果缓存
+可执行文件和源文件都没有变化、且上次运行通过的测试不再重新运行
+
+- 指纹: 测试可执行文件、测试源文件以及 cmake_parser.get_source_files_for_test 解析出的
+  依赖源文件（含头文件）的内容哈希
+- 文件哈希按 (mtime, size) 缓存在进程内，未修改的大文件（如可执行文件）不重复读取
+- 命中缓存的测试以原运行记录的结果报告为 "cached pass"，并给出原 run_id
+"""
+import hashlib
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from core.database import TestDatabase
+from core.utils.logger import logger
+from .cmake_parser import get_source_files_for_test
+from .unit_test_scanner import UnitTestFile
+from .unit_test_runner import TestResult, TestCaseResult
+
+# 读取文件计算哈希的块大小
+_CHUNK_SIZE = 1024 * 1024
+
+# {文件路径: (mtime_ns, size, sha256)}
+_digest_cache: Dict[str, Tuple[int, int, str]] = {}
+_cache_lock = threading.Lock()
+
+
+def file_digest(path: str) -> Optional[str]:
+    """文件内容的 sha256（文件不存在时返回 None）"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    with _cache_lock:
+        cached = _digest_cache.get(path)
+    if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2]
+
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(_CHUNK_SIZE), b''):
+                digest.update(chunk)
+    except OSError:
+        return None
+    value = digest.hexdigest()
+
+    with _cache_lock:
+        _digest_cache[path] = (stat.st_mtime_ns, stat.st_size, value)
+    return value
+
+
+def compute_test_fingerprint(project_path: str, test: UnitTestFile) -> Optional[str]:
+    """
+    计算测试的内容指纹
+
+    Args:
+        project_path: 项目路径
+        test: 单元测试
+
+    Returns:
+        指纹；可执行文件不存在时返回 None（不使用缓存）
+    """
+    exe_digest = file_digest(test.executable_path)
+    if exe_digest is None:
+        return None
+
+    project_dir = Path(project_path)
+    sources = [test.file_path, *get_source_files_for_test(project_path, test.name)]
+    fingerprint = hashlib.sha256(f"exe:{exe_digest}\n".encode())
+    for source in sorted(set(sources)):
+        try:
+            relative = Path(source).relative_to(project_dir).as_posix()
+        except ValueError:
+            relative = source
+        fingerprint.update(f"{relative}:{file_digest(source)}\n".encode())
+    return fingerprint.hexdigest()
+
+
+class TestResultCache:
+    """基于数据库的测试结果缓存"""
+
+    def __init__(self, db: TestDatabase):
+        self.db = db
+
+    def lookup(self, project_path: str, test_name: str, fingerprint: Optional[str]) -> Optional[Tuple[int, TestResult]]:
+        """
+        查找指纹相同且已通过的运行
+
+        Returns:
+            (原 run_id, 原运行的结果)；未命中时返回 None
+        """
+        if fingerprint is None:
+            return None
+        run_id = self.db.get_cached_run(project_path, test_name, fingerprint)
+        if run_id is None:
+            return None
+        detail = self.db.get_test_run_detail(run_id)
+        if detail is None:
+            return None
+
+        run = detail.run
+        result = TestResult(
+            test_name=run.test_name,
+            status=run.status,
+            total=run.total,
+            passed=run.passed,
+            failed=run.failed,
+            skipped=run.skipped,
+            duration=run.duration,
+            output=run.output,
+            details=[
+                TestCaseResult(
+                    name=d.case_name,
+                    status=d.status,
+                    message=d.message,
+                    data_tag=d.data_tag,
+                    duration_ms=d.duration_ms,
+                    file=d.file,
+                    line=d.line
+                )
+                for d in detail.details
+            ]
+        )
+        return run_id, result
+
+    def update(self, project_path: str, entries: List[Tuple[str, Optional[str], TestResult, Optional[int]]]):
+        """
+        根据本次运行结果更新缓存：通过的测试记录指纹和 run_id，未通过的测试清除缓存
+
+        Args:
+            project_path: 项目路径
+            entries: [(测试名称, 指纹, 结果, run_id), ...]
+        """
+        passed = [
+            (project_path, name, fingerprint, run_id)
+            for name, fingerprint, result, run_id in entries
+            if result.status == 'passed' and fingerprint is not None and run_id is not None
+        ]
+        failed = [name for name, _, result, _ in entries if result.status != 'passed']
+        try:
+            self.db.save_cached_runs(passed)
+            self.db.delete_cached_runs(project_path, failed)
+        except Exception as e:
+            logger.error(f"更新测试结果缓存失败: {e}")
@@ -0,0 +1,288 @@
+"""
+测试运行环境配置（profile）
+链接了 QtWidgets 的单元测试需要显示器，在同一个桌面上并行运行会互相抢占焦点和窗口；
+为每次运行提供互不干扰的环境后，这些测试也可以完全并行
+
+- offscreen: QT_QPA_PLATFORM=offscreen，不需要显示器
+- xvfb: 每个并发的测试独占一个 Xvfb 显示（见 core.utils.xvfb，仅 Linux）
+- desktop: 使用当前桌面（原有行为），同一时间只运行一个 desktop 测试
+- 以上 profile 都使用独立的 HOME / XDG_RUNTIME_DIR 等目录（运行结束后删除），
+  测试写入的 QSettings、缓存、运行时文件互不影响，也不污染用户目录
+- auto: 依次尝试 offscreen -> xvfb -> desktop，只有出现环境问题（找不到平台插件、连不上显示器、
+  没有运行任何用例就退出）时才换下一个；测试通过或失败即按测试缓存该 profile，超时则停止但不缓存。
+  缓存的 profile 出现环境问题时重新选择
+"""
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from core.database import TestDatabase
+from core.utils.logger import logger
+from core.utils.xvfb import XvfbDisplay
+from .unit_test_runner import TestResult, build_test_env
+
+# 自动选择时的尝试顺序
+AUTO_PROFILE = 'auto'
+PROFILES = ('offscreen', 'xvfb', 'desktop')
+
+# 输出中表示运行环境有问题（而不是测试本身失败）的信息
+_ENV_ERROR_PATTERN = re.compile(
+    r'could not load the Qt platform plugin'
+    r'|no Qt platform plugin could be initialized'
+    r'|could not connect to display'
+    r'|cannot open display'
+    r'|qt\.qpa\.\w+: could not'
+    r'|Failed to create OpenGL context',
+    re.IGNORECASE
+)
+
+# 同一时间只允许一个测试使用真实桌面
+_desktop_lock = threading.Lock()
+
+
+def is_environment_error(result: TestResult) -> bool:
+    """测试结果是否说明运行环境有问题（超时不算：卡住更可能是测试本身的问题）"""
+    if result.duration == 'timeout':
+        return False
+    if _ENV_ERROR_PATTERN.search(result.output or ''):
+        return True
+    # 没有运行任何用例就异常退出（如 QApplication 创建失败）
+    return result.status != 'passed' and result.total == 0 and not result.details
+
+
+def isolated_env(env: Dict[str, str], root: str) -> Dict[str, str]:
+    """把 HOME / XDG_* 目录指向 root 下的独立目录（仍能连接到原来的 X11 / Wayland 显示）"""
+    env = dict(env)
+    if os.name != 'nt':
+        # X11 授权文件默认在 $HOME 下，Wayland socket 默认在 $XDG_RUNTIME_DIR 下
+        xauthority = os.path.join(os.path.expanduser('~'), '.Xauthority')
+        if 'XAUTHORITY' not in env and os.path.isfile(xauthority):
+            env['XAUTHORITY'] = xauthority
+        wayland = env.get('WAYLAND_DISPLAY')
+        if wayland and not os.path.isabs(wayland) and env.get('XDG_RUNTIME_DIR'):
+            env['WAYLAND_DISPLAY'] = os.path.join(env['XDG_RUNTIME_DIR'], wayland)
+    dirs = {
+        'HOME': 'home',
+        'XDG_RUNTIME_DIR': 'runtime',
+        'XDG_CONFIG_HOME': 'config',
+        'XDG_CACHE_HOME': 'cache',
+        'XDG_DATA_HOME': 'data',
+    }
+    for name, sub in dirs.items():
+        path = os.path.join(root, sub)
+        os.makedirs(path, mode=0o700, exist_ok=True)
+        env[name] = path
+    if os.name == 'nt':
+        env['USERPROFILE'] = env['HOME']
+    return env
+
+
+class _DisplayPool:
+    """Xvfb 显示池：每个正在运行的测试独占一个显示，结束后留给下一个测试复用"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._idle: List[XvfbDisplay] = []
+        self._all: List[XvfbDisplay] = []
+
+    def acquire(self) -> XvfbDisplay:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        display = XvfbDisplay()
+        display.start()
+        with self._lock:
+            self._all.append(display)
+        return display
+
+    def release(self, display: XvfbDisplay):
+        with self._lock:
+            if display.running:
+                self._idle.append(display)
+
+    def close(self):
+        with self._lock:
+            displays, self._all, self._idle = self._all, [], []
+        for display in displays:
+            display.stop()
+
+
+class EnvProfileManager:
+    """为测试运行提供环境，并按测试选择和缓存 profile
+
+    示例:
+        >>> with EnvProfileManager(TestDatabase()) as profiles:
+        ...     result, profile, cost_ms = profiles.run(project_path, "test_arrow", exe,
+        ...         lambda env: run_unit_test(exe, "test_arrow", env=env))
+    """
+
+    def __init__(self, db: Optional[TestDatabase] = None):
+        """
+        Args:
+            db: 测试数据库（读写各测试可用的 profile），为 None 时不缓存
+        """
+        self.db = db
+        self._displays = _DisplayPool()
+        self._xvfb_available = XvfbDisplay.available()
+
+    def available_profiles(self) -> List[str]:
+        """当前系统可用的 profile（按自动选择的顺序）"""
+        return [p for p in PROFILES if p != 'xvfb' or self._xvfb_available]
+
+    @contextmanager
+    def environment(self, profile: str, executable_path: str) -> Iterator[Dict[str, str]]:
+        """
+        准备一次运行的环境变量，运行结束后释放显示并删除临时目录
+
+        Args:
+            profile: offscreen / xvfb / desktop
+            executable_path: 测试可执行文件路径
+        """
+        if profile not in PROFILES:
+            raise ValueError(f"不支持的环境 profile: {profile}（可选 {', '.join(PROFILES)}、{AUTO_PROFILE}）")
+        root = tempfile.mkdtemp(prefix='qtest_env_')
+        display: Optional[XvfbDisplay] = None
+        desktop = False
+        try:
+            env = isolated_env(build_test_env(executable_path), root)
+            if profile == 'offscreen':
+                env['QT_QPA_PLATFORM'] = 'offscreen'
+            elif profile == 'xvfb':
+                display = self._displays.acquire()
+                env = display.env(env)
+            else:
+                _desktop_lock.acquire()
+                desktop = True
+            yield env
+        finally:
+            if display is not None:
+                self._displays.release(display)
+            if desktop:
+                _desktop_lock.release()
+            shutil.rmtree(root, ignore_errors=True)
+
+    def cached_profile(self, project_path: str, test_name: str) -> Optional[str]:
+        """测试缓存的 profile"""
+        if self.db is None:
+            return None
+        try:
+            profile = self.db.get_test_env_profile(project_path, test_name)
+        except Exception as e:
+            logger.error(f"读取测试环境 profile 失败: {e}")
+            return None
+        return profile if profile in self.available_profiles() else None
+
+    def run(
+        self,
+        project_path: str,
+        test_name: str,
+        executable_path: str,
+        run: Callable[[Dict[str, str]], TestResult],
+        profile: Optional[str] = AUTO_PROFILE
+    ) -> Tuple[TestResult, str, float]:
+        """
+        在指定（或自动选择的）环境中运行测试
+
+        Args:
+            project_path: 项目路径
+            test_name: 测试名称
+            executable_path: 测试可执行文件路径
+            run: 以环境变量为参数运行测试的函数
+            profile: offscreen / xvfb / desktop，auto 或 None 时自动选择
+
+        Returns:
+            (测试结果, 使用的 profile, 该次运行的耗时毫秒)；自动选择时耗时只计最后一次尝试，
+            之前因环境问题失败的尝试不计入
+        """
+        if profile not in (None, AUTO_PROFILE):
+            return self._attempt(profile, executable_path, run)
+
+        cached = self.cached_profile(project_path, test_name)
+        if cached is not None:
+            attempt = self._attempt(cached, executable_path, run)
+            result = attempt[0]
+            if result.duration == 'cancelled' or not is_environment_error(result):
+                return attempt
+            logger.warning(f"{test_name}: 缓存的环境 {cached} 不可用，重新选择")
+            self._forget(project_path, test_name)
+
+        return self._probe(project_path, test_name, executable_path, run, exclude=cached)
+
+    def _probe(
+        self,
+        project_path: str,
+        test_name: str,
+        executable_path: str,
+        run: Callable[[Dict[str, str]], TestResult],
+        exclude: Optional[str] = None
+    ) -> Tuple[TestResult, str, float]:
+        """依次尝试各 profile，只有环境问题才换下一个；通过或失败的 profile 缓存下来"""
+        last: Optional[Tuple[TestResult, str, float]] = None
+        for profile in self.available_profiles():
+            if profile == exclude:
+                continue
+            try:
+                last = self._attempt(profile, executable_path, run)
+            except RuntimeError as e:
+                # Xvfb 启动失败，本次不再尝试
+                logger.warning(f"{test_name}: 环境 {profile} 不可用: {e}")
+                if profile == 'xvfb':
+                    self._xvfb_available = False
+                continue
+            result = last[0]
+            if result.duration in ('cancelled', 'timeout'):
+                # 超时不说明环境是否可用：停止尝试，也不缓存
+                return last
+            if not is_environment_error(result):
+                self._remember(project_path, test_name, profile)
+                logger.info(f"{test_name}: 使用环境 {profile}")
+                return last
+            logger.info(f"{test_name}: 环境 {profile} 有问题，尝试下一个")
+
+        if last is None:
+            raise RuntimeError(f"{test_name}: 没有可用的运行环境")
+        return last
+
+    def _attempt(
+        self,
+        profile: str,
+        executable_path: str,
+        run: Callable[[Dict[str, str]], TestResult]
+    ) -> Tuple[TestResult, str, float]:
+        """在一个 profile 中运行一次，返回 (结果, profile, 耗时毫秒)"""
+        start = time.perf_counter()
+        with self.environment(profile, executable_path) as env:
+            result = run(env)
+        return result, profile, (time.perf_counter() - start) * 1000
+
+    def _remember(self, project_path: str, test_name: str, profile: str):
+        if self.db is None:
+            return
+        try:
+            self.db.save_test_env_profile(project_path, test_name, profile)
+        except Exception as e:
+            logger.error(f"保存测试环境 profile 失败: {e}")
+
+    def _forget(self, project_path: str, test_name: str):
+        if self.db is None:
+            return
+        try:
+            self.db.delete_test_env_profile(project_path, test_name)
+        except Exception as e:
+            logger.error(f"删除测试环境 profile 失败: {e}")
+
+    def close(self):
+        """关闭启动的 Xvfb 显示"""
+        self._displays.close()
+
+    def __enter__(self) -> "EnvProfileManager":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
@@ -0,0 +1,273 @@
+"""
+不稳定测试检测
+把同一个测试可执行文件（或其中一个测试函数）并发重复运行 N 次，统计结果是否一致
+
+- 各次运行是独立的 QTest 进程，有界并发（默认 CPU 核数）
+- 统计通过率、耗时分布（p50 / p95 / max）和不稳定度：
+  flakiness = 2 × min(通过率, 1 - 通过率)，全部通过或全部失败为 0，一半通过一半失败为 1
+- 超时或崩溃的运行计为失败；每个用例（含数据行）失败的次数一并给出，便于定位不稳定的用例
+- 各次运行在独立的运行环境中执行（见 test_env_profiles）：第一次运行按 auto 规则选定 profile
+  （使用缓存或探测），其余各次沿用该 profile，需要显示器的 GUI 测试也能并发重复运行
+- 汇总结果写入数据库（不写入逐次运行记录，避免淹没测试历史），历史视图可直接据此标记不稳定的测试
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from core.database import TestDatabase, FlakinessRecord
+from core.utils.logger import logger
+from .unit_test_runner import run_unit_test, TestResult
+from .test_timeouts import TimeoutPolicy, percentile
+from .test_env_profiles import EnvProfileManager, AUTO_PROFILE
+
+# 单次检测最多运行的次数
+MAX_RERUNS = 200
+
+
+@dataclass
+class RerunResult:
+    """一次重复运行的结果"""
+    index: int
+    status: str                   # 'passed' | 'failed' | 'error'
+    duration_ms: float            # 进程墙钟耗时
+    failed_cases: List[str] = field(default_factory=list)
+    timed_out: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'index': self.index,
+            'status': self.status,
+            'duration_ms': round(self.duration_ms, 2),
+            'failed_cases': self.failed_cases,
+            'timed_out': self.timed_out,
+        }
+
+
+def flakiness_score(passed: int, runs: int) -> float:
+    """不稳定度：结果一致为 0，通过和失败各占一半为 1"""
+    if runs <= 0:
+        return 0.0
+    pass_rate = passed / runs
+    return 2 * min(pass_rate, 1 - pass_rate)
+
+
+def _case_key(case) -> str:
+    return f"{case.name}:{case.data_tag}" if case.data_tag else case.name
+
+
+def summarize_reruns(
+    project_path: str,
+    test_name: str,
+    function_name: Optional[str],
+    reruns: List[RerunResult]
+) -> FlakinessRecord:
+    """把各次运行的结果汇总为一条不稳定度记录"""
+    runs = len(reruns)
+    passed = sum(1 for r in reruns if r.status == 'passed')
+    durations = [r.duration_ms for r in reruns]
+    failing_cases: Dict[str, int] = {}
+    for rerun in reruns:
+        for case in rerun.failed_cases:
+            failing_cases[case] = failing_cases.get(case, 0) + 1
+
+    return FlakinessRecord(
+        project_path=project_path,
+        test_name=test_name,
+        function_name=function_name or '',
+        runs=runs,
+        passed=passed,
+        failed=runs - passed,
+        pass_rate=passed / runs if runs else 0.0,
+        flakiness=flakiness_score(passed, runs),
+        p50_ms=percentile(durations, 50),
+        p95_ms=percentile(durations, 95),
+        max_ms=max(durations) if durations else None,
+        failing_cases=dict(sorted(failing_cases.items(), key=lambda item: -item[1])),
+    )
+
+
+class FlakinessDetector:
+    """重复运行测试检测不稳定性
+
+    示例:
+        >>> detector = FlakinessDetector(TestDatabase(), max_workers=4)
+        >>> report = detector.run(project_path, exe_path, "test_arrow", runs=20)
+        >>> print(report["pass_rate"], report["flakiness"])
+    """
+
+    def __init__(
+        self,
+        db: TestDatabase,
+        max_workers: Optional[int] = None,
+        on_run: Optional[Callable[[Dict[str, Any]], None]] = None,
+        cancel_event: Optional[threading.Event] = None,
+        env_profile: Optional[str] = AUTO_PROFILE
+    ):
+        """
+        Args:
+            db: 测试数据库（写入汇总结果）
+            max_workers: 同时运行的测试进程数，默认取 CPU 核数
+            on_run: 每次运行结束时的回调，参数为该次结果和累计统计
+            cancel_event: 取消事件，置位后不再启动新的运行，正在运行的进程被结束
+            env_profile: 运行环境 offscreen / xvfb / desktop，auto 时由第一次运行选定
+        """
+        self.db = db
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.on_run = on_run
+        self.cancel_event = cancel_event or threading.Event()
+        self.timeouts = TimeoutPolicy(db)
+        self.env_profile = env_profile
+
+    def run(
+        self,
+        project_path: str,
+        executable_path: str,
+        test_name: str,
+        runs: int = 10,
+        function_name: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        重复运行测试并保存统计
+
+        Args:
+            project_path: 项目路径
+            executable_path: 测试可执行文件路径
+            test_name: 测试名称
+            runs: 运行次数
+            function_name: 只运行该测试函数（可带数据行，如 "testFoo:row1"），默认运行全部
+
+        Returns:
+            统计结果（FlakinessRecord 的字段），附加 reruns（各次运行）、cancelled 和 cost_ms
+        """
+        runs = max(1, min(int(runs), MAX_RERUNS))
+        workers = max(1, min(self.max_workers, runs))
+        functions = [function_name] if function_name else None
+        target = f"{test_name}::{function_name}" if function_name else test_name
+        logger.info(f"重复运行测试 {target}: {runs} 次, 并发 {workers}")
+
+        start = time.perf_counter()
+        reruns: List[RerunResult] = []
+        timeout_s = self.timeouts.timeout_for(project_path, test_name, 'unit').timeout_s
+        profiles = EnvProfileManager(self.db)
+        profile = self.env_profile
+
+        def run_once(index: int) -> Optional[RerunResult]:
+            nonlocal profile
+            if self.cancel_event.is_set():
+                return None
+            result, profile, cost_ms = profiles.run(
+                project_path,
+                test_name,
+                executable_path,
+                lambda env: run_unit_test(
+                    executable_path,
+                    test_name,
+                    functions=functions,
+                    cancel_event=self.cancel_event,
+                    timeout=timeout_s,
+                    env=env
+                ),
+                profile
+            )
+            if self.cancel_event.is_set():
+                return None  # 被取消的运行不计入统计
+            return self._rerun_result(index, result, cost_ms)
+
+        with profiles, ThreadPoolExecutor(max_workers=workers, thread_name_prefix="flaky-test") as executor:
+            futures = []
+            if profile in (None, AUTO_PROFILE):
+                # 先运行一次选定 profile（缓存的 profile 有环境问题时重新探测），其余各次沿用，
+                # 环境问题不会被当成不稳定
+                futures.append(executor.submit(run_once, 0))
+                wait(futures)
+            futures += [executor.submit(run_once, i) for i in range(len(futures), runs)]
+            for future in as_completed(futures):
+                try:
+                    rerun = future.result()
+                except Exception as e:
+                    logger.error(f"重复运行测试失败: {target}: {e}")
+                    continue
+                if rerun is None:
+                    continue
+                reruns.append(rerun)
+                passed = sum(1 for r in reruns if r.status == 'passed')
+                self._notify(rerun, len(reruns), passed, runs)
+
+        reruns.sort(key=lambda r: r.index)
+        self.timeouts.record(project_path, 'unit', [
+            (test_name, timeout_s, r.duration_ms, r.timed_out, function_name is not None) for r in reruns
+        ])
+        record = summarize_reruns(project_path, test_name, function_name, reruns)
+        if reruns:
+            try:
+                record.id = self.db.save_flakiness(record)
+            except Exception as e:
+                logger.error(f"保存不稳定度统计失败: {e}")
+        logger.info(
+            f"重复运行完成 {target}: 通过 {record.passed}/{record.runs}, "
+            f"不稳定度 {record.flakiness:.2f}, p95 {record.p95_ms or 0:.0f}ms"
+        )
+
+        report = record.to_dict()
+        report.update({
+            'success': bool(reruns),
+            'requested_runs': runs,
+            'workers': workers,
+            'env_profile': profile,
+            'cancelled': self.cancel_event.is_set(),
+            'reruns': [r.to_dict() for r in reruns],
+            'cost_ms': round((time.perf_counter() - start) * 1000, 2),
+        })
+        return report
+
+    @staticmethod
+    def _rerun_result(index: int, result: TestResult, duration_ms: float) -> RerunResult:
+        failed_cases = []
+        for case in result.details:
+            key = _case_key(case)
+            if case.status == 'FAIL' and key not in failed_cases:
+                failed_cases.append(key)
+        status = result.status if result.status in ('passed', 'failed') else 'error'
+        return RerunResult(
+            index=index,
+            status=status,
+            duration_ms=duration_ms,
+            failed_cases=failed_cases,
+            timed_out=result.duration == 'timeout'
+        )
+
+    def _notify(self, rerun: RerunResult, completed: int, passed: int, runs: int):
+        if self.on_run is None:
+            return
+        try:
+            self.on_run({
+                'run': rerun.to_dict(),
+                'completed': completed,
+                'runs': runs,
+                'passed': passed,
+                'failed': completed - passed,
+            })
+        except Exception as e:
+            logger.error(f"重复运行进度回调失败: {e}")
+
+
+def run_flakiness_check(
+    project_path: str,
+    db: TestDatabase,
+    executable_path: str,
+    test_name: str,
+    runs: int = 10,
+    function_name: Optional[str] = None,
+    max_workers: Optional[int] = None,
+    on_run: Optional[Callable[[Dict[str, Any]], None]] = None,
+    cancel_event: Optional[threading.Event] = None,
+    env_profile: Optional[str] = AUTO_PROFILE
+) -> Dict[str, Any]:
+    """重复运行测试检测不稳定性（字典接口，供 API 层调用）"""
+    detector = FlakinessDetector(
+        db, max_workers=max_workers, on_run=on_run, cancel_event=cancel_event, env_profile=env_profile
+    )
+    return detector.run(project_path, executable_path, test_name, runs, function_name)
@@ -0,0 +1,281 @@
+"""
+测试影响分析
+根据改动的文件找出需要运行的测试
+
+- 正向依赖: tests/CMakeLists.txt 中每个测试目标的源文件（cmake_parser.parse_test_targets），
+  加上从这些源文件出发、经 #include "..." 递归找到的项目内头文件
+- 反向索引: 文件 -> 依赖它的测试
+- 增量更新: CMake 文件未变化时复用测试目标；每个文件的 include 列表按 (mtime, size) 缓存，
+  只有修改过的文件才会重新扫描
+- 改动 CMakeLists.txt 视为影响全部测试；不在任何测试依赖中的文件（文档、图片等）不影响测试
+"""
+import os
+import re
+import subprocess
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from core.database import TestDatabase
+from core.utils.logger import logger
+from .cmake_parser import parse_test_targets
+from .unit_test_scanner import scan_unit_tests
+from .test_suite_runner import SuiteReport, run_unit_test_suite
+from .test_env_profiles import AUTO_PROFILE
+
+# 引号形式的 include（尖括号形式是 Qt / 系统头文件，不参与分析）
+_INCLUDE_PATTERN = re.compile(r'^\s*#\s*include\s+"([^"]+)"', re.MULTILINE)
+
+# 改动后影响全部测试的构建文件
+_BUILD_FILES = ('CMakeLists.txt', os.path.join('tests', 'CMakeLists.txt'))
+
+
+@dataclass
+class ImpactResult:
+    """影响分析结果"""
+    changed_files: List[str]                                  # 相对项目目录
+    affected: List[str] = field(default_factory=list)         # 受影响的测试
+    unaffected: List[str] = field(default_factory=list)
+    reasons: Dict[str, List[str]] = field(default_factory=dict)  # 测试 -> 导致其受影响的改动文件
+    all_tests: bool = False                                   # 构建文件改动，全部测试受影响
+    cost_ms: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'changed_files': self.changed_files,
+            'affected': self.affected,
+            'unaffected': self.unaffected,
+            'skipped': len(self.unaffected),
+            'reasons': self.reasons,
+            'all_tests': self.all_tests,
+            'cost_ms': round(self.cost_ms, 2),
+        }
+
+
+class TestImpactIndex:
+    """一个项目的测试依赖索引"""
+
+    def __init__(self, project_path: str):
+        self.project_dir = Path(project_path).resolve()
+        self._lock = threading.Lock()
+        self._build_signature: Optional[Tuple] = None
+        self._targets: Dict[str, Dict[str, List[str]]] = {}
+        # {文件: (mtime_ns, size, 解析后的 include 文件列表)}
+        self._includes: Dict[str, Tuple[int, int, List[str]]] = {}
+
+    def _signature(self) -> Tuple:
+        """构建文件的 (mtime, size)，任何一个变化都要重新解析测试目标"""
+        signature = []
+        for name in _BUILD_FILES:
+            try:
+                stat = os.stat(self.project_dir / name)
+                signature.append((name, stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                signature.append((name, None, None))
+        return tuple(signature)
+
+    def _refresh_targets(self):
+        """CMake 文件变化时重新解析测试目标（扫描到但 CMake 中没有的测试只依赖其源文件）"""
+        signature = self._signature()
+        if signature == self._build_signature:
+            return
+        targets = parse_test_targets(str(self.project_dir / 'tests' / 'CMakeLists.txt'))
+        for test in scan_unit_tests(str(self.project_dir)):
+            target = targets.setdefault(test.name, {'sources': [], 'include_dirs': []})
+            source = os.path.normpath(test.file_path)
+            if source not in target['sources']:
+                target['sources'].insert(0, source)
+        self._targets = targets
+        self._build_signature = signature
+        logger.info(f"测试依赖索引: 解析 {len(targets)} 个测试目标 ({self.project_dir.name})")
+
+    def _file_includes(self, path: str, include_dirs: List[str]) -> List[str]:
+        """文件直接 include 的项目内文件（按 mtime 缓存）"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return []
+        cached = self._includes.get(path)
+        if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return cached[2]
+
+        try:
+            content = Path(path).read_text(encoding='utf-8', errors='ignore')
+        except OSError:
+            return []
+        resolved = []
+        search_dirs = [os.path.dirname(path), *include_dirs]
+        for name in _INCLUDE_PATTERN.findall(content):
+            for directory in search_dirs:
+                candidate = os.path.normpath(os.path.join(directory, name))
+                if os.path.isfile(candidate):
+                    resolved.append(candidate)
+                    break
+        self._includes[path] = (stat.st_mtime_ns, stat.st_size, resolved)
+        return resolved
+
+    def test_files(self, test_name: str) -> Set[str]:
+        """测试依赖的全部文件（源文件及递归 include 的头文件）"""
+        target = self._targets.get(test_name)
+        if target is None:
+            return set()
+        include_dirs = target['include_dirs']
+        visited: Set[str] = set()
+        pending = list(target['sources'])
+        while pending:
+            path = pending.pop()
+            if path in visited:
+                continue
+            visited.add(path)
+            pending.extend(p for p in self._file_includes(path, include_dirs) if p not in visited)
+        return visited
+
+    def reverse_index(self) -> Dict[str, Set[str]]:
+        """文件 -> 依赖它的测试"""
+        with self._lock:
+            self._refresh_targets()
+            index: Dict[str, Set[str]] = {}
+            for test_name in self._targets:
+                for path in self.test_files(test_name):
+                    index.setdefault(path, set()).add(test_name)
+            return index
+
+    def _normalize(self, path: str) -> str:
+        candidate = Path(path)
+        if not candidate.is_absolute():
+            candidate = self.project_dir / candidate
+        return os.path.normpath(str(candidate))
+
+    def _relative(self, path: str) -> str:
+        try:
+            return Path(path).relative_to(self.project_dir).as_posix()
+        except ValueError:
+            return path
+
+    def affected_tests(self, changed_files: Iterable[str]) -> ImpactResult:
+        """
+        计算受改动影响的测试
+
+        Args:
+            changed_files: 改动的文件（绝对路径或相对项目目录的路径）
+        """
+        start = time.perf_counter()
+        changed = sorted({self._normalize(p) for p in changed_files})
+        index = self.reverse_index()
+        with self._lock:
+            all_tests = sorted(self._targets)
+
+        result = ImpactResult(changed_files=[self._relative(p) for p in changed])
+        build_files = {os.path.normpath(str(self.project_dir / name)) for name in _BUILD_FILES}
+        if any(p in build_files for p in changed):
+            result.all_tests = True
+            result.affected = all_tests
+            result.reasons = {t: [self._relative(p) for p in changed if p in build_files] for t in all_tests}
+        else:
+            for path in changed:
+                for test_name in index.get(path, ()):
+                    result.reasons.setdefault(test_name, []).append(self._relative(path))
+            result.affected = sorted(result.reasons)
+        result.unaffected = [t for t in all_tests if t not in result.reasons]
+        result.cost_ms = (time.perf_counter() - start) * 1000
+        return result
+
+
+_indexes: Dict[str, TestImpactIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_impact_index(project_path: str) -> TestImpactIndex:
+    """获取项目的依赖索引（进程内复用，按需增量更新）"""
+    key = str(Path(project_path).resolve())
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = TestImpactIndex(key)
+        return index
+
+
+def changed_files_from_git(project_path: str, base: str = 'HEAD') -> List[str]:
+    """
+    项目目录下相对 base 改动的文件（含工作区未提交的改动和未跟踪的新文件）
+
+    Args:
+        project_path: 项目路径（位于 git 仓库内）
+        base: 比较的提交，如 HEAD、origin/main
+
+    Returns:
+        相对项目目录的路径列表
+    """
+    files: Set[str] = set()
+    for args in (
+        ['git', '-C', project_path, 'diff', '--name-only', '--relative', base],
+        ['git', '-C', project_path, 'ls-files', '--others', '--exclude-standard'],
+    ):
+        result = subprocess.run(args, capture_output=True, text=True, encoding='utf-8', errors='replace', timeout=30)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip() or f"git 命令失败: {' '.join(args[3:])}")
+        files.update(line.strip() for line in result.stdout.splitlines() if line.strip())
+    return sorted(files)
+
+
+def analyze_impact(
+    project_path: str,
+    changed_files: Optional[List[str]] = None,
+    base: str = 'HEAD'
+) -> ImpactResult:
+    """
+    影响分析
+
+    Args:
+        project_path: 项目路径
+        changed_files: 改动的文件；为 None 时从 git diff 获取
+        base: changed_files 为 None 时比较的提交
+    """
+    if changed_files is None:
+        changed_files = changed_files_from_git(project_path, base)
+    return get_impact_index(project_path).affected_tests(changed_files)
+
+
+def run_affected_tests(
+    project_path: str,
+    db: TestDatabase,
+    changed_files: Optional[List[str]] = None,
+    base: str = 'HEAD',
+    max_workers: Optional[int] = None,
+    force: bool = False,
+    on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+    cancel_event: Optional[threading.Event] = None,
+    on_case: Optional[Callable[[Dict[str, Any]], None]] = None,
+    env_profile: Optional[str] = AUTO_PROFILE
+) -> Dict[str, Any]:
+    """
+    只运行受改动影响的测试（字典接口，供 API 层调用）
+
+    Returns:
+        套件报告，附加 impact（影响分析结果）和 skipped_tests（未受影响而跳过的测试数）
+    """
+    impact = analyze_impact(project_path, changed_files, base)
+    logger.info(
+        f"影响分析: {len(impact.changed_files)} 个改动文件, "
+        f"{len(impact.affected)} 个测试受影响, 跳过 {len(impact.unaffected)} 个"
+    )
+    if impact.affected:
+        report = run_unit_test_suite(
+            project_path,
+            db,
+            max_workers,
+            impact.affected,
+            on_result=on_result,
+            cancel_event=cancel_event,
+            on_case=on_case,
+            force=force,
+            env_profile=env_profile
+        )
+    else:
+        report = SuiteReport(project_path=project_path).to_dict()
+        report['success'] = True  # 没有需要运行的测试
+    report['impact'] = impact.to_dict()
+    report['skipped_tests'] = len(impact.unaffected)
+    return report
@@ -0,0 +1,191 @@
+"""
+测试进程的流式执行器
+
+用 Popen 运行测试可执行文件，输出到达即处理，而不是等进程结束后一次性读取:
+- 读取线程逐行读取合并后的 stdout/stderr，交给 on_line（如 QTest 增量解析器）
+- 主线程每隔 FLUSH_INTERVAL 把新到达的输出批量交给 on_output（推送到前端），
+  同时检查超时和取消事件
+- 内存中只保留最后 tail_lines 行输出，输出再多也不会无限增长
+- 测试进程在独立的进程组中运行（POSIX: start_new_session，Windows: CREATE_NEW_PROCESS_GROUP），
+  超时或取消时结束整个进程树（killpg / taskkill /T）；POSIX 上进程结束后残留在进程组中的
+  子进程也一并结束，不会泄漏，也不会因为子进程占用输出管道而卡住
+"""
+import os
+import signal
+import subprocess
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, List, Optional
+
+from core.utils.logger import logger
+
+# 保留的输出行数
+OUTPUT_TAIL_LINES = 5000
+# 批量推送输出、检查超时和取消的间隔（秒）
+FLUSH_INTERVAL = 0.2
+# 进程结束后等待读取线程读完剩余输出的时间（秒）
+_READER_JOIN_TIMEOUT = 5
+
+
+@dataclass
+class ProcessOutput:
+    """测试进程的执行结果"""
+    return_code: Optional[int]    # 超时或取消后被结束时为 None
+    output: str                   # 输出的最后 tail_lines 行
+    line_count: int = 0           # 输出的总行数
+    timed_out: bool = False
+    cancelled: bool = False
+    cost_ms: float = 0.0
+
+
+def _process_group_options() -> Dict:
+    """让测试进程成为新进程组的组长，便于结束整个进程树"""
+    if os.name == 'nt':
+        return {'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {'start_new_session': True}
+
+
+def kill_process_tree(process: subprocess.Popen):
+    """
+    结束进程及其子进程
+    
+    POSIX 上向进程组发送 SIGKILL（组长已退出时仍能结束残留的组成员）；
+    Windows 上用 taskkill /T 结束进程树
+    """
+    if os.name == 'nt':
+        if process.poll() is None:
+            try:
+                subprocess.run(
+                    ['taskkill', '/F', '/T', '/PID', str(process.pid)],
+                    capture_output=True,
+                    timeout=10
+                )
+            except (OSError, subprocess.SubprocessError) as e:
+                logger.warning(f"结束进程树失败: {e}")
+    else:
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass  # 进程组已经不存在
+    try:
+        process.kill()
+    except OSError:
+        pass
+
+
+def run_streaming(
+    args: List[str],
+    timeout: float,
+    env: Optional[Dict[str, str]] = None,
+    cwd: Optional[str] = None,
+    on_line: Optional[Callable[[str], None]] = None,
+    on_output: Optional[Callable[[List[str]], None]] = None,
+    cancel_event: Optional[threading.Event] = None,
+    tail_lines: int = OUTPUT_TAIL_LINES
+) -> ProcessOutput:
+    """
+    运行进程并流式处理其输出
+
+    Args:
+        args: 命令行
+        timeout: 超时时间（秒），超时后结束进程
+        env: 环境变量
+        cwd: 工作目录
+        on_line: 每行输出的回调（在读取线程中调用）
+        on_output: 批量输出的回调，参数为自上次回调以来的新行（在调用线程中调用）
+        cancel_event: 取消事件，置位后结束进程
+        tail_lines: 保留的输出行数
+
+    Returns:
+        执行结果
+    """
+    start = time.perf_counter()
+    tail: Deque[str] = deque(maxlen=tail_lines)
+    pending: Deque[str] = deque(maxlen=tail_lines)
+    lock = threading.Lock()
+    line_count = 0
+
+    process = subprocess.Popen(
+        args,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        encoding='utf-8',
+        errors='replace',  # 遇到无法解码的字节用 � 替换
+        bufsize=1,
+        env=env,
+        cwd=cwd,
+        **_process_group_options()
+    )
+
+    def read_output():
+        nonlocal line_count
+        for raw in process.stdout:
+            line = raw.rstrip('\r\n')
+            with lock:
+                tail.append(line)
+                if on_output is not None:
+                    pending.append(line)
+                line_count += 1
+            if on_line is not None:
+                try:
+                    on_line(line)
+                except Exception as e:
+                    logger.error(f"测试输出处理失败: {e}")
+        process.stdout.close()
+
+    def flush():
+        if on_output is None:
+            return
+        with lock:
+            lines = list(pending)
+            pending.clear()
+        if lines:
+            try:
+                on_output(lines)
+            except Exception as e:
+                logger.error(f"测试输出推送失败: {e}")
+
+    reader = threading.Thread(target=read_output, name="test-output", daemon=True)
+    reader.start()
+
+    timed_out = cancelled = False
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            process.wait(timeout=FLUSH_INTERVAL)
+            break
+        except subprocess.TimeoutExpired:
+            pass
+        flush()
+        if cancel_event is not None and cancel_event.is_set():
+            cancelled = True
+        elif time.monotonic() >= deadline:
+            timed_out = True
+        if cancelled or timed_out:
+            kill_process_tree(process)
+            process.wait()
+            break
+
+    if os.name != 'nt':
+        # 测试进程已退出，结束进程组中残留的子进程（它们可能仍占用输出管道）
+        kill_process_tree(process)
+    reader.join(timeout=_READER_JOIN_TIMEOUT)
+    flush()
+
+    with lock:
+        output = '\n'.join(tail)
+        total_lines = line_count
+    if total_lines > len(tail):
+        output = f"...（省略前 {total_lines - len(tail)} 行输出）\n{output}"
+
+    return ProcessOutput(
+        return_code=None if (timed_out or cancelled) else process.returncode,
+        output=output,
+        line_count=total_lines,
+        timed_out=timed_out,
+        cancelled=cancelled,
+        cost_ms=(time.perf_counter() - start) * 1000,
+    )
@@ -61,12 +61,7 @@ class TestRecorder:
         
         # 保存测试用例详情
         details = [
-            TestCaseDetail(
-                run_id=run_id,
-                case_name=case.name,
-                status=case.status,
-                message=case.message
-            )
+            self._case_detail(case, run_id)
             for case in result.details
         ]
         self.db.save_test_case_details(run_id, details)
@@ -74,6 +69,49 @@ class TestRecorder:
         logger.info(f"单元测试记录完成: run_id={run_id}")
         return run_id
     
+    def record_unit_tests(self, project_path: str, results: List[TestResult]) -> List[int]:
+        """
+        批量记录单元测试结果（一个事务，用于测试套件）
+        
+        Args:
+            project_path: 项目路径
+            results: 测试结果列表
+            
+        Returns:
+            各结果的 run_id（与 results 顺序一致）
+        """
+        items = []
+        for result in results:
+            run = TestRun(
+                project_path=project_path,
+                test_name=result.test_name,
+                test_type='unit',
+                status=result.status,
+                total=result.total,
+                passed=result.passed,
+                failed=result.failed,
+                skipped=result.skipped,
+                duration=result.duration,
+                output=result.output
+            )
+            details = [self._case_detail(case) for case in result.details]
+            items.append((run, details))
+        return self.db.save_test_runs_batch(items)
+    
+    @staticmethod
+    def _case_detail(case: TestCaseResult, run_id: int = 0) -> TestCaseDetail:
+        """测试用例结果转换为数据库记录"""
+        return TestCaseDetail(
+            run_id=run_id,
+            case_name=case.name,
+            status=case.status,
+            message=case.message,
+            data_tag=case.data_tag,
+            duration_ms=case.duration_ms,
+            file=case.file,
+            line=case.line
+        )
+    
     def record_ui_test(
         self, 
         project_path: str, 
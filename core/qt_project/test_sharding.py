@@ -0,0 +1,256 @@
+"""
+QTest 函数级分片
+把一个测试可执行文件的测试函数拆成多个分片，分别在独立进程中并行运行
+
+- 通过 `<exe> -functions` 列出测试函数，按可执行文件的 mtime 缓存
+- 按各函数的历史耗时用最长优先贪心法（LPT）分配到各分片，使各分片耗时接近
+- 各分片的结果合并回一个 TestResult：initTestCase / cleanupTestCase 在每个分片中都会运行，
+  合并时只统计一次，保证总数与不分片时一致
+"""
+import math
+import os
+import statistics
+import subprocess
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from core.utils.logger import logger
+from .unit_test_runner import TestResult, TestCaseResult, build_test_env
+
+# 分片的最小估算耗时：估算耗时不足该值的测试不值得多启动进程
+MIN_SHARD_MS = 500.0
+
+# 每个分片进程都会运行的函数（不在 -functions 列表中）
+FIXTURE_FUNCTIONS = ('initTestCase', 'cleanupTestCase')
+
+# 列出测试函数的超时（秒）
+_DISCOVER_TIMEOUT = 10
+
+# {可执行文件路径: (mtime_ns, 函数列表)}
+_functions_cache: Dict[str, Tuple[int, List[str]]] = {}
+_cache_lock = threading.Lock()
+
+
+@dataclass
+class TestShard:
+    """一个分片：同一个可执行文件的一组测试函数"""
+    index: int
+    count: int                              # 该测试的分片总数
+    functions: Optional[List[str]] = None   # None 表示运行全部函数（不分片）
+    expected_ms: Optional[float] = None     # 估算耗时，None 表示没有历史
+
+    @property
+    def label(self) -> str:
+        return f"{self.index + 1}/{self.count}"
+
+
+def parse_function_list(output: str) -> List[str]:
+    """解析 `-functions` 的输出（每行一个 "testFoo()"）"""
+    functions = []
+    for line in output.splitlines():
+        line = line.strip()
+        if line.endswith('()'):
+            name = line[:-2]
+            if name.isidentifier() and name not in functions:
+                functions.append(name)
+    return functions
+
+
+def discover_test_functions(executable_path: str) -> List[str]:
+    """
+    列出测试可执行文件中的测试函数（按 mtime 缓存，重新编译后自动失效）
+
+    Args:
+        executable_path: 测试可执行文件路径
+
+    Returns:
+        测试函数名列表；可执行文件不支持 -functions 或运行失败时返回空列表
+    """
+    try:
+        mtime = os.stat(executable_path).st_mtime_ns
+    except OSError:
+        return []
+
+    with _cache_lock:
+        cached = _functions_cache.get(executable_path)
+    if cached is not None and cached[0] == mtime:
+        return list(cached[1])
+
+    try:
+        result = subprocess.run(
+            [executable_path, '-functions'],
+            capture_output=True,
+            text=True,
+            encoding='utf-8',
+            errors='replace',
+            timeout=_DISCOVER_TIMEOUT,
+            # 只列出函数，不需要显示器（GUI 测试在没有桌面的机器上也能列出）
+            env={**build_test_env(executable_path), 'QT_QPA_PLATFORM': 'offscreen'}
+        )
+        functions = parse_function_list(result.stdout) if result.returncode == 0 else []
+    except Exception as e:
+        logger.warning(f"列出测试函数失败: {executable_path}: {e}")
+        functions = []
+
+    with _cache_lock:
+        _functions_cache[executable_path] = (mtime, functions)
+    logger.debug(f"发现 {len(functions)} 个测试函数: {executable_path}")
+    return list(functions)
+
+
+def estimate_function_durations(
+    functions: List[str],
+    history: Dict[str, List[float]],
+    test_estimate: Optional[float] = None
+) -> Dict[str, float]:
+    """
+    估算各测试函数的耗时（毫秒）
+
+    有历史的函数取最近几次的中位数；没有历史的函数取其余函数的平均值，
+    全部没有历史时按测试整体耗时平均分配。全部未知时返回空字典。
+
+    Args:
+        functions: 测试函数列表
+        history: {函数名: [耗时毫秒, ...]}
+        test_estimate: 整个测试的估算耗时
+    """
+    known = {f: statistics.median(history[f]) for f in functions if history.get(f)}
+    if known:
+        fill = statistics.mean(known.values())
+    elif test_estimate is not None and functions:
+        fill = test_estimate / len(functions)
+    else:
+        return {}
+    return {f: known.get(f, fill) for f in functions}
+
+
+def split_functions(functions: List[str], estimates: Dict[str, float], shards: int) -> List[List[str]]:
+    """
+    按估算耗时把测试函数分配到若干分片（最长优先，每次放入当前最轻的分片）
+
+    没有估算时按函数数量平均分配。返回的分片保持函数的声明顺序，且不含空分片。
+    """
+    shards = max(1, min(shards, len(functions)))
+    bins: List[List[str]] = [[] for _ in range(shards)]
+    loads = [0.0] * shards
+    order = sorted(functions, key=lambda f: -estimates.get(f, 1.0))
+    for function in order:
+        target = loads.index(min(loads))
+        bins[target].append(function)
+        loads[target] += estimates.get(function, 1.0)
+    position = {f: i for i, f in enumerate(functions)}
+    return [sorted(b, key=position.__getitem__) for b in bins if b]
+
+
+def plan_shards(
+    functions: List[str],
+    estimates: Dict[str, float],
+    test_estimate: Optional[float],
+    max_shards: int
+) -> List[TestShard]:
+    """
+    决定一个测试的分片方式
+
+    分片数不超过 max_shards 和函数数，且每个分片的估算耗时不低于 MIN_SHARD_MS；
+    耗时未知的测试按 max_shards 拆分（可能很长，先拆开更稳妥）。
+
+    Args:
+        functions: 测试函数列表（为空时不分片）
+        estimates: 各函数的估算耗时
+        test_estimate: 整个测试的估算耗时
+        max_shards: 最大分片数（通常为并发数）
+    """
+    total = sum(estimates.values()) if estimates else test_estimate
+    if len(functions) < 2 or max_shards < 2:
+        return [TestShard(index=0, count=1, expected_ms=total)]
+
+    if total is None:
+        count = min(max_shards, len(functions))
+    else:
+        count = min(max_shards, len(functions), max(1, math.floor(total / MIN_SHARD_MS)))
+    if count < 2:
+        return [TestShard(index=0, count=1, expected_ms=total)]
+
+    groups = split_functions(functions, estimates, count)
+    return [
+        TestShard(
+            index=i,
+            count=len(groups),
+            functions=group,
+            expected_ms=sum(estimates[f] for f in group) if estimates else None,
+        )
+        for i, group in enumerate(groups)
+    ]
+
+
+def function_durations_from_cases(details: List[TestCaseResult]) -> Dict[str, float]:
+    """按函数汇总用例耗时（来自 QTest XML 输出，不含 initTestCase / cleanupTestCase）"""
+    durations: Dict[str, float] = {}
+    for case in details:
+        if case.duration_ms is None or case.name in FIXTURE_FUNCTIONS:
+            continue
+        durations[case.name] = durations.get(case.name, 0.0) + case.duration_ms
+    return durations
+
+
+def apportion_duration(functions: List[str], estimates: Dict[str, float], cost_ms: float) -> Dict[str, float]:
+    """把一个分片的实测耗时按估算比例分摊到各函数（没有估算时平均分摊）"""
+    if not functions:
+        return {}
+    weights = [estimates.get(f, 0.0) for f in functions]
+    total = sum(weights)
+    if total <= 0:
+        return {f: cost_ms / len(functions) for f in functions}
+    return {f: cost_ms * w / total for f, w in zip(functions, weights)}
+
+
+def merge_shard_results(test_name: str, results: List[TestResult], wall_ms: float) -> TestResult:
+    """
+    把同一个测试各分片的结果合并为一个 TestResult
+
+    Args:
+        test_name: 测试名称
+        results: 各分片的结果（按分片顺序）
+        wall_ms: 该测试从第一个分片开始到最后一个分片结束的墙钟耗时
+    """
+    if len(results) == 1:
+        return results[0]
+
+    passed = failed = skipped = 0
+    details: List[TestCaseResult] = []
+    outputs = []
+    seen_fixtures = set()
+    for i, result in enumerate(results):
+        passed += result.passed
+        failed += result.failed
+        skipped += result.skipped
+        outputs.append(f"===== 分片 {i + 1}/{len(results)} =====\n{result.output}")
+        for case in result.details:
+            if case.name in FIXTURE_FUNCTIONS and case.status == 'PASS':
+                # 每个分片都会运行 initTestCase / cleanupTestCase，通过时只计一次
+                if case.name in seen_fixtures:
+                    passed = max(0, passed - 1)
+                    continue
+                seen_fixtures.add(case.name)
+            details.append(case)
+
+    if any(r.status == 'error' for r in results):
+        status = 'error'
+    elif any(r.status == 'failed' for r in results):
+        status = 'failed'
+    else:
+        status = 'passed'
+
+    return TestResult(
+        test_name=test_name,
+        status=status,
+        total=passed + failed + skipped,
+        passed=passed,
+        failed=failed,
+        skipped=skipped,
+        duration=f"{wall_ms:.0f}ms",
+        output='\n'.join(outputs),
+        details=details,
+        benchmarks=[b for result in results for b in result.benchmarks]
+    )
@@ -0,0 +1,505 @@
+"""
+单元测试套件运行器
+并行运行项目中的全部单元测试
+
+- 有界并发（默认 CPU 核数），每个测试仍是独立的 QTest 进程
+- 按历史耗时从长到短调度：长测试先启动，避免最后才启动的长测试拖长总耗时；
+  没有历史记录的测试耗时未知，排在最前面
+- 测试函数较多的耗时测试按函数拆成多个分片并行运行（见 test_sharding），
+  单个慢测试文件不再决定整个套件的墙钟耗时
+- 每个测试结束时通过回调推送该测试的结果和累计统计；运行中每个用例的结果也可以实时推送
+- 可执行文件和源文件都没有变化、且上次通过的测试直接报告为 "cached pass"（见 test_cache），
+  force=True 时忽略缓存全部重新运行
+- 每个测试的超时根据其历史耗时计算（见 test_timeouts），各分片的超时时间和实际耗时一并记录
+- 每个测试在独立的运行环境中执行（见 test_env_profiles）：默认自动选择并缓存 offscreen / xvfb / desktop，
+  需要显示器的 GUI 测试也可以并行运行
+- 全部结束后在一个事务中写入数据库，并对比墙钟耗时与串行累计耗时
+"""
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from core.database import TestDatabase
+from core.utils.logger import logger
+from .unit_test_scanner import scan_unit_tests, UnitTestFile
+from .unit_test_runner import run_unit_test, parse_duration_ms, TestResult
+from .test_recorder import TestRecorder
+from .test_cache import TestResultCache, compute_test_fingerprint
+from .test_timeouts import TimeoutPolicy
+from .test_env_profiles import EnvProfileManager, AUTO_PROFILE
+from .test_sharding import (
+    TestShard, discover_test_functions, estimate_function_durations,
+    plan_shards, apportion_duration, function_durations_from_cases, merge_shard_results
+)
+
+# 估算耗时时使用的最近运行次数
+HISTORY_WINDOW = 5
+
+
+@dataclass
+class SuiteTestResult:
+    """套件中单个测试的执行情况"""
+    test: UnitTestFile
+    result: TestResult
+    order: int                          # 调度顺序（从 0 开始）
+    expected_ms: Optional[float] = None  # 根据历史估算的耗时，None 表示没有历史
+    start_ms: float = 0.0               # 相对套件开始的时间
+    cost_ms: float = 0.0                # 各分片耗时之和（含进程启动）
+    wall_ms: float = 0.0                # 第一个分片开始到最后一个分片结束
+    shards: int = 1
+    run_id: Optional[int] = None
+    cached: bool = False                # 命中结果缓存，run_id 为原运行记录
+    timeout_s: Optional[float] = None   # 每个分片的超时时间
+    env_profile: Optional[str] = None   # 使用的运行环境（各分片不同时以逗号分隔）
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            **self.result.to_dict(),
+            'executable_path': self.test.executable_path,
+            'order': self.order,
+            'expected_ms': round(self.expected_ms, 2) if self.expected_ms is not None else None,
+            'start_ms': round(self.start_ms, 2),
+            'cost_ms': round(self.cost_ms, 2),
+            'wall_ms': round(self.wall_ms, 2),
+            'shards': self.shards,
+            'run_id': self.run_id,
+            'cached': self.cached,
+            'timeout_s': round(self.timeout_s, 2) if self.timeout_s is not None else None,
+            'env_profile': self.env_profile,
+        }
+
+
+@dataclass
+class SuiteReport:
+    """测试套件运行报告"""
+    project_path: str
+    results: List[SuiteTestResult] = field(default_factory=list)
+    missing: List[str] = field(default_factory=list)   # 可执行文件不存在（未编译）的测试
+    workers: int = 0
+    wall_ms: float = 0.0
+    cancelled: bool = False
+
+    @property
+    def serial_ms(self) -> float:
+        """各测试耗时之和（串行执行所需时间）"""
+        return sum(r.cost_ms for r in self.results)
+
+    @property
+    def speedup(self) -> float:
+        return self.serial_ms / self.wall_ms if self.wall_ms > 0 else 0.0
+
+    def count(self, status: str) -> int:
+        return sum(1 for r in self.results if r.result.status == status)
+
+    def to_dict(self) -> Dict[str, Any]:
+        passed = self.count('passed')
+        return {
+            'success': bool(self.results) and passed == len(self.results) and not self.cancelled,
+            'project_path': self.project_path,
+            'total': len(self.results),
+            'passed': passed,
+            'failed': self.count('failed'),
+            'error': self.count('error'),
+            'cached': sum(1 for r in self.results if r.cached),
+            'missing': self.missing,
+            'cancelled': self.cancelled,
+            'workers': self.workers,
+            'wall_ms': round(self.wall_ms, 2),
+            'serial_ms': round(self.serial_ms, 2),
+            'speedup': round(self.speedup, 2),
+            'results': [r.to_dict() for r in sorted(self.results, key=lambda r: r.order)],
+        }
+
+
+def estimate_durations(history: Dict[str, List[str]]) -> Dict[str, float]:
+    """根据最近几次运行的耗时文本估算各测试的耗时（中位数，毫秒）"""
+    estimates = {}
+    for test_name, durations in history.items():
+        values = [ms for ms in (parse_duration_ms(d) for d in durations) if ms is not None]
+        if values:
+            estimates[test_name] = statistics.median(values)
+    return estimates
+
+
+def schedule_longest_first(tests: List[UnitTestFile], estimates: Dict[str, float]) -> List[UnitTestFile]:
+    """按估算耗时从长到短排序，没有历史的测试排在最前面（同组内按名称）"""
+    return sorted(
+        tests,
+        key=lambda t: (t.name in estimates, -estimates.get(t.name, 0.0), t.name)
+    )
+
+
+@dataclass
+class _TestPlan:
+    """一个测试的分片计划"""
+    order: int
+    test: UnitTestFile
+    functions: List[str]                 # -functions 列出的测试函数，未知时为空
+    function_estimates: Dict[str, float]
+    shards: List[TestShard]
+    timeout_s: Optional[float] = None    # 根据历史耗时计算的超时
+
+
+class TestSuiteRunner:
+    """单元测试套件运行器
+
+    示例:
+        >>> runner = TestSuiteRunner(TestDatabase(), max_workers=4)
+        >>> report = runner.run("playground/diagramscene_ultima")
+        >>> print(report.to_dict()["speedup"])
+    """
+
+    def __init__(
+        self,
+        db: TestDatabase,
+        max_workers: Optional[int] = None,
+        on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+        cancel_event: Optional[threading.Event] = None,
+        shard_functions: bool = True,
+        on_case: Optional[Callable[[Dict[str, Any]], None]] = None,
+        use_cache: bool = True,
+        env_profile: Optional[str] = AUTO_PROFILE
+    ):
+        """
+        Args:
+            db: 测试数据库（读取历史耗时、写入本次结果）
+            max_workers: 同时运行的测试进程数，默认取 CPU 核数
+            on_result: 每个测试结束时的回调，参数为该测试的结果和累计统计
+            cancel_event: 取消事件，置位后不再启动新的测试
+            shard_functions: 是否把耗时测试按测试函数拆成多个分片并行运行
+            on_case: 运行中每个用例结果解析出来时的回调（在测试输出的读取线程中调用）
+            use_cache: 是否跳过可执行文件和源文件都没有变化、且上次通过的测试
+            env_profile: 运行环境 offscreen / xvfb / desktop，auto 时按测试自动选择并缓存
+        """
+        self.db = db
+        self.recorder = TestRecorder(db)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.on_result = on_result
+        self.cancel_event = cancel_event or threading.Event()
+        self.shard_functions = shard_functions
+        self.on_case = on_case
+        self.use_cache = use_cache
+        self.cache = TestResultCache(db)
+        self.timeouts = TimeoutPolicy(db)
+        self.env_profile = env_profile
+
+    def run(
+        self,
+        project_path: str,
+        test_names: Optional[List[str]] = None,
+        force: bool = False
+    ) -> SuiteReport:
+        """
+        运行项目的单元测试
+
+        Args:
+            project_path: 项目路径
+            test_names: 只运行这些测试，默认运行扫描到的全部测试
+            force: 忽略结果缓存，全部重新运行
+
+        Returns:
+            套件报告
+        """
+        tests = scan_unit_tests(project_path)
+        if test_names is not None:
+            tests = [t for t in tests if t.name in test_names]
+        report = SuiteReport(project_path=project_path)
+        report.missing = [t.name for t in tests if not t.exists]
+        runnable = [t for t in tests if t.exists]
+
+        fingerprints: Dict[str, Optional[str]] = {}
+        if self.use_cache:
+            fingerprints = {t.name: compute_test_fingerprint(project_path, t) for t in runnable}
+            if not force:
+                runnable = self._take_cached(project_path, runnable, fingerprints, report)
+
+        estimates = estimate_durations(
+            self.db.get_recent_durations(project_path, 'unit', HISTORY_WINDOW)
+        )
+        ordered = schedule_longest_first(runnable, estimates)
+        plans = [self._plan(project_path, order, test, estimates.get(test.name))
+                 for order, test in enumerate(ordered)]
+        shard_count = sum(len(p.shards) for p in plans)
+        report.workers = max(1, min(self.max_workers, shard_count))
+        logger.info(
+            f"测试套件开始: {len(ordered)} 个测试 ({shard_count} 个分片), {report.workers} 个并发, "
+            f"{len(report.results)} 个命中缓存, {len(report.missing)} 个未编译"
+        )
+
+        suite_start = time.perf_counter()
+        shard_results: Dict[str, List[Tuple[TestShard, SuiteTestResult]]] = {}
+        if plans:
+            # 本次启动的 Xvfb 显示在套件结束后关闭
+            with EnvProfileManager(self.db) as profiles:
+                self._run_all(project_path, profiles, plans, estimates, report, suite_start,
+                              shard_results, len(report.results) + len(plans))
+        report.wall_ms = (time.perf_counter() - suite_start) * 1000
+        report.cancelled = self.cancel_event.is_set()
+
+        # 全部结束后一次写入（一个事务），避免每个测试单独提交
+        finished = sorted((r for r in report.results if not r.cached), key=lambda r: r.order)
+        if finished:
+            try:
+                run_ids = self.recorder.record_unit_tests(project_path, [r.result for r in finished])
+                for item, run_id in zip(finished, run_ids):
+                    item.run_id = run_id
+                self._record_function_durations(project_path, plans, shard_results)
+                self._record_timeouts(project_path, plans, shard_results)
+                if self.use_cache:
+                    self.cache.update(project_path, [
+                        (r.test.name, fingerprints.get(r.test.name), r.result, r.run_id) for r in finished
+                    ])
+            except Exception as e:
+                logger.error(f"测试套件结果保存失败: {e}")
+
+        logger.info(
+            f"测试套件完成: {report.count('passed')}/{len(report.results)} 通过, "
+            f"墙钟 {report.wall_ms / 1000:.1f}s, 串行累计 {report.serial_ms / 1000:.1f}s, "
+            f"加速比 {report.speedup:.2f}x"
+        )
+        return report
+
+    def _take_cached(
+        self,
+        project_path: str,
+        tests: List[UnitTestFile],
+        fingerprints: Dict[str, Optional[str]],
+        report: SuiteReport
+    ) -> List[UnitTestFile]:
+        """命中缓存的测试直接加入报告，返回仍需运行的测试"""
+        remaining = []
+        for test in tests:
+            hit = self.cache.lookup(project_path, test.name, fingerprints.get(test.name))
+            if hit is None:
+                remaining.append(test)
+                continue
+            run_id, result = hit
+            item = SuiteTestResult(
+                test=test,
+                result=result,
+                order=len(tests) + len(report.results),  # 排在运行的测试之后
+                run_id=run_id,
+                cached=True,
+            )
+            report.results.append(item)
+            logger.info(f"{test.name}: 未变化，使用缓存结果 (run_id={run_id})")
+            self._notify(item, report, len(tests))
+        return remaining
+
+    def _plan(self, project_path: str, order: int, test: UnitTestFile, test_estimate: Optional[float]) -> _TestPlan:
+        """列出测试函数并决定分片方式（不分片时整个测试是一个分片）"""
+        timeout_s = self.timeouts.timeout_for(project_path, test.name, 'unit').timeout_s
+        if not self.shard_functions or self.max_workers < 2:
+            shard = TestShard(index=0, count=1, expected_ms=test_estimate)
+            return _TestPlan(order, test, [], {}, [shard], timeout_s)
+
+        functions = discover_test_functions(test.executable_path)
+        function_estimates = estimate_function_durations(
+            functions,
+            self.db.get_function_durations(project_path, test.name, HISTORY_WINDOW),
+            test_estimate
+        )
+        shards = plan_shards(functions, function_estimates, test_estimate, self.max_workers)
+        if len(shards) > 1:
+            logger.info(f"{test.name}: {len(functions)} 个测试函数拆成 {len(shards)} 个分片")
+        return _TestPlan(order, test, functions, function_estimates, shards, timeout_s)
+
+    def _run_all(
+        self,
+        project_path: str,
+        profiles: EnvProfileManager,
+        plans: List[_TestPlan],
+        estimates: Dict[str, float],
+        report: SuiteReport,
+        suite_start: float,
+        shard_results: Dict[str, List[Tuple[TestShard, SuiteTestResult]]],
+        total: int
+    ):
+        """按估算耗时从长到短提交各分片，同一测试的分片全部结束后合并为一个结果"""
+        def run_one(plan: _TestPlan, shard: TestShard) -> Optional[SuiteTestResult]:
+            if self.cancel_event.is_set():
+                return None
+            on_case = self._case_callback(plan.test, shard)
+            result, profile, cost_ms = profiles.run(
+                project_path,
+                plan.test.name,
+                plan.test.executable_path,
+                lambda env: run_unit_test(
+                    plan.test.executable_path,
+                    plan.test.name,
+                    shard.functions,
+                    on_case=on_case,
+                    timeout=plan.timeout_s,
+                    env=env
+                ),
+                self.env_profile
+            )
+            # 只计实际采用的那次运行（不含因环境问题换 profile 前的尝试）
+            start_ms = (time.perf_counter() - suite_start) * 1000 - cost_ms
+            return SuiteTestResult(
+                test=plan.test,
+                result=result,
+                order=plan.order,
+                expected_ms=shard.expected_ms,
+                start_ms=start_ms,
+                cost_ms=cost_ms,
+                env_profile=profile,
+            )
+
+        # 分片和未分片的测试一起按估算耗时排序（没有估算的排在最前面）
+        work = [(plan, shard) for plan in plans for shard in plan.shards]
+        work.sort(key=lambda w: (w[1].expected_ms is not None, -(w[1].expected_ms or 0.0), w[0].order))
+        remaining = {plan.test.name: len(plan.shards) for plan in plans}
+        by_name = {plan.test.name: plan for plan in plans}
+
+        with ThreadPoolExecutor(max_workers=report.workers, thread_name_prefix="unit-test") as executor:
+            # 线程池按提交顺序领取任务，因此提交顺序就是启动顺序
+            futures = {executor.submit(run_one, plan, shard): (plan, shard) for plan, shard in work}
+            for future in as_completed(futures):
+                plan, shard = futures[future]
+                name = plan.test.name
+                remaining[name] -= 1
+                item = future.result()
+                if item is not None:
+                    shard_results.setdefault(name, []).append((shard, item))
+                if remaining[name] > 0:
+                    continue
+
+                parts = sorted(shard_results.get(name, []), key=lambda p: p[0].index)
+                if len(parts) < len(plan.shards):
+                    # 部分分片因取消未运行，结果不完整，不计入报告
+                    continue
+                merged = self._merge(by_name[name], parts, estimates.get(name))
+                report.results.append(merged)
+                logger.info(
+                    f"[{len(report.results)}/{total}] {name}: "
+                    f"{merged.result.status} ({merged.wall_ms:.0f}ms"
+                    f"{f', {merged.shards} 个分片' if merged.shards > 1 else ''})"
+                )
+                self._notify(merged, report, total)
+
+    @staticmethod
+    def _merge(
+        plan: _TestPlan,
+        parts: List[Tuple[TestShard, SuiteTestResult]],
+        expected_ms: Optional[float]
+    ) -> SuiteTestResult:
+        """合并同一测试各分片的执行情况"""
+        items = [item for _, item in parts]
+        start_ms = min(item.start_ms for item in items)
+        wall_ms = max(item.start_ms + item.cost_ms for item in items) - start_ms
+        return SuiteTestResult(
+            test=plan.test,
+            result=merge_shard_results(plan.test.name, [item.result for item in items], wall_ms),
+            order=plan.order,
+            expected_ms=expected_ms,
+            start_ms=start_ms,
+            cost_ms=sum(item.cost_ms for item in items),
+            wall_ms=wall_ms,
+            shards=len(items),
+            timeout_s=plan.timeout_s,
+            env_profile=','.join(dict.fromkeys(item.env_profile for item in items if item.env_profile)) or None,
+        )
+
+    def _record_function_durations(
+        self,
+        project_path: str,
+        plans: List[_TestPlan],
+        shard_results: Dict[str, List[Tuple[TestShard, SuiteTestResult]]]
+    ):
+        """记录各测试函数的耗时，作为下次分片的依据
+
+        优先使用 QTest XML 给出的函数耗时；没有时把分片的实测耗时按估算比例分摊到各函数。
+        """
+        for plan in plans:
+            if plan.test.name not in shard_results:
+                continue
+            durations: Dict[str, float] = {}
+            for shard, item in shard_results[plan.test.name]:
+                if item.result.status == 'error':
+                    continue  # 超时等情况的耗时不代表函数的真实耗时
+                measured = function_durations_from_cases(item.result.details)
+                if measured:
+                    durations.update(measured)
+                elif plan.functions:
+                    functions = shard.functions or plan.functions
+                    durations.update(apportion_duration(functions, plan.function_estimates, item.cost_ms))
+            self.db.save_function_durations(project_path, plan.test.name, durations)
+
+    def _record_timeouts(
+        self,
+        project_path: str,
+        plans: List[_TestPlan],
+        shard_results: Dict[str, List[Tuple[TestShard, SuiteTestResult]]]
+    ):
+        """记录各分片的超时时间和实际耗时（被取消的分片不记录）"""
+        observations = []
+        for plan in plans:
+            for shard, item in shard_results.get(plan.test.name, []):
+                if item.result.duration == 'cancelled':
+                    continue
+                observations.append((
+                    plan.test.name,
+                    plan.timeout_s,
+                    item.cost_ms,
+                    item.result.duration == 'timeout',
+                    shard.functions is not None,
+                ))
+        self.timeouts.record(project_path, 'unit', observations)
+
+    def _case_callback(self, test: UnitTestFile, shard: TestShard) -> Optional[Callable]:
+        """生成推送单个用例结果的回调"""
+        if self.on_case is None:
+            return None
+        on_case = self.on_case
+
+        def notify(case):
+            on_case({'test_name': test.name, 'shard': shard.label, 'case': case.to_dict()})
+        return notify
+
+    def _notify(self, item: SuiteTestResult, report: SuiteReport, total: int):
+        """推送单个测试的结果和累计统计，回调异常不影响套件执行"""
+        if self.on_result is None:
+            return
+        data = item.to_dict()
+        data.pop('output', None)  # 完整输出在最终报告中返回
+        try:
+            self.on_result({
+                'result': data,
+                'completed': len(report.results),
+                'total': total,
+                'passed': report.count('passed'),
+                'failed': report.count('failed'),
+                'error': report.count('error'),
+            })
+        except Exception as e:
+            logger.error(f"测试套件进度回调失败: {e}")
+
+
+def run_unit_test_suite(
+    project_path: str,
+    db: TestDatabase,
+    max_workers: Optional[int] = None,
+    test_names: Optional[List[str]] = None,
+    on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+    cancel_event: Optional[threading.Event] = None,
+    shard_functions: bool = True,
+    on_case: Optional[Callable[[Dict[str, Any]], None]] = None,
+    force: bool = False,
+    env_profile: Optional[str] = AUTO_PROFILE
+) -> Dict[str, Any]:
+    """运行单元测试套件（字典接口，供 API 层调用）"""
+    runner = TestSuiteRunner(
+        db,
+        max_workers=max_workers,
+        on_result=on_result,
+        cancel_event=cancel_event,
+        shard_functions=shard_functions,
+        on_case=on_case,
+        env_profile=env_profile
+    )
+    return runner.run(project_path, test_names, force=force).to_dict()
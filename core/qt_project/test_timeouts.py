@@ -0,0 +1,167 @@
+"""
+自适应测试超时
+根据每个测试的历史耗时决定超时时间，替代固定的 30 秒（单元测试）/ 60 秒（UI 测试）
+
+- timeout = p99(最近 HISTORY_WINDOW 次的进程耗时) × multiplier，限制在 [floor, ceiling] 之间；
+  历史不足 MIN_SAMPLES 次时使用默认超时
+- 耗时取自超时记录表中完整运行（非分片、非单函数）且未超时的进程墙钟耗时，
+  记录不足时退回 test_runs 中 QTest 报告的耗时
+- 连续超时的测试每次把超时时间加倍（不超过 ceiling），变慢的正常测试不会一直被误杀
+- 算出的超时随测试保存（test_timeouts 表），每次运行的超时时间、实际耗时和是否超时都写入
+  test_timeout_log，便于调整 multiplier / floor / ceiling
+"""
+import math
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.database import TestDatabase
+from core.utils.logger import logger
+from .unit_test_runner import parse_duration_ms, UNIT_TEST_TIMEOUT
+from .ui_test_runner import UI_TEST_TIMEOUT
+
+# 没有历史时的默认超时（秒）
+DEFAULT_TIMEOUTS = {'unit': UNIT_TEST_TIMEOUT, 'ui': UI_TEST_TIMEOUT}
+# p99 的倍数
+TIMEOUT_MULTIPLIER = 3.0
+# 超时的下限和上限（秒）
+MIN_TIMEOUT = 10.0
+MAX_TIMEOUT = 600.0
+# 参与计算的历史次数
+HISTORY_WINDOW = 20
+# 使用历史所需的最少次数
+MIN_SAMPLES = 3
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """最近秩法求百分位数（q 取 0~100）"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+@dataclass
+class TimeoutDecision:
+    """一个测试的超时时间及其依据"""
+    timeout_s: float
+    source: str                      # 'history' | 'default'
+    p99_ms: Optional[float] = None
+    samples: int = 0
+    timeout_streak: int = 0          # 最近连续超时的次数
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'timeout_s': round(self.timeout_s, 2),
+            'source': self.source,
+            'p99_ms': round(self.p99_ms, 2) if self.p99_ms is not None else None,
+            'samples': self.samples,
+            'timeout_streak': self.timeout_streak,
+        }
+
+
+def compute_timeout(
+    durations_ms: List[float],
+    default_s: float,
+    multiplier: float = TIMEOUT_MULTIPLIER,
+    floor: float = MIN_TIMEOUT,
+    ceiling: float = MAX_TIMEOUT,
+    timeout_streak: int = 0
+) -> TimeoutDecision:
+    """
+    根据历史耗时计算超时
+
+    Args:
+        durations_ms: 历史耗时（毫秒）
+        default_s: 历史不足时的超时（秒）
+        multiplier: p99 的倍数
+        floor: 下限（秒）
+        ceiling: 上限（秒）
+        timeout_streak: 最近连续超时的次数，每次把超时时间加倍
+    """
+    if len(durations_ms) >= MIN_SAMPLES:
+        p99 = percentile(durations_ms, 99)
+        timeout = min(ceiling, max(floor, p99 * multiplier / 1000))
+        decision = TimeoutDecision(timeout, 'history', p99, len(durations_ms))
+    else:
+        decision = TimeoutDecision(default_s, 'default', None, len(durations_ms))
+    if timeout_streak:
+        decision.timeout_s = min(ceiling, decision.timeout_s * 2 ** timeout_streak)
+        decision.timeout_streak = timeout_streak
+    return decision
+
+
+class TimeoutPolicy:
+    """按测试历史耗时决定超时，并记录每次运行的结果"""
+
+    def __init__(
+        self,
+        db: TestDatabase,
+        multiplier: float = TIMEOUT_MULTIPLIER,
+        floor: float = MIN_TIMEOUT,
+        ceiling: float = MAX_TIMEOUT
+    ):
+        """
+        Args:
+            db: 测试数据库
+            multiplier: p99 的倍数
+            floor: 超时下限（秒）
+            ceiling: 超时上限（秒）
+        """
+        self.db = db
+        self.multiplier = multiplier
+        self.floor = floor
+        self.ceiling = ceiling
+
+    def timeout_for(self, project_path: str, test_name: str, test_type: str = 'unit') -> TimeoutDecision:
+        """
+        决定测试的超时时间（并随测试保存）
+
+        Args:
+            project_path: 项目路径
+            test_name: 测试名称
+            test_type: 'unit' | 'ui'
+        """
+        default = DEFAULT_TIMEOUTS.get(test_type, DEFAULT_TIMEOUTS['unit'])
+        try:
+            durations, streak = self.db.get_timeout_history(project_path, test_name, test_type, HISTORY_WINDOW)
+            if len(durations) < MIN_SAMPLES:
+                recorded = self.db.get_recent_durations(project_path, test_type, HISTORY_WINDOW).get(test_name, [])
+                parsed = [ms for ms in (parse_duration_ms(d) for d in recorded) if ms is not None]
+                if len(parsed) > len(durations):
+                    durations = parsed
+            decision = compute_timeout(durations, default, self.multiplier, self.floor, self.ceiling, streak)
+            self.db.save_test_timeout(project_path, test_name, test_type, decision.to_dict())
+        except Exception as e:
+            logger.error(f"计算测试超时失败，使用默认超时: {test_name}: {e}")
+            decision = TimeoutDecision(default, 'default')
+        logger.debug(f"{test_name}: 超时 {decision.timeout_s:.1f}s ({decision.source}, {decision.samples} 次历史)")
+        return decision
+
+    def record(self, project_path: str, test_type: str, observations: List[Tuple[str, float, float, bool, bool]]):
+        """
+        记录运行结果（一个事务）
+
+        Args:
+            project_path: 项目路径
+            test_type: 'unit' | 'ui'
+            observations: [(测试名称, 超时秒, 进程耗时毫秒, 是否超时, 是否只运行了部分函数), ...]
+        """
+        try:
+            self.db.save_timeout_observations(project_path, test_type, observations)
+        except Exception as e:
+            logger.error(f"记录测试超时数据失败: {e}")
+
+    def summary(self, project_path: str) -> Dict[str, Any]:
+        """各测试当前的超时及历史运行情况（用于调整策略）"""
+        return {
+            'policy': {
+                'multiplier': self.multiplier,
+                'floor_s': self.floor,
+                'ceiling_s': self.ceiling,
+                'history_window': HISTORY_WINDOW,
+                'min_samples': MIN_SAMPLES,
+                'defaults_s': DEFAULT_TIMEOUTS,
+            },
+            'tests': self.db.get_test_timeouts(project_path),
+        }
@@ -2,12 +2,17 @@
 UI 测试运行器
 运行 UI 测试并收集截图
 """
-import subprocess
 import re
+import threading
 from pathlib import Path
-from typing import List, Optional
+from typing import Callable, Dict, List, Optional
 from dataclasses import dataclass, asdict
 from core.utils.logger import logger
+from .test_process import run_streaming
+from .unit_test_runner import QTestLineParser, TestCaseResult
+
+# 默认超时（秒），通常由 test_timeouts 根据历史耗时给出
+UI_TEST_TIMEOUT = 60.0
 
 
 @dataclass
@@ -50,14 +55,28 @@ class UITestResult:
         }
 
 
-def run_ui_test(executable_path: str, test_name: str, project_dir: str) -> UITestResult:
+def run_ui_test(
+    executable_path: str,
+    test_name: str,
+    project_dir: str,
+    on_case: Optional[Callable[[TestCaseResult], None]] = None,
+    on_output: Optional[Callable[[List[str]], None]] = None,
+    cancel_event: Optional[threading.Event] = None,
+    timeout: Optional[float] = None,
+    env: Optional[Dict[str, str]] = None
+) -> UITestResult:
     """
-    运行 UI 测试并收集截图
+    运行 UI 测试并收集截图（流式读取输出）
     
     Args:
         executable_path: 测试可执行文件路径
         test_name: 测试名称
         project_dir: 项目目录（用于查找截图）
+        on_case: 每个用例结果解析出来时的回调
+        on_output: 批量输出的回调（见 run_streaming）
+        cancel_event: 取消事件，置位后结束测试进程
+        timeout: 超时时间（秒），默认 UI_TEST_TIMEOUT；超时后结束整个进程树
+        env: 环境变量（见 test_env_profiles），默认继承当前进程
         
     Returns:
         UI 测试结果（含截图路径）
@@ -66,23 +85,42 @@ def run_ui_test(executable_path: str, test_name: str, project_dir: str) -> UITes
     
     try:
         # 运行测试（设置工作目录为项目目录）
-        result = subprocess.run(
+        parser = QTestLineParser(on_case=on_case)
+        process = run_streaming(
             [executable_path],
-            capture_output=True,
-            text=True,
-            timeout=60,
-            cwd=project_dir  # 关键：设置工作目录
+            timeout=timeout or UI_TEST_TIMEOUT,
+            env=env,
+            cwd=project_dir,  # 关键：设置工作目录
+            on_line=parser.feed,
+            on_output=on_output,
+            cancel_event=cancel_event
         )
+        parser.finish()
         
-        output = result.stdout + result.stderr
+        output = process.output
         logger.debug(f"测试输出:\n{output}")
         
+        if process.timed_out or process.cancelled:
+            reason = f'测试执行超时（{timeout or UI_TEST_TIMEOUT:g}秒）' if process.timed_out else '测试已取消'
+            logger.error(f"{reason}: {test_name}")
+            return UITestResult(
+                test_name=test_name,
+                status='error',
+                total=0,
+                passed=0,
+                failed=0,
+                skipped=0,
+                duration='timeout' if process.timed_out else 'cancelled',
+                output=f'{output}\n{reason}',
+                screenshots=_collect_screenshots(project_dir)
+            )
+        
         # 解析测试结果
         total, passed, failed, skipped = _parse_test_counts(output)
         duration = _parse_duration(output)
         
         # 确定状态
-        if result.returncode == 0 and failed == 0:
+        if process.return_code == 0 and failed == 0:
             status = 'passed'
         elif failed > 0:
             status = 'failed'
@@ -105,19 +143,6 @@ def run_ui_test(executable_path: str, test_name: str, project_dir: str) -> UITes
             screenshots=screenshots
         )
         
-    except subprocess.TimeoutExpired:
-        logger.error(f"测试超时: {test_name}")
-        return UITestResult(
-            test_name=test_name,
-            status='error',
-            total=0,
-            passed=0,
-            failed=0,
-            skipped=0,
-            duration='timeout',
-            output='测试执行超时',
-            screenshots=[]
-        )
     except Exception as e:
         logger.error(f"运行测试失败: {e}")
         return UITestResult(
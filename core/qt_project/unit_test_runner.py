@@ -1,11 +1,27 @@
 """
 单元测试运行器
 运行 Qt 单元测试并解析结果
+
+QTest 同时输出两份结果：XML（-o file,xml）用于解析，文本（-o -,txt）作为完整输出展示。
+文本输出在运行过程中逐行读取并增量解析，用例结果可以实时推送到前端。
+XML 用 iterparse 增量解析，每个测试函数处理完即释放，大输出也只占用有界内存；
+可执行文件不支持 -o（非 QTest 程序）或没有生成 XML 时退回解析文本输出。
+QBENCHMARK 的结果（XML 的 BenchmarkResult / 文本的 RESULT 行）解析为 TestResult.benchmarks，
+测量后端通过 -tickcounter / -eventcounter / -callgrind 选择。
 """
-import subprocess
+import os
 import re
-from typing import Dict, List, Optional
-from dataclasses import dataclass, asdict
+import tempfile
+import threading
+import xml.etree.ElementTree as ET
+from typing import Callable, Dict, IO, List, Optional, Union
+from dataclasses import dataclass, asdict, field
+
+from core.utils.logger import logger
+from .test_process import run_streaming
+
+# 默认超时（秒），通常由 test_timeouts 根据历史耗时给出
+UNIT_TEST_TIMEOUT = 30.0
 
 
 @dataclass
@@ -14,11 +30,47 @@ class TestCaseResult:
     name: str              # 测试用例名称
     status: str            # 'PASS' | 'FAIL' | 'SKIP'
     message: Optional[str] = None  # 失败信息
+    data_tag: Optional[str] = None      # 数据驱动测试的数据行
+    duration_ms: Optional[float] = None # 数据驱动测试按数据行平均分摊函数耗时
+    file: Optional[str] = None          # 失败/跳过的源码位置
+    line: Optional[int] = None
     
     def to_dict(self):
         return asdict(self)
 
 
+@dataclass
+class BenchmarkResult:
+    """QBENCHMARK 的一个测量结果"""
+    function: str          # 测试函数
+    data_tag: Optional[str]  # 数据驱动测试的数据行
+    metric: str            # 度量，如 WalltimeMilliseconds、CPUTicks、Events、InstructionReads
+    value: float           # 每次迭代的测量值
+    iterations: int        # 迭代次数
+    
+    def to_dict(self):
+        return asdict(self)
+
+
+# QBENCHMARK 的测量后端 -> 命令行参数（walltime 为默认后端）
+BENCHMARK_BACKENDS = {
+    'walltime': None,
+    'tickcounter': '-tickcounter',
+    'eventcounter': '-eventcounter',
+    'callgrind': '-callgrind',
+}
+
+
+def benchmark_args(backend: Optional[str]) -> List[str]:
+    """测量后端对应的 QTest 命令行参数"""
+    if backend is None:
+        return []
+    if backend not in BENCHMARK_BACKENDS:
+        raise ValueError(f"不支持的 benchmark 后端: {backend}（可选 {', '.join(BENCHMARK_BACKENDS)}）")
+    flag = BENCHMARK_BACKENDS[backend]
+    return [flag] if flag else []
+
+
 @dataclass
 class TestResult:
     """测试结果"""
@@ -31,6 +83,7 @@ class TestResult:
     duration: str          # 耗时
     output: str            # 完整输出
     details: List[TestCaseResult]  # 详细结果
+    benchmarks: List[BenchmarkResult] = field(default_factory=list)  # QBENCHMARK 结果
     
     def to_dict(self):
         return {
@@ -42,78 +95,110 @@ class TestResult:
             'skipped': self.skipped,
             'duration': self.duration,
             'output': self.output,
-            'details': [d.to_dict() for d in self.details]
+            'details': [d.to_dict() for d in self.details],
+            'benchmarks': [b.to_dict() for b in self.benchmarks]
         }
 
 
-def run_unit_test(executable_path: str, test_name: str) -> TestResult:
+def build_test_env(executable_path: str) -> Dict[str, str]:
+    """
+    构建运行测试可执行文件的环境变量（Windows 上把 Qt bin 目录加入 PATH）
+    
+    Args:
+        executable_path: 测试可执行文件路径
+        
+    Returns:
+        环境变量
+    """
+    import os
+    import platform
+    from pathlib import Path
+    
+    # 设置环境变量，添加 Qt bin 目录到 PATH
+    env = os.environ.copy()
+    
+    # 尝试查找 Qt bin 目录
+    # 在 Windows 上，Qt DLL 通常在项目附近或 Qt 安装目录
+    possible_qt_paths = []
+    
+    if platform.system() == "Windows":
+        # 查找常见的 Qt 路径
+        for drive in ['C:', 'D:']:
+            possible_qt_paths.extend([
+                f"{drive}\\Qt\\6.10.1\\mingw_64\\bin",
+                f"{drive}\\qtcreator\\6.10.1\\mingw_64\\bin",
+            ])
+        
+        # 添加到 PATH
+        for qt_path in possible_qt_paths:
+            if Path(qt_path).exists():
+                env['PATH'] = f"{qt_path};{env['PATH']}"
+                break
+    
+    return env
+
+
+def run_unit_test(
+    executable_path: str,
+    test_name: str,
+    functions: Optional[List[str]] = None,
+    on_case: Optional[Callable[[TestCaseResult], None]] = None,
+    on_output: Optional[Callable[[List[str]], None]] = None,
+    cancel_event: Optional[threading.Event] = None,
+    benchmark_backend: Optional[str] = None,
+    timeout: Optional[float] = None,
+    env: Optional[Dict[str, str]] = None
+) -> TestResult:
     """
-    运行单元测试
+    运行单元测试（流式读取输出）
     
     Args:
         executable_path: 测试可执行文件路径
         test_name: 测试名称
+        functions: 只运行这些测试函数（QTest 命令行参数），默认运行全部
+        on_case: 每个用例结果解析出来时的回调
+        on_output: 批量输出的回调（见 run_streaming）
+        cancel_event: 取消事件，置位后结束测试进程
+        benchmark_backend: QBENCHMARK 测量后端（见 BENCHMARK_BACKENDS），默认 walltime
+        timeout: 超时时间（秒），默认 UNIT_TEST_TIMEOUT；超时后结束整个进程树
+        env: 环境变量（见 test_env_profiles），默认 build_test_env
         
     Returns:
         测试结果
     """
+    extra_args = benchmark_args(benchmark_backend)
+    timeout = timeout or UNIT_TEST_TIMEOUT
+    xml_fd, xml_path = tempfile.mkstemp(prefix='qtest_', suffix='.xml')
+    os.close(xml_fd)
     try:
-        import os
-        import platform
-        from pathlib import Path
-        
-        # 设置环境变量，添加 Qt bin 目录到 PATH
-        env = os.environ.copy()
-        
-        # 从可执行文件路径推断 Qt 安装位置
-        exe_path = Path(executable_path)
-        
-        # 尝试查找 Qt bin 目录
-        # 在 Windows 上，Qt DLL 通常在项目附近或 Qt 安装目录
-        possible_qt_paths = []
+        env = env or build_test_env(executable_path)
+        parser = QTestLineParser(on_case=on_case)
         
-        if platform.system() == "Windows":
-            # 查找常见的 Qt 路径
-            for drive in ['C:', 'D:']:
-                possible_qt_paths.extend([
-                    f"{drive}\\Qt\\6.10.1\\mingw_64\\bin",
-                    f"{drive}\\qtcreator\\6.10.1\\mingw_64\\bin",
-                ])
-            
-            # 添加到 PATH
-            for qt_path in possible_qt_paths:
-                if Path(qt_path).exists():
-                    env['PATH'] = f"{qt_path};{env['PATH']}"
-                    break
-        
-        # 运行测试
-        result = subprocess.run(
-            [executable_path],
-            capture_output=True,
-            text=True,
-            encoding='utf-8',
-            errors='replace',  # 遇到无法解码的字节用 � 替换
-            timeout=30,
-            env=env
+        # 运行测试（XML 写入临时文件，文本输出到 stdout 并逐行解析）
+        process = run_streaming(
+            [executable_path, '-o', f'{xml_path},xml', '-o', '-,txt', *extra_args, *(functions or [])],
+            timeout=timeout,
+            env=env,
+            on_line=parser.feed,
+            on_output=on_output,
+            cancel_event=cancel_event
         )
+        parser.finish()
         
-        output = result.stdout + result.stderr
+        if process.timed_out or process.cancelled:
+            # 保留已经完成的用例和最后的输出，便于定位卡住的位置
+            reason = f'测试超时（{timeout:g}秒）' if process.timed_out else '测试已取消'
+            result = parser.result(test_name, f'{process.output}\n{reason}', -1)
+            result.status = 'error'
+            result.duration = 'timeout' if process.timed_out else 'cancelled'
+            return result
         
-        # 解析输出
-        return parse_qtest_output(test_name, output, result.returncode)
+        # 解析输出：优先 XML，没有生成 XML 时使用文本解析结果
+        parsed = parse_qtest_xml(test_name, xml_path, process.output, process.return_code)
+        if parsed is not None:
+            return parsed
+        return parser.result(test_name, process.output, process.return_code)
         
-    except subprocess.TimeoutExpired:
-        return TestResult(
-            test_name=test_name,
-            status='error',
-            total=0,
-            passed=0,
-            failed=0,
-            skipped=0,
-            duration='timeout',
-            output='测试超时（30秒）',
-            details=[]
-        )
     except Exception as e:
         return TestResult(
             test_name=test_name,
@@ -126,11 +211,201 @@ def run_unit_test(executable_path: str, test_name: str) -> TestResult:
             output=f'运行失败: {str(e)}',
             details=[]
         )
+    finally:
+        try:
+            os.remove(xml_path)
+        except OSError:
+            pass
+
+
+def parse_duration_ms(duration: str) -> Optional[float]:
+    """
+    把耗时文本（如 "12ms"、"1.5s"）转换为毫秒
+    
+    Args:
+        duration: TestResult.duration
+        
+    Returns:
+        毫秒数；无法解析（如 "timeout"）时返回 None
+    """
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*(ms|s)?\s*', duration or '')
+    if not match:
+        return None
+    value = float(match.group(1))
+    return value * 1000 if match.group(2) == 's' else value
+
+
+# 文本输出中的用例结果行
+# 格式: PASS   : TestClass::testMethod()
+# 格式: FAIL!  : TestClass::testMethod(dataTag) 'a == b' returned FALSE.
+# 格式: SKIP   : TestClass::testMethod() reason
+_CASE_LINE_PATTERN = re.compile(r'^(PASS|FAIL!|SKIP)\s+:\s+\w+::(\w+)\((.*?)\)(.*)$')
+# 格式:    Loc: [/path/to/tst_foo.cpp(42)]
+_LOC_LINE_PATTERN = re.compile(r'^\s*Loc:\s+\[(.*)\((\d+)\)\]')
+# 总结行格式: Totals: 4 passed, 0 failed, 0 skipped, 0 blacklisted, 1ms
+_TOTALS_PATTERN = re.compile(
+    r'Totals:\s+(\d+)\s+passed,\s+(\d+)\s+failed,\s+(\d+)\s+skipped,\s+\d+\s+blacklisted,\s+(\d+\w+)'
+)
+
+_TEXT_STATUS = {'PASS': 'PASS', 'FAIL!': 'FAIL', 'SKIP': 'SKIP'}
+
+# Benchmark 结果行，下一行（或几行）是测量值
+# 格式: RESULT : TestClass::benchMethod():"dataTag":
+_BENCHMARK_LINE_PATTERN = re.compile(r'^RESULT\s+:\s+\w+::(\w+)\(\):(?:"(.*)":)?\s*$')
+# 格式:      0.00012 msecs per iteration (total: 64, iterations: 524288)
+_BENCHMARK_VALUE_PATTERN = re.compile(
+    r'^\s+([\d.,eE+-]+)\s+(.+?)\s+per iteration\s+\(total:\s*[\d.,eE+-]+,\s*iterations:\s*(\d+)\)'
+)
+# 文本输出中的单位 -> XML 中的度量名称
+_BENCHMARK_UNITS = {
+    'msecs': 'WalltimeMilliseconds',
+    'nsecs': 'WalltimeNanoseconds',
+    'CPU ticks': 'CPUTicks',
+    'CPU cycles': 'CPUCycles',
+    'events': 'Events',
+    'instruction reads': 'InstructionReads',
+    'instructions': 'Instructions',
+    'bytes': 'BytesAllocated',
+}
+
+
+class QTestLineParser:
+    """QTest 文本输出的增量解析器
+    
+    逐行输入输出，每解析出一个用例结果就回调 on_case。
+    失败/跳过的用例要等到 Loc 源码位置行（或下一个用例 / RESULT / Totals 行、输出结束）才回调；
+    其间缩进的详情行（如 QCOMPARE 的 Actual / Expected）追加到 message。
+    """
+    
+    def __init__(self, on_case: Optional[Callable[[TestCaseResult], None]] = None):
+        self.details: List[TestCaseResult] = []
+        self.totals: Optional[re.Match] = None
+        self._on_case = on_case
+        self._pending: Optional[TestCaseResult] = None   # 等待 Loc 行的用例
+        self.benchmarks: List[BenchmarkResult] = []
+        self._benchmark: Optional[tuple] = None          # 等待测量值行的 (函数, 数据行)
+    
+    def feed(self, line: str):
+        """输入一行输出"""
+        if self._benchmark is not None:
+            value = _BENCHMARK_VALUE_PATTERN.match(line)
+            if value:
+                self._add_benchmark(value)
+                return
+            self._benchmark = None
+        bench = _BENCHMARK_LINE_PATTERN.match(line)
+        if bench:
+            self._emit_pending()
+            self._benchmark = (bench.group(1), bench.group(2) or None)
+            return
+        
+        match = _CASE_LINE_PATTERN.match(line)
+        if match:
+            self._emit_pending()
+            status = _TEXT_STATUS[match.group(1)]
+            message = match.group(4).strip() if status != 'PASS' else None
+            case = TestCaseResult(
+                name=match.group(2),
+                status=status,
+                message=message or None,
+                data_tag=match.group(3) or None
+            )
+            self.details.append(case)
+            if status == 'PASS':
+                self._notify(case)
+            else:
+                self._pending = case
+            return
+        
+        # 失败/跳过行之后的源码位置
+        loc = _LOC_LINE_PATTERN.match(line)
+        if loc:
+            if self._pending is not None:
+                self._pending.file = loc.group(1)
+                self._pending.line = int(loc.group(2))
+            self._emit_pending()
+            return
+        
+        totals = _TOTALS_PATTERN.search(line)
+        if totals:
+            self._emit_pending()
+            self.totals = totals
+            return
+        
+        # 失败详情（Actual / Expected 等缩进行）
+        if self._pending is not None and line[:1].isspace() and line.strip():
+            detail = line.strip()
+            self._pending.message = f"{self._pending.message}\n{detail}" if self._pending.message else detail
+    
+    def finish(self):
+        """输出结束"""
+        self._emit_pending()
+    
+    def result(self, test_name: str, output: str, return_code: int) -> TestResult:
+        """根据已解析的内容生成测试结果"""
+        details = self.details
+        if self.totals:
+            passed = int(self.totals.group(1))
+            failed = int(self.totals.group(2))
+            skipped = int(self.totals.group(3))
+            duration = self.totals.group(4)
+            total = passed + failed + skipped
+            
+            status = 'passed' if failed == 0 and return_code == 0 else 'failed'
+        else:
+            # 无法解析，使用返回码判断
+            passed = len([d for d in details if d.status == 'PASS'])
+            failed = len([d for d in details if d.status == 'FAIL'])
+            skipped = len([d for d in details if d.status == 'SKIP'])
+            total = passed + failed + skipped
+            duration = '0ms'
+            status = 'passed' if return_code == 0 else 'failed'
+        
+        return TestResult(
+            test_name=test_name,
+            status=status,
+            total=total,
+            passed=passed,
+            failed=failed,
+            skipped=skipped,
+            duration=duration,
+            output=output,
+            details=details,
+            benchmarks=self.benchmarks
+        )
+    
+    def _add_benchmark(self, match: re.Match):
+        try:
+            value = float(match.group(1).replace(',', ''))
+        except ValueError:
+            return
+        function, data_tag = self._benchmark
+        unit = match.group(2).strip()
+        self.benchmarks.append(BenchmarkResult(
+            function=function,
+            data_tag=data_tag,
+            metric=_BENCHMARK_UNITS.get(unit, unit),
+            value=value,
+            iterations=int(match.group(3))
+        ))
+    
+    def _emit_pending(self):
+        if self._pending is not None:
+            case, self._pending = self._pending, None
+            self._notify(case)
+    
+    def _notify(self, case: TestCaseResult):
+        if self._on_case is None:
+            return
+        try:
+            self._on_case(case)
+        except Exception as e:
+            logger.error(f"用例结果回调失败: {e}")
 
 
 def parse_qtest_output(test_name: str, output: str, return_code: int) -> TestResult:
     """
-    解析 QTest 输出
+    解析 QTest 文本输出（单次逐行扫描）
     
     Args:
         test_name: 测试名称
@@ -140,63 +415,177 @@ def parse_qtest_output(test_name: str, output: str, return_code: int) -> TestRes
     Returns:
         测试结果
     """
-    details = []
-    
-    # 解析每个测试用例
-    # 格式: PASS   : TestClass::testMethod()
-    # 格式: FAIL!  : TestClass::testMethod() ...
-    pass_pattern = r'PASS\s+:\s+\w+::(\w+)\(\)'
-    fail_pattern = r'FAIL!\s+:\s+\w+::(\w+)\(\)'
-    
-    for match in re.finditer(pass_pattern, output):
-        details.append(TestCaseResult(
-            name=match.group(1),
-            status='PASS'
-        ))
+    parser = QTestLineParser()
+    for line in output.splitlines():
+        parser.feed(line)
+    parser.finish()
+    return parser.result(test_name, output, return_code)
+
+
+# XML 中 Incident 类型对应的用例状态（b 开头为黑名单中的用例，按跳过统计）
+_INCIDENT_STATUS = {
+    'pass': 'PASS',
+    'xfail': 'PASS',
+    'fail': 'FAIL',
+    'xpass': 'FAIL',
+    'skip': 'SKIP',
+    'bpass': 'SKIP',
+    'bfail': 'SKIP',
+    'bxpass': 'SKIP',
+    'bxfail': 'SKIP',
+}
+# 同一数据行有多个 Incident 时（如 xfail 之后 pass）取最严重的状态
+_STATUS_RANK = {'PASS': 0, 'SKIP': 1, 'FAIL': 2}
+
+
+def _child_text(element: ET.Element, tag: str) -> Optional[str]:
+    child = element.find(tag)
+    if child is None or child.text is None:
+        return None
+    return child.text.strip() or None
+
+
+def _parse_msecs(element: ET.Element) -> Optional[float]:
+    try:
+        return float(element.get('msecs', ''))
+    except ValueError:
+        return None
+
+
+def _parse_benchmark(element: ET.Element, function: str) -> Optional[BenchmarkResult]:
+    """解析 <BenchmarkResult metric=".." tag=".." value=".." iterations=".."/>（value 为每次迭代的值）"""
+    try:
+        value = float(element.get('value', ''))
+        iterations = int(element.get('iterations') or 1)
+    except ValueError:
+        return None
+    return BenchmarkResult(
+        function=function,
+        data_tag=element.get('tag') or None,
+        metric=element.get('metric') or 'WalltimeMilliseconds',
+        value=value,
+        iterations=iterations
+    )
+
+
+def parse_qtest_xml(
+    test_name: str,
+    source: Union[str, IO[bytes]],
+    output: str,
+    return_code: int
+) -> Optional[TestResult]:
+    """
+    增量解析 QTest XML 输出（-o file,xml）
     
-    for match in re.finditer(fail_pattern, output):
-        # 尝试提取失败信息
-        case_name = match.group(1)
-        # 查找下一行的错误信息
-        lines = output[match.end():].split('\n')
-        message = lines[0].strip() if lines else None
-        
-        details.append(TestCaseResult(
-            name=case_name,
-            status='FAIL',
-            message=message
-        ))
+    每个 TestFunction 结束时生成其各数据行的结果并释放已处理的元素，
+    耗时与输出大小成线性关系，内存占用与单个测试函数的大小相关。
+    XML 被截断（进程崩溃）时保留已解析的结果，并把执行中的函数记为失败。
     
-    # 解析总结行
-    # 格式: Totals: 4 passed, 0 failed, 0 skipped, 0 blacklisted, 1ms
-    totals_pattern = r'Totals:\s+(\d+)\s+passed,\s+(\d+)\s+failed,\s+(\d+)\s+skipped,\s+\d+\s+blacklisted,\s+(\d+\w+)'
-    totals_match = re.search(totals_pattern, output)
-    
-    if totals_match:
-        passed = int(totals_match.group(1))
-        failed = int(totals_match.group(2))
-        skipped = int(totals_match.group(3))
-        duration = totals_match.group(4)
-        total = passed + failed + skipped
+    Args:
+        test_name: 测试名称
+        source: XML 文件路径或二进制文件对象
+        output: 文本输出（作为 TestResult.output）
+        return_code: 返回码
         
-        status = 'passed' if failed == 0 and return_code == 0 else 'failed'
-    else:
-        # 无法解析，使用返回码判断
-        passed = len([d for d in details if d.status == 'PASS'])
-        failed = len([d for d in details if d.status == 'FAIL'])
-        skipped = 0
-        total = passed + failed
-        duration = '0ms'
-        status = 'passed' if return_code == 0 else 'failed'
+    Returns:
+        测试结果；没有有效的 QTest XML 时返回 None
+    """
+    details: List[TestCaseResult] = []
+    benchmarks: List[BenchmarkResult] = []
+    rows: Dict[Optional[str], TestCaseResult] = {}   # 当前函数的各数据行
+    function: Optional[str] = None
+    function_ms: Optional[float] = None
+    total_ms: Optional[float] = None
+    root: Optional[ET.Element] = None
+    
+    def add_incident(element: ET.Element, status: str):
+        tag = _child_text(element, 'DataTag')
+        case = rows.get(tag)
+        if case is None:
+            case = rows[tag] = TestCaseResult(name=function, status=status, data_tag=tag)
+        elif _STATUS_RANK[status] > _STATUS_RANK[case.status]:
+            case.status = status
+        else:
+            return
+        if status != 'PASS':
+            case.message = _child_text(element, 'Description')
+            line = int(element.get('line') or 0)
+            if element.get('file') and line > 0:
+                case.file = element.get('file')
+                case.line = line
+    
+    def finish_function():
+        cases = list(rows.values())
+        if function_ms is not None and cases:
+            for case in cases:
+                case.duration_ms = function_ms / len(cases)
+        details.extend(cases)
+        rows.clear()
+    
+    try:
+        for event, element in ET.iterparse(source, events=('start', 'end')):
+            if root is None:
+                if element.tag != 'TestCase':
+                    return None
+                root = element
+            if event == 'start':
+                if element.tag == 'TestFunction':
+                    function = element.get('name')
+                    function_ms = None
+                continue
+            
+            if element.tag == 'Incident' and function is not None:
+                status = _INCIDENT_STATUS.get(element.get('type', ''))
+                if status is not None:
+                    add_incident(element, status)
+            elif element.tag == 'Message' and function is not None and element.get('type') == 'skip':
+                # Qt 5 以 Message 报告跳过
+                add_incident(element, 'SKIP')
+            elif element.tag == 'BenchmarkResult' and function is not None:
+                benchmark = _parse_benchmark(element, function)
+                if benchmark is not None:
+                    benchmarks.append(benchmark)
+            elif element.tag == 'Duration':
+                if function is not None:
+                    function_ms = _parse_msecs(element)
+                else:
+                    total_ms = _parse_msecs(element)
+            elif element.tag == 'TestFunction':
+                finish_function()
+                function = None
+                root.clear()  # 释放已处理的测试函数
+    except OSError:
+        return None
+    except ET.ParseError:
+        if root is None:
+            return None
+        if function is not None:
+            # 进程在该函数执行期间退出，XML 不完整
+            rows.setdefault(None, TestCaseResult(name=function, status='FAIL'))
+            for case in rows.values():
+                if case.status != 'FAIL':
+                    continue
+                case.message = case.message or f'测试进程异常退出（返回码 {return_code}）'
+            finish_function()
+    
+    if root is None:
+        return None
+    
+    passed = len([d for d in details if d.status == 'PASS'])
+    failed = len([d for d in details if d.status == 'FAIL'])
+    skipped = len([d for d in details if d.status == 'SKIP'])
+    if total_ms is None:
+        total_ms = sum(d.duration_ms or 0.0 for d in details)
     
     return TestResult(
         test_name=test_name,
-        status=status,
-        total=total,
+        status='passed' if failed == 0 and return_code == 0 else 'failed',
+        total=passed + failed + skipped,
         passed=passed,
         failed=failed,
         skipped=skipped,
-        duration=duration,
+        duration=f'{total_ms:.0f}ms',
         output=output,
-        details=details
+        details=details,
+        benchmarks=benchmarks
     )
@@ -3,6 +3,11 @@
 提供视觉测试等高级功能
 """
 from .visual_agent import VisualAgent
+from .batch_runner import BatchRunner, BatchJob, BatchReport, run_pipeline_batch
+from .job_manager import JobManager, Job, JobEvent
 
-__all__ = ['VisualAgent']
+__all__ = [
+    'VisualAgent', 'BatchRunner', 'BatchJob', 'BatchReport', 'run_pipeline_batch',
+    'JobManager', 'Job', 'JobEvent',
+]
 
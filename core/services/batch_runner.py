@@ -0,0 +1,359 @@
+"""
+批量 Pipeline 运行器
+
+把多个 (pipeline 文件, 入口节点) 任务分配到 N 个工作进程并行执行:
+- 每个工作进程拥有独立的 Xvfb 显示，被测应用和 pyautogui 输入互不干扰
+- 工作进程常驻，依次领取任务（每个任务重新启动一次被测应用）
+- 汇总为一份报告，对比墙钟耗时与各任务累计耗时
+"""
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.utils.logger import logger
+from core.utils.xvfb import XvfbDisplay
+from .batch_worker import RESULT_MARKER
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+
+
+@dataclass
+class BatchJob:
+    """批量任务"""
+    pipeline_path: str
+    entry: str
+    resource_dir: Optional[str] = None
+    launch_app: bool = True
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "BatchJob":
+        return cls(
+            pipeline_path=data["pipeline_path"],
+            entry=data["entry"],
+            resource_dir=data.get("resource_dir"),
+            launch_app=data.get("launch_app", True),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class BatchJobResult:
+    """单个任务的结果"""
+    job_id: int
+    job: BatchJob
+    worker: int = -1
+    display: Optional[str] = None
+    success: bool = False
+    error: Optional[str] = None
+    app_launched: bool = False
+    start_ms: float = 0.0         # 相对批量开始的时间
+    cost_ms: float = 0.0
+    log_dir: Optional[str] = None
+    pipeline_result: Optional[Dict[str, Any]] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            **self.job.to_dict(),
+            "worker": self.worker,
+            "display": self.display,
+            "success": self.success,
+            "error": self.error,
+            "app_launched": self.app_launched,
+            "start_ms": round(self.start_ms, 2),
+            "cost_ms": round(self.cost_ms, 2),
+            "log_dir": self.log_dir,
+            "pipeline_result": self.pipeline_result,
+        }
+
+
+@dataclass
+class BatchReport:
+    """批量运行报告"""
+    results: List[BatchJobResult] = field(default_factory=list)
+    workers: int = 0
+    displays: List[str] = field(default_factory=list)
+    wall_ms: float = 0.0
+    output_dir: Optional[str] = None
+
+    @property
+    def cumulative_ms(self) -> float:
+        """各任务耗时之和（串行执行所需时间）"""
+        return sum(r.cost_ms for r in self.results)
+
+    @property
+    def speedup(self) -> float:
+        return self.cumulative_ms / self.wall_ms if self.wall_ms > 0 else 0.0
+
+    @property
+    def passed(self) -> int:
+        return sum(1 for r in self.results if r.success)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "success": bool(self.results) and self.passed == len(self.results),
+            "total": len(self.results),
+            "passed": self.passed,
+            "failed": len(self.results) - self.passed,
+            "workers": self.workers,
+            "displays": self.displays,
+            "wall_ms": round(self.wall_ms, 2),
+            "cumulative_ms": round(self.cumulative_ms, 2),
+            "speedup": round(self.speedup, 2),
+            "output_dir": self.output_dir,
+            "results": [r.to_dict() for r in sorted(self.results, key=lambda r: r.job_id)],
+        }
+
+
+class _WorkerProcess:
+    """一个工作进程及其输出读取线程"""
+
+    def __init__(self, index: int, env: Dict[str, str], target_exe: Optional[str], log_path: Path):
+        cmd = [sys.executable, "-m", "core.services.batch_worker"]
+        if target_exe:
+            cmd += ["--target-exe", target_exe]
+        self.index = index
+        self._log_file = open(log_path, "a", encoding="utf-8")
+        self.process = subprocess.Popen(
+            cmd,
+            cwd=str(PROJECT_ROOT),
+            env=env,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=self._log_file,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+            bufsize=1,
+        )
+        self._results: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue()
+        self._reader = threading.Thread(target=self._read_stdout, daemon=True)
+        self._reader.start()
+
+    def _read_stdout(self):
+        """逐行读取输出：结果行放入队列，其余作为日志写入文件"""
+        for line in self.process.stdout:
+            if line.startswith(RESULT_MARKER):
+                self._results.put(json.loads(line[len(RESULT_MARKER):]))
+            elif line.strip():
+                self._log_file.write(line)
+        self._results.put(None)  # 进程已退出
+
+    def run(self, job: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        """提交任务并等待结果
+
+        Raises:
+            TimeoutError: 超时
+            RuntimeError: 工作进程异常退出
+        """
+        self.process.stdin.write(json.dumps(job, ensure_ascii=False) + "\n")
+        self.process.stdin.flush()
+        try:
+            result = self._results.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f"任务超时 ({timeout}s)")
+        if result is None:
+            try:
+                code = self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                code = None
+            raise RuntimeError(f"工作进程异常退出 (code={code})")
+        return result
+
+    def close(self, kill: bool = False):
+        try:
+            if kill:
+                self.process.kill()
+            else:
+                self.process.stdin.close()
+            self.process.wait(timeout=10)
+        except (OSError, subprocess.TimeoutExpired):
+            self.process.kill()
+            self.process.wait()
+        finally:
+            self._log_file.close()
+
+
+class BatchRunner:
+    """批量 Pipeline 运行器
+
+    示例:
+        >>> runner = BatchRunner(workers=4)
+        >>> report = runner.run([
+        ...     BatchJob("core/vision/examples/freecharts_test.json", "开始测试"),
+        ...     BatchJob("core/vision/examples/diagramscene_pipeline.json", "开始"),
+        ... ])
+        >>> print(report.to_dict()["speedup"])
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        target_exe: Optional[str] = None,
+        use_xvfb: bool = True,
+        screen_size: Tuple[int, int] = (1920, 1080),
+        output_dir: Optional[str] = None,
+        job_timeout: float = 600.0
+    ):
+        """
+        Args:
+            workers: 并行进程数，默认取 CPU 核数
+            target_exe: 被测程序路径，默认使用 VisualAgent 的默认程序
+            use_xvfb: 每个工作进程使用独立的 Xvfb 显示；不可用时退化为在当前桌面串行执行
+            screen_size: 虚拟显示分辨率，应与录制模板时的分辨率一致
+            output_dir: 报告和各任务识别截图的输出目录，默认 log/batch/<时间戳>
+            job_timeout: 单个任务的超时时间 (秒)
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.target_exe = target_exe
+        self.use_xvfb = use_xvfb
+        self.screen_size = screen_size
+        self.output_dir = Path(output_dir) if output_dir else (
+            PROJECT_ROOT / "log" / "batch" / datetime.now().strftime("%Y%m%d_%H%M%S")
+        )
+        self.job_timeout = job_timeout
+
+    def run(self, jobs: List[BatchJob]) -> BatchReport:
+        """运行所有任务并汇总报告"""
+        use_xvfb = self.use_xvfb
+        workers = max(1, min(self.workers, len(jobs)))
+        if use_xvfb and not XvfbDisplay.available():
+            logger.warning("Xvfb 不可用，在当前桌面上串行执行")
+            use_xvfb = False
+        if not use_xvfb:
+            # 同一桌面只有一个鼠标和焦点，无法并行
+            workers = 1
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        report = BatchReport(workers=workers, output_dir=str(self.output_dir))
+        job_queue: "queue.Queue[Tuple[int, BatchJob]]" = queue.Queue()
+        for job_id, job in enumerate(jobs):
+            job_queue.put((job_id, job))
+
+        lock = threading.Lock()
+        batch_start = time.perf_counter()
+        logger.info(f"批量运行开始: {len(jobs)} 个任务, {workers} 个进程, Xvfb={use_xvfb}")
+
+        threads = [
+            threading.Thread(
+                target=self._worker_loop,
+                args=(index, use_xvfb, job_queue, report, lock, batch_start),
+                name=f"batch-worker-{index}",
+                daemon=True,
+            )
+            for index in range(workers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # 所有工作进程都启动失败时，剩余任务记为失败
+        while not job_queue.empty():
+            job_id, job = job_queue.get_nowait()
+            report.results.append(BatchJobResult(job_id=job_id, job=job, error="没有可用的工作进程"))
+
+        report.wall_ms = (time.perf_counter() - batch_start) * 1000
+        with open(self.output_dir / "batch_report.json", "w", encoding="utf-8") as f:
+            json.dump(report.to_dict(), f, ensure_ascii=False, indent=2, default=str)
+        logger.info(
+            f"批量运行完成: {report.passed}/{len(report.results)} 通过, "
+            f"墙钟 {report.wall_ms / 1000:.1f}s, 累计 {report.cumulative_ms / 1000:.1f}s, "
+            f"加速比 {report.speedup:.2f}x"
+        )
+        return report
+
+    def _worker_loop(
+        self,
+        index: int,
+        use_xvfb: bool,
+        job_queue: "queue.Queue[Tuple[int, BatchJob]]",
+        report: BatchReport,
+        lock: threading.Lock,
+        batch_start: float
+    ):
+        """一个工作进程的生命周期：启动显示 -> 依次领取任务 -> 清理"""
+        display = XvfbDisplay(*self.screen_size) if use_xvfb else None
+        worker: Optional[_WorkerProcess] = None
+        try:
+            if display:
+                display.start()
+                with lock:
+                    report.displays.append(display.display)
+            env = display.env() if display else dict(os.environ)
+            log_path = self.output_dir / f"worker_{index}.log"
+
+            while True:
+                try:
+                    job_id, job = job_queue.get_nowait()
+                except queue.Empty:
+                    break
+
+                job_log_dir = self.output_dir / f"job_{job_id}"
+                result = BatchJobResult(
+                    job_id=job_id,
+                    job=job,
+                    worker=index,
+                    display=display.display if display else os.environ.get("DISPLAY"),
+                    start_ms=(time.perf_counter() - batch_start) * 1000,
+                    log_dir=str(job_log_dir),
+                )
+
+                if worker is None:
+                    try:
+                        worker = _WorkerProcess(index, env, self.target_exe, log_path)
+                    except Exception as e:
+                        # 已领取的任务记为失败，否则报告里会少一条结果
+                        result.error = f"工作进程启动失败: {e}"
+                        with lock:
+                            report.results.append(result)
+                        raise
+                payload = {"job_id": job_id, "log_dir": str(job_log_dir), **job.to_dict()}
+                job_start = time.perf_counter()
+                try:
+                    data = worker.run(payload, self.job_timeout)
+                    result.success = data.get("success", False)
+                    result.error = data.get("error")
+                    result.app_launched = data.get("app_launched", False)
+                    result.pipeline_result = data.get("pipeline_result")
+                except (TimeoutError, RuntimeError) as e:
+                    # 工作进程状态未知，结束它，下一个任务重新启动
+                    result.error = str(e)
+                    worker.close(kill=True)
+                    worker = None
+                result.cost_ms = (time.perf_counter() - job_start) * 1000
+
+                status = "通过" if result.success else f"失败: {result.error}"
+                logger.info(f"[worker {index}] 任务 {job_id} {job.entry} {status} ({result.cost_ms:.0f}ms)")
+                with lock:
+                    report.results.append(result)
+        except Exception as e:
+            # 该进程无法继续，剩余任务由其他进程领取
+            logger.error(f"[worker {index}] 异常: {e}")
+        finally:
+            if worker is not None:
+                worker.close()
+            if display:
+                display.stop()
+
+
+def run_pipeline_batch(
+    jobs: List[Dict[str, Any]],
+    workers: Optional[int] = None,
+    target_exe: Optional[str] = None,
+    use_xvfb: bool = True
+) -> Dict[str, Any]:
+    """批量运行 Pipeline（字典接口，供 API 层调用）"""
+    runner = BatchRunner(workers=workers, target_exe=target_exe, use_xvfb=use_xvfb)
+    report = runner.run([BatchJob.from_dict(job) for job in jobs])
+    return report.to_dict()
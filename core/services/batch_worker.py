@@ -0,0 +1,86 @@
+"""
+批量 Pipeline 运行的工作进程
+
+由 BatchRunner 以独立进程启动 (python -m core.services.batch_worker)，
+启动前已通过环境变量设置好 DISPLAY，因此 pyautogui 在导入时就绑定到该进程专属的虚拟显示。
+
+协议:
+- stdin: 每行一个任务 JSON
+- stdout: 每个任务完成后输出一行 "@@BATCH_RESULT@@ {结果 JSON}"（其余输出为 Pipeline 日志）
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Any, Dict
+
+RESULT_MARKER = "@@BATCH_RESULT@@"
+
+
+def _emit(result: Dict[str, Any]):
+    sys.stdout.write(f"\n{RESULT_MARKER} {json.dumps(result, ensure_ascii=False, default=str)}\n")
+    sys.stdout.flush()
+
+
+def run_job(agent, job: Dict[str, Any]) -> Dict[str, Any]:
+    """在当前显示上运行一个任务：启动被测应用 -> 运行 Pipeline -> 关闭应用"""
+    from core.vision.plan import resolve_resource_dir
+
+    start = time.perf_counter()
+    result: Dict[str, Any] = {
+        "job_id": job["job_id"],
+        "success": False,
+        "error": None,
+        "app_launched": False,
+        "pipeline_result": None,
+    }
+    try:
+        if job.get("launch_app", True):
+            launch = agent.launch_target_app()
+            result["app_launched"] = launch.get("success", False)
+            if not result["app_launched"]:
+                result["error"] = f"启动被测应用失败: {launch.get('error')}"
+                return result
+
+        pipeline_path = job["pipeline_path"]
+        resource_dir = job.get("resource_dir") or resolve_resource_dir(pipeline_path)
+        pipeline_result = agent.run_pipeline_from_file(
+            pipeline_path,
+            job["entry"],
+            resource_dir,
+            log_dir=job.get("log_dir")
+        )
+        result["pipeline_result"] = pipeline_result
+        result["success"] = pipeline_result.get("success", False)
+        result["error"] = pipeline_result.get("error")
+    except Exception as e:
+        result["error"] = str(e)
+    finally:
+        if result["app_launched"]:
+            agent.close_target_app()
+        result["cost_ms"] = (time.perf_counter() - start) * 1000
+    return result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="批量 Pipeline 工作进程")
+    parser.add_argument("--target-exe", default=None, help="被测程序路径")
+    args = parser.parse_args()
+
+    from core.services.visual_agent import VisualAgent
+    agent = VisualAgent(target_exe_path=args.target_exe)
+
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        job = json.loads(line)
+        result = run_job(agent, job)
+        result["display"] = os.environ.get("DISPLAY")
+        _emit(result)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
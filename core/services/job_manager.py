@@ -0,0 +1,279 @@
+"""
+后台任务管理器
+
+把耗时操作（如 Pipeline 执行）放到后台线程运行，避免阻塞 pywebview 的桥接调用:
+- 每个任务有一个 ID，前端立即拿到 ID 后返回
+- 任务执行中产生的进度事件按序号存入缓冲区，前端通过游标轮询增量获取，
+  也可以注册推送函数（如 window.evaluate_js）主动推送
+- 取消任务时调用任务注册的取消回调（如 Pipeline.stop）
+"""
+import itertools
+import queue
+import threading
+import time
+import traceback
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from core.utils.logger import logger
+
+# 任务状态
+PENDING = "pending"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+
+@dataclass
+class JobEvent:
+    """任务进度事件"""
+    seq: int                  # 任务内递增序号，用作轮询游标
+    job_id: str
+    type: str
+    time: float
+    data: Dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "seq": self.seq,
+            "job_id": self.job_id,
+            "type": self.type,
+            "time": self.time,
+            "data": self.data,
+        }
+
+
+class Job:
+    """后台任务，同时作为任务函数的上下文（emit / on_cancel / cancelled）"""
+
+    def __init__(self, job_id: str, kind: str, params: Dict[str, Any], manager: "JobManager", max_events: int):
+        self.id = job_id
+        self.kind = kind
+        self.params = params
+        self.status = PENDING
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._manager = manager
+        self._events: Deque[JobEvent] = deque(maxlen=max_events)
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._cancel_event = threading.Event()
+        self._cancel_callbacks: List[Callable[[], None]] = []
+        self._done = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    def emit(self, event_type: str, **data):
+        """记录一条进度事件（线程安全）"""
+        with self._lock:
+            self._seq += 1
+            event = JobEvent(self._seq, self.id, event_type, time.time(), data)
+            self._events.append(event)
+        self._manager._push(event)
+
+    def on_cancel(self, callback: Callable[[], None]):
+        """注册取消回调；任务已被取消时立即调用"""
+        with self._lock:
+            self._cancel_callbacks.append(callback)
+        if self.cancelled:
+            callback()
+
+    def cancel(self):
+        self._cancel_event.set()
+        with self._lock:
+            callbacks = list(self._cancel_callbacks)
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"任务 {self.id} 取消回调失败: {e}")
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """等待任务结束"""
+        return self._done.wait(timeout)
+
+    def events_since(self, cursor: int) -> Dict[str, Any]:
+        """取序号大于 cursor 的事件
+
+        Returns:
+            {"events": [...], "cursor": 最新序号, "dropped": 因缓冲区已满而丢失的事件数}
+        """
+        with self._lock:
+            events = [e for e in self._events if e.seq > cursor]
+            first_seq = self._events[0].seq if self._events else self._seq + 1
+            latest = self._seq
+        dropped = max(0, first_seq - cursor - 1) if events else 0
+        return {
+            "events": [e.to_dict() for e in events],
+            "cursor": latest,
+            "dropped": dropped,
+        }
+
+    def to_dict(self, include_result: bool = False) -> Dict[str, Any]:
+        data = {
+            "job_id": self.id,
+            "kind": self.kind,
+            "params": self.params,
+            "status": self.status,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if include_result and self.finished:
+            data["result"] = self.result
+        return data
+
+
+class JobManager:
+    """后台任务管理器
+
+    示例:
+        >>> manager = JobManager()
+        >>> job = manager.submit("demo", lambda job: job.emit("progress", value=1) or 42)
+        >>> manager.poll(job.id, cursor=0)
+    """
+
+    def __init__(self, max_workers: int = 4, max_events: int = 5000, keep_finished: int = 50):
+        """
+        Args:
+            max_workers: 同时运行的任务数
+            max_events: 每个任务保留的最大事件数（超出后丢弃最早的事件）
+            keep_finished: 保留的已结束任务数
+        """
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._max_events = max_events
+        self._keep_finished = keep_finished
+        self._push_func: Optional[Callable[[JobEvent], None]] = None
+        self._push_queue: "queue.Queue[JobEvent]" = queue.Queue()
+        self._push_thread: Optional[threading.Thread] = None
+
+    def set_push(self, func: Optional[Callable[[JobEvent], None]]):
+        """设置事件推送函数
+
+        推送在独立线程中进行，推送慢或失败都不会拖慢任务本身。
+        """
+        self._push_func = func
+        if func and self._push_thread is None:
+            self._push_thread = threading.Thread(target=self._push_loop, name="job-push", daemon=True)
+            self._push_thread.start()
+
+    def submit(self, kind: str, func: Callable[[Job], Any], params: Optional[Dict[str, Any]] = None) -> Job:
+        """提交任务
+
+        Args:
+            kind: 任务类型（仅用于展示）
+            func: 任务函数，接收 Job 作为上下文，返回值作为任务结果
+            params: 任务参数（仅用于展示）
+        """
+        job = Job(f"{kind}-{next(self._ids)}", kind, params or {}, self, self._max_events)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        self._executor.submit(self._run, job, func)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def poll(self, job_id: str, cursor: int = 0) -> Dict[str, Any]:
+        """增量获取任务状态和事件；任务结束后附带结果
+
+        Raises:
+            KeyError: 任务不存在
+        """
+        job = self.get(job_id)
+        if job is None:
+            raise KeyError(f"任务不存在: {job_id}")
+        # 先取状态再取事件，保证返回 finished 时事件已经完整
+        data = job.to_dict(include_result=True)
+        data.update(job.events_since(cursor))
+        return data
+
+    def cancel(self, job_id: str) -> bool:
+        """取消任务，返回任务是否存在且尚未结束"""
+        job = self.get(job_id)
+        if job is None or job.finished:
+            return False
+        job.cancel()
+        return True
+
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [job.to_dict() for job in jobs]
+
+    def shutdown(self, cancel: bool = True):
+        if cancel:
+            with self._lock:
+                jobs = list(self._jobs.values())
+            for job in jobs:
+                if not job.finished:
+                    job.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, job: Job, func: Callable[[Job], Any]):
+        if job.cancelled:
+            self._finish(job, CANCELLED)
+            return
+
+        job.status = RUNNING
+        job.started_at = time.time()
+        job.emit("started", kind=job.kind)
+        status = FAILED
+        try:
+            job.result = func(job)
+            status = CANCELLED if job.cancelled else SUCCEEDED
+        except Exception as e:
+            logger.error(f"任务 {job.id} 执行失败: {e}\n{traceback.format_exc()}")
+            job.error = str(e)
+            status = CANCELLED if job.cancelled else FAILED
+        finally:
+            self._finish(job, status)
+
+    @staticmethod
+    def _finish(job: Job, status: str):
+        """先记录 finished 事件再公开结束状态：poll 先取状态，看到已结束时 finished 事件一定已在缓冲区中"""
+        job.finished_at = time.time()
+        job.emit("finished", status=status, error=job.error)
+        job.status = status
+        job._done.set()
+
+    def _prune(self):
+        """只保留最近的 keep_finished 个已结束任务（调用方持有锁）"""
+        finished = [j for j in self._jobs.values() if j.finished]
+        for job in finished[:max(0, len(finished) - self._keep_finished)]:
+            del self._jobs[job.id]
+
+    def _push(self, event: JobEvent):
+        if self._push_func is not None:
+            self._push_queue.put(event)
+
+    def _push_loop(self):
+        while True:
+            event = self._push_queue.get()
+            func = self._push_func
+            if func is None:
+                continue
+            try:
+                func(event)
+            except Exception as e:
+                logger.warning(f"任务事件推送失败: {e}")
@@ -31,8 +31,16 @@ try:
     from core.vision import (
         TemplateMatcher, TemplateMatcherParam,
         ColorMatcher, ColorMatcherParam,
-        Pipeline, PipelineNode,
-        Rect, RecoResult
+        Pipeline,
+        Rect,
+        load_plan,
+    )
+    from core.vision.actions import ActionBatch, create_action_backend, benchmark_backends
+    from core.vision.replay import FrameRecorder, run_replay
+    from core.vision.roi_learning import RoiStore, suggest_rois
+    from core.vision.scene_inventory import InventoryParam, get_inventory
+    from core.vision.stability import (
+        WaitFreezesParam, frame_signature, wait_until_changed, wait_until_stable,
     )
     VISION_MODULE_AVAILABLE = True
 except ImportError:
@@ -74,6 +82,7 @@ class VisualAgent:
         
         self.target_process = None
         self.ai_client = None
+        self._roi_store = None  # 命中位置历史，首次运行 Pipeline 文件时创建
         
         # 自动从 .env 读取 API Key（如果未提供）
         if not api_key and AI_LIB_AVAILABLE:
@@ -115,8 +124,16 @@ class VisualAgent:
 
     # ==================== 应用程序控制 ====================
 
-    def launch_target_app(self) -> Dict[str, Any]:
-        """启动被测应用程序"""
+    def launch_target_app(self, ready_timeout_ms: int = 15000, settle_ms: int = 500) -> Dict[str, Any]:
+        """启动被测应用程序
+
+        启动后通过截图探测就绪：先等待画面相对启动前发生变化（窗口出现），
+        再等待画面静止 settle_ms（窗口绘制完成），而不是固定睡眠。
+
+        Args:
+            ready_timeout_ms: 等待窗口出现的最长时间 (ms)
+            settle_ms: 窗口出现后画面需要保持静止的时长 (ms)
+        """
         logger.info("启动被测应用程序...")
         
         if not self.target_exe.exists():
@@ -126,15 +143,33 @@ class VisualAgent:
             }
         
         try:
+            probe = VISUAL_LIBS_AVAILABLE and VISION_MODULE_AVAILABLE
+            baseline = frame_signature(self._capture_screen_cv()) if probe else None
+            start = time.perf_counter()
             self.target_process = subprocess.Popen([str(self.target_exe)])
-            time.sleep(2)  # 等待应用启动
             
-            logger.info(f"应用已启动，PID: {self.target_process.pid}")
+            ready = False
+            if probe:
+                ready = self._wait_app_ready(baseline, ready_timeout_ms, settle_ms)
+            else:
+                time.sleep(2)  # 无法截图时退化为固定等待
+            ready_ms = (time.perf_counter() - start) * 1000
+            
+            if self.target_process.poll() is not None:
+                return {
+                    "success": False,
+                    "error": f"应用启动后立即退出 (code={self.target_process.returncode})"
+                }
+            if probe and not ready:
+                logger.warning(f"未检测到应用窗口就绪，已等待 {ready_ms:.0f}ms，继续执行")
+            logger.info(f"应用已启动，PID: {self.target_process.pid}，就绪耗时 {ready_ms:.0f}ms")
             
             return {
                 "success": True,
                 "pid": self.target_process.pid,
-                "path": str(self.target_exe)
+                "path": str(self.target_exe),
+                "ready": ready,
+                "ready_ms": round(ready_ms, 2)
             }
             
         except Exception as e:
@@ -144,6 +179,23 @@ class VisualAgent:
                 "error": str(e)
             }
 
+    def _wait_app_ready(self, baseline: "np.ndarray", timeout_ms: int, settle_ms: int) -> bool:
+        """等待应用窗口出现并绘制完成"""
+        process = self.target_process
+        changed = wait_until_changed(
+            self._capture_screen_cv,
+            baseline,
+            timeout_ms,
+            alive=lambda: process.poll() is None,
+        )
+        if not changed.stable:
+            return False
+        settled = wait_until_stable(
+            self._capture_screen_cv,
+            WaitFreezesParam(time=settle_ms, timeout=max(timeout_ms - int(changed.waited_ms), settle_ms)),
+        )
+        return settled.stable
+
     def close_target_app(self) -> Dict[str, Any]:
         """关闭被测应用程序"""
         logger.info("关闭被测应用程序...")
@@ -261,7 +313,7 @@ class VisualAgent:
         Returns:
             测试结果
         """
-        if not VISUAL_LIBS_AVAILABLE:
+        if not VISUAL_LIBS_AVAILABLE or not VISION_MODULE_AVAILABLE:
             return {"success": False, "error": "视觉库未安装"}
         
         logger.info(f"开始压力测试，迭代次数: {iterations}")
@@ -274,10 +326,13 @@ class VisualAgent:
             "logs": []
         }
         
+        backend = None
         try:
             # 获取屏幕中心区域
             screen_width, screen_height = pyautogui.size()
             center_x, center_y = screen_width // 2, screen_height // 2
+            backend = create_action_backend()
+            results["backend"] = backend.name
             
             for i in range(iterations):
                 try:
@@ -288,11 +343,9 @@ class VisualAgent:
                     x2 = center_x + random.randint(-200, 200)
                     y2 = center_y + random.randint(-200, 200)
                     
-                    # 模拟拖拽连线
-                    pyautogui.moveTo(x1, y1, duration=0.2)
-                    pyautogui.click()
-                    time.sleep(0.1)
-                    pyautogui.dragTo(x2, y2, duration=0.3)
+                    # 模拟拖拽连线：点击、停顿、拖动作为一批事件提交
+                    batch = ActionBatch().click(x1, y1).wait(100).swipe(x1, y1, x2, y2, 300)
+                    backend.submit(batch)
                     
                     results["successful"] += 1
                     results["logs"].append(f"迭代 {i+1}: 成功 ({x1},{y1}) -> ({x2},{y2})")
@@ -308,9 +361,40 @@ class VisualAgent:
         except Exception as e:
             results["success"] = False
             results["error"] = str(e)
+        finally:
+            if backend is not None:
+                backend.close()
         
         return results
 
+    def benchmark_action_backends(self, iterations: int = 20, batch_size: int = 10) -> Dict[str, Any]:
+        """
+        测量各动作后端 (xtest / xdotool / pyautogui) 的分发延迟
+        
+        只移动鼠标，不产生点击
+        
+        Args:
+            iterations: 每项测量的次数
+            batch_size: 批量提交测试中每批的事件数
+        """
+        if not VISION_MODULE_AVAILABLE:
+            return {"success": False, "error": "视觉识别模块未加载"}
+        
+        try:
+            backends = benchmark_backends(iterations=iterations, batch_size=batch_size)
+            try:
+                default_backend = create_action_backend().name
+            except Exception:
+                default_backend = None
+            return {
+                "success": True,
+                "default": default_backend,
+                "backends": backends
+            }
+        except Exception as e:
+            logger.error(f"动作后端基准测试失败: {e}")
+            return {"success": False, "error": str(e)}
+
     def execute_ai_command(self, natural_language: str) -> Dict[str, Any]:
         """
         执行自然语言驱动的测试指令
@@ -608,11 +692,64 @@ class VisualAgent:
             logger.error(f"找图点击失败: {e}")
             return {"success": False, "error": str(e)}
 
+    def scan_scene_inventory(
+        self,
+        templates: Any,
+        resource_dir: str = None,
+        threshold: float = 0.8,
+        roi: List[int] = None
+    ) -> Dict[str, Any]:
+        """
+        场景清单 - 一次扫描找出屏幕上所有已知图标的全部实例
+        
+        同一组模板的清单引擎会被复用（模板只加载一次），画面不变时直接返回缓存结果。
+        
+        Args:
+            templates: 模板目录、文件或通配符（字符串或列表），如 "NodesIcon/*.png"
+            resource_dir: 资源目录，templates 中的相对路径基于该目录
+            threshold: 记录实例的最低分数
+            roi: 只返回中心点在该区域内的实例 [x, y, width, height]
+            
+        Returns:
+            各模板的实例列表、扫描耗时、是否命中缓存
+        """
+        if not VISUAL_LIBS_AVAILABLE or not VISION_MODULE_AVAILABLE:
+            return {"success": False, "error": "视觉模块未安装"}
+        
+        logger.info(f"场景清单扫描: {templates}")
+        
+        try:
+            param = InventoryParam.from_config(
+                {"templates": templates, "threshold": threshold}, resource_dir
+            )
+            if not param.templates:
+                return {"success": False, "error": f"没有匹配到任何模板: {templates}"}
+            inventory = get_inventory(param)
+            
+            image = self._capture_screen_cv()
+            snapshot, cached = inventory.scan(image)
+            
+            if roi:
+                snapshot = snapshot.within(Rect.from_list(roi))
+            
+            data = snapshot.to_dict()
+            data.update({
+                "success": True,
+                "cached": cached,
+                "stats": inventory.stats(),
+            })
+            return data
+            
+        except Exception as e:
+            logger.error(f"场景清单扫描失败: {e}")
+            return {"success": False, "error": str(e)}
+
     def run_pipeline(
         self,
         config: Dict[str, Any],
         entry: str,
-        resource_dir: str = None
+        resource_dir: str = None,
+        job=None
     ) -> Dict[str, Any]:
         """
         运行视觉测试流水线
@@ -621,6 +758,7 @@ class VisualAgent:
             config: Pipeline 配置 (JSON 格式的字典)
             entry: 入口节点名
             resource_dir: 资源目录（模板图片等）
+            job: 后台任务上下文 (JobManager 的 Job)，提供时推送进度事件并支持取消
             
         Returns:
             执行结果
@@ -641,11 +779,13 @@ class VisualAgent:
         
         logger.info(f"运行 Pipeline: 入口 = {entry}")
         
+        pipeline = None
         try:
             # 创建 Pipeline
             pipeline = Pipeline(
                 screen_capture_func=self._capture_screen_cv,
-                resource_dir=resource_dir
+                resource_dir=resource_dir,
+                on_event=self._bind_job(job, lambda: pipeline)
             )
             
             # 加载配置
@@ -659,32 +799,71 @@ class VisualAgent:
         except Exception as e:
             logger.error(f"Pipeline 执行失败: {e}")
             return {"success": False, "error": str(e)}
+        finally:
+            if pipeline is not None:
+                pipeline.close()
 
     def run_pipeline_from_file(
         self,
         json_path: str,
         entry: str,
-        resource_dir: str = None
+        resource_dir: str = None,
+        record_dir: str = None,
+        log_dir: str = None,
+        job=None,
+        auto_roi: bool = False
     ) -> Dict[str, Any]:
         """
         从 JSON 文件运行 Pipeline
         
+        每次运行的命中位置都会记入测试数据库（match_boxes 表），供 auto_roi 和 suggest_pipeline_rois 使用。
+        
         Args:
             json_path: Pipeline 配置文件路径
             entry: 入口节点名
             resource_dir: 资源目录
+            record_dir: 录制目录，提供时保存每一帧截图和动作，之后可用回放模式复现
+            log_dir: 识别截图和 trace 的保存目录，默认为项目 log/ 目录
+            job: 后台任务上下文 (JobManager 的 Job)，提供时推送进度事件并支持取消
+            auto_roi: 未设置 roi 的节点先在历史命中位置附近识别，未命中再搜索全屏
         """
         if not VISUAL_LIBS_AVAILABLE or not VISION_MODULE_AVAILABLE:
             return {"success": False, "error": "视觉模块未安装"}
         
         logger.info(f"从文件运行 Pipeline: {json_path}, 入口 = {entry}")
         
+        import json
+        pipeline = None
+        action_backend = None
         try:
-            import json
-            with open(json_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
+            # 编译结果按文件 mtime 缓存，重复运行同一文件时无需重新解析
+            plan = load_plan(json_path, resource_dir)
+            
+            recorder = None
+            capture_func = self._capture_screen_cv
+            if record_dir:
+                recorder = FrameRecorder(capture_func, record_dir)
+                capture_func = recorder
+                action_backend = recorder.wrap_backend(create_action_backend())
+            
+            options = {"log_dir": log_dir} if log_dir else {}
+            pipeline = Pipeline(
+                screen_capture_func=capture_func,
+                resource_dir=resource_dir,
+                action_backend=action_backend,
+                on_event=self._bind_job(job, lambda: pipeline),
+                roi_store=self._get_roi_store(),
+                auto_roi=auto_roi,
+                **options
+            )
+            pipeline.load_plan(plan)
+            
+            result = pipeline.run(entry)
             
-            return self.run_pipeline(config, entry, resource_dir)
+            data = result.to_dict()
+            if recorder:
+                data["record_manifest"] = recorder.save_manifest(pipeline.last_reco_results)
+            return data
             
         except FileNotFoundError:
             return {"success": False, "error": f"配置文件不存在: {json_path}"}
@@ -693,6 +872,101 @@ class VisualAgent:
         except Exception as e:
             logger.error(f"Pipeline 执行失败: {e}")
             return {"success": False, "error": str(e)}
+        finally:
+            if pipeline is not None:
+                pipeline.close()
+            if action_backend is not None:
+                action_backend.close()
+    
+    def _get_roi_store(self) -> Optional["RoiStore"]:
+        """命中位置历史；数据库不可用时返回 None（不影响 Pipeline 运行）"""
+        if self._roi_store is None:
+            try:
+                self._roi_store = RoiStore()
+            except Exception as e:
+                logger.warning(f"命中位置历史不可用: {e}")
+        return self._roi_store
+
+    def suggest_pipeline_rois(self, json_path: str, min_samples: int = 3) -> Dict[str, Any]:
+        """
+        根据历史命中位置为 Pipeline 中的节点推荐 ROI
+        
+        Args:
+            json_path: Pipeline 配置文件路径
+            min_samples: 至少命中多少次才给出建议
+            
+        Returns:
+            各节点建议的 roi、命中次数和预计加速比
+        """
+        if not VISION_MODULE_AVAILABLE:
+            return {"success": False, "error": "视觉模块未安装"}
+        
+        import json
+        try:
+            store = self._get_roi_store()
+            if store is None:
+                return {"success": False, "error": "命中位置历史不可用"}
+            return suggest_rois(json_path, store, min_samples=min_samples).to_dict()
+        except FileNotFoundError:
+            return {"success": False, "error": f"配置文件不存在: {json_path}"}
+        except json.JSONDecodeError as e:
+            return {"success": False, "error": f"JSON 解析错误: {e}"}
+        except Exception as e:
+            logger.error(f"ROI 建议生成失败: {e}")
+            return {"success": False, "error": str(e)}
+
+    @staticmethod
+    def _bind_job(job, get_pipeline):
+        """把 Pipeline 的进度事件转发到后台任务，并在任务取消时停止 Pipeline
+
+        取消回调在收到第一个事件时才注册：run() 开始时会重置停止标志，
+        在此之前到达的取消请求由 on_cancel 在注册时立即补上。
+        """
+        if job is None:
+            return None
+        bound = []
+
+        def on_event(event_type: str, data: Dict[str, Any]):
+            job.emit(event_type, **data)
+            if not bound:
+                bound.append(True)
+                job.on_cancel(lambda: get_pipeline().stop())
+        return on_event
+
+    def run_pipeline_replay(
+        self,
+        json_path: str,
+        entry: str,
+        source: str,
+        resource_dir: str = None,
+        repeat: int = 3
+    ) -> Dict[str, Any]:
+        """
+        在录制的帧序列上回放 Pipeline（不需要被测应用和真实输入）
+        
+        Args:
+            json_path: Pipeline 配置文件路径
+            entry: 入口节点名
+            source: 帧目录或视频文件
+            resource_dir: 资源目录
+            repeat: 回放次数，用于统计识别耗时
+        """
+        if not VISION_MODULE_AVAILABLE:
+            return {"success": False, "error": "视觉模块未安装"}
+        
+        logger.info(f"回放 Pipeline: {json_path}, 入口 = {entry}, 帧 = {source}")
+        
+        import json
+        try:
+            report = run_replay(json_path, entry, source, resource_dir, repeat=repeat)
+            return report.to_dict()
+        except FileNotFoundError as e:
+            return {"success": False, "error": f"文件不存在: {e}"}
+        except json.JSONDecodeError as e:
+            return {"success": False, "error": f"JSON 解析错误: {e}"}
+        except Exception as e:
+            logger.error(f"Pipeline 回放失败: {e}")
+            return {"success": False, "error": str(e)}
 
     def wait_for_template(
         self,
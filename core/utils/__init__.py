@@ -1,3 +1,4 @@
 from .logger import logger, setup_logger
+from .xvfb import XvfbDisplay
 
-__all__ = ["logger", "setup_logger"]
+__all__ = ["logger", "setup_logger", "XvfbDisplay"]
@@ -0,0 +1,121 @@
+"""
+Xvfb 虚拟显示
+
+为每个测试进程启动独立的 X 显示，使多个 GUI 测试可以并行运行而互不抢占鼠标和屏幕。
+仅支持 Linux (需要安装 Xvfb)。
+"""
+import os
+import select
+import shutil
+import subprocess
+import sys
+from typing import Dict, Optional
+
+from .logger import logger
+
+
+class XvfbDisplay:
+    """独立的 Xvfb 显示
+
+    示例:
+        >>> with XvfbDisplay(1920, 1080) as display:
+        ...     subprocess.run(["app"], env=display.env())
+    """
+
+    def __init__(
+        self,
+        width: int = 1920,
+        height: int = 1080,
+        depth: int = 24,
+        startup_timeout: float = 10.0
+    ):
+        self.width = width
+        self.height = height
+        self.depth = depth
+        self.startup_timeout = startup_timeout
+        self.display: Optional[str] = None
+        self._process: Optional[subprocess.Popen] = None
+
+    @staticmethod
+    def available() -> bool:
+        """当前系统是否可以使用 Xvfb"""
+        return sys.platform.startswith("linux") and shutil.which("Xvfb") is not None
+
+    @property
+    def running(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def start(self) -> str:
+        """启动 Xvfb，返回显示名 (如 ":99")
+
+        使用 -displayfd 让 Xvfb 自行选择空闲的显示号，并在就绪后写回，
+        避免多个进程同时启动时抢占同一个显示号。
+        """
+        if self.running:
+            return self.display
+        if not self.available():
+            raise RuntimeError("Xvfb 不可用（需要 Linux 并安装 Xvfb）")
+
+        read_fd, write_fd = os.pipe()
+        try:
+            self._process = subprocess.Popen(
+                [
+                    "Xvfb",
+                    "-displayfd", str(write_fd),
+                    "-screen", "0", f"{self.width}x{self.height}x{self.depth}",
+                    "-nolisten", "tcp",
+                ],
+                pass_fds=(write_fd,),
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            os.close(write_fd)
+            write_fd = -1
+
+            ready, _, _ = select.select([read_fd], [], [], self.startup_timeout)
+            number = os.read(read_fd, 32).decode().strip() if ready else ""
+        finally:
+            if write_fd >= 0:
+                os.close(write_fd)
+            os.close(read_fd)
+
+        if not number:
+            self.stop()
+            raise RuntimeError(f"Xvfb 启动超时 ({self.startup_timeout}s)")
+
+        self.display = f":{number}"
+        logger.info(f"Xvfb 已启动: DISPLAY={self.display}, {self.width}x{self.height}")
+        return self.display
+
+    def stop(self):
+        """关闭 Xvfb"""
+        if self._process is None:
+            return
+        if self._process.poll() is None:
+            self._process.terminate()
+            try:
+                self._process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+                self._process.wait()
+        logger.info(f"Xvfb 已关闭: DISPLAY={self.display}")
+        self._process = None
+        self.display = None
+
+    def env(self, base: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        """返回指向该显示的环境变量"""
+        env = dict(os.environ if base is None else base)
+        if self.display:
+            env["DISPLAY"] = self.display
+            # 不继承宿主机的 Wayland 会话，强制 Qt 使用 X11
+            env.pop("WAYLAND_DISPLAY", None)
+            env["QT_QPA_PLATFORM"] = "xcb"
+        return env
+
+    def __enter__(self) -> "XvfbDisplay":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
@@ -28,7 +28,8 @@ from .base import VisionBase
 from .template_matcher import TemplateMatcher, TemplateMatcherParam
 from .feature_matcher import FeatureMatcher, FeatureMatcherParam, FeatureDetector
 from .color_matcher import ColorMatcher, ColorMatcherParam
-from .pipeline import Pipeline, PipelineNode
+from .pipeline import Pipeline, PipelineNode, PipelineResult
+from .plan import PipelinePlan, compile_pipeline, load_plan
 
 __all__ = [
     # Types
@@ -52,5 +53,9 @@ __all__ = [
     # Pipeline
     'Pipeline',
     'PipelineNode',
+    'PipelineResult',
+    'PipelinePlan',
+    'compile_pipeline',
+    'load_plan',
 ]
 
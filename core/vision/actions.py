@@ -0,0 +1,441 @@
+"""
+动作后端 - ActionBackend
+
+Pipeline 的点击、长按、滑动、输入等输入操作通过动作后端执行，
+便于替换为其他实现（例如回放模式下只记录动作的 MockActionBackend）。
+
+X11 下提供两个低延迟后端，均不带 pyautogui 每次调用后 0.1s 的 PAUSE:
+- XTestBackend: 通过 python-xlib 的 XTest 扩展直接注入事件，整批事件只 sync 一次
+- XdotoolBackend: 把整批事件串成一条 xdotool 命令，只启动一次进程
+pyautogui 作为兜底后端保留，create_action_backend() 按可用性自动选择。
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+try:
+    import pyautogui
+    PYAUTOGUI_AVAILABLE = True
+except ImportError:
+    PYAUTOGUI_AVAILABLE = False
+
+try:
+    from Xlib import X, XK
+    from Xlib import display as xdisplay
+    from Xlib.ext import xtest
+    XLIB_AVAILABLE = True
+except ImportError:
+    XLIB_AVAILABLE = False
+
+# 滑动时相邻两次移动的间隔 (ms)，约 60Hz
+SWIPE_STEP_MS = 16
+
+
+@dataclass(frozen=True)
+class InputEvent:
+    """底层输入事件"""
+    kind: str        # move / down / up / wait / type
+    x: int = 0
+    y: int = 0
+    ms: int = 0      # wait 的时长
+    text: str = ""   # type 的文本
+
+
+class ActionBatch:
+    """一组按顺序提交的输入事件
+
+    示例:
+        >>> batch = ActionBatch().click(100, 200).wait(100).swipe(100, 200, 300, 200, 300)
+        >>> backend.submit(batch)
+    """
+
+    def __init__(self):
+        self.events: List[InputEvent] = []
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def move(self, x: int, y: int) -> 'ActionBatch':
+        self.events.append(InputEvent('move', x=int(x), y=int(y)))
+        return self
+
+    def down(self) -> 'ActionBatch':
+        self.events.append(InputEvent('down'))
+        return self
+
+    def up(self) -> 'ActionBatch':
+        self.events.append(InputEvent('up'))
+        return self
+
+    def wait(self, ms: int) -> 'ActionBatch':
+        if ms > 0:
+            self.events.append(InputEvent('wait', ms=int(ms)))
+        return self
+
+    def type_text(self, text: str) -> 'ActionBatch':
+        if text:
+            self.events.append(InputEvent('type', text=text))
+        return self
+
+    def click(self, x: int, y: int) -> 'ActionBatch':
+        return self.move(x, y).down().up()
+
+    def long_press(self, x: int, y: int, duration_ms: int) -> 'ActionBatch':
+        return self.move(x, y).down().wait(duration_ms).up()
+
+    def swipe(self, x1: int, y1: int, x2: int, y2: int, duration_ms: int) -> 'ActionBatch':
+        """按下后分步移动到终点，每步间隔 SWIPE_STEP_MS"""
+        self.move(x1, y1).down()
+        steps = max(1, duration_ms // SWIPE_STEP_MS)
+        interval = duration_ms / steps
+        for i in range(1, steps + 1):
+            self.wait(int(round(interval * i)) - int(round(interval * (i - 1))))
+            self.move(x1 + (x2 - x1) * i / steps, y1 + (y2 - y1) * i / steps)
+        return self.up()
+
+
+class ActionBackend(ABC):
+    """动作后端基类，坐标均为屏幕坐标"""
+
+    name: str = "base"
+
+    @abstractmethod
+    def click(self, x: int, y: int):
+        """点击"""
+
+    @abstractmethod
+    def long_press(self, x: int, y: int, duration_ms: int):
+        """长按"""
+
+    @abstractmethod
+    def swipe(self, x1: int, y1: int, x2: int, y2: int, duration_ms: int):
+        """从 (x1, y1) 拖动到 (x2, y2)"""
+
+    @abstractmethod
+    def input_text(self, text: str):
+        """输入文本"""
+
+    def move(self, x: int, y: int):
+        """移动鼠标"""
+        self.submit(ActionBatch().move(x, y))
+
+    def submit(self, batch: ActionBatch):
+        """一次性提交一组输入事件
+
+        默认把事件还原为单个动作依次执行：按下后直接抬起为点击，按下后只有等待为长按，
+        按下后有移动为滑动；没有按下的单独移动没有对应的动作，忽略。
+        """
+        position: Optional[tuple] = None
+        pressed_at: Optional[tuple] = None
+        released_at: Optional[tuple] = None
+        held_ms = 0
+        for event in batch.events:
+            if event.kind == 'move':
+                position = (event.x, event.y)
+                if pressed_at is not None:
+                    released_at = position
+            elif event.kind == 'down':
+                if position is None:
+                    raise ValueError("按下前没有移动到任何位置")
+                pressed_at, released_at, held_ms = position, None, 0
+            elif event.kind == 'wait':
+                if pressed_at is not None:
+                    held_ms += event.ms
+                else:
+                    time.sleep(event.ms / 1000)
+            elif event.kind == 'up' and pressed_at is not None:
+                if released_at is not None:
+                    self.swipe(*pressed_at, *released_at, held_ms)
+                elif held_ms:
+                    self.long_press(*pressed_at, held_ms)
+                else:
+                    self.click(*pressed_at)
+                pressed_at = None
+            elif event.kind == 'type':
+                self.input_text(event.text)
+
+    def close(self):
+        """释放后端占用的资源（如 X 连接）"""
+
+
+class EventBackend(ActionBackend):
+    """以批量提交为基础的后端：单个动作也是只含一组事件的批次"""
+
+    def click(self, x: int, y: int):
+        self.submit(ActionBatch().click(x, y))
+
+    def long_press(self, x: int, y: int, duration_ms: int):
+        self.submit(ActionBatch().long_press(x, y, duration_ms))
+
+    def swipe(self, x1: int, y1: int, x2: int, y2: int, duration_ms: int):
+        self.submit(ActionBatch().swipe(x1, y1, x2, y2, duration_ms))
+
+    def input_text(self, text: str):
+        self.submit(ActionBatch().type_text(text))
+
+    @abstractmethod
+    def submit(self, batch: ActionBatch):
+        """一次性提交一组输入事件"""
+
+
+class PyAutoGuiBackend(ActionBackend):
+    """基于 pyautogui 的动作后端（兜底）
+
+    单个动作保持 pyautogui 原有行为（含 PAUSE），批量提交时跳过 PAUSE。
+    """
+
+    name = "pyautogui"
+
+    def __init__(self):
+        if not PYAUTOGUI_AVAILABLE:
+            raise ImportError("pyautogui is required for PyAutoGuiBackend")
+
+    def click(self, x: int, y: int):
+        pyautogui.click(x, y)
+
+    def long_press(self, x: int, y: int, duration_ms: int):
+        pyautogui.mouseDown(x, y)
+        time.sleep(duration_ms / 1000)
+        pyautogui.mouseUp()
+
+    def swipe(self, x1: int, y1: int, x2: int, y2: int, duration_ms: int):
+        pyautogui.moveTo(x1, y1)
+        pyautogui.drag(x2 - x1, y2 - y1, duration=duration_ms / 1000)
+
+    def input_text(self, text: str):
+        pyautogui.write(text)
+
+    def move(self, x: int, y: int):
+        pyautogui.moveTo(x, y)
+
+    def submit(self, batch: ActionBatch):
+        for event in batch.events:
+            if event.kind == 'move':
+                pyautogui.moveTo(event.x, event.y, _pause=False)
+            elif event.kind == 'down':
+                pyautogui.mouseDown(_pause=False)
+            elif event.kind == 'up':
+                pyautogui.mouseUp(_pause=False)
+            elif event.kind == 'wait':
+                time.sleep(event.ms / 1000)
+            elif event.kind == 'type':
+                pyautogui.write(event.text, _pause=False)
+
+
+class XdotoolBackend(EventBackend):
+    """基于 xdotool 命令链的动作后端
+
+    一批事件串成一条命令（xdotool 的 type 会吞掉其后的所有参数，因此在 type 处分段）。
+    """
+
+    name = "xdotool"
+
+    def __init__(self, executable: Optional[str] = None):
+        self.executable = executable or shutil.which('xdotool')
+        if not self.executable:
+            raise ImportError("xdotool is required for XdotoolBackend")
+
+    @staticmethod
+    def available() -> bool:
+        return _x11_session() and shutil.which('xdotool') is not None
+
+    def submit(self, batch: ActionBatch):
+        args: List[str] = []
+        for event in batch.events:
+            if event.kind == 'move':
+                args += ['mousemove', str(event.x), str(event.y)]
+            elif event.kind == 'down':
+                args += ['mousedown', '1']
+            elif event.kind == 'up':
+                args += ['mouseup', '1']
+            elif event.kind == 'wait':
+                args += ['sleep', f"{event.ms / 1000:.3f}"]
+            elif event.kind == 'type':
+                args += ['type', '--delay', '0', '--', event.text]
+                self._run(args)
+                args = []
+        if args:
+            self._run(args)
+
+    def _run(self, args: List[str]):
+        completed = subprocess.run(
+            [self.executable] + args,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        if completed.returncode != 0:
+            raise RuntimeError(f"xdotool 执行失败: {completed.stderr.strip()}")
+
+
+class XTestBackend(EventBackend):
+    """基于 XTest 扩展的动作后端（python-xlib）
+
+    事件直接写入 X 连接的输出缓冲，只在批次结束或需要等待时 sync 一次。
+    """
+
+    name = "xtest"
+
+    def __init__(self, display_name: Optional[str] = None):
+        if not XLIB_AVAILABLE:
+            raise ImportError("python-xlib is required for XTestBackend")
+        self._display = xdisplay.Display(display_name)
+        if not self._display.has_extension('XTEST'):
+            self._display.close()
+            raise RuntimeError("X 服务器不支持 XTEST 扩展")
+        self._shift = self._display.keysym_to_keycode(XK.XK_Shift_L)
+
+    @staticmethod
+    def available() -> bool:
+        return XLIB_AVAILABLE and _x11_session()
+
+    def submit(self, batch: ActionBatch):
+        d = self._display
+        for event in batch.events:
+            if event.kind == 'move':
+                xtest.fake_input(d, X.MotionNotify, x=event.x, y=event.y)
+            elif event.kind == 'down':
+                xtest.fake_input(d, X.ButtonPress, 1)
+            elif event.kind == 'up':
+                xtest.fake_input(d, X.ButtonRelease, 1)
+            elif event.kind == 'wait':
+                d.sync()
+                time.sleep(event.ms / 1000)
+            elif event.kind == 'type':
+                self._type(event.text)
+        d.sync()
+
+    def _type(self, text: str):
+        d = self._display
+        for char in text:
+            keysym = _char_to_keysym(char)
+            keycode = d.keysym_to_keycode(keysym)
+            if not keycode:
+                raise ValueError(f"当前键盘布局无法输入字符: {char!r}")
+            shifted = d.keycode_to_keysym(keycode, 0) != keysym
+            if shifted:
+                xtest.fake_input(d, X.KeyPress, self._shift)
+            xtest.fake_input(d, X.KeyPress, keycode)
+            xtest.fake_input(d, X.KeyRelease, keycode)
+            if shifted:
+                xtest.fake_input(d, X.KeyRelease, self._shift)
+
+    def close(self):
+        self._display.close()
+
+
+def _x11_session() -> bool:
+    """当前是否为 X11 会话"""
+    return sys.platform.startswith('linux') and bool(os.environ.get('DISPLAY'))
+
+
+def _char_to_keysym(char: str) -> int:
+    """字符 -> X keysym（Latin-1 直接对应，其余使用 Unicode keysym）"""
+    if char == '\n':
+        return XK.XK_Return
+    if char == '\t':
+        return XK.XK_Tab
+    code = ord(char)
+    return code if code < 0x100 else 0x01000000 | code
+
+
+BACKENDS = {
+    'xtest': XTestBackend,
+    'xdotool': XdotoolBackend,
+    'pyautogui': PyAutoGuiBackend,
+}
+
+
+def create_action_backend(name: str = 'auto') -> ActionBackend:
+    """创建动作后端
+
+    Args:
+        name: 'auto' 按 xtest -> xdotool -> pyautogui 的顺序选择第一个可用的后端，
+              也可以指定 BACKENDS 中的名称
+
+    Raises:
+        ImportError / RuntimeError: 指定的后端不可用
+    """
+    if name != 'auto':
+        if name not in BACKENDS:
+            raise ValueError(f"未知的动作后端: {name}")
+        return BACKENDS[name]()
+
+    for backend_cls in (XTestBackend, XdotoolBackend):
+        if backend_cls.available():
+            try:
+                return backend_cls()
+            except (ImportError, RuntimeError, OSError):
+                continue
+    return PyAutoGuiBackend()
+
+
+def benchmark_backends(
+    names: Optional[List[str]] = None,
+    iterations: int = 20,
+    batch_size: int = 10
+) -> Dict[str, Any]:
+    """测量各动作后端的分发延迟
+
+    只移动鼠标（在当前位置附近来回移动），不产生点击。
+
+    Args:
+        names: 要测试的后端，默认全部
+        iterations: 每项测量的次数
+        batch_size: 批量提交测试中每批的事件数
+
+    Returns:
+        {后端名: {available, single_ms: {mean, p50, max}, batch_event_ms: {...}} 或 {available, error}}
+    """
+    iterations = max(1, iterations)
+    results: Dict[str, Any] = {}
+    for name in names or list(BACKENDS):
+        try:
+            backend = BACKENDS[name]()
+        except Exception as e:
+            results[name] = {'available': False, 'error': str(e)}
+            continue
+
+        x, y = 100, 100
+        single: List[float] = []
+        batched: List[float] = []
+        try:
+            for i in range(iterations):
+                start = time.perf_counter()
+                backend.move(x + i % 2, y)
+                single.append((time.perf_counter() - start) * 1000)
+
+            for _ in range(iterations):
+                batch = ActionBatch()
+                for i in range(batch_size):
+                    batch.move(x + i % 2, y)
+                start = time.perf_counter()
+                backend.submit(batch)
+                batched.append((time.perf_counter() - start) * 1000 / batch_size)
+        except Exception as e:
+            results[name] = {'available': False, 'error': str(e)}
+            continue
+        finally:
+            backend.close()
+
+        results[name] = {
+            'available': True,
+            'single_ms': _latency_summary(single),
+            'batch_event_ms': _latency_summary(batched),
+        }
+    return results
+
+
+def _latency_summary(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        'mean': round(sum(ordered) / len(ordered), 3),
+        'p50': round(ordered[len(ordered) // 2], 3),
+        'max': round(ordered[-1], 3),
+    }
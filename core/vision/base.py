@@ -3,7 +3,9 @@
 """
 
 import time
+import threading
 from abc import ABC, abstractmethod
+from contextlib import nullcontext
 from typing import Optional, List, Tuple
 from dataclasses import dataclass
 import numpy as np
@@ -46,6 +48,8 @@ class VisionBase(ABC):
         self._name = name
         self._debug_draw = False
         self._draw_image: Optional[np.ndarray] = None
+        self._cancel_event: Optional[threading.Event] = None
+        self._tracer = None
     
     @property
     def image(self) -> np.ndarray:
@@ -62,10 +66,32 @@ class VisionBase(ABC):
         """识别器名称"""
         return self._name
     
+    def set_roi(self, roi: Optional[Rect]):
+        """切换识别区域（复用已加载的模板，在同一画面的多个区域上依次识别）"""
+        self._roi = roi or Rect(0, 0, self._image.shape[1], self._image.shape[0])
+    
     def enable_debug_draw(self, enable: bool = True):
         """启用调试绘图"""
         self._debug_draw = enable
     
+    def set_cancel_event(self, event: Optional[threading.Event]):
+        """设置取消事件，置位后识别器应尽早返回（结果视为未命中）"""
+        self._cancel_event = event
+    
+    def is_cancelled(self) -> bool:
+        """识别是否已被取消"""
+        return self._cancel_event is not None and self._cancel_event.is_set()
+    
+    def set_tracer(self, tracer):
+        """设置追踪器 (Tracer)，识别过程中的细分步骤会记录为 span"""
+        self._tracer = tracer
+    
+    def trace_span(self, name: str, **args):
+        """创建识别步骤的 span，未设置追踪器时为空操作"""
+        if self._tracer is None:
+            return nullcontext()
+        return self._tracer.span(name, "recognize", matcher=self._name, **args)
+    
     def image_with_roi(self) -> np.ndarray:
         """获取ROI区域的图像"""
         return self._image[
@@ -0,0 +1,292 @@
+"""
+级联识别 - Cascade
+
+单一算法的节点即使目标只占屏幕一小块，也要在整个 ROI 上运行多尺度模板匹配或特征匹配。
+级联识别把多个识别器串起来，每一级只在上一级给出的候选区域内运行:
+- ColorMatch（找色，开销最小）的命中区域向四周扩展 expand 像素，作为下一级的候选区域
+- TemplateMatch 只在候选区域内匹配，命中框同样成为下一级的候选区域
+- 标记 fallback 的级（如 FeatureMatch）只在紧邻的上一级未命中时运行，搜索上一级的输入区域
+
+每一级的耗时、输入/输出区域和像素剪枝率记录在 RecoResult.detail['stages'] 中。
+
+示例 (Pipeline JSON):
+    "找保存按钮": {
+        "recognition": "Cascade",
+        "stages": [
+            {"recognition": "ColorMatch", "lower": [...], "upper": [...], "connected": true, "count": 200},
+            {"recognition": "TemplateMatch", "template": ["save.png"], "threshold": [0.8]},
+            {"recognition": "FeatureMatch", "template": ["save.png"], "fallback": true}
+        ]
+    }
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .types import Rect, RecoResult, MatchResult
+from .base import VisionBase
+from .template_matcher import TemplateMatcher, TemplateMatcherParam
+from .color_matcher import ColorMatcher, ColorMatcherParam
+from .feature_matcher import FeatureMatcher, FeatureMatcherParam
+from .node import RecognitionType
+
+# 命中框向四周扩展的默认像素数（需保证下一级的模板能放进候选区域）
+DEFAULT_STAGE_EXPAND = 16
+# 每一级最多传给下一级的候选区域数（按分数取前 N 个）
+DEFAULT_MAX_REGIONS = 8
+
+# 可以作为级联中一级的识别类型
+STAGE_TYPES = (
+    RecognitionType.TEMPLATE_MATCH,
+    RecognitionType.FEATURE_MATCH,
+    RecognitionType.COLOR_MATCH,
+)
+
+StageParam = Union[TemplateMatcherParam, FeatureMatcherParam, ColorMatcherParam]
+
+_ALGORITHM_NAMES = {
+    RecognitionType.TEMPLATE_MATCH: "TemplateMatch",
+    RecognitionType.FEATURE_MATCH: "FeatureMatch",
+    RecognitionType.COLOR_MATCH: "ColorMatch",
+}
+
+
+@dataclass(frozen=True)
+class CascadeStage:
+    """级联中的一级"""
+    recognition: RecognitionType
+    param: StageParam
+    expand: int = DEFAULT_STAGE_EXPAND        # 命中框向四周扩展的像素，作为下一级的候选区域
+    max_regions: int = DEFAULT_MAX_REGIONS    # 最多传给下一级的候选区域数
+    fallback: bool = False                    # 只在上一级未命中时运行
+
+    @property
+    def algorithm(self) -> str:
+        return _ALGORITHM_NAMES.get(self.recognition, self.recognition.name)
+
+
+@dataclass(frozen=True)
+class CascadeParam:
+    """级联识别参数"""
+    stages: Tuple[CascadeStage, ...] = ()
+
+
+@dataclass
+class StageReport:
+    """一次识别中某一级的执行情况"""
+    index: int
+    algorithm: str
+    fallback: bool = False
+    skipped: bool = False     # 上一级未命中（或 fallback 的上一级已命中）时跳过
+    regions_in: int = 0
+    pixels_in: int = 0
+    regions_out: int = 0      # 传给下一级的候选区域数（合并重叠后）
+    pixels_out: int = 0
+    matches: int = 0          # 达到阈值的结果数
+    hit: bool = False
+    cost_ms: float = 0.0
+
+    @property
+    def prune_rate(self) -> float:
+        """本级排除的像素比例"""
+        if not self.pixels_in:
+            return 0.0
+        return max(0.0, 1.0 - self.pixels_out / self.pixels_in)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'index': self.index,
+            'algorithm': self.algorithm,
+            'fallback': self.fallback,
+            'skipped': self.skipped,
+            'regions_in': self.regions_in,
+            'pixels_in': self.pixels_in,
+            'regions_out': self.regions_out,
+            'pixels_out': self.pixels_out,
+            'prune_rate': round(float(self.prune_rate), 4),
+            'matches': self.matches,
+            'hit': self.hit,
+            'cost_ms': round(self.cost_ms, 2),
+        }
+
+
+@dataclass
+class StageStats:
+    """某一级在多次识别中的累计统计 (NodeStats.stages)"""
+    index: int
+    algorithm: str
+    fallback: bool = False
+    runs: int = 0
+    skipped: int = 0
+    hits: int = 0
+    cost_ms: float = 0.0
+    pixels_in: int = 0
+    pixels_out: int = 0
+
+    def add(self, report: Dict[str, Any]):
+        """累加一次识别的 StageReport.to_dict()"""
+        if report['skipped']:
+            self.skipped += 1
+            return
+        self.runs += 1
+        self.hits += int(report['hit'])
+        self.cost_ms += report['cost_ms']
+        self.pixels_in += report['pixels_in']
+        self.pixels_out += report['pixels_out']
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'index': self.index,
+            'algorithm': self.algorithm,
+            'fallback': self.fallback,
+            'runs': self.runs,
+            'skipped': self.skipped,
+            'hits': self.hits,
+            'cost_ms': round(self.cost_ms, 2),
+            'avg_ms': round(self.cost_ms / self.runs, 2) if self.runs else 0.0,
+            'prune_rate': round(max(0.0, 1.0 - self.pixels_out / self.pixels_in), 4) if self.pixels_in else 0.0,
+        }
+
+
+def merge_regions(regions: List[Rect]) -> List[Rect]:
+    """把相互重叠的区域合并为外接矩形，避免同一块画面被搜索多次"""
+    pending = list(regions)
+    merged: List[Rect] = []
+    while pending:
+        current = pending.pop()
+        changed = True
+        while changed:
+            changed = False
+            for other in list(pending):
+                if current.intersection(other):
+                    current = current.union(other)
+                    pending.remove(other)
+                    changed = True
+        merged.append(current)
+    return merged
+
+
+class CascadeMatcher(VisionBase):
+    """级联识别器
+
+    按顺序执行各级识别，每一级的命中区域作为下一级的搜索区域，
+    最后一个运行的级的结果即为识别结果。
+    """
+
+    def __init__(
+        self,
+        image: np.ndarray,
+        param: CascadeParam,
+        roi: Optional[Rect] = None,
+        name: str = "CascadeMatcher"
+    ):
+        super().__init__(image, roi, name)
+        self._param = param
+
+    def analyze(self) -> RecoResult:
+        """执行级联识别"""
+        start_time = time.perf_counter()
+        result = RecoResult(algorithm="Cascade")
+        reports: List[StageReport] = []
+
+        regions = [self._roi]          # 下一个主级的搜索区域
+        inputs = regions               # 最近一次运行的级的输入区域（fallback 级复用）
+        current: Optional[RecoResult] = None
+        previous_missed = False        # 紧邻的上一级运行了但未命中
+
+        for i, stage in enumerate(self._param.stages):
+            report = StageReport(index=i, algorithm=stage.algorithm, fallback=stage.fallback)
+            reports.append(report)
+            if stage.fallback:
+                run = previous_missed
+                stage_regions = inputs
+            else:
+                run = current is None or current.success
+                stage_regions = regions
+            if not run or not stage_regions or self.is_cancelled():
+                report.skipped = True
+                previous_missed = False
+                continue
+
+            with self.trace_span(f"stage[{i}] {stage.algorithm}", regions=len(stage_regions)):
+                current = self._run_stage(stage, stage_regions, report)
+            inputs = stage_regions
+            regions = self._next_regions(stage, current, stage_regions, report)
+            previous_missed = not current.success
+
+        if current is not None and not self.is_cancelled():
+            result.all_results = current.all_results
+            result.filtered_results = current.filtered_results
+            result.best_result = current.best_result
+        result.detail = {'stages': [r.to_dict() for r in reports]}
+        result.cost_ms = (time.perf_counter() - start_time) * 1000
+        return result
+
+    def _build_matcher(self, stage: CascadeStage, roi: Rect) -> Optional[VisionBase]:
+        """构建本级的识别器（模板只加载一次，之后切换区域复用）"""
+        if stage.recognition == RecognitionType.TEMPLATE_MATCH:
+            matcher = TemplateMatcher(self._image, stage.param, roi, name=self._name)
+        elif stage.recognition == RecognitionType.FEATURE_MATCH:
+            matcher = FeatureMatcher(self._image, stage.param, roi, name=self._name)
+        elif stage.recognition == RecognitionType.COLOR_MATCH:
+            matcher = ColorMatcher(self._image, stage.param, roi, name=self._name)
+        else:
+            return None
+        matcher.set_cancel_event(self._cancel_event)
+        matcher.set_tracer(self._tracer)
+        return matcher
+
+    def _run_stage(self, stage: CascadeStage, regions: List[Rect], report: StageReport) -> RecoResult:
+        """在每个候选区域内执行本级识别，合并各区域的结果"""
+        start_time = time.perf_counter()
+        result = RecoResult(algorithm=stage.algorithm)
+        report.regions_in = len(regions)
+        report.pixels_in = int(sum(r.area() for r in regions))
+
+        matcher = self._build_matcher(stage, regions[0])
+        if matcher is not None:
+            for region in regions:
+                if self.is_cancelled():
+                    break
+                matcher.set_roi(region)
+                region_result = matcher.analyze()
+                result.all_results.extend(region_result.all_results)
+                result.filtered_results.extend(region_result.filtered_results)
+
+        # 合并后按本级参数重新排序并选取结果
+        param = stage.param
+        result.all_results = self.sort_results(result.all_results, param.order_by)
+        result.filtered_results = self.sort_results(result.filtered_results, param.order_by)
+        idx = self.pythonic_index(len(result.filtered_results), param.result_index)
+        if idx is not None:
+            result.best_result = result.filtered_results[idx]
+
+        report.matches = len(result.filtered_results)
+        report.hit = result.success
+        result.cost_ms = (time.perf_counter() - start_time) * 1000
+        report.cost_ms = result.cost_ms
+        return result
+
+    def _next_regions(
+        self, stage: CascadeStage, result: RecoResult, inputs: List[Rect], report: StageReport
+    ) -> List[Rect]:
+        """本级命中框扩展后作为下一级的候选区域
+
+        扩展后的框裁剪到本级的输入区域内，下一级不会搜索本级没搜索过的画面，
+        pixels_out 也就不会超过 pixels_in
+        """
+        candidates: List[MatchResult] = self.sort_by_score(result.filtered_results)[:max(stage.max_regions, 1)]
+        regions = []
+        for match in candidates:
+            box = match.box.expanded(stage.expand, stage.expand)
+            for source in inputs:
+                region = box.intersection(source)
+                if region:
+                    regions.append(region)
+        regions = merge_regions(regions)
+        report.regions_out = len(regions)
+        report.pixels_out = int(sum(r.area() for r in regions))
+        return regions
@@ -0,0 +1,53 @@
+"""
+时钟 - Clock
+
+Pipeline 的超时判断和各种延迟都通过时钟完成:
+- Clock: 真实时钟，等待可被 stop() 打断
+- VirtualClock: 虚拟时钟，等待立即返回并推进虚拟时间，
+  用于回放模式下以满 CPU 速度运行且超时/重试次数可复现
+"""
+
+import threading
+import time
+
+
+class Clock:
+    """真实时钟"""
+
+    def now(self) -> float:
+        """当前时间 (秒)"""
+        return time.perf_counter()
+
+    def wait(self, seconds: float, stop_event: threading.Event) -> bool:
+        """等待指定秒数，stop_event 置位时提前返回
+
+        Returns:
+            是否因 stop_event 提前返回
+        """
+        if seconds <= 0:
+            return stop_event.is_set()
+        return stop_event.wait(seconds)
+
+
+class VirtualClock(Clock):
+    """虚拟时钟：等待不占用真实时间，只推进虚拟时间"""
+
+    def __init__(self, start: float = 0.0):
+        self._now = start
+        self._lock = threading.Lock()
+
+    def now(self) -> float:
+        with self._lock:
+            return self._now
+
+    def advance(self, seconds: float):
+        """推进虚拟时间"""
+        if seconds > 0:
+            with self._lock:
+                self._now += seconds
+
+    def wait(self, seconds: float, stop_event: threading.Event) -> bool:
+        if stop_event.is_set():
+            return True
+        self.advance(seconds)
+        return False
@@ -0,0 +1,245 @@
+"""
+组合识别 - And / Or
+
+"按钮 A 出现且横幅 B 不存在" 这样的条件原本要拆成多个节点，每个节点单独截图、单独等待延迟。
+And / Or 节点在同一帧上并行执行多个子识别:
+- And (all_of): 所有子识别都命中才算命中；任一子识别未命中即可确定结果，取消其余子识别
+- Or (any_of): 任一子识别命中即命中，取消其余子识别
+- 子识别可以设置自己的 roi 和 inverse，也可以是 Cascade 或嵌套的 And / Or
+- 合并后的 RecoResult: And 取 box_index 指定的子识别的结果，Or 取最先命中的子识别的结果；
+  detail['branches'] 记录各子识别是否运行、是否命中和耗时
+
+示例 (Pipeline JSON):
+    "可以保存": {
+        "recognition": "And",
+        "all_of": [
+            {"recognition": "TemplateMatch", "template": ["save.png"]},
+            {"recognition": "TemplateMatch", "template": ["loading.png"], "inverse": true}
+        ],
+        "box_index": 0,
+        "action": "Click"
+    }
+"""
+
+import threading
+import time
+from concurrent.futures import Executor, FIRST_COMPLETED, wait
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .types import Rect, RecoResult, MatchResult
+from .base import VisionBase
+from .template_matcher import TemplateMatcher
+from .color_matcher import ColorMatcher
+from .feature_matcher import FeatureMatcher
+from .cascade import CascadeMatcher
+from .node import RecognitionType
+
+# 可以作为子识别的类型（DirectHit 没有意义，Inventory 依赖 Pipeline 级别的清单）
+BRANCH_TYPES = (
+    RecognitionType.TEMPLATE_MATCH,
+    RecognitionType.FEATURE_MATCH,
+    RecognitionType.COLOR_MATCH,
+    RecognitionType.CASCADE,
+    RecognitionType.AND,
+    RecognitionType.OR,
+)
+
+# 等待子识别时检查外部取消事件的间隔 (秒)
+_CANCEL_POLL_INTERVAL = 0.05
+
+_ALGORITHM_NAMES = {
+    RecognitionType.TEMPLATE_MATCH: "TemplateMatch",
+    RecognitionType.FEATURE_MATCH: "FeatureMatch",
+    RecognitionType.COLOR_MATCH: "ColorMatch",
+    RecognitionType.CASCADE: "Cascade",
+    RecognitionType.AND: "And",
+    RecognitionType.OR: "Or",
+}
+
+
+@dataclass(frozen=True)
+class CompositeBranch:
+    """一个子识别"""
+    recognition: RecognitionType
+    param: Any                      # 子识别的参数 (TemplateMatcherParam / CascadeParam / CompositeParam 等)
+    roi: Optional[Rect] = None      # 为 None 时使用组合节点的 roi
+    inverse: bool = False           # 反转子识别结果（如 "横幅不存在"）
+
+    @property
+    def algorithm(self) -> str:
+        return _ALGORITHM_NAMES.get(self.recognition, self.recognition.name)
+
+
+@dataclass(frozen=True)
+class CompositeParam:
+    """组合识别参数"""
+    mode: RecognitionType = RecognitionType.AND   # AND / OR
+    branches: Tuple[CompositeBranch, ...] = ()
+    box_index: int = 0                            # And: 取第几个子识别的结果作为节点的识别框
+
+    @property
+    def algorithm(self) -> str:
+        return _ALGORITHM_NAMES.get(self.mode, self.mode.name)
+
+
+def build_matcher(
+    recognition: RecognitionType,
+    param: Any,
+    image: np.ndarray,
+    roi: Optional[Rect],
+    name: str,
+    executor: Optional[Executor] = None
+) -> Optional[VisionBase]:
+    """按识别类型构建子识别器（不支持的类型返回 None）"""
+    if recognition == RecognitionType.TEMPLATE_MATCH:
+        return TemplateMatcher(image, param, roi, name=name)
+    if recognition == RecognitionType.FEATURE_MATCH:
+        return FeatureMatcher(image, param, roi, name=name)
+    if recognition == RecognitionType.COLOR_MATCH:
+        return ColorMatcher(image, param, roi, name=name)
+    if recognition == RecognitionType.CASCADE:
+        return CascadeMatcher(image, param, roi, name=name)
+    if recognition in (RecognitionType.AND, RecognitionType.OR):
+        return CompositeMatcher(image, param, roi, name=name, executor=executor)
+    return None
+
+
+class CompositeMatcher(VisionBase):
+    """And / Or 组合识别器
+
+    提供 executor 时子识别并行执行，否则按声明顺序依次执行（同样会短路）。
+    嵌套的组合识别总是顺序执行，避免在线程池内等待同一线程池的任务。
+    """
+
+    def __init__(
+        self,
+        image: np.ndarray,
+        param: CompositeParam,
+        roi: Optional[Rect] = None,
+        name: str = "CompositeMatcher",
+        executor: Optional[Executor] = None
+    ):
+        super().__init__(image, roi, name)
+        self._param = param
+        self._executor = executor
+
+    def analyze(self) -> RecoResult:
+        """执行组合识别"""
+        start_time = time.perf_counter()
+        branches = self._param.branches
+        outcomes: List[Optional[RecoResult]] = [None] * len(branches)
+        branch_cancel = threading.Event()
+        decided: Optional[int] = None   # 决定了最终结果的子识别（短路）
+
+        if self._executor is None or len(branches) <= 1:
+            for i, branch in enumerate(branches):
+                if self.is_cancelled():
+                    break
+                outcomes[i] = self._run_branch(i, branch, branch_cancel)
+                if self._is_decisive(branch, outcomes[i]):
+                    decided = i
+                    break
+        else:
+            futures = {
+                self._executor.submit(self._run_branch, i, branch, branch_cancel): i
+                for i, branch in enumerate(branches)
+            }
+            pending = set(futures)
+            try:
+                while pending and decided is None and not self.is_cancelled():
+                    done, pending = wait(pending, timeout=_CANCEL_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        i = futures[future]
+                        outcomes[i] = future.result()
+                        if decided is None and self._is_decisive(branches[i], outcomes[i]):
+                            decided = i
+            finally:
+                # 结果已确定（或外部取消）：未开始的子识别直接取消，执行中的通过 branch_cancel 尽早退出
+                branch_cancel.set()
+                for future in pending:
+                    future.cancel()
+
+        result = self._merge(outcomes, decided)
+        result.cost_ms = (time.perf_counter() - start_time) * 1000
+        return result
+
+    def _run_branch(self, index: int, branch: CompositeBranch, cancel_event: threading.Event) -> RecoResult:
+        """执行一个子识别"""
+        matcher = build_matcher(branch.recognition, branch.param, self._image,
+                                branch.roi or self._roi, f"{self._name}[{index}]")
+        if matcher is None:
+            return RecoResult(algorithm=branch.algorithm)
+        matcher.set_cancel_event(cancel_event)
+        matcher.set_tracer(self._tracer)
+        with self.trace_span(f"branch[{index}] {branch.algorithm}", inverse=branch.inverse):
+            return matcher.analyze()
+
+    @staticmethod
+    def _branch_hit(branch: CompositeBranch, outcome: Optional[RecoResult]) -> bool:
+        return outcome is not None and outcome.success != branch.inverse
+
+    def _is_decisive(self, branch: CompositeBranch, outcome: RecoResult) -> bool:
+        """该子识别的结果是否已经决定了组合结果（Or 命中 / And 未命中）"""
+        hit = self._branch_hit(branch, outcome)
+        return hit if self._param.mode == RecognitionType.OR else not hit
+
+    def _merge(self, outcomes: List[Optional[RecoResult]], decided: Optional[int]) -> RecoResult:
+        """合并各子识别的结果"""
+        branches = self._param.branches
+        result = RecoResult(algorithm=self._param.algorithm)
+        for outcome in outcomes:
+            if outcome is not None:
+                result.all_results.extend(outcome.all_results)
+        hits = [self._branch_hit(b, o) for b, o in zip(branches, outcomes)]
+        for branch, outcome, hit in zip(branches, outcomes, hits):
+            if hit and not branch.inverse:
+                result.filtered_results.extend(outcome.filtered_results)
+
+        chosen: Optional[int] = None
+        if self.is_cancelled() or not branches:
+            chosen = None
+        elif self._param.mode == RecognitionType.OR:
+            chosen = decided
+        elif all(hits):
+            chosen = self.pythonic_index(len(branches), self._param.box_index)
+            if chosen is None:
+                chosen = 0
+
+        if chosen is not None:
+            outcome = outcomes[chosen]
+            if outcome is not None and outcome.best_result is not None and not branches[chosen].inverse:
+                result.best_result = outcome.best_result
+            else:
+                # 反转的子识别没有识别框，以其搜索区域作为命中区域
+                result.best_result = MatchResult(box=branches[chosen].roi or self._roi, score=1.0)
+
+        result.detail = {
+            'mode': self._param.algorithm,
+            'short_circuit': decided is not None and any(o is None for o in outcomes),
+            'branches': [self._branch_detail(i, b, o, h) for i, (b, o, h) in enumerate(zip(branches, outcomes, hits))],
+        }
+        return result
+
+    @staticmethod
+    def _branch_detail(
+        index: int,
+        branch: CompositeBranch,
+        outcome: Optional[RecoResult],
+        hit: bool
+    ) -> Dict[str, Any]:
+        detail: Dict[str, Any] = {
+            'index': index,
+            'algorithm': branch.algorithm,
+            'inverse': branch.inverse,
+            'skipped': outcome is None,   # 结果已确定后被取消
+            'hit': hit,
+            'score': round(float(outcome.score), 4) if outcome is not None else 0.0,
+            'box': [int(v) for v in outcome.box.to_list()] if outcome is not None and outcome.box else None,
+            'cost_ms': round(outcome.cost_ms, 2) if outcome is not None else 0.0,
+        }
+        if outcome is not None and outcome.detail:
+            detail['detail'] = outcome.detail
+        return detail
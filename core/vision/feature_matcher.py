@@ -190,7 +190,8 @@ class FeatureMatcher(VisionBase):
         image_mask = self._create_mask(image_roi)
         
         try:
-            kp_image, desc_image = detector.detectAndCompute(image_roi, image_mask)
+            with self.trace_span("detect image", size=f"{image_roi.shape[1]}x{image_roi.shape[0]}"):
+                kp_image, desc_image = detector.detectAndCompute(image_roi, image_mask)
         except Exception as e:
             print(f"[FeatureMatcher] 图像特征提取失败: {e}")
             result.cost_ms = (time.perf_counter() - start_time) * 1000
@@ -202,11 +203,14 @@ class FeatureMatcher(VisionBase):
             return result
         
         # 对每个模板执行匹配
-        for template in self._templates:
+        for i, template in enumerate(self._templates):
+            if self.is_cancelled():
+                break
             template_mask = self._create_mask(template)
             
             try:
-                kp_template, desc_template = detector.detectAndCompute(template, template_mask)
+                with self.trace_span(f"template[{i}] detect"):
+                    kp_template, desc_template = detector.detectAndCompute(template, template_mask)
             except Exception as e:
                 print(f"[FeatureMatcher] 模板特征提取失败: {e}")
                 continue
@@ -217,7 +221,8 @@ class FeatureMatcher(VisionBase):
             
             # 执行 KNN 匹配
             try:
-                matches = matcher.knnMatch(desc_template, desc_image, k=2)
+                with self.trace_span(f"template[{i}] match", keypoints=len(kp_template)):
+                    matches = matcher.knnMatch(desc_template, desc_image, k=2)
             except Exception as e:
                 print(f"[FeatureMatcher] 匹配失败: {e}")
                 continue
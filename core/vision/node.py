@@ -0,0 +1,211 @@
+"""
+流水线节点定义
+
+- RecognitionType: 识别算法类型
+- ActionType: 动作类型
+- PipelineNode: 单个节点，包含识别和动作配置
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Any, Union
+from enum import Enum, auto
+
+
+class RecognitionType(Enum):
+    """识别算法类型"""
+    DIRECT_HIT = auto()      # 直接命中，不识别
+    TEMPLATE_MATCH = auto()  # 模板匹配
+    FEATURE_MATCH = auto()   # 特征匹配 (抗透视/旋转)
+    COLOR_MATCH = auto()     # 颜色匹配
+    INVENTORY = auto()       # 查询场景清单 (一次扫描所有已知图标)
+    CASCADE = auto()         # 级联识别 (找色 -> 找图 -> 特征匹配，逐级缩小搜索区域)
+    AND = auto()             # 组合识别: 所有子识别都命中
+    OR = auto()              # 组合识别: 任一子识别命中
+    # OCR = auto()           # 文字识别（可扩展）
+
+
+class ActionType(Enum):
+    """动作类型"""
+    DO_NOTHING = auto()      # 不执行动作
+    CLICK = auto()           # 点击
+    LONG_PRESS = auto()      # 长按
+    SWIPE = auto()           # 滑动
+    INPUT_TEXT = auto()      # 输入文本
+    WAIT = auto()            # 等待
+
+
+@dataclass
+class PipelineNode:
+    """流水线节点
+    
+    参考 MAA 的节点设计，简化版本
+    """
+    name: str
+    
+    # 识别配置
+    recognition: RecognitionType = RecognitionType.DIRECT_HIT
+    recognition_param: Dict[str, Any] = field(default_factory=dict)
+    
+    # ROI 区域 [x, y, width, height]，或节点名（相对该节点最近一次命中的位置）
+    roi: Optional[Union[List[int], str]] = None
+    roi_offset: List[int] = field(default_factory=lambda: [0, 0, 0, 0])  # 叠加到 roi 上的偏移 [x, y, w, h]
+    roi_expand: Union[int, List[int]] = 0  # 向四周扩展的像素，int 或 [左右, 上下]
+    hot_region: bool = False  # 先在本节点上次命中位置附近搜索，未命中再搜完整 ROI（需显式开启）
+    
+    # 动作配置
+    action: ActionType = ActionType.DO_NOTHING
+    action_param: Dict[str, Any] = field(default_factory=dict)
+    
+    # 后续节点列表
+    next: List[str] = field(default_factory=list)
+    
+    # 超时和重试
+    timeout: int = 20000      # 超时时间 (ms)
+    rate_limit: int = 1000    # 识别频率限制 (ms)
+    
+    # 延迟
+    pre_delay: int = 200      # 动作前延迟 (ms)
+    post_delay: int = 200     # 动作后延迟 (ms)
+    
+    # 等待画面稳定 (ms 或对象配置，见 stability.WaitFreezesParam)
+    pre_wait_freezes: Any = 0   # 动作前等待画面静止
+    post_wait_freezes: Any = 0  # 动作后等待画面静止
+    
+    # 反转识别结果
+    inverse: bool = False
+    
+    # 是否启用
+    enabled: bool = True
+    
+    @classmethod
+    def from_dict(cls, name: str, data: Dict[str, Any]) -> 'PipelineNode':
+        """从字典创建节点"""
+        # 解析识别类型
+        reco_type = RecognitionType.DIRECT_HIT
+        reco_str = data.get('recognition', 'DirectHit')
+        if reco_str == 'TemplateMatch':
+            reco_type = RecognitionType.TEMPLATE_MATCH
+        elif reco_str == 'FeatureMatch':
+            reco_type = RecognitionType.FEATURE_MATCH
+        elif reco_str == 'ColorMatch':
+            reco_type = RecognitionType.COLOR_MATCH
+        elif reco_str == 'Inventory':
+            reco_type = RecognitionType.INVENTORY
+        elif reco_str == 'Cascade':
+            reco_type = RecognitionType.CASCADE
+        elif reco_str == 'And':
+            reco_type = RecognitionType.AND
+        elif reco_str == 'Or':
+            reco_type = RecognitionType.OR
+        
+        # 解析动作类型
+        action_type = ActionType.DO_NOTHING
+        action_str = data.get('action', 'DoNothing')
+        if action_str == 'Click':
+            action_type = ActionType.CLICK
+        elif action_str == 'LongPress':
+            action_type = ActionType.LONG_PRESS
+        elif action_str == 'Swipe':
+            action_type = ActionType.SWIPE
+        elif action_str == 'InputText':
+            action_type = ActionType.INPUT_TEXT
+        elif action_str == 'Wait':
+            action_type = ActionType.WAIT
+        
+        # 提取识别参数
+        reco_param = {}
+        if reco_type == RecognitionType.TEMPLATE_MATCH:
+            reco_param = {
+                'template': data.get('template', []),
+                'threshold': data.get('threshold', [0.7]),
+                'method': data.get('method', 5),
+                'green_mask': data.get('green_mask', False),
+                'multi_scale': data.get('multi_scale', True),
+                'scale_range': data.get('scale_range', [0.5, 1.5]),
+                'scale_step': data.get('scale_step', 0.1),
+                'order_by': data.get('order_by', 'Score'),  # 默认按分数排序
+            }
+        elif reco_type == RecognitionType.FEATURE_MATCH:
+            reco_param = {
+                'template': data.get('template', []),
+                'detector': data.get('detector', 'AKAZE'),
+                'ratio': data.get('ratio', 0.75),
+                'count': data.get('count', 10),
+                'green_mask': data.get('green_mask', False),
+            }
+        elif reco_type == RecognitionType.COLOR_MATCH:
+            reco_param = {
+                'lower': data.get('lower', []),
+                'upper': data.get('upper', []),
+                'method': data.get('method', 4),
+                'count': data.get('count', 1),
+                'connected': data.get('connected', False),
+            }
+        elif reco_type == RecognitionType.INVENTORY:
+            reco_param = {
+                'template': data.get('template', []),
+                'threshold': data.get('threshold', [0.8]),
+                'order_by': data.get('order_by', 'Score'),
+                'index': data.get('index', 0),
+            }
+        elif reco_type == RecognitionType.CASCADE:
+            reco_param = {
+                'stages': data.get('stages', []),  # 每一级的配置与普通节点的识别字段相同
+            }
+        elif reco_type == RecognitionType.AND:
+            reco_param = {
+                'all_of': data.get('all_of', []),  # 子识别的配置与普通节点的识别字段相同
+                'box_index': data.get('box_index', 0),
+            }
+        elif reco_type == RecognitionType.OR:
+            reco_param = {
+                'any_of': data.get('any_of', []),
+            }
+        
+        # 提取动作参数
+        action_param = {}
+        if action_type == ActionType.CLICK:
+            action_param = {
+                'target': data.get('target', True),
+                'target_offset': data.get('target_offset', [0, 0, 0, 0]),
+            }
+        elif action_type == ActionType.SWIPE:
+            action_param = {
+                'begin': data.get('begin', True),
+                'end': data.get('end', [0, 0]),
+                'duration': data.get('duration', 200),
+            }
+        elif action_type == ActionType.INPUT_TEXT:
+            action_param = {
+                'input_text': data.get('input_text', ''),
+            }
+        elif action_type == ActionType.WAIT:
+            action_param = {
+                'duration': data.get('duration', 1000),
+            }
+        
+        # 解析 next 列表
+        next_nodes = data.get('next', [])
+        if isinstance(next_nodes, str):
+            next_nodes = [next_nodes]
+        
+        return cls(
+            name=name,
+            recognition=reco_type,
+            recognition_param=reco_param,
+            roi=data.get('roi'),
+            roi_offset=data.get('roi_offset', [0, 0, 0, 0]),
+            roi_expand=data.get('roi_expand', 0),
+            hot_region=data.get('hot_region', False),
+            action=action_type,
+            action_param=action_param,
+            next=next_nodes,
+            timeout=data.get('timeout', 20000),
+            rate_limit=data.get('rate_limit', 1000),
+            pre_delay=data.get('pre_delay', 200),
+            post_delay=data.get('post_delay', 200),
+            pre_wait_freezes=data.get('pre_wait_freezes', 0),
+            post_wait_freezes=data.get('post_wait_freezes', 0),
+            inverse=data.get('inverse', False),
+            enabled=data.get('enabled', True),
+        )
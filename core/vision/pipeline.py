@@ -9,12 +9,14 @@
 - Entry: 任务入口节点
 """
 
+import os
 import time
-import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Any, Callable, Union
+from typing import Dict, List, Optional, Any, Callable, Tuple
 from pathlib import Path
-from enum import Enum, auto
 import numpy as np
 
 try:
@@ -24,166 +26,88 @@ try:
 except ImportError:
     CV_AVAILABLE = False
 
-from .types import Rect, RecoResult, MatchResult, Point, OrderBy
-from .template_matcher import TemplateMatcher, TemplateMatcherParam
-from .color_matcher import ColorMatcher, ColorMatcherParam
-from .feature_matcher import FeatureMatcher, FeatureMatcherParam, FeatureDetector
+from .types import Rect, RecoResult, MatchResult, Point
+from .template_matcher import TemplateMatcher
+from .color_matcher import ColorMatcher
+from .feature_matcher import FeatureMatcher
+from .node import RecognitionType, ActionType, PipelineNode
+from .plan import PipelinePlan, CompiledNode, compile_pipeline, load_plan
+from .actions import ActionBackend, create_action_backend
+from .clock import Clock
+from .tracing import Tracer
+from .stability import WaitFreezesParam, wait_until_stable
+from .roi_learning import RoiStore, RoiKey, pipeline_key, template_key
+from .scene_inventory import SceneInventory, InventoryMatcher, get_inventory
+from .cascade import CascadeMatcher, StageStats
+from .composite import CompositeMatcher
 
+# 默认的识别截图保存目录 (项目根目录下的 log/)
+DEFAULT_LOG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'log')
 
-class RecognitionType(Enum):
-    """识别算法类型"""
-    DIRECT_HIT = auto()      # 直接命中，不识别
-    TEMPLATE_MATCH = auto()  # 模板匹配
-    FEATURE_MATCH = auto()   # 特征匹配 (抗透视/旋转)
-    COLOR_MATCH = auto()     # 颜色匹配
-    # OCR = auto()           # 文字识别（可扩展）
+# 不参与 ROI 学习的识别类型: 直接命中没有识别框；场景清单总是扫描全屏；
+# 组合识别的子识别（尤其是 inverse 的子识别）需要在各自的区域内搜索
+NO_LEARNED_ROI = (
+    RecognitionType.DIRECT_HIT,
+    RecognitionType.INVENTORY,
+    RecognitionType.AND,
+    RecognitionType.OR,
+)
 
-
-class ActionType(Enum):
-    """动作类型"""
-    DO_NOTHING = auto()      # 不执行动作
-    CLICK = auto()           # 点击
-    LONG_PRESS = auto()      # 长按
-    SWIPE = auto()           # 滑动
-    INPUT_TEXT = auto()      # 输入文本
-    WAIT = auto()            # 等待
+# 热区跟踪: 上次命中框向四周扩展的像素数至少为该值（同时不小于命中框的宽高）
+HOT_REGION_MIN_MARGIN = 16
+# 热区面积超过搜索区域的该比例时直接搜索完整区域（省下的像素太少）
+HOT_REGION_MAX_RATIO = 0.5
 
 
 @dataclass
-class PipelineNode:
-    """流水线节点
-    
-    参考 MAA 的节点设计，简化版本
+class NodeStats:
+    """节点识别统计
+
+    同一节点在一次运行中可能被多次执行（循环流程），统计值为累计值
     """
     name: str
-    
-    # 识别配置
-    recognition: RecognitionType = RecognitionType.DIRECT_HIT
-    recognition_param: Dict[str, Any] = field(default_factory=dict)
-    
-    # ROI 区域 [x, y, width, height]
-    roi: Optional[List[int]] = None
-    
-    # 动作配置
-    action: ActionType = ActionType.DO_NOTHING
-    action_param: Dict[str, Any] = field(default_factory=dict)
-    
-    # 后续节点列表
-    next: List[str] = field(default_factory=list)
-    
-    # 超时和重试
-    timeout: int = 20000      # 超时时间 (ms)
-    rate_limit: int = 1000    # 识别频率限制 (ms)
-    
-    # 延迟
-    pre_delay: int = 200      # 动作前延迟 (ms)
-    post_delay: int = 200     # 动作后延迟 (ms)
-    
-    # 反转识别结果
-    inverse: bool = False
-    
-    # 是否启用
-    enabled: bool = True
-    
-    @classmethod
-    def from_dict(cls, name: str, data: Dict[str, Any]) -> 'PipelineNode':
-        """从字典创建节点"""
-        # 解析识别类型
-        reco_type = RecognitionType.DIRECT_HIT
-        reco_str = data.get('recognition', 'DirectHit')
-        if reco_str == 'TemplateMatch':
-            reco_type = RecognitionType.TEMPLATE_MATCH
-        elif reco_str == 'FeatureMatch':
-            reco_type = RecognitionType.FEATURE_MATCH
-        elif reco_str == 'ColorMatch':
-            reco_type = RecognitionType.COLOR_MATCH
-        
-        # 解析动作类型
-        action_type = ActionType.DO_NOTHING
-        action_str = data.get('action', 'DoNothing')
-        if action_str == 'Click':
-            action_type = ActionType.CLICK
-        elif action_str == 'LongPress':
-            action_type = ActionType.LONG_PRESS
-        elif action_str == 'Swipe':
-            action_type = ActionType.SWIPE
-        elif action_str == 'InputText':
-            action_type = ActionType.INPUT_TEXT
-        elif action_str == 'Wait':
-            action_type = ActionType.WAIT
-        
-        # 提取识别参数
-        reco_param = {}
-        if reco_type == RecognitionType.TEMPLATE_MATCH:
-            reco_param = {
-                'template': data.get('template', []),
-                'threshold': data.get('threshold', [0.7]),
-                'method': data.get('method', 5),
-                'green_mask': data.get('green_mask', False),
-                'multi_scale': data.get('multi_scale', True),
-                'scale_range': data.get('scale_range', [0.5, 1.5]),
-                'scale_step': data.get('scale_step', 0.1),
-                'order_by': data.get('order_by', 'Score'),  # 默认按分数排序
-            }
-        elif reco_type == RecognitionType.FEATURE_MATCH:
-            reco_param = {
-                'template': data.get('template', []),
-                'detector': data.get('detector', 'AKAZE'),
-                'ratio': data.get('ratio', 0.75),
-                'count': data.get('count', 10),
-                'green_mask': data.get('green_mask', False),
-            }
-        elif reco_type == RecognitionType.COLOR_MATCH:
-            reco_param = {
-                'lower': data.get('lower', []),
-                'upper': data.get('upper', []),
-                'method': data.get('method', 4),
-                'count': data.get('count', 1),
-                'connected': data.get('connected', False),
-            }
-        
-        # 提取动作参数
-        action_param = {}
-        if action_type == ActionType.CLICK:
-            action_param = {
-                'target': data.get('target', True),
-                'target_offset': data.get('target_offset', [0, 0, 0, 0]),
-            }
-        elif action_type == ActionType.SWIPE:
-            action_param = {
-                'begin': data.get('begin', True),
-                'end': data.get('end', [0, 0]),
-                'duration': data.get('duration', 200),
-            }
-        elif action_type == ActionType.INPUT_TEXT:
-            action_param = {
-                'input_text': data.get('input_text', ''),
-            }
-        elif action_type == ActionType.WAIT:
-            action_param = {
-                'duration': data.get('duration', 1000),
-            }
-        
-        # 解析 next 列表
-        next_nodes = data.get('next', [])
-        if isinstance(next_nodes, str):
-            next_nodes = [next_nodes]
-        
-        return cls(
-            name=name,
-            recognition=reco_type,
-            recognition_param=reco_param,
-            roi=data.get('roi'),
-            action=action_type,
-            action_param=action_param,
-            next=next_nodes,
-            timeout=data.get('timeout', 20000),
-            rate_limit=data.get('rate_limit', 1000),
-            pre_delay=data.get('pre_delay', 200),
-            post_delay=data.get('post_delay', 200),
-            inverse=data.get('inverse', False),
-            enabled=data.get('enabled', True),
-        )
+    attempts: int = 0         # 识别尝试次数（每次尝试 = 截图 + 识别）
+    hits: int = 0             # 识别命中次数
+    timeouts: int = 0         # 识别超时次数
+    reco_ms: float = 0.0      # 识别累计耗时 (ms)，不含共享的截图耗时
+    wait_ms: float = 0.0      # 从开始等待到命中/超时的累计耗时 (ms)
+    freeze_ms: float = 0.0    # 等待画面稳定的累计耗时 (ms)
+    hot_attempts: int = 0     # 先搜索热区（上次命中位置附近）的识别次数
+    hot_hits: int = 0         # 在热区内命中、无需搜索完整区域的次数
+    pixels_saved: int = 0     # 热区跟踪少搜索的像素数（热区未命中时额外搜索的像素计为负数）
+    learned_attempts: int = 0  # 先在学习到的 ROI 内识别的次数 (auto_roi)
+    learned_hits: int = 0      # 在学习到的 ROI 内命中、无需搜索全屏的次数
+    stages: List[StageStats] = field(default_factory=list)  # 级联识别各级的累计统计 (Cascade)
+
+    def to_dict(self) -> Dict[str, Any]:
+        waits = self.hits + self.timeouts
+        return {
+            'name': self.name,
+            'attempts': self.attempts,
+            'hits': self.hits,
+            'timeouts': self.timeouts,
+            'reco_ms': round(self.reco_ms, 2),
+            'wait_ms': round(self.wait_ms, 2),
+            'avg_reco_ms': round(self.reco_ms / self.attempts, 2) if self.attempts else 0.0,
+            'avg_wait_ms': round(self.wait_ms / waits, 2) if waits else 0.0,
+            'freeze_ms': round(self.freeze_ms, 2),
+            'hot_attempts': self.hot_attempts,
+            'hot_hits': self.hot_hits,
+            'hot_hit_rate': round(self.hot_hits / self.hot_attempts, 4) if self.hot_attempts else 0.0,
+            'pixels_saved': self.pixels_saved,
+            'learned_attempts': self.learned_attempts,
+            'learned_hits': self.learned_hits,
+            'learned_hit_rate': round(self.learned_hits / self.learned_attempts, 4) if self.learned_attempts else 0.0,
+            'stages': [stage.to_dict() for stage in self.stages],
+        }
+
+    def add_stages(self, reports: List[Dict[str, Any]]):
+        """累加一次级联识别的各级执行情况 (RecoResult.detail['stages'])"""
+        for report in reports:
+            while len(self.stages) <= report['index']:
+                self.stages.append(StageStats(index=len(self.stages), algorithm=report['algorithm'],
+                                              fallback=report['fallback']))
+            self.stages[report['index']].add(report)
 
 
 @dataclass
@@ -197,6 +121,11 @@ class PipelineResult:
     error: Optional[str] = None
     cost_ms: float = 0.0
     logs: List[str] = field(default_factory=list)
+    node_stats: Dict[str, NodeStats] = field(default_factory=dict)
+    trace: Optional[Dict[str, Any]] = None            # Chrome trace_event JSON
+    trace_summary: Dict[str, Dict[str, float]] = field(default_factory=dict)  # 各类别耗时汇总
+    trace_file: Optional[str] = None
+    inventory: Optional[Dict[str, Any]] = None         # 场景清单统计（扫描次数、缓存命中等）
     
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -208,6 +137,10 @@ class PipelineResult:
             'error': self.error,
             'cost_ms': self.cost_ms,
             'logs': self.logs,
+            'node_stats': {name: s.to_dict() for name, s in self.node_stats.items()},
+            'trace_summary': self.trace_summary,
+            'trace_file': self.trace_file,
+            'inventory': self.inventory,
         }
 
 
@@ -239,19 +172,57 @@ class Pipeline:
     def __init__(
         self,
         screen_capture_func: Optional[Callable[[], np.ndarray]] = None,
-        resource_dir: Optional[str] = None
+        resource_dir: Optional[str] = None,
+        max_workers: Optional[int] = None,
+        action_backend: Optional[ActionBackend] = None,
+        clock: Optional[Clock] = None,
+        log_dir: Optional[str] = DEFAULT_LOG_DIR,
+        trace: bool = True,
+        on_event: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+        roi_store: Optional[RoiStore] = None,
+        auto_roi: bool = False
     ):
         """
         Args:
             screen_capture_func: 屏幕截图函数，返回 BGR 格式的 numpy 数组
             resource_dir: 资源目录（模板图片等）
+            max_workers: 并行识别 next 候选节点的线程数，默认取 CPU 核数（最多 8）
+            action_backend: 动作后端，默认按 xtest -> xdotool -> pyautogui 自动选择
+            clock: 时钟，默认真实时钟；回放时可传入 VirtualClock
+            log_dir: 识别截图保存目录，为 None 时不保存截图
+            trace: 是否记录执行追踪 (截图/识别/动作/延迟/IO 的耗时 span)
+            on_event: 进度事件回调 (事件类型, 数据)，在执行线程中同步调用，
+                事件类型: log / wait / recognized / timeout / action
+            roi_store: 命中位置历史，提供时在运行结束后记录各节点的命中框
+                （仅从 JSON 文件加载的 Pipeline）
+            auto_roi: 没有设置 roi 的节点先在 roi_store 学习到的区域内识别，未命中再搜索全屏
         """
         self._nodes: Dict[str, PipelineNode] = {}
+        self._plan: Optional[PipelinePlan] = None
         self._screen_capture = screen_capture_func or self._default_screen_capture
         self._resource_dir = Path(resource_dir) if resource_dir else None
         self._running = False
+        self._stop_event = threading.Event()
+        self._max_workers = max_workers or min(8, os.cpu_count() or 1)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._branch_executor: Optional[ThreadPoolExecutor] = None
+        self._action_backend = action_backend
+        self._owns_action_backend = action_backend is None  # 自行创建的后端由 close() 释放
+        self._clock = clock or Clock()
+        self._log_dir = log_dir
+        self._trace = trace
+        self._tracer: Optional[Tracer] = None
         self._last_reco_results: Dict[str, RecoResult] = {}
+        self._anchor_boxes: Dict[str, Rect] = {}  # 各节点最近一次识别成功的位置，用于相对 ROI 和热区跟踪
+        self._hot_outcomes: Dict[str, Tuple[bool, int]] = {}  # 本次尝试各节点的热区结果 (是否命中, 节省像素)
+        self._roi_store = roi_store
+        self._auto_roi = auto_roi
+        self._learned_rois: Dict[RoiKey, Rect] = {}   # 本次运行使用的学习 ROI
+        self._learned_outcomes: Dict[str, bool] = {}  # 本次尝试各节点在学习 ROI 内是否命中
+        self._roi_samples: List[Tuple[RoiKey, Rect]] = []  # 本次运行的命中框，结束时写入 roi_store
+        self._inventory: Optional[SceneInventory] = None
         self._logs: List[str] = []
+        self._on_event = on_event
     
     def _default_screen_capture(self) -> np.ndarray:
         """默认屏幕截图"""
@@ -262,22 +233,35 @@ class Pipeline:
     
     def load_from_dict(self, config: Dict[str, Any]):
         """从字典加载配置"""
-        self._nodes.clear()
-        for name, data in config.items():
-            if not name.startswith('$'):  # 跳过 $ 开头的字段
-                node = PipelineNode.from_dict(name, data)
-                self._nodes[name] = node
+        resource_dir = str(self._resource_dir) if self._resource_dir else None
+        self.load_plan(compile_pipeline(config, resource_dir))
     
     def load_from_json(self, json_path: str):
-        """从 JSON 文件加载配置"""
-        path = Path(json_path)
-        if not path.exists():
-            raise FileNotFoundError(f"Pipeline config not found: {json_path}")
-        
-        with open(path, 'r', encoding='utf-8') as f:
-            config = json.load(f)
-        
-        self.load_from_dict(config)
+        """从 JSON 文件加载配置（编译结果按文件 mtime 缓存）"""
+        resource_dir = str(self._resource_dir) if self._resource_dir else None
+        self.load_plan(load_plan(json_path, resource_dir))
+    
+    def load_plan(self, plan: PipelinePlan):
+        """加载编译好的执行计划"""
+        self._plan = plan
+        self._nodes = {name: compiled.node for name, compiled in plan.nodes.items()}
+    
+    @property
+    def plan(self) -> Optional[PipelinePlan]:
+        """当前执行计划"""
+        return self._plan
+    
+    @property
+    def last_reco_results(self) -> Dict[str, RecoResult]:
+        """各节点最近一次的识别结果"""
+        return dict(self._last_reco_results)
+    
+    @property
+    def action_backend(self) -> ActionBackend:
+        """动作后端（首次使用时才创建默认后端）"""
+        if self._action_backend is None:
+            self._action_backend = create_action_backend()
+        return self._action_backend
     
     def run(self, entry: str) -> PipelineResult:
         """运行流水线
@@ -290,9 +274,8 @@ class Pipeline:
         """
 
         # 清空 log 文件夹
-        import os, shutil
-        log_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'log')
-        if os.path.exists(log_dir):
+        log_dir = self._log_dir
+        if log_dir and os.path.exists(log_dir):
             for f in os.listdir(log_dir):
                 fp = os.path.join(log_dir, f)
                 try:
@@ -303,7 +286,11 @@ class Pipeline:
 
         start_time = time.perf_counter()
         self._running = True
+        self._stop_event.clear()
+        self._last_reco_results = {}
+        self._anchor_boxes = {}
         self._logs = []
+        self._roi_samples = []
 
         result = PipelineResult(entry=entry)
 
@@ -312,80 +299,377 @@ class Pipeline:
             result.cost_ms = (time.perf_counter() - start_time) * 1000
             return result
         
+        for warning in self._plan.warnings:
+            self._log(f"警告: {warning}")
+        if not self._plan.valid:
+            result.error = "Pipeline 校验失败: " + "; ".join(self._plan.errors)
+            result.cost_ms = (time.perf_counter() - start_time) * 1000
+            result.logs = self._logs.copy()
+            return result
+        
 
+        self._tracer = Tracer(f"pipeline:{entry}") if self._trace else None
+        self._learned_rois = self._load_learned_rois()
+        self._inventory = self._load_inventory()
+        inventory_start = self._inventory.stats() if self._inventory else None
+        self._executor = ThreadPoolExecutor(
+            max_workers=self._max_workers,
+            thread_name_prefix="pipeline-reco"
+        )
+        # And / Or 的子识别使用单独的线程池，避免在候选识别线程内等待同一线程池的任务
+        self._branch_executor = ThreadPoolExecutor(
+            max_workers=self._max_workers,
+            thread_name_prefix="pipeline-branch"
+        )
         try:
-            current_node = entry
-            # 截图文件名用节点名
-            while self._running and current_node:
-                node = self._nodes.get(current_node)
-                if not node or not node.enabled:
+            candidates = self._enabled_nodes([entry])
+            while self._running and candidates:
+                names = [c.name for c in candidates]
+                self._log(f"识别节点: {', '.join(names)}")
+                # 同一帧上并行识别所有候选节点，在 timeout 内按 rate_limit 重试
+                self._emit("wait", candidates=names)
+                with self._span("wait next", "node", candidates=names) as span:
+                    hit_node, reco_results, image = self._wait_for_candidates(candidates, result)
+                    if span is not None:
+                        span.args['hit'] = hit_node.name if hit_node else None
+                if hit_node is None:
+                    # 识别失败也截图，文件名加_fail
+                    for node in candidates:
+                        if node.name in reco_results:
+                            self._save_node_artifact(node.name, image, reco_results[node.name], False)
+                    if self._running:
+                        timeout = max(c.timeout for c in candidates)
+                        if len(candidates) == 1:
+                            result.error = f"节点 {names[0]} 识别超时 ({timeout}ms)"
+                        else:
+                            result.error = f"后续节点 [{', '.join(names)}] 均未命中 ({timeout}ms)"
+                        self._emit("timeout", candidates=names, timeout=timeout)
+                        self._log(result.error)
                     break
-                self._log(f"执行节点: {current_node}")
-                # 执行识别
-                reco_result = self._recognize(node)
-                self._last_reco_results[current_node] = reco_result
+
+                current_node = hit_node.name
+                reco_result = reco_results[current_node]
                 result.last_reco_result = reco_result
-                # 检查识别结果
-                success = reco_result.success
-                if node.inverse:
-                    success = not success
-                # 识别失败也截图，文件名加_fail
-                import cv2, pyautogui, os, re
-                img = pyautogui.screenshot()
-                img = cv2.cvtColor(np.array(img), cv2.COLOR_RGB2BGR)
-                if reco_result.box:
-                    box = reco_result.box
-                    cv2.rectangle(img, (box.x, box.y), (box.x + box.width, box.y + box.height), (0,0,255), 3)
-                log_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'log')
-                os.makedirs(log_dir, exist_ok=True)
-                idx = list(self._nodes.keys()).index(str(current_node)) + 1
-                # 文件名加_fail后缀表示失败
-                if not success:
-                    save_path = os.path.join(log_dir, f"node_{idx}_fail.png")
-                else:
-                    save_path = os.path.join(log_dir, f"node_{idx}.png")
-                try:
-                    cv2.imwrite(save_path, img)
-                except Exception as e:
-                    self._log(f"截图保存失败: {e}")
-                if not success:
-                    # 识别失败，尝试下一个 next 节点
-                    next_node = self._find_next_node(node)
-                    if next_node:
-                        current_node = next_node
-                        continue
-                    else:
-                        # 超时处理
-                        self._log(f"节点 {current_node} 识别超时")
-                        break
-                self._log(f"识别成功，分数: {reco_result.score:.3f}")
+                self._save_node_artifact(current_node, image, reco_result, True)
+                if reco_result.box is not None and hit_node.recognition not in NO_LEARNED_ROI:
+                    self._roi_samples.append((self._roi_key(hit_node, image), reco_result.box))
+                self._log(f"执行节点: {current_node}，识别成功，分数: {reco_result.score:.3f}")
+                self._emit(
+                    "recognized",
+                    node=current_node,
+                    score=round(float(reco_result.score), 4),
+                    box=[int(v) for v in reco_result.box.to_list()] if reco_result.box else None,
+                    cost_ms=round(reco_result.cost_ms, 2),
+                )
                 result.executed_nodes.append(current_node)
                 result.last_node = current_node
-                # 动作前延迟
-                if node.pre_delay > 0:
-                    time.sleep(node.pre_delay / 1000)
-                self._execute_action(node, reco_result)
-                # 动作后延迟
-                if node.post_delay > 0:
-                    time.sleep(node.post_delay / 1000)
-                # 进入下一个节点
-                if node.next:
-                    current_node = node.next[0]  # 简化：取第一个
-                else:
-                    current_node = None
-            result.success = len(result.executed_nodes) > 0
+                compiled = self._plan.get(current_node)
+                # 执行顺序 (同 MAA): pre_wait_freezes -> pre_delay -> 动作 -> post_wait_freezes -> post_delay
+                self._wait_freezes(compiled, compiled.pre_freezes, 'pre_wait_freezes', result)
+                with self._span("pre_delay", "delay", node=current_node, ms=hit_node.pre_delay):
+                    self._sleep_ms(hit_node.pre_delay)
+                if not self._running:
+                    break
+                self._execute_action(hit_node, reco_result)
+                self._wait_freezes(compiled, compiled.post_freezes, 'post_wait_freezes', result)
+                with self._span("post_delay", "delay", node=current_node, ms=hit_node.post_delay):
+                    self._sleep_ms(hit_node.post_delay)
+                # 进入下一组候选节点
+                candidates = self._enabled_nodes(hit_node.next)
+            result.success = len(result.executed_nodes) > 0 and result.error is None
         except Exception as e:
             result.error = str(e)
             self._log(f"执行错误: {e}")
         finally:
             self._running = False
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self._branch_executor.shutdown(wait=False, cancel_futures=True)
+            self._branch_executor = None
+            self._save_roi_samples()
+            if self._inventory is not None:
+                result.inventory = self._inventory_stats(inventory_start)
             result.cost_ms = (time.perf_counter() - start_time) * 1000
+            self._finish_trace(result)
             result.logs = self._logs.copy()
         return result
     
+    @staticmethod
+    def _roi_key(node: PipelineNode, image: np.ndarray) -> RoiKey:
+        return (node.name, template_key(node), image.shape[1], image.shape[0])
+    
+    def _load_learned_rois(self) -> Dict[RoiKey, Rect]:
+        """auto_roi 模式下从 roi_store 读取本 Pipeline 学习到的 ROI"""
+        key = pipeline_key(self._plan.source)
+        if not self._auto_roi or self._roi_store is None or key is None:
+            return {}
+        try:
+            with self._span("load learned rois", "io"):
+                return self._roi_store.learned_rois(key)
+        except Exception as e:
+            self._log(f"读取学习 ROI 失败: {e}")
+            return {}
+    
+    def _load_inventory(self) -> Optional[SceneInventory]:
+        """取得计划的场景清单（同一参数的清单在多次运行间共享，模板只加载一次）"""
+        if self._plan.inventory is None:
+            return None
+        with self._span("load inventory", "io", templates=len(self._plan.inventory.templates)):
+            inventory = get_inventory(self._plan.inventory, self._max_workers)
+        if inventory.missing:
+            self._log(f"场景清单中有 {len(inventory.missing)} 个模板无法读取")
+        if inventory.flat:
+            self._log(f"场景清单中有 {len(inventory.flat)} 个纯色模板已跳过")
+        return inventory
+    
+    def _inventory_stats(self, start: Dict[str, Any]) -> Dict[str, Any]:
+        """本次运行期间的清单统计（清单是共享的，统计值取差）"""
+        end = self._inventory.stats()
+        scans = end['scans'] - start['scans']
+        scan_ms = end['scan_ms'] - start['scan_ms']
+        return {
+            'templates': end['templates'],
+            'scans': scans,
+            'cache_hits': end['cache_hits'] - start['cache_hits'],
+            'scan_ms': round(scan_ms, 2),
+            'avg_scan_ms': round(scan_ms / scans, 2) if scans else 0.0,
+        }
+    
+    def _save_roi_samples(self):
+        """把本次运行的命中框写入 roi_store"""
+        key = pipeline_key(self._plan.source)
+        if self._roi_store is None or key is None or not self._roi_samples:
+            return
+        try:
+            with self._span("save roi samples", "io", count=len(self._roi_samples)):
+                self._roi_store.record_many(key, self._roi_samples)
+        except Exception as e:
+            self._log(f"保存命中位置失败: {e}")
+        self._roi_samples = []
+    
+    def _span(self, name: str, cat: str, **args):
+        """创建追踪 span，未开启追踪时为空操作"""
+        if self._tracer is None:
+            return nullcontext()
+        return self._tracer.span(name, cat, **args)
+    
+    def _finish_trace(self, result: PipelineResult):
+        """把追踪数据附加到结果，并写入 log 目录下的 trace.json"""
+        if self._tracer is None:
+            return
+        result.trace = self._tracer.to_chrome_trace()
+        result.trace_summary = self._tracer.summary()
+        if self._log_dir:
+            try:
+                result.trace_file = self._tracer.save(os.path.join(self._log_dir, 'trace.json'))
+            except OSError as e:
+                self._log(f"追踪文件保存失败: {e}")
+    
+    def _wait_for_candidates(
+        self,
+        candidates: List[PipelineNode],
+        result: PipelineResult
+    ) -> Tuple[Optional[PipelineNode], Dict[str, RecoResult], np.ndarray]:
+        """在 timeout 内重复截图识别候选节点，直到某个节点命中 (参考 MAA 的 next 列表语义)
+
+        - 每次尝试只截一帧，所有候选节点在这一帧上并行识别
+        - 命中时按 next 中的声明顺序取第一个命中的节点
+        - 两次尝试的间隔由 rate_limit 控制，从上一次尝试 *开始* 计时，
+          因此识别本身的耗时会计入间隔，不会额外叠加等待
+        - 多个候选时取最长的 timeout 和最短的 rate_limit
+
+        Returns:
+            (命中的节点或 None, 最后一次尝试的各节点识别结果, 最后一次尝试使用的截图)
+        """
+        timeout = max(c.timeout for c in candidates)
+        rate_limit = min(c.rate_limit for c in candidates)
+        stats = [
+            result.node_stats.setdefault(c.name, NodeStats(name=c.name))
+            for c in candidates
+        ]
+
+        begin = self._clock.now()
+        deadline = begin + timeout / 1000
+        hit_index: Optional[int] = None
+
+        while True:
+            attempt_start = self._clock.now()
+            with self._span("capture", "capture"):
+                image = self._screen_capture()
+            self._hot_outcomes = {}
+            self._learned_outcomes = {}
+            hit_index, reco_results = self._recognize_candidates(candidates, image)
+
+            for node, node_stats in zip(candidates, stats):
+                reco_result = reco_results.get(node.name)
+                if reco_result is not None:
+                    node_stats.attempts += 1
+                    node_stats.reco_ms += reco_result.cost_ms
+                    hot = self._hot_outcomes.get(node.name)
+                    if hot is not None:
+                        node_stats.hot_attempts += 1
+                        node_stats.hot_hits += hot[0]
+                        node_stats.pixels_saved += hot[1]
+                    learned = self._learned_outcomes.get(node.name)
+                    if learned is not None:
+                        node_stats.learned_attempts += 1
+                        node_stats.learned_hits += learned
+                    if 'stages' in reco_result.detail:
+                        node_stats.add_stages(reco_result.detail['stages'])
+                    self._last_reco_results[node.name] = reco_result
+                    if reco_result.box is not None:
+                        self._anchor_boxes[node.name] = reco_result.box
+
+            if hit_index is not None or not self._running:
+                break
+
+            next_attempt = attempt_start + rate_limit / 1000
+            if next_attempt >= deadline:
+                break
+            with self._span("rate_limit", "delay", ms=rate_limit):
+                self._clock.wait(next_attempt - self._clock.now(), self._stop_event)
+            if not self._running:
+                break
+
+        wait_ms = (self._clock.now() - begin) * 1000
+        if hit_index is not None:
+            stats[hit_index].hits += 1
+            stats[hit_index].wait_ms += wait_ms
+            return candidates[hit_index], reco_results, image
+
+        if self._running:
+            for node_stats in stats:
+                node_stats.timeouts += 1
+                node_stats.wait_ms += wait_ms
+        return None, reco_results, image
+
+    def _recognize_candidates(
+        self,
+        candidates: List[PipelineNode],
+        image: np.ndarray
+    ) -> Tuple[Optional[int], Dict[str, RecoResult]]:
+        """在同一帧上识别所有候选节点，返回声明顺序中第一个命中的下标
+
+        多个候选时提交到线程池并行识别（OpenCV 计算会释放 GIL），
+        按声明顺序等待结果：一旦某个节点命中且排在它前面的节点都未命中，
+        就取消其余仍在排队或执行中的识别。
+        """
+        reco_results: Dict[str, RecoResult] = {}
+
+        if len(candidates) == 1 or self._executor is None:
+            for i, node in enumerate(candidates):
+                reco_result = self._recognize(node, image)
+                reco_results[node.name] = reco_result
+                if self._is_hit(node, reco_result):
+                    return i, reco_results
+            return None, reco_results
+
+        cancel_event = threading.Event()
+        futures = [
+            self._executor.submit(self._recognize, node, image, cancel_event)
+            for node in candidates
+        ]
+        hit_index: Optional[int] = None
+        try:
+            for i, (node, future) in enumerate(zip(candidates, futures)):
+                reco_result = future.result()
+                reco_results[node.name] = reco_result
+                if self._is_hit(node, reco_result):
+                    hit_index = i
+                    break
+        finally:
+            # 不再需要的识别：未开始的直接取消，执行中的通过 cancel_event 协作退出
+            cancel_event.set()
+            for future in futures:
+                future.cancel()
+        return hit_index, reco_results
+
+    @staticmethod
+    def _is_hit(node: PipelineNode, reco_result: RecoResult) -> bool:
+        """识别结果是否命中（考虑 inverse）"""
+        return reco_result.success != node.inverse
+
+    def _enabled_nodes(self, names: List[str]) -> List[PipelineNode]:
+        """按声明顺序取出存在且启用的节点"""
+        nodes = []
+        for name in names:
+            node = self._nodes.get(name)
+            if node and node.enabled:
+                nodes.append(node)
+            elif not node:
+                self._log(f"警告: 节点不存在: {name}")
+        return nodes
+
+    def _save_node_artifact(
+        self,
+        node_name: str,
+        image: np.ndarray,
+        reco_result: RecoResult,
+        success: bool
+    ):
+        """保存节点识别截图到 log 目录（失败时文件名加 _fail 后缀）"""
+        log_dir = self._log_dir
+        if not log_dir:
+            return
+        with self._span("artifact", "io", node=node_name, success=success):
+            img = image.copy()
+            if reco_result.box:
+                box = reco_result.box
+                cv2.rectangle(img, (box.x, box.y), (box.x + box.width, box.y + box.height), (0,0,255), 3)
+            os.makedirs(log_dir, exist_ok=True)
+            idx = self._plan.nodes[node_name].index
+            # 文件名加_fail后缀表示失败
+            if not success:
+                save_path = os.path.join(log_dir, f"node_{idx}_fail.png")
+            else:
+                save_path = os.path.join(log_dir, f"node_{idx}.png")
+            try:
+                cv2.imwrite(save_path, img)
+            except Exception as e:
+                self._log(f"截图保存失败: {e}")
+
     def stop(self):
         """停止流水线"""
         self._running = False
+        self._stop_event.set()
+    
+    def close(self):
+        """释放自动创建的动作后端（如 XTest 的 X 连接）；传入的后端由调用方负责关闭"""
+        if self._owns_action_backend and self._action_backend is not None:
+            backend, self._action_backend = self._action_backend, None
+            backend.close()
+    
+    def _sleep_ms(self, ms: int):
+        """可被 stop() 打断的延迟"""
+        if ms > 0:
+            self._clock.wait(ms / 1000, self._stop_event)
+    
+    def _wait_freezes(
+        self,
+        compiled: CompiledNode,
+        param: WaitFreezesParam,
+        label: str,
+        result: PipelineResult
+    ):
+        """等待节点区域画面稳定（未配置时直接返回）"""
+        if not param.enabled or not self._running:
+            return
+        with self._span(label, "delay", node=compiled.name, ms=param.time) as span:
+            stability = wait_until_stable(
+                self._screen_capture,
+                param,
+                roi=self._anchor_roi(compiled) if compiled.roi_anchor else compiled.roi,
+                clock=self._clock,
+                stop_event=self._stop_event,
+            )
+            if span is not None:
+                span.args.update(stability.to_dict())
+        node_stats = result.node_stats.setdefault(compiled.name, NodeStats(name=compiled.name))
+        node_stats.freeze_ms += stability.waited_ms
+        if stability.stable:
+            self._log(f"{label}: 画面已稳定 ({stability.waited_ms:.0f}ms, {stability.frames} 帧)")
+        elif self._running:
+            self._log(f"{label}: 等待画面稳定超时 ({param.timeout}ms)，继续执行")
     
     def _log(self, message: str):
         """记录日志"""
@@ -393,16 +677,52 @@ class Pipeline:
         log = f"[{timestamp}] {message}"
         self._logs.append(log)
         print(log)  # 也输出到控制台
+        self._emit("log", message=log)
     
-    def _recognize(self, node: PipelineNode) -> RecoResult:
-        """执行识别"""
-        # 截图
-        image = self._screen_capture()
-        
-        # 构建 ROI
-        roi = None
-        if node.roi:
-            roi = Rect.from_list(node.roi)
+    def _emit(self, event_type: str, **data):
+        """发送进度事件，回调异常不影响流水线执行"""
+        if self._on_event is None:
+            return
+        try:
+            self._on_event(event_type, data)
+        except Exception as e:
+            print(f"进度事件回调失败: {e}")
+    
+    def _recognize(
+        self,
+        node: PipelineNode,
+        image: np.ndarray,
+        cancel_event: Optional[threading.Event] = None
+    ) -> RecoResult:
+        """对给定截图执行识别
+
+        Args:
+            node: 节点
+            image: 截图
+            cancel_event: 取消事件，置位后识别器会尽早返回
+        """
+        with self._span(f"recognize:{node.name}", "recognize",
+                        algorithm=node.recognition.name) as span:
+            reco_result = self._run_matcher(node, image, cancel_event)
+            if span is not None:
+                span.args['hit'] = reco_result.success
+                span.args['score'] = round(reco_result.score, 4)
+        return reco_result
+    
+    def _run_matcher(
+        self,
+        node: PipelineNode,
+        image: np.ndarray,
+        cancel_event: Optional[threading.Event]
+    ) -> RecoResult:
+        """按识别类型构建识别器并执行"""
+        compiled = self._plan.nodes[node.name]
+        roi = compiled.roi
+        if compiled.roi_anchor:
+            roi = self._anchor_roi(compiled, image.shape[1], image.shape[0])
+            if roi is None:
+                # 锚点节点尚未命中（或区域在画面外），视为未命中
+                return RecoResult(algorithm=node.recognition.name)
         
         # 根据类型执行识别
         if node.recognition == RecognitionType.DIRECT_HIT:
@@ -414,155 +734,156 @@ class Pipeline:
             )
             return result
         
-        elif node.recognition == RecognitionType.TEMPLATE_MATCH:
-            return self._template_match(image, node, roi)
-        
-        elif node.recognition == RecognitionType.FEATURE_MATCH:
-            return self._feature_match(image, node, roi)
-        
-        elif node.recognition == RecognitionType.COLOR_MATCH:
-            return self._color_match(image, node, roi)
-        
-        else:
-            return RecoResult(algorithm="Unknown")
+        learned = None
+        if roi is None and self._learned_rois and node.recognition not in NO_LEARNED_ROI:
+            learned = self._learned_rois.get(self._roi_key(node, image))
+        if learned is None:
+            return self._search(node, compiled, image, roi, cancel_event)
+        
+        # auto_roi: 先在历史命中位置的外接区域内识别，未命中再搜索全屏（不再重复热区）
+        with self._span("learned roi", "recognize", node=node.name, roi=learned.to_list()):
+            learned_result = self._search(node, compiled, image, learned, cancel_event)
+        if learned_result.success or (cancel_event is not None and cancel_event.is_set()):
+            if learned_result.success:
+                self._learned_outcomes[node.name] = True
+            return learned_result
+        self._learned_outcomes[node.name] = False
+        result = self._match(node, compiled, image, None, cancel_event)
+        result.cost_ms += learned_result.cost_ms
+        return result
     
-    def _template_match(
-        self, 
-        image: np.ndarray, 
+    def _search(
+        self,
         node: PipelineNode,
-        roi: Optional[Rect]
+        compiled: CompiledNode,
+        image: np.ndarray,
+        roi: Optional[Rect],
+        cancel_event: Optional[threading.Event]
     ) -> RecoResult:
-        """模板匹配 (支持多尺度)"""
-        param = node.recognition_param
-        
-        # 处理模板路径
-        templates = param.get('template', [])
-        if isinstance(templates, str):
-            templates = [templates]
-        
-        # 如果设置了资源目录，补全路径
-        if self._resource_dir:
-            templates = [
-                str(self._resource_dir / t) if not Path(t).is_absolute() else t
-                for t in templates
-            ]
-        
-        # 验证模板文件是否存在
-        for t in templates:
-            if not Path(t).exists():
-                self._log(f"警告: 模板文件不存在: {t}")
-        
-        # 处理阈值
-        thresholds = param.get('threshold', [0.7])
-        if isinstance(thresholds, (int, float)):
-            thresholds = [thresholds]
-        
-        # 解析排序方式
-        order_by_str = param.get('order_by', 'Score')
-        order_by_map = {
-            'Horizontal': OrderBy.HORIZONTAL,
-            'Vertical': OrderBy.VERTICAL,
-            'Score': OrderBy.SCORE,
-            'Area': OrderBy.AREA,
-            'Random': OrderBy.RANDOM,
-        }
-        order_by = order_by_map.get(order_by_str, OrderBy.SCORE)
-        
-        matcher_param = TemplateMatcherParam(
-            templates=templates,
-            thresholds=thresholds,
-            method=param.get('method', 5),
-            green_mask=param.get('green_mask', False),
-            multi_scale=param.get('multi_scale', True),
-            scale_range=param.get('scale_range', [0.5, 1.5]),
-            scale_step=param.get('scale_step', 0.1),
-            order_by=order_by,
-        )
-        
-        matcher = TemplateMatcher(image, matcher_param, roi, name=node.name)
-        return matcher.analyze()
+        """在 roi 内识别，启用热区跟踪时先搜索上次命中位置附近"""
+        if not compiled.hot_region:
+            return self._match(node, compiled, image, roi, cancel_event)
+        
+        # 热区跟踪: 目标通常停留在上次命中位置附近，先搜索那一小块，未命中再搜索完整区域
+        search_roi = roi or Rect(0, 0, image.shape[1], image.shape[0])
+        window = self._hot_region(compiled, search_roi)
+        if window is None:
+            return self._match(node, compiled, image, roi, cancel_event)
+        
+        with self._span("hot region", "recognize", node=node.name, roi=window.to_list()):
+            hot_result = self._match(node, compiled, image, window, cancel_event)
+        if cancel_event is not None and cancel_event.is_set():
+            return hot_result
+        
+        hit = hot_result.success
+        if hit and node.recognition == RecognitionType.COLOR_MATCH:
+            # 连通域贴着热区内侧边界时可能被截断，回退到完整区域重新识别
+            hit = not self._touches_inner_edge(hot_result.box, window, search_roi)
+        if hit:
+            self._hot_outcomes[node.name] = (True, int(search_roi.area() - window.area()))
+            return hot_result
+        
+        self._hot_outcomes[node.name] = (False, -int(window.area()))
+        result = self._match(node, compiled, image, roi, cancel_event)
+        result.cost_ms += hot_result.cost_ms
+        return result
     
-    def _feature_match(
+    def _match(
         self,
-        image: np.ndarray,
         node: PipelineNode,
-        roi: Optional[Rect]
+        compiled: CompiledNode,
+        image: np.ndarray,
+        roi: Optional[Rect],
+        cancel_event: Optional[threading.Event]
     ) -> RecoResult:
-        """特征匹配 (抗透视/旋转)"""
-        param = node.recognition_param
-        
-        # 处理模板路径
-        templates = param.get('template', [])
-        if isinstance(templates, str):
-            templates = [templates]
-        
-        # 如果设置了资源目录，补全路径
-        if self._resource_dir:
-            templates = [
-                str(self._resource_dir / t) if not Path(t).is_absolute() else t
-                for t in templates
-            ]
-        
-        # 验证模板文件是否存在
-        for t in templates:
-            if not Path(t).exists():
-                self._log(f"警告: 模板文件不存在: {t}")
-        
-        # 解析检测器类型
-        detector_str = param.get('detector', 'AKAZE')
-        detector_map = {
-            'SIFT': FeatureDetector.SIFT,
-            'ORB': FeatureDetector.ORB,
-            'BRISK': FeatureDetector.BRISK,
-            'KAZE': FeatureDetector.KAZE,
-            'AKAZE': FeatureDetector.AKAZE,
-        }
-        detector = detector_map.get(detector_str.upper(), FeatureDetector.AKAZE)
-        
-        matcher_param = FeatureMatcherParam(
-            templates=templates,
-            detector=detector,
-            ratio=param.get('ratio', 0.75),
-            count=param.get('count', 10),
-            green_mask=param.get('green_mask', False),
-        )
-        
-        matcher = FeatureMatcher(image, matcher_param, roi, name=node.name)
+        """在指定区域内执行 TemplateMatch / FeatureMatch / ColorMatch / Inventory / Cascade / And / Or"""
+        # 识别器构建时会从磁盘加载模板
+        with self._span("load templates", "io", node=node.name):
+            if node.recognition == RecognitionType.TEMPLATE_MATCH:
+                matcher = TemplateMatcher(image, compiled.matcher_param, roi, name=node.name)
+            elif node.recognition == RecognitionType.FEATURE_MATCH:
+                # 特征匹配 (抗透视/旋转)
+                matcher = FeatureMatcher(image, compiled.matcher_param, roi, name=node.name)
+            elif node.recognition == RecognitionType.COLOR_MATCH:
+                matcher = ColorMatcher(image, compiled.matcher_param, roi, name=node.name)
+            elif node.recognition == RecognitionType.CASCADE:
+                # 级联识别：每一级只在上一级的命中区域内运行
+                matcher = CascadeMatcher(image, compiled.matcher_param, roi, name=node.name)
+            elif node.recognition in (RecognitionType.AND, RecognitionType.OR):
+                # 组合识别：子识别在同一帧上并行执行，结果确定后取消其余子识别
+                matcher = CompositeMatcher(image, compiled.matcher_param, roi, name=node.name,
+                                           executor=self._branch_executor)
+            elif node.recognition == RecognitionType.INVENTORY:
+                # 查询场景清单：同一帧只扫描一次，画面不变时复用上次结果
+                matcher = InventoryMatcher(image, compiled.matcher_param, self._inventory, roi, name=node.name)
+            else:
+                return RecoResult(algorithm="Unknown")
+        
+        matcher.set_cancel_event(cancel_event)
+        matcher.set_tracer(self._tracer)
         return matcher.analyze()
     
-    def _color_match(
-        self,
-        image: np.ndarray,
-        node: PipelineNode,
-        roi: Optional[Rect]
-    ) -> RecoResult:
-        """颜色匹配"""
-        param = node.recognition_param
-        
-        lower = param.get('lower', [])
-        upper = param.get('upper', [])
-        
-        # 支持多组颜色范围
-        if lower and isinstance(lower[0], int):
-            ranges = [(lower, upper)]
-        else:
-            ranges = list(zip(lower, upper))
-        
-        matcher_param = ColorMatcherParam(
-            ranges=ranges,
-            method=param.get('method', 4),
-            count=param.get('count', 1),
-            connected=param.get('connected', False),
+    def _hot_region(self, compiled: CompiledNode, search_roi: Rect) -> Optional[Rect]:
+        """本节点上次命中框附近的热区
+
+        Returns:
+            热区（已限制在 search_roi 内）；本节点尚未命中或热区不比 search_roi 小多少时返回 None
+        """
+        last = self._anchor_boxes.get(compiled.name)
+        if last is None:
+            return None
+        margin = max(HOT_REGION_MIN_MARGIN, last.width, last.height)
+        window = last.expanded(margin, margin).intersection(search_roi)
+        if not window or window.area() > search_roi.area() * HOT_REGION_MAX_RATIO:
+            return None
+        return window
+    
+    @staticmethod
+    def _touches_inner_edge(box: Rect, window: Rect, search_roi: Rect) -> bool:
+        """box 是否贴着热区的某条边，且这条边不是 search_roi 的边界"""
+        return (
+            (box.x <= window.x and window.x > search_roi.x) or
+            (box.y <= window.y and window.y > search_roi.y) or
+            (box.x + box.width >= window.x + window.width and
+             window.x + window.width < search_roi.x + search_roi.width) or
+            (box.y + box.height >= window.y + window.height and
+             window.y + window.height < search_roi.y + search_roi.height)
         )
-        
-        matcher = ColorMatcher(image, matcher_param, roi, name=node.name)
-        return matcher.analyze()
+    
+    def _anchor_roi(
+        self,
+        compiled: CompiledNode,
+        width: Optional[int] = None,
+        height: Optional[int] = None
+    ) -> Optional[Rect]:
+        """相对锚点节点最近一次命中位置解析 ROI
+
+        Args:
+            compiled: 设置了 roi_anchor 的节点
+            width, height: 画面尺寸，提供时把 ROI 裁剪到画面内
+
+        Returns:
+            解析后的 ROI；锚点尚未命中或裁剪后为空时返回 None
+        """
+        anchor = self._anchor_boxes.get(compiled.roi_anchor)
+        if anchor is None:
+            return None
+        roi = anchor.shifted(compiled.roi_offset).expanded(*compiled.roi_expand)
+        if width is not None and height is not None:
+            roi = roi.clipped(width, height)
+        return roi if roi else None
     
     def _execute_action(self, node: PipelineNode, reco_result: RecoResult):
         """执行动作"""
         if node.action == ActionType.DO_NOTHING:
             return
         
+        self._emit("action", node=node.name, action=node.action.name)
+        with self._span(f"action:{node.action.name}", "action", node=node.name):
+            self._dispatch_action(node, reco_result)
+    
+    def _dispatch_action(self, node: PipelineNode, reco_result: RecoResult):
+        """按动作类型分发"""
         param = node.action_param
         
         if node.action == ActionType.CLICK:
@@ -592,6 +913,16 @@ class Pipeline:
                 x=center.x + offset[0],
                 y=center.y + offset[1]
             )
+        elif isinstance(target, str):
+            # 之前节点的识别位置 (PRE_TASK)
+            box = self._anchor_boxes.get(target)
+            if box is None:
+                raise RuntimeError(f"目标节点 {target} 尚未识别成功")
+            center = box.center()
+            return Point(
+                x=center.x + offset[0],
+                y=center.y + offset[1]
+            )
         elif isinstance(target, list) and len(target) >= 2:
             # 固定坐标
             return Point(
@@ -606,16 +937,14 @@ class Pipeline:
         """点击动作"""
         point = self._get_click_point(reco_result, param)
         self._log(f"点击: ({point.x}, {point.y})")
-        pyautogui.click(point.x, point.y)
+        self.action_backend.click(point.x, point.y)
     
     def _action_long_press(self, reco_result: RecoResult, param: Dict[str, Any]):
         """长按动作"""
         point = self._get_click_point(reco_result, param)
-        duration = param.get('duration', 1000) / 1000
-        self._log(f"长按: ({point.x}, {point.y}), {duration}s")
-        pyautogui.mouseDown(point.x, point.y)
-        time.sleep(duration)
-        pyautogui.mouseUp()
+        duration = param.get('duration', 1000)
+        self._log(f"长按: ({point.x}, {point.y}), {duration / 1000}s")
+        self.action_backend.long_press(point.x, point.y, duration)
     
     def _action_swipe(self, reco_result: RecoResult, param: Dict[str, Any]):
         """滑动动作"""
@@ -632,33 +961,19 @@ class Pipeline:
         end = param.get('end', [0, 0])
         end_point = Point(x=end[0], y=end[1])
         
-        duration = param.get('duration', 200) / 1000
+        duration = param.get('duration', 200)
         
         self._log(f"滑动: ({start.x}, {start.y}) -> ({end_point.x}, {end_point.y})")
-        pyautogui.moveTo(start.x, start.y)
-        pyautogui.drag(
-            end_point.x - start.x, 
-            end_point.y - start.y, 
-            duration=duration
-        )
+        self.action_backend.swipe(start.x, start.y, end_point.x, end_point.y, duration)
     
     def _action_input_text(self, param: Dict[str, Any]):
         """输入文本"""
         text = param.get('input_text', '')
         self._log(f"输入: {text}")
-        pyautogui.write(text)
+        self.action_backend.input_text(text)
     
     def _action_wait(self, param: Dict[str, Any]):
         """等待"""
-        duration = param.get('duration', 1000) / 1000
-        self._log(f"等待: {duration}s")
-        time.sleep(duration)
-    
-    def _find_next_node(self, node: PipelineNode) -> Optional[str]:
-        """查找下一个可执行的节点"""
-        for next_name in node.next:
-            next_node = self._nodes.get(next_name)
-            if next_node and next_node.enabled:
-                return next_name
-        return None
-
+        duration = param.get('duration', 1000)
+        self._log(f"等待: {duration / 1000}s")
+        self._sleep_ms(duration)
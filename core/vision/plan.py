@@ -0,0 +1,569 @@
+"""
+流水线编译 - PipelinePlan
+
+把 JSON 配置编译为不可变的执行计划:
+- 解析节点（字符串 -> 枚举）只做一次
+- 预先补全所有模板路径并检查文件是否存在
+- 预先构建各识别器的参数对象 (TemplateMatcherParam 等)
+- 校验节点图：缺失节点、缺失模板、无延迟的循环、ROI 锚点节点
+
+编译结果按 (文件路径, mtime) 缓存，重复运行同一个 JSON 文件时无需重新编译。
+"""
+
+import json
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, List, Optional, Any, Mapping, Tuple, Union
+
+from .types import Rect, OrderBy
+from .template_matcher import TemplateMatcherParam
+from .color_matcher import ColorMatcherParam
+from .feature_matcher import FeatureMatcherParam, FeatureDetector
+from .node import RecognitionType, ActionType, PipelineNode
+from .stability import WaitFreezesParam
+from .scene_inventory import InventoryParam, InventoryQuery
+from .cascade import CascadeParam, CascadeStage, STAGE_TYPES, DEFAULT_STAGE_EXPAND, DEFAULT_MAX_REGIONS
+from .composite import CompositeParam, CompositeBranch, BRANCH_TYPES
+
+
+MatcherParam = Union[
+    TemplateMatcherParam, FeatureMatcherParam, ColorMatcherParam, InventoryQuery, CascadeParam, CompositeParam
+]
+
+ORDER_BY_MAP = {
+    'Horizontal': OrderBy.HORIZONTAL,
+    'Vertical': OrderBy.VERTICAL,
+    'Score': OrderBy.SCORE,
+    'Area': OrderBy.AREA,
+    'Random': OrderBy.RANDOM,
+}
+
+DETECTOR_MAP = {
+    'SIFT': FeatureDetector.SIFT,
+    'ORB': FeatureDetector.ORB,
+    'BRISK': FeatureDetector.BRISK,
+    'KAZE': FeatureDetector.KAZE,
+    'AKAZE': FeatureDetector.AKAZE,
+}
+
+
+@dataclass(frozen=True)
+class CompiledNode:
+    """编译后的节点"""
+    node: PipelineNode                       # 原始节点配置（只读使用）
+    index: int                               # 声明顺序（从 1 开始，用于截图文件名）
+    roi: Optional[Rect] = None               # 解析后的固定 ROI（已叠加 roi_offset / roi_expand）
+    roi_anchor: Optional[str] = None         # ROI 锚点节点名，运行时相对其最近一次命中的位置解析
+    roi_offset: Rect = field(default_factory=lambda: Rect(0, 0, 0, 0))  # 叠加到锚点框上的偏移
+    roi_expand: Tuple[int, int] = (0, 0)     # 锚点框向四周扩展的像素 (左右, 上下)
+    hot_region: bool = False                 # 是否先在上次命中位置附近搜索（热区跟踪）
+    matcher_param: Optional[MatcherParam] = None  # 预构建的识别参数
+    next: Tuple[str, ...] = ()
+    pre_freezes: WaitFreezesParam = WaitFreezesParam()   # 动作前等待画面稳定
+    post_freezes: WaitFreezesParam = WaitFreezesParam()  # 动作后等待画面稳定
+
+    @property
+    def name(self) -> str:
+        return self.node.name
+
+
+@dataclass(frozen=True)
+class PipelinePlan:
+    """不可变的流水线执行计划"""
+    nodes: Mapping[str, CompiledNode]
+    resource_dir: Optional[str] = None
+    source: Optional[str] = None             # 来源 JSON 文件（如果有）
+    errors: Tuple[str, ...] = ()             # 致命错误，存在时拒绝执行
+    warnings: Tuple[str, ...] = ()
+    inventory: Optional[InventoryParam] = None  # 场景清单（存在 Inventory 节点或声明了 $inventory 时）
+
+    @property
+    def valid(self) -> bool:
+        return not self.errors
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.nodes
+
+    def get(self, name: str) -> Optional[CompiledNode]:
+        return self.nodes.get(name)
+
+
+def compile_pipeline(
+    config: Dict[str, Any],
+    resource_dir: Optional[str] = None,
+    source: Optional[str] = None
+) -> PipelinePlan:
+    """把 Pipeline 配置编译为执行计划
+
+    Args:
+        config: Pipeline 配置 (JSON 格式的字典)
+        resource_dir: 资源目录（模板图片等）
+        source: 来源文件路径（仅用于提示）
+    """
+    base_dir = Path(resource_dir) if resource_dir else None
+    errors: List[str] = []
+    warnings: List[str] = []
+    nodes: Dict[str, CompiledNode] = {}
+
+    index = 0
+    for name, data in config.items():
+        if name.startswith('$'):  # 跳过 $ 开头的字段
+            continue
+        index += 1
+        node = PipelineNode.from_dict(name, data)
+
+        roi, roi_anchor, roi_offset, roi_expand = _parse_roi(node, errors)
+
+        matcher_param = _build_matcher_param(node, base_dir, errors)
+        freezes = {}
+        for key in ('pre_wait_freezes', 'post_wait_freezes'):
+            try:
+                freezes[key] = WaitFreezesParam.from_value(getattr(node, key))
+            except (ValueError, TypeError) as e:
+                errors.append(f"节点 {name} 的 {key} 无效: {e}")
+                freezes[key] = WaitFreezesParam()
+        nodes[name] = CompiledNode(
+            node=node,
+            index=index,
+            roi=roi,
+            roi_anchor=roi_anchor,
+            roi_offset=roi_offset,
+            roi_expand=roi_expand,
+            hot_region=node.hot_region and _supports_hot_region(node, matcher_param),
+            matcher_param=matcher_param,
+            next=tuple(node.next),
+            pre_freezes=freezes['pre_wait_freezes'],
+            post_freezes=freezes['post_wait_freezes'],
+        )
+
+    for compiled in nodes.values():
+        for next_name in compiled.next:
+            if next_name not in nodes:
+                errors.append(f"节点 {compiled.name} 的 next 引用了不存在的节点: {next_name}")
+        if compiled.roi_anchor and compiled.roi_anchor not in nodes:
+            errors.append(f"节点 {compiled.name} 的 roi 引用了不存在的节点: {compiled.roi_anchor}")
+        target = compiled.node.action_param.get('target')
+        if isinstance(target, str) and target not in nodes:
+            errors.append(f"节点 {compiled.name} 的 target 引用了不存在的节点: {target}")
+
+    warnings.extend(_find_busy_cycles(nodes))
+    inventory = _build_inventory(config.get('$inventory'), nodes, base_dir, errors, warnings)
+
+    return PipelinePlan(
+        nodes=MappingProxyType(nodes),
+        resource_dir=str(base_dir) if base_dir else None,
+        source=source,
+        errors=tuple(errors),
+        warnings=tuple(warnings),
+        inventory=inventory,
+    )
+
+
+def _build_inventory(
+    value: Any,
+    nodes: Dict[str, CompiledNode],
+    base_dir: Optional[Path],
+    errors: List[str],
+    warnings: List[str]
+) -> Optional[InventoryParam]:
+    """构建场景清单参数：$inventory 声明的模板加上所有 Inventory 节点用到的模板"""
+    queries = {
+        c.name: c.matcher_param for c in nodes.values()
+        if isinstance(c.matcher_param, InventoryQuery)
+    }
+    if not value and not queries:
+        return None
+
+    extra: List[str] = []
+    for query in queries.values():
+        extra.extend(t for t in query.templates if t not in extra)
+    # 未指定清单阈值时取各节点阈值的最小值，保证每个节点需要的实例都会被记录
+    default_threshold = min((q.threshold for q in queries.values()), default=0.8)
+    try:
+        param = InventoryParam.from_config(value, base_dir, extra, default_threshold)
+    except (ValueError, TypeError, AttributeError) as e:
+        errors.append(f"$inventory 无效: {e}")
+        return None
+
+    if not param.templates:
+        warnings.append("$inventory 没有匹配到任何模板")
+    for name, query in queries.items():
+        if query.threshold < param.threshold:
+            warnings.append(
+                f"节点 {name} 的 threshold ({query.threshold}) 低于清单阈值 ({param.threshold})，"
+                f"低于清单阈值的实例不会被记录"
+            )
+    return param
+
+
+def _parse_roi(
+    node: PipelineNode,
+    errors: List[str]
+) -> Tuple[Optional[Rect], Optional[str], Rect, Tuple[int, int]]:
+    """解析 roi / roi_offset / roi_expand
+
+    Returns:
+        (固定 ROI, 锚点节点名, 偏移, 扩展)；固定 ROI 已叠加偏移和扩展
+    """
+    name = node.name
+    offset = Rect(0, 0, 0, 0)
+    try:
+        offset = Rect.from_list(node.roi_offset)
+    except (ValueError, TypeError) as e:
+        errors.append(f"节点 {name} 的 roi_offset 无效: {e}")
+
+    expand = node.roi_expand
+    try:
+        if isinstance(expand, (int, float)):
+            expand = (int(expand), int(expand))
+        else:
+            dx, dy = expand
+            expand = (int(dx), int(dy))
+    except (ValueError, TypeError):
+        errors.append(f"节点 {name} 的 roi_expand 无效: {node.roi_expand!r}")
+        expand = (0, 0)
+
+    if isinstance(node.roi, str):
+        return None, node.roi, offset, expand
+
+    roi = None
+    if node.roi:
+        try:
+            roi = Rect.from_list(node.roi).shifted(offset).expanded(*expand)
+        except (ValueError, TypeError) as e:
+            errors.append(f"节点 {name} 的 roi 无效: {e}")
+    return roi, None, offset, expand
+
+
+def _supports_hot_region(node: PipelineNode, matcher_param: Optional[MatcherParam]) -> bool:
+    """识别结果只取决于局部画面的算法才能做热区跟踪
+
+    - TemplateMatch: 匹配框完全落在搜索区域内，热区内达到阈值的结果就是有效命中；
+      仅按分数排序时——按位置或面积排序要在完整 ROI 中比较，热区内的命中可能不是应取的那个
+    - ColorMatch: 仅连通域模式；非连通模式返回所有像素的外接框，局部搜索会改变结果
+    """
+    if node.recognition == RecognitionType.TEMPLATE_MATCH:
+        return isinstance(matcher_param, TemplateMatcherParam) and matcher_param.order_by == OrderBy.SCORE
+    if node.recognition == RecognitionType.COLOR_MATCH:
+        return isinstance(matcher_param, ColorMatcherParam) and matcher_param.connected
+    return False
+
+
+def _resolve_templates(
+    node: PipelineNode,
+    base_dir: Optional[Path],
+    errors: List[str]
+) -> List[str]:
+    """补全模板路径并检查文件是否存在"""
+    templates = node.recognition_param.get('template', [])
+    if isinstance(templates, str):
+        templates = [templates]
+
+    resolved = []
+    for t in templates:
+        path = Path(t)
+        if base_dir and not path.is_absolute():
+            path = base_dir / t
+        if not path.exists():
+            errors.append(f"节点 {node.name} 的模板文件不存在: {path}")
+        resolved.append(str(path))
+    return resolved
+
+
+def _build_matcher_param(
+    node: PipelineNode,
+    base_dir: Optional[Path],
+    errors: List[str]
+) -> Optional[MatcherParam]:
+    """预构建识别器参数"""
+    param = node.recognition_param
+
+    if node.recognition == RecognitionType.TEMPLATE_MATCH:
+        thresholds = param.get('threshold', [0.7])
+        if isinstance(thresholds, (int, float)):
+            thresholds = [thresholds]
+        return TemplateMatcherParam(
+            templates=_resolve_templates(node, base_dir, errors),
+            thresholds=thresholds,
+            method=param.get('method', 5),
+            green_mask=param.get('green_mask', False),
+            multi_scale=param.get('multi_scale', True),
+            scale_range=param.get('scale_range', [0.5, 1.5]),
+            scale_step=param.get('scale_step', 0.1),
+            order_by=ORDER_BY_MAP.get(param.get('order_by', 'Score'), OrderBy.SCORE),
+        )
+
+    if node.recognition == RecognitionType.FEATURE_MATCH:
+        detector_str = param.get('detector', 'AKAZE')
+        return FeatureMatcherParam(
+            templates=_resolve_templates(node, base_dir, errors),
+            detector=DETECTOR_MAP.get(detector_str.upper(), FeatureDetector.AKAZE),
+            ratio=param.get('ratio', 0.75),
+            count=param.get('count', 10),
+            green_mask=param.get('green_mask', False),
+        )
+
+    if node.recognition == RecognitionType.COLOR_MATCH:
+        lower = param.get('lower', [])
+        upper = param.get('upper', [])
+        # 支持多组颜色范围
+        if lower and isinstance(lower[0], int):
+            ranges = [(lower, upper)]
+        else:
+            ranges = list(zip(lower, upper))
+        return ColorMatcherParam(
+            ranges=ranges,
+            method=param.get('method', 4),
+            count=param.get('count', 1),
+            connected=param.get('connected', False),
+        )
+
+    if node.recognition == RecognitionType.INVENTORY:
+        thresholds = param.get('threshold', [0.8])
+        if isinstance(thresholds, (int, float)):
+            thresholds = [thresholds]
+        return InventoryQuery(
+            templates=tuple(_resolve_templates(node, base_dir, errors)),
+            threshold=float(thresholds[0]) if thresholds else 0.8,
+            order_by=ORDER_BY_MAP.get(param.get('order_by', 'Score'), OrderBy.SCORE),
+            result_index=param.get('index', 0),
+        )
+
+    if node.recognition == RecognitionType.CASCADE:
+        return _build_cascade(node, base_dir, errors)
+
+    if node.recognition in (RecognitionType.AND, RecognitionType.OR):
+        return _build_composite(node, base_dir, errors)
+
+    return None
+
+
+def _build_cascade(
+    node: PipelineNode,
+    base_dir: Optional[Path],
+    errors: List[str]
+) -> Optional[CascadeParam]:
+    """构建级联识别参数：每一级按普通节点解析识别字段，再附加 expand / max_regions / fallback"""
+    configs = node.recognition_param.get('stages', [])
+    if not isinstance(configs, list) or not configs:
+        errors.append(f"节点 {node.name} 的 stages 为空")
+        return None
+
+    stages = []
+    for i, data in enumerate(configs):
+        label = f"{node.name}.stages[{i}]"
+        if not isinstance(data, dict):
+            errors.append(f"{label} 必须是对象")
+            continue
+        stage_node = PipelineNode.from_dict(label, data)
+        if stage_node.recognition not in STAGE_TYPES:
+            errors.append(f"{label} 的 recognition 只能是 TemplateMatch / FeatureMatch / ColorMatch")
+            continue
+        fallback = bool(data.get('fallback', False))
+        if fallback and i == 0:
+            errors.append(f"{label}: 第一级不能设置 fallback")
+        try:
+            expand = int(data.get('expand', DEFAULT_STAGE_EXPAND))
+            max_regions = int(data.get('max_regions', DEFAULT_MAX_REGIONS))
+        except (ValueError, TypeError) as e:
+            errors.append(f"{label} 的 expand / max_regions 无效: {e}")
+            continue
+        stages.append(CascadeStage(
+            recognition=stage_node.recognition,
+            param=_build_matcher_param(stage_node, base_dir, errors),
+            expand=expand,
+            max_regions=max_regions,
+            fallback=fallback,
+        ))
+    return CascadeParam(stages=tuple(stages))
+
+
+def _build_composite(
+    node: PipelineNode,
+    base_dir: Optional[Path],
+    errors: List[str]
+) -> Optional[CompositeParam]:
+    """构建 And / Or 组合识别参数：每个子识别按普通节点解析识别字段和 roi / inverse"""
+    key = 'all_of' if node.recognition == RecognitionType.AND else 'any_of'
+    configs = node.recognition_param.get(key, [])
+    if not isinstance(configs, list) or not configs:
+        errors.append(f"节点 {node.name} 的 {key} 为空")
+        return None
+
+    branches = []
+    for i, data in enumerate(configs):
+        label = f"{node.name}.{key}[{i}]"
+        if not isinstance(data, dict):
+            errors.append(f"{label} 必须是对象")
+            continue
+        branch_node = PipelineNode.from_dict(label, data)
+        if branch_node.recognition not in BRANCH_TYPES:
+            errors.append(f"{label} 的 recognition 不支持 {data.get('recognition', 'DirectHit')}")
+            continue
+        roi, roi_anchor, _, _ = _parse_roi(branch_node, errors)
+        if roi_anchor:
+            errors.append(f"{label} 的 roi 不支持引用节点名")
+        branches.append(CompositeBranch(
+            recognition=branch_node.recognition,
+            param=_build_matcher_param(branch_node, base_dir, errors),
+            roi=roi,
+            inverse=bool(branch_node.inverse),
+        ))
+
+    box_index = node.recognition_param.get('box_index', 0)
+    if not isinstance(box_index, int):
+        errors.append(f"节点 {node.name} 的 box_index 无效: {box_index!r}")
+        box_index = 0
+    return CompositeParam(mode=node.recognition, branches=tuple(branches), box_index=box_index)
+
+
+def _node_has_delay(node: PipelineNode) -> bool:
+    """节点执行时是否会让出时间（避免空转）"""
+    return (
+        node.pre_delay > 0
+        or node.post_delay > 0
+        or bool(node.pre_wait_freezes)
+        or bool(node.post_wait_freezes)
+        or node.action == ActionType.WAIT
+    )
+
+
+def _find_busy_cycles(nodes: Dict[str, CompiledNode]) -> List[str]:
+    """查找所有节点都没有延迟的循环（会以最快速度空转截图识别）
+
+    使用 Tarjan 强连通分量算法，每个强连通分量视为一个循环。
+    """
+    index_of: Dict[str, int] = {}
+    lowlink: Dict[str, int] = {}
+    on_stack: Dict[str, bool] = {}
+    stack: List[str] = []
+    components: List[List[str]] = []
+    counter = [0]
+
+    def strongconnect(root: str):
+        # 迭代实现，避免长链路触发递归深度限制
+        work = [(root, iter(nodes[root].next))]
+        index_of[root] = lowlink[root] = counter[0]
+        counter[0] += 1
+        stack.append(root)
+        on_stack[root] = True
+        while work:
+            name, children = work[-1]
+            advanced = False
+            for child in children:
+                if child not in nodes:
+                    continue
+                if child not in index_of:
+                    index_of[child] = lowlink[child] = counter[0]
+                    counter[0] += 1
+                    stack.append(child)
+                    on_stack[child] = True
+                    work.append((child, iter(nodes[child].next)))
+                    advanced = True
+                    break
+                if on_stack.get(child):
+                    lowlink[name] = min(lowlink[name], index_of[child])
+            if advanced:
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[name])
+            if lowlink[name] == index_of[name]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = False
+                    component.append(member)
+                    if member == name:
+                        break
+                components.append(component)
+
+    for name in nodes:
+        if name not in index_of:
+            strongconnect(name)
+
+    warnings = []
+    for component in components:
+        is_cycle = len(component) > 1 or component[0] in nodes[component[0]].next
+        if not is_cycle:
+            continue
+        if not any(_node_has_delay(nodes[n].node) for n in component):
+            members = ' -> '.join(reversed(component))
+            warnings.append(f"循环中的节点都没有延迟，可能空转: {members}")
+    return warnings
+
+
+# ==================== 编译缓存 ====================
+
+_PLAN_CACHE_SIZE = 32
+_plan_cache: Dict[Tuple[str, int, int, Optional[str]], PipelinePlan] = {}
+_plan_cache_lock = threading.Lock()
+
+
+def load_plan(json_path: str, resource_dir: Optional[str] = None) -> PipelinePlan:
+    """从 JSON 文件加载执行计划（按文件路径和 mtime 缓存）
+
+    有错误的计划不缓存：错误可能来自尚未放置的模板文件，
+    文件补上后下次加载即可重新编译，不需要改动 JSON。
+
+    Raises:
+        FileNotFoundError: 配置文件不存在
+        json.JSONDecodeError: JSON 格式错误
+    """
+    path = Path(json_path).resolve()
+    if not path.exists():
+        raise FileNotFoundError(f"Pipeline config not found: {json_path}")
+
+    stat = path.stat()
+    key = (str(path), stat.st_mtime_ns, stat.st_size, resource_dir)
+
+    with _plan_cache_lock:
+        plan = _plan_cache.get(key)
+    if plan is not None:
+        return plan
+
+    with open(path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    plan = compile_pipeline(config, resource_dir, source=str(path))
+
+    with _plan_cache_lock:
+        # 同一文件的旧版本计划不再需要
+        for old_key in [k for k in _plan_cache if k[0] == key[0] and k[3] == key[3]]:
+            del _plan_cache[old_key]
+        if not plan.valid:
+            return plan
+        if len(_plan_cache) >= _PLAN_CACHE_SIZE:
+            del _plan_cache[next(iter(_plan_cache))]
+        _plan_cache[key] = plan
+    return plan
+
+
+def clear_plan_cache():
+    """清空编译缓存"""
+    with _plan_cache_lock:
+        _plan_cache.clear()
+
+
+def resolve_resource_dir(json_path: str) -> str:
+    """确定 Pipeline 文件的资源目录
+
+    优先使用配置中的 $resource_base（相对路径基于 pipeline 文件所在目录解析），
+    否则使用 pipeline 文件所在目录。
+    """
+    pipeline_file = Path(json_path)
+    try:
+        with open(pipeline_file, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        resource_base = config.get('$resource_base')
+    except (OSError, ValueError, AttributeError):
+        resource_base = None
+
+    if not resource_base:
+        return str(pipeline_file.parent)
+    resource_path = Path(resource_base)
+    if not resource_path.is_absolute():
+        resource_path = (pipeline_file.parent / resource_base).resolve()
+    return str(resource_path)
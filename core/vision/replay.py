@@ -0,0 +1,575 @@
+"""
+回放模式 - Replay
+
+在录制好的帧序列上运行 Pipeline，不需要真实显示器、被测应用和鼠标输入:
+- ReplayScreenSource: 从图片目录或视频文件读取帧，代替屏幕截图
+- MockActionBackend: 只记录点击/滑动等动作，并按脚本切换帧
+- FrameRecorder: 真实运行时录制截图和动作，生成可回放的目录
+- run_replay: 使用虚拟时钟以满 CPU 速度回放，输出各节点的耗时和准确率报告
+
+回放目录结构:
+```
+frames/
+├── frame_00000.png
+├── frame_00001.png
+└── replay.json      # 可选的清单文件
+```
+
+replay.json:
+```json
+{
+    "frames": ["frame_00000.png", "frame_00001.png"],
+    "advance": "capture",
+    "script": {"0": 5},
+    "expected": {"点击按钮": [100, 200, 80, 30], "错误弹窗": null}
+}
+```
+- advance: "capture" 每次截图前进一帧（录制的序列）；"action" 只在动作后切换帧（手工挑选的关键帧）
+- script: 第 i 个动作执行后跳转到的帧下标；未写的动作在 "action" 模式下前进一帧
+- expected: 各节点期望的命中区域，null 表示不应命中，用于计算准确率
+
+命令行:
+```
+python -m core.vision.replay <pipeline.json> <入口节点> <帧目录或视频> [--repeat N] [--json 报告.json]
+```
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Callable
+
+import numpy as np
+
+try:
+    import cv2
+    CV_AVAILABLE = True
+except ImportError:
+    CV_AVAILABLE = False
+
+from .types import Rect, RecoResult
+from .actions import ActionBackend
+from .clock import VirtualClock
+from .pipeline import Pipeline, PipelineResult
+from .plan import load_plan, resolve_resource_dir
+
+
+MANIFEST_NAME = 'replay.json'
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+ADVANCE_ON_CAPTURE = 'capture'
+ADVANCE_ON_ACTION = 'action'
+
+
+class ReplayScreenSource:
+    """回放截图源
+
+    帧在创建时全部解码到内存，避免解码耗时混入识别耗时。
+    实例可直接作为 Pipeline 的 screen_capture_func 使用。
+    """
+
+    def __init__(
+        self,
+        frames: List[np.ndarray],
+        advance: str = ADVANCE_ON_CAPTURE,
+        script: Optional[Dict[int, int]] = None,
+        expected: Optional[Dict[str, Optional[List[int]]]] = None,
+        source: str = "",
+        capture_cost_ms: float = 1.0
+    ):
+        """
+        Args:
+            frames: BGR 格式的帧列表
+            advance: 帧前进方式 (capture / action)
+            script: 动作下标 -> 动作执行后跳转到的帧下标
+            expected: 各节点期望的命中区域
+            source: 来源路径（仅用于报告）
+            capture_cost_ms: 每次截图推进的虚拟时间 (ms)，保证 rate_limit 为 0 时超时也能到达
+        """
+        if not frames:
+            raise ValueError("Replay source has no frames")
+        if advance not in (ADVANCE_ON_CAPTURE, ADVANCE_ON_ACTION):
+            raise ValueError(f"Unknown advance mode: {advance}")
+        self.frames = frames
+        self.advance_mode = advance
+        self.script = script or {}
+        self.expected = expected or {}
+        self.source = source
+        self.capture_cost_ms = capture_cost_ms
+        self.clock: Optional[VirtualClock] = None
+        self.index = 0
+        self.captures = 0
+        self._started = False
+
+    @classmethod
+    def open(cls, path: str, **kwargs) -> 'ReplayScreenSource':
+        """打开图片目录或视频文件"""
+        if Path(path).is_dir():
+            return cls.from_dir(path, **kwargs)
+        return cls.from_video(path, **kwargs)
+
+    @classmethod
+    def from_dir(cls, directory: str, **kwargs) -> 'ReplayScreenSource':
+        """从图片目录加载（有 replay.json 时按清单加载，否则按文件名排序）"""
+        if not CV_AVAILABLE:
+            raise ImportError("OpenCV is required for replay")
+        base = Path(directory)
+        manifest: Dict[str, Any] = {}
+        manifest_path = base / MANIFEST_NAME
+        if manifest_path.exists():
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+
+        names = manifest.get('frames') or sorted(
+            p.name for p in base.iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS
+        )
+        frames = []
+        for name in names:
+            frame = cv2.imread(str(base / name))
+            if frame is None:
+                raise ValueError(f"Failed to load frame: {base / name}")
+            frames.append(frame)
+
+        kwargs.setdefault('advance', manifest.get('advance', ADVANCE_ON_CAPTURE))
+        kwargs.setdefault('script', {int(k): int(v) for k, v in manifest.get('script', {}).items()})
+        kwargs.setdefault('expected', manifest.get('expected', {}))
+        return cls(frames, source=str(base), **kwargs)
+
+    @classmethod
+    def from_video(
+        cls,
+        video_path: str,
+        step: int = 1,
+        max_frames: Optional[int] = None,
+        **kwargs
+    ) -> 'ReplayScreenSource':
+        """从视频文件加载
+
+        Args:
+            video_path: 视频文件路径
+            step: 每隔多少帧取一帧
+            max_frames: 最多读取的帧数
+        """
+        if not CV_AVAILABLE:
+            raise ImportError("OpenCV is required for replay")
+        cap = cv2.VideoCapture(str(video_path))
+        if not cap.isOpened():
+            raise ValueError(f"Failed to open video: {video_path}")
+        frames = []
+        i = 0
+        try:
+            while max_frames is None or len(frames) < max_frames:
+                ok, frame = cap.read()
+                if not ok:
+                    break
+                if i % step == 0:
+                    frames.append(frame)
+                i += 1
+        finally:
+            cap.release()
+        return cls(frames, source=str(video_path), **kwargs)
+
+    @property
+    def frame_count(self) -> int:
+        return len(self.frames)
+
+    def reset(self, clock: Optional[VirtualClock] = None):
+        """回到第一帧（每次回放前调用）"""
+        self.clock = clock
+        self.index = 0
+        self.captures = 0
+        self._started = False
+
+    def seek(self, index: int):
+        """跳转到指定帧（超出范围时停在最后一帧）"""
+        self.index = max(0, min(index, len(self.frames) - 1))
+
+    def advance(self, count: int = 1):
+        """前进若干帧"""
+        self.seek(self.index + count)
+
+    def __call__(self) -> np.ndarray:
+        """截图：返回当前帧"""
+        if self.advance_mode == ADVANCE_ON_CAPTURE:
+            # 第一次截图返回第一帧，之后每次截图前进一帧
+            if self._started:
+                self.advance()
+            self._started = True
+        self.captures += 1
+        if self.clock is not None:
+            self.clock.advance(self.capture_cost_ms / 1000)
+        return self.frames[self.index]
+
+    def on_action(self, action_index: int):
+        """动作执行后按脚本切换帧"""
+        if action_index in self.script:
+            self.seek(self.script[action_index])
+            # 跳转后的下一次截图应返回跳转到的帧本身
+            self._started = False
+        elif self.advance_mode == ADVANCE_ON_ACTION:
+            self.advance()
+
+
+class MockActionBackend(ActionBackend):
+    """模拟动作后端：只记录动作，不产生真实输入"""
+
+    name = "mock"
+
+    def __init__(self, screen: Optional[ReplayScreenSource] = None):
+        """
+        Args:
+            screen: 回放截图源，动作执行后通知其切换帧
+        """
+        self.screen = screen
+        self.actions: List[Dict[str, Any]] = []
+
+    def _record(self, action_type: str, **params):
+        index = len(self.actions)
+        self.actions.append({
+            'index': index,
+            'type': action_type,
+            'frame': self.screen.index if self.screen else None,
+            **params,
+        })
+        if self.screen:
+            self.screen.on_action(index)
+
+    def click(self, x: int, y: int):
+        self._record('Click', x=int(x), y=int(y))
+
+    def long_press(self, x: int, y: int, duration_ms: int):
+        self._record('LongPress', x=int(x), y=int(y), duration=duration_ms)
+
+    def swipe(self, x1: int, y1: int, x2: int, y2: int, duration_ms: int):
+        self._record('Swipe', begin=[int(x1), int(y1)], end=[int(x2), int(y2)], duration=duration_ms)
+
+    def input_text(self, text: str):
+        self._record('InputText', text=text)
+
+
+# ==================== 录制 ====================
+
+class FrameRecorder:
+    """录制真实运行的截图和动作，生成回放目录
+
+    示例:
+    ```python
+    recorder = FrameRecorder(capture_func, "recordings/case1")
+    pipeline = Pipeline(
+        screen_capture_func=recorder,
+        action_backend=recorder.wrap_backend(PyAutoGuiBackend())
+    )
+    result = pipeline.run("开始")
+    recorder.save_manifest(pipeline.last_reco_results)
+    ```
+    """
+
+    def __init__(self, capture_func: Callable[[], np.ndarray], out_dir: str):
+        if not CV_AVAILABLE:
+            raise ImportError("OpenCV is required for recording")
+        self._capture = capture_func
+        self.out_dir = Path(out_dir)
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self.frames: List[str] = []
+        self.script: Dict[int, int] = {}
+        self.actions: List[Dict[str, Any]] = []
+
+    def __call__(self) -> np.ndarray:
+        frame = self._capture()
+        name = f"frame_{len(self.frames):05d}.png"
+        cv2.imwrite(str(self.out_dir / name), frame)
+        self.frames.append(name)
+        return frame
+
+    def record_action(self, action_type: str, **params):
+        """记录动作：回放时该动作执行后跳转到它之后录制的第一帧"""
+        index = len(self.actions)
+        self.actions.append({'index': index, 'type': action_type, **params})
+        self.script[index] = len(self.frames)
+
+    def wrap_backend(self, backend: ActionBackend) -> ActionBackend:
+        """包装动作后端，执行动作的同时记录"""
+        return _RecordingActionBackend(backend, self)
+
+    def save_manifest(self, reco_results: Optional[Dict[str, RecoResult]] = None) -> str:
+        """写入 replay.json
+
+        Args:
+            reco_results: 真实运行时各节点的识别结果，命中区域作为 expected 的初始值（可手工修正）
+        """
+        expected = {}
+        for name, reco_result in (reco_results or {}).items():
+            expected[name] = [int(v) for v in reco_result.box.to_list()] if reco_result.box else None
+        # 最后一个动作之后可能没有再截图
+        script = {
+            str(i): frame for i, frame in self.script.items()
+            if frame < len(self.frames)
+        }
+        manifest = {
+            'frames': self.frames,
+            'advance': ADVANCE_ON_CAPTURE,
+            'script': script,
+            'expected': expected,
+            'actions': self.actions,
+        }
+        path = self.out_dir / MANIFEST_NAME
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        return str(path)
+
+
+class _RecordingActionBackend(ActionBackend):
+    """执行动作并通知 FrameRecorder"""
+
+    def __init__(self, inner: ActionBackend, recorder: FrameRecorder):
+        self._inner = inner
+        self._recorder = recorder
+        self.name = f"recording({inner.name})"
+
+    def click(self, x: int, y: int):
+        self._inner.click(x, y)
+        self._recorder.record_action('Click', x=int(x), y=int(y))
+
+    def long_press(self, x: int, y: int, duration_ms: int):
+        self._inner.long_press(x, y, duration_ms)
+        self._recorder.record_action('LongPress', x=int(x), y=int(y), duration=duration_ms)
+
+    def swipe(self, x1: int, y1: int, x2: int, y2: int, duration_ms: int):
+        self._inner.swipe(x1, y1, x2, y2, duration_ms)
+        self._recorder.record_action(
+            'Swipe', begin=[int(x1), int(y1)], end=[int(x2), int(y2)], duration=duration_ms
+        )
+
+    def input_text(self, text: str):
+        self._inner.input_text(text)
+        self._recorder.record_action('InputText', text=text)
+
+    def close(self):
+        self._inner.close()
+
+
+# ==================== 回放报告 ====================
+
+def _iou(a: Rect, b: Rect) -> float:
+    """两个矩形的交并比"""
+    x1, y1 = max(a.x, b.x), max(a.y, b.y)
+    x2 = min(a.x + a.width, b.x + b.width)
+    y2 = min(a.y + a.height, b.y + b.height)
+    inter = max(0, x2 - x1) * max(0, y2 - y1)
+    union = a.area() + b.area() - inter
+    return inter / union if union > 0 else 0.0
+
+
+@dataclass
+class ReplayRun:
+    """单次回放结果"""
+    result: PipelineResult
+    actions: List[Dict[str, Any]]
+    reco_results: Dict[str, RecoResult]
+    captures: int
+
+
+@dataclass
+class ReplayReport:
+    """回放报告
+
+    - 执行路径、识别次数、动作等在多次回放间应完全一致 (deterministic)
+    - 识别耗时取多次回放的中位数和最小值，减少机器抖动的影响
+    """
+    pipeline: str
+    entry: str
+    source: str
+    frame_count: int
+    expected: Dict[str, Optional[List[int]]] = field(default_factory=dict)
+    runs: List[ReplayRun] = field(default_factory=list)
+    iou_threshold: float = 0.5
+
+    @property
+    def deterministic(self) -> bool:
+        """多次回放的执行路径和动作是否一致"""
+        if not self.runs:
+            return True
+        first = self.runs[0]
+        return all(
+            run.result.executed_nodes == first.result.executed_nodes
+            and run.actions == first.actions
+            and run.captures == first.captures
+            for run in self.runs[1:]
+        )
+
+    def node_reports(self) -> Dict[str, Dict[str, Any]]:
+        """各节点的耗时和准确率"""
+        if not self.runs:
+            return {}
+        first = self.runs[0]
+        reports = {}
+        for name, stats in first.result.node_stats.items():
+            avg_samples = [
+                run.result.node_stats[name].reco_ms / run.result.node_stats[name].attempts
+                for run in self.runs
+                if name in run.result.node_stats and run.result.node_stats[name].attempts
+            ]
+            report = {
+                'attempts': stats.attempts,
+                'hits': stats.hits,
+                'timeouts': stats.timeouts,
+                'median_reco_ms': round(statistics.median(avg_samples), 3) if avg_samples else 0.0,
+                'min_reco_ms': round(min(avg_samples), 3) if avg_samples else 0.0,
+                'hot_hit_rate': stats.to_dict()['hot_hit_rate'],
+                'pixels_saved': stats.pixels_saved,
+            }
+            reports[name] = report
+
+        # 准确率：与期望的命中区域比较
+        for name, expected_box in self.expected.items():
+            report = reports.setdefault(name, {
+                'attempts': 0, 'hits': 0, 'timeouts': 0,
+                'median_reco_ms': 0.0, 'min_reco_ms': 0.0,
+                'hot_hit_rate': 0.0, 'pixels_saved': 0,
+            })
+            reco_result = first.reco_results.get(name)
+            actual = reco_result.box if reco_result and reco_result.success else None
+            report['expected'] = expected_box
+            report['actual'] = [int(v) for v in actual.to_list()] if actual else None
+            if expected_box is None:
+                report['iou'] = None
+                report['correct'] = actual is None
+            elif actual is None:
+                report['iou'] = 0.0
+                report['correct'] = False
+            else:
+                iou = float(_iou(Rect.from_list(expected_box), actual))
+                report['iou'] = round(iou, 3)
+                report['correct'] = bool(iou >= self.iou_threshold)
+        return reports
+
+    @property
+    def accuracy(self) -> Optional[float]:
+        """有期望标注的节点中识别正确的比例"""
+        labeled = [r for r in self.node_reports().values() if 'correct' in r]
+        if not labeled:
+            return None
+        return sum(1 for r in labeled if r['correct']) / len(labeled)
+
+    def to_dict(self) -> Dict[str, Any]:
+        first = self.runs[0] if self.runs else None
+        return {
+            'pipeline': self.pipeline,
+            'entry': self.entry,
+            'source': self.source,
+            'frame_count': self.frame_count,
+            'repeat': len(self.runs),
+            'success': first.result.success if first else False,
+            'error': first.result.error if first else None,
+            'executed_nodes': first.result.executed_nodes if first else [],
+            'actions': first.actions if first else [],
+            'captures': first.captures if first else 0,
+            'deterministic': self.deterministic,
+            'accuracy': self.accuracy,
+            'cost_ms': [round(run.result.cost_ms, 2) for run in self.runs],
+            'trace_summary': first.result.trace_summary if first else {},
+            'nodes': self.node_reports(),
+        }
+
+
+def run_replay(
+    pipeline_path: str,
+    entry: str,
+    source: Any,
+    resource_dir: Optional[str] = None,
+    repeat: int = 1,
+    max_workers: Optional[int] = None,
+    log_dir: Optional[str] = None
+) -> ReplayReport:
+    """在录制的帧序列上回放 Pipeline
+
+    Args:
+        pipeline_path: Pipeline 配置文件路径
+        entry: 入口节点名
+        source: 帧目录、视频文件路径或 ReplayScreenSource
+        resource_dir: 资源目录，默认按 $resource_base 解析
+        repeat: 回放次数（用于统计耗时）
+        max_workers: 并行识别线程数
+        log_dir: 识别截图保存目录，默认不保存
+    """
+    if not isinstance(source, ReplayScreenSource):
+        source = ReplayScreenSource.open(str(source))
+    resource_dir = resource_dir or resolve_resource_dir(pipeline_path)
+    plan = load_plan(pipeline_path, resource_dir)
+
+    report = ReplayReport(
+        pipeline=str(pipeline_path),
+        entry=entry,
+        source=source.source,
+        frame_count=source.frame_count,
+        expected=dict(source.expected),
+    )
+    for _ in range(max(1, repeat)):
+        clock = VirtualClock()
+        source.reset(clock)
+        backend = MockActionBackend(source)
+        pipeline = Pipeline(
+            screen_capture_func=source,
+            resource_dir=resource_dir,
+            max_workers=max_workers,
+            action_backend=backend,
+            clock=clock,
+            log_dir=log_dir,
+        )
+        pipeline.load_plan(plan)
+        result = pipeline.run(entry)
+        report.runs.append(ReplayRun(
+            result=result,
+            actions=backend.actions,
+            reco_results=pipeline.last_reco_results,
+            captures=source.captures,
+        ))
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="在录制的帧序列上回放 Pipeline")
+    parser.add_argument('pipeline', help="Pipeline 配置文件路径")
+    parser.add_argument('entry', help="入口节点名")
+    parser.add_argument('source', help="帧目录或视频文件")
+    parser.add_argument('--resource-dir', default=None, help="资源目录")
+    parser.add_argument('--repeat', type=int, default=3, help="回放次数")
+    parser.add_argument('--workers', type=int, default=None, help="并行识别线程数")
+    parser.add_argument('--json', dest='json_path', default=None, help="报告输出路径")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    report = run_replay(
+        args.pipeline, args.entry, args.source,
+        resource_dir=args.resource_dir,
+        repeat=args.repeat,
+        max_workers=args.workers,
+    )
+    data = report.to_dict()
+
+    print(f"Pipeline: {data['pipeline']}  入口: {data['entry']}")
+    print(f"帧: {data['frame_count']}  截图次数: {data['captures']}  回放次数: {data['repeat']}  "
+          f"总耗时: {(time.perf_counter() - start) * 1000:.1f}ms")
+    print(f"结果: {'成功' if data['success'] else '失败'}  可复现: {data['deterministic']}"
+          + (f"  错误: {data['error']}" if data['error'] else ""))
+    print(f"{'节点':<24}{'尝试':>6}{'命中':>6}{'超时':>6}{'中位耗时ms':>12}{'最小耗时ms':>12}{'热区命中':>8}  准确")
+    for name, node in data['nodes'].items():
+        correct = node.get('correct')
+        mark = '-' if correct is None else ('✓' if correct else '✗')
+        print(f"{name:<24}{node['attempts']:>6}{node['hits']:>6}{node['timeouts']:>6}"
+              f"{node['median_reco_ms']:>12.3f}{node['min_reco_ms']:>12.3f}"
+              f"{node['hot_hit_rate'] * 100:>7.0f}%  {mark}")
+    if data['accuracy'] is not None:
+        print(f"准确率: {data['accuracy'] * 100:.1f}%")
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+    return 0 if data['success'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,257 @@
+"""
+跨运行的 ROI 学习 - 根据历史命中位置推荐识别区域
+
+没有设置 roi 的节点每次都要搜索全屏。同一个按钮在同一分辨率下几乎总出现在相同位置，
+因此把每次识别成功的框按 (Pipeline 文件, 节点, 模板, 画面尺寸) 存入测试数据库（match_boxes 表）:
+- 取最近若干次命中框的外接矩形，再向四周留出余量，作为学习到的 ROI
+- Pipeline 开启 auto_roi 时先在学习到的 ROI 内识别，未命中再搜索全屏
+- suggest_rois 生成报告，列出每个节点建议写入 JSON 的 roi 以及预计加速比
+
+示例:
+    >>> store = RoiStore()
+    >>> pipeline = Pipeline(roi_store=store, auto_roi=True)
+    >>> pipeline.load_plan(load_plan("test.json"))
+    >>> pipeline.run("开始")
+    >>> print(suggest_rois("test.json", store).to_dict())
+"""
+
+import argparse
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from core.database import TestDatabase
+from .types import Rect
+from .node import RecognitionType, PipelineNode
+
+# 计算外接矩形时使用的最近命中次数（界面布局变化后旧位置会逐渐被淘汰）
+DEFAULT_WINDOW = 50
+# 至少命中这么多次才给出学习到的 ROI
+DEFAULT_MIN_SAMPLES = 3
+# 外接矩形向四周留出的余量（像素）
+DEFAULT_MARGIN = 32
+
+# 学习键: (节点名, 模板键, 画面宽, 画面高)
+RoiKey = Tuple[str, str, int, int]
+
+
+def pipeline_key(source: Optional[str]) -> Optional[str]:
+    """Pipeline 的学习键（JSON 文件绝对路径）；从字典加载的配置没有稳定标识，返回 None"""
+    if not source:
+        return None
+    return str(Path(source).resolve())
+
+
+def template_key(node: PipelineNode) -> str:
+    """节点识别目标的学习键
+
+    模板类识别取 JSON 中填写的模板路径（修改模板后重新学习），其他识别类型为空串。
+    """
+    if node.recognition in (RecognitionType.TEMPLATE_MATCH, RecognitionType.FEATURE_MATCH):
+        templates = node.recognition_param.get('template', [])
+        if isinstance(templates, str):
+            templates = [templates]
+        return "|".join(str(t) for t in templates)
+    return ""
+
+
+def envelope(boxes: Iterable[Rect], width: int, height: int, margin: int = DEFAULT_MARGIN) -> Optional[Rect]:
+    """多个框的外接矩形，向四周扩展 margin 并裁剪到画面内"""
+    boxes = list(boxes)
+    if not boxes:
+        return None
+    x1 = min(b.x for b in boxes)
+    y1 = min(b.y for b in boxes)
+    x2 = max(b.x + b.width for b in boxes)
+    y2 = max(b.y + b.height for b in boxes)
+    roi = Rect(x1, y1, x2 - x1, y2 - y1).expanded(margin, margin).clipped(width, height)
+    return roi if roi else None
+
+
+@dataclass
+class RoiSuggestion:
+    """单个节点在某个画面尺寸下的 ROI 建议"""
+    node: str
+    template: str
+    width: int
+    height: int
+    samples: int
+    roi: Optional[Rect] = None
+    current_roi: Optional[List[int]] = None   # JSON 中已有的 roi
+
+    @property
+    def area_ratio(self) -> float:
+        """建议 ROI 占全屏的面积比例"""
+        if self.roi is None or not self.width or not self.height:
+            return 1.0
+        return self.roi.area() / (self.width * self.height)
+
+    @property
+    def expected_speedup(self) -> float:
+        """预计识别加速比（模板匹配/找色的耗时大致与搜索面积成正比）"""
+        ratio = self.area_ratio
+        return 1.0 / ratio if ratio > 0 else 1.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'node': self.node,
+            'template': self.template,
+            'display': [self.width, self.height],
+            'samples': self.samples,
+            'roi': self.roi.to_list() if self.roi else None,
+            'current_roi': self.current_roi,
+            'area_ratio': round(self.area_ratio, 4),
+            'expected_speedup': round(self.expected_speedup, 2),
+        }
+
+
+@dataclass
+class RoiSuggestionReport:
+    """一个 Pipeline 文件的 ROI 建议报告"""
+    pipeline: str
+    suggestions: List[RoiSuggestion] = field(default_factory=list)
+    no_history: List[str] = field(default_factory=list)  # 没有足够命中记录的节点
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'success': True,
+            'pipeline': self.pipeline,
+            'suggestions': [s.to_dict() for s in self.suggestions],
+            'no_history': self.no_history,
+        }
+
+
+class RoiStore:
+    """命中位置历史（测试数据库的 match_boxes 表，随 cleanup_old_records 一起清理）
+
+    Pipeline 在运行结束时批量写入本次的命中框，写入失败不影响运行结果。
+    """
+
+    def __init__(self, db: Optional[TestDatabase] = None, window: int = DEFAULT_WINDOW):
+        """
+        Args:
+            db: 测试数据库，默认为项目根目录下的 test_history.db
+            window: 计算外接矩形时使用的最近命中次数
+        """
+        self.db = db or TestDatabase()
+        self.window = window
+
+    def record_many(self, pipeline: str, samples: List[Tuple[RoiKey, Rect]]):
+        """批量记录命中框
+
+        Args:
+            pipeline: Pipeline 学习键
+            samples: [((节点, 模板键, 画面宽, 画面高), 命中框), ...]
+        """
+        if not samples:
+            return
+        self.db.save_match_boxes(pipeline, [
+            (node, template, int(w), int(h), int(box.x), int(box.y), int(box.width), int(box.height))
+            for (node, template, w, h), box in samples
+        ])
+
+    def history(self, pipeline: str) -> Dict[RoiKey, List[Rect]]:
+        """按学习键分组的最近 window 次命中框（新的在前）"""
+        groups = self.db.get_match_boxes(pipeline, self.window)
+        return {key: [Rect(*box) for box in boxes] for key, boxes in groups.items()}
+
+    def learned_rois(
+        self,
+        pipeline: str,
+        margin: int = DEFAULT_MARGIN,
+        min_samples: int = DEFAULT_MIN_SAMPLES
+    ) -> Dict[RoiKey, Rect]:
+        """各学习键的 ROI（命中次数不足 min_samples 的不返回）"""
+        rois = {}
+        for key, boxes in self.history(pipeline).items():
+            if len(boxes) < min_samples:
+                continue
+            roi = envelope(boxes, key[2], key[3], margin)
+            if roi is not None:
+                rois[key] = roi
+        return rois
+
+    def clear(self, pipeline: Optional[str] = None) -> int:
+        """删除某个 Pipeline（默认全部）的历史，返回删除的记录数"""
+        return self.db.delete_match_boxes(pipeline)
+
+
+def suggest_rois(
+    json_path: str,
+    store: Optional[RoiStore] = None,
+    margin: int = DEFAULT_MARGIN,
+    min_samples: int = DEFAULT_MIN_SAMPLES
+) -> RoiSuggestionReport:
+    """为 Pipeline JSON 中的每个识别节点给出 ROI 建议
+
+    Args:
+        json_path: Pipeline 配置文件路径
+        store: 命中历史，默认使用项目根目录下的测试数据库
+        margin: 外接矩形向四周留出的余量
+        min_samples: 至少命中多少次才给出建议
+    """
+    with open(json_path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    store = store or RoiStore()
+    key = pipeline_key(json_path)
+    history = store.history(key)
+
+    report = RoiSuggestionReport(pipeline=key)
+    for name, data in config.items():
+        if name.startswith('$'):
+            continue
+        node = PipelineNode.from_dict(name, data)
+        if node.recognition in (RecognitionType.DIRECT_HIT, RecognitionType.AND, RecognitionType.OR):
+            continue
+        tkey = template_key(node)
+        found = False
+        for (node_name, template, sw, sh), boxes in history.items():
+            if node_name != name or template != tkey or len(boxes) < min_samples:
+                continue
+            found = True
+            report.suggestions.append(RoiSuggestion(
+                node=name,
+                template=template,
+                width=sw,
+                height=sh,
+                samples=len(boxes),
+                roi=envelope(boxes, sw, sh, margin),
+                current_roi=node.roi if isinstance(node.roi, list) else None,
+            ))
+        if not found:
+            report.no_history.append(name)
+    report.suggestions.sort(key=lambda s: s.expected_speedup, reverse=True)
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口: python -m core.vision.roi_learning pipeline.json"""
+    parser = argparse.ArgumentParser(description="根据历史命中位置为 Pipeline 节点推荐 ROI")
+    parser.add_argument('pipeline', help="Pipeline JSON 文件")
+    parser.add_argument('--db', default=None, help="测试数据库文件（默认 test_history.db）")
+    parser.add_argument('--margin', type=int, default=DEFAULT_MARGIN, help="外接矩形余量（像素）")
+    parser.add_argument('--min-samples', type=int, default=DEFAULT_MIN_SAMPLES, help="最少命中次数")
+    parser.add_argument('--json', dest='json_path', default=None, help="报告输出路径")
+    args = parser.parse_args(argv)
+
+    store = RoiStore(TestDatabase(args.db) if args.db else None)
+    report = suggest_rois(args.pipeline, store, args.margin, args.min_samples)
+    data = report.to_dict()
+
+    print(f"Pipeline: {data['pipeline']}")
+    print(f"{'节点':<24}{'画面':>12}{'命中':>6}  {'建议 roi':<26}{'加速比':>8}")
+    for s in data['suggestions']:
+        display = f"{s['display'][0]}x{s['display'][1]}"
+        print(f"{s['node']:<24}{display:>12}{s['samples']:>6}  {str(s['roi']):<26}{s['expected_speedup']:>7.1f}x")
+    if data['no_history']:
+        print(f"命中记录不足: {', '.join(data['no_history'])}")
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
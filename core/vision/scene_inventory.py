@@ -0,0 +1,461 @@
+"""
+场景清单 - Scene Inventory
+
+一次扫描找出画面中所有已知图标的全部实例，供多个节点查询:
+- 模板集合（如资源目录下的 NodesIcon/*.png）在创建时加载并预处理（灰度、缩放）一次
+- 每帧只做一次共享预处理（转灰度），所有模板提交到线程池并行匹配（OpenCV 计算会释放 GIL）
+- 扫描结果按帧内容哈希缓存，画面不变时直接复用，不再重复匹配；
+  同一帧上并行识别的多个节点只会触发一次扫描
+
+Pipeline 中使用 "recognition": "Inventory" 的节点查询清单，清单的模板集合由顶层
+"$inventory" 声明，未声明时为所有 Inventory 节点用到的模板。
+
+示例:
+    >>> param = InventoryParam.from_config("NodesIcon/*.png", base_dir="resources/freecharts")
+    >>> inventory = get_inventory(param)
+    >>> snapshot, cached = inventory.scan(screen_image)
+    >>> snapshot.query(["resources/freecharts/NodesIcon/Io.png"], threshold=0.8)
+"""
+
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+try:
+    import cv2
+    CV_AVAILABLE = True
+except ImportError:
+    CV_AVAILABLE = False
+
+from .types import Rect, RecoResult, MatchResult, OrderBy
+from .base import VisionBase
+
+# 模板文件扩展名
+IMAGE_SUFFIXES = ('.png', '.jpg', '.jpeg', '.bmp')
+# 单个模板最多保留的候选位置（按分数取前 N 个后再做 NMS）
+MAX_PEAKS_PER_TEMPLATE = 256
+# 同一模板的重叠结果去重阈值
+INVENTORY_NMS_IOU = 0.3
+# 缓存的帧数
+SNAPSHOT_CACHE_SIZE = 8
+# 缓存的清单数（按参数区分）
+INVENTORY_CACHE_SIZE = 4
+
+
+@dataclass(frozen=True)
+class InventoryParam:
+    """场景清单参数（对应 Pipeline 顶层的 $inventory）"""
+    templates: Tuple[str, ...] = ()     # 模板文件路径
+    threshold: float = 0.8              # 记录实例的最低分数 (TM_CCOEFF_NORMED)
+    scales: Tuple[float, ...] = (1.0,)  # 模板缩放比例
+    grayscale: bool = True              # 在灰度图上匹配（约为彩色的 1/3 耗时）
+    background: Tuple[int, int, int] = (255, 255, 255)  # 带透明通道的模板合成到的背景色 (BGR)
+    base_dir: Optional[str] = None      # 资源目录，结果中的模板名相对该目录显示
+
+    @classmethod
+    def from_config(
+        cls,
+        value: Union[str, List[str], Dict[str, Any]],
+        base_dir: Optional[str] = None,
+        extra_templates: Sequence[str] = (),
+        default_threshold: float = 0.8
+    ) -> 'InventoryParam':
+        """解析清单配置
+
+        支持以下写法（路径相对 base_dir，可以是目录、文件或通配符）:
+        - "NodesIcon"
+        - ["NodesIcon/*.png", "logo.png"]
+        - {"templates": ["NodesIcon"], "threshold": 0.7, "scales": [0.9, 1.0, 1.1],
+           "grayscale": true, "background": [240, 240, 240]}
+
+        Args:
+            value: 配置值，为空时只包含 extra_templates
+            base_dir: 资源目录
+            extra_templates: 额外加入的模板路径（如 Inventory 节点用到的模板）
+            default_threshold: 配置中未指定阈值时使用的阈值
+
+        Raises:
+            ValueError: 配置格式错误
+        """
+        options: Dict[str, Any] = {}
+        if isinstance(value, dict):
+            options = value
+            patterns = value.get('templates', [])
+        elif value:
+            patterns = value
+        else:
+            patterns = []
+        if isinstance(patterns, str):
+            patterns = [patterns]
+        if not isinstance(patterns, list):
+            raise ValueError(f"templates 应为字符串或列表: {patterns!r}")
+
+        paths: List[str] = []
+        for pattern in patterns:
+            paths.extend(_expand_pattern(str(pattern), base_dir))
+        for path in extra_templates:
+            if path not in paths:
+                paths.append(path)
+
+        scales = options.get('scales', [1.0])
+        if isinstance(scales, (int, float)):
+            scales = [scales]
+        background = options.get('background', [255, 255, 255])
+        if isinstance(background, (int, float)):
+            background = [background] * 3
+        if len(background) != 3:
+            raise ValueError(f"background 应为灰度值或 [B, G, R]: {background!r}")
+        return cls(
+            templates=tuple(paths),
+            threshold=float(options.get('threshold', default_threshold)),
+            scales=tuple(float(s) for s in scales),
+            grayscale=bool(options.get('grayscale', True)),
+            background=tuple(int(c) for c in background),
+            base_dir=str(base_dir) if base_dir else None,
+        )
+
+
+@dataclass(frozen=True)
+class InventoryQuery:
+    """Inventory 节点的查询参数"""
+    templates: Tuple[str, ...] = ()
+    threshold: float = 0.8
+    order_by: OrderBy = OrderBy.SCORE
+    result_index: int = 0
+
+
+def _expand_pattern(pattern: str, base_dir: Optional[str]) -> List[str]:
+    """把目录 / 文件 / 通配符展开为模板文件列表"""
+    path = Path(pattern)
+    if base_dir and not path.is_absolute():
+        path = Path(base_dir) / pattern
+    if path.is_dir():
+        files = sorted(p for p in path.rglob('*') if p.suffix.lower() in IMAGE_SUFFIXES)
+    elif any(c in pattern for c in '*?['):
+        files = sorted(p for p in path.parent.glob(path.name) if p.suffix.lower() in IMAGE_SUFFIXES)
+    else:
+        files = [path]
+    return [str(p) for p in files]
+
+
+def frame_hash(image: np.ndarray) -> str:
+    """帧内容哈希（CRC32，1080p 约几毫秒，远小于一次模板扫描）"""
+    data = np.ascontiguousarray(image)
+    return f"{data.shape[1]}x{data.shape[0]}:{zlib.crc32(memoryview(data).cast('B')):08x}"
+
+
+@dataclass
+class InventorySnapshot:
+    """一帧的扫描结果"""
+    frame_hash: str
+    items: Dict[str, List[MatchResult]] = field(default_factory=dict)  # 模板路径 -> 实例（分数降序）
+    cost_ms: float = 0.0
+    base_dir: Optional[str] = None
+
+    def query(
+        self,
+        templates: Sequence[str],
+        threshold: float = 0.0,
+        roi: Optional[Rect] = None
+    ) -> List[MatchResult]:
+        """取指定模板中分数达到阈值、中心点位于 roi 内的实例"""
+        results = []
+        for template in templates:
+            for match in self.items.get(template, []):
+                if match.score < threshold:
+                    continue
+                if roi is not None and not roi.contains(match.center()):
+                    continue
+                results.append(match)
+        return results
+
+    def within(self, roi: Rect) -> 'InventorySnapshot':
+        """只保留中心点在 roi 内的实例"""
+        return InventorySnapshot(
+            frame_hash=self.frame_hash,
+            items={t: self.query([t], roi=roi) for t in self.items},
+            cost_ms=self.cost_ms,
+            base_dir=self.base_dir,
+        )
+
+    def display_name(self, template: str) -> str:
+        """模板的显示名（相对资源目录）"""
+        if self.base_dir:
+            try:
+                return Path(template).relative_to(self.base_dir).as_posix()
+            except ValueError:
+                pass
+        return template
+
+    def to_dict(self, threshold: float = 0.0) -> Dict[str, Any]:
+        items = {}
+        for template, matches in self.items.items():
+            found = [m.to_dict() for m in matches if m.score >= threshold]
+            if found:
+                items[self.display_name(template)] = found
+        return {
+            'frame_hash': self.frame_hash,
+            'cost_ms': round(self.cost_ms, 2),
+            'template_count': len(self.items),
+            'instance_count': sum(len(v) for v in items.values()),
+            'items': items,
+        }
+
+
+class SceneInventory:
+    """场景清单引擎
+
+    线程安全：多个线程同时扫描同一帧时只有第一个线程执行匹配，其余线程等待并复用结果。
+    """
+
+    def __init__(self, param: InventoryParam, max_workers: Optional[int] = None):
+        """
+        Args:
+            param: 清单参数
+            max_workers: 并行匹配模板的线程数，默认取 CPU 核数（最多 8）
+        """
+        if not CV_AVAILABLE:
+            raise ImportError("OpenCV (cv2) is required for vision module")
+        self._param = param
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or min(8, os.cpu_count() or 1),
+            thread_name_prefix="inventory"
+        )
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, InventorySnapshot]" = OrderedDict()
+        self._pending: Dict[str, Future] = {}
+        self._scans = 0
+        self._cache_hits = 0
+        self._scan_ms = 0.0
+        # 预处理后的模板: 模板路径 -> [(缩放比例, 模板图)]
+        self._templates: Dict[str, List[Tuple[float, np.ndarray]]] = {}
+        self.missing: List[str] = []   # 无法读取的模板
+        self.flat: List[str] = []      # 纯色模板（归一化相关系数无意义，跳过）
+        self._load_templates()
+
+    @property
+    def param(self) -> InventoryParam:
+        return self._param
+
+    def _load_templates(self):
+        for path in self._param.templates:
+            image = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+            if image is None:
+                self.missing.append(path)
+                continue
+            image = self._compose(image)
+            if float(image.std()) < 1e-6:
+                self.flat.append(path)
+                continue
+            if self._param.grayscale:
+                image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            variants = []
+            for scale in self._param.scales:
+                if scale == 1.0:
+                    variants.append((scale, image))
+                    continue
+                w = max(1, int(round(image.shape[1] * scale)))
+                h = max(1, int(round(image.shape[0] * scale)))
+                variants.append((scale, cv2.resize(image, (w, h), interpolation=cv2.INTER_AREA)))
+            self._templates[path] = variants
+
+    def _compose(self, image: np.ndarray) -> np.ndarray:
+        """转为 BGR；带透明通道时合成到背景色上
+
+        图标类资源常常是单色 + 透明通道（如 NodesIcon），直接丢弃透明通道会得到纯色模板。
+        """
+        if image.ndim == 2:
+            return cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        if image.shape[2] == 4:
+            alpha = image[:, :, 3:4].astype(np.float32) / 255.0
+            background = np.array(self._param.background, dtype=np.float32)
+            composed = image[:, :, :3].astype(np.float32) * alpha + background * (1.0 - alpha)
+            return np.clip(composed + 0.5, 0, 255).astype(np.uint8)
+        return image
+
+    def scan(self, image: np.ndarray) -> Tuple[InventorySnapshot, bool]:
+        """扫描一帧（画面未变化时直接返回缓存）
+
+        Returns:
+            (扫描结果, 是否命中缓存)
+        """
+        key = frame_hash(image)
+        with self._lock:
+            snapshot = self._cache.get(key)
+            if snapshot is not None:
+                self._cache.move_to_end(key)
+                self._cache_hits += 1
+                return snapshot, True
+            pending = self._pending.get(key)
+            if pending is None:
+                pending = Future()
+                self._pending[key] = pending
+                owner = True
+            else:
+                owner = False
+
+        if not owner:
+            snapshot = pending.result()
+            with self._lock:
+                self._cache_hits += 1
+            return snapshot, True
+
+        try:
+            snapshot = self._sweep(image, key)
+        except BaseException as e:
+            with self._lock:
+                del self._pending[key]
+            pending.set_exception(e)
+            raise
+
+        with self._lock:
+            self._cache[key] = snapshot
+            while len(self._cache) > SNAPSHOT_CACHE_SIZE:
+                self._cache.popitem(last=False)
+            del self._pending[key]
+            self._scans += 1
+            self._scan_ms += snapshot.cost_ms
+        pending.set_result(snapshot)
+        return snapshot, False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'templates': len(self._templates),
+                'missing': len(self.missing),
+                'flat': len(self.flat),
+                'scans': self._scans,
+                'cache_hits': self._cache_hits,
+                'scan_ms': round(self._scan_ms, 2),
+                'avg_scan_ms': round(self._scan_ms / self._scans, 2) if self._scans else 0.0,
+            }
+
+    def _sweep(self, image: np.ndarray, key: str) -> InventorySnapshot:
+        """所有模板并行匹配同一张预处理后的画面"""
+        start = time.perf_counter()
+        # 共享预处理：每帧只转换一次灰度
+        frame = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if self._param.grayscale else image
+        futures = {
+            path: self._executor.submit(self._match_template, frame, path, variants)
+            for path, variants in self._templates.items()
+        }
+        items = {path: future.result() for path, future in futures.items()}
+        return InventorySnapshot(
+            frame_hash=key,
+            items=items,
+            cost_ms=(time.perf_counter() - start) * 1000,
+            base_dir=self._param.base_dir,
+        )
+
+    def _match_template(
+        self,
+        frame: np.ndarray,
+        path: str,
+        variants: List[Tuple[float, np.ndarray]]
+    ) -> List[MatchResult]:
+        """单个模板在各缩放比例下的全部实例"""
+        threshold = self._param.threshold
+        results: List[MatchResult] = []
+        for _, template in variants:
+            h, w = template.shape[:2]
+            if h > frame.shape[0] or w > frame.shape[1]:
+                continue
+            matched = cv2.matchTemplate(frame, template, cv2.TM_CCOEFF_NORMED)
+            # 纯色区域会产生 inf/nan，视为未命中
+            mask = (matched >= threshold) & np.isfinite(matched)
+            ys, xs = np.nonzero(mask)
+            if len(ys) == 0:
+                continue
+            if len(ys) > MAX_PEAKS_PER_TEMPLATE:
+                scores = matched[ys, xs]
+                top = np.argpartition(scores, -MAX_PEAKS_PER_TEMPLATE)[-MAX_PEAKS_PER_TEMPLATE:]
+                ys, xs = ys[top], xs[top]
+            for y, x in zip(ys, xs):
+                # 整帧匹配时 OpenCV 用积分图求窗口方差，低方差窗口上精度不足、分数会虚高，
+                # 对候选位置在局部窗口上重新计算准确分数
+                window = frame[y:y + h, x:x + w]
+                score = float(cv2.matchTemplate(window, template, cv2.TM_CCOEFF_NORMED)[0, 0])
+                if not np.isfinite(score) or score < threshold:
+                    continue
+                results.append(MatchResult(
+                    box=Rect(int(x), int(y), w, h),
+                    score=score,
+                    label=path,
+                ))
+        return VisionBase.nms(results, iou_threshold=INVENTORY_NMS_IOU)
+
+
+_inventories: "OrderedDict[Tuple[InventoryParam, Optional[int]], SceneInventory]" = OrderedDict()
+_inventories_lock = threading.Lock()
+
+
+def get_inventory(param: InventoryParam, max_workers: Optional[int] = None) -> SceneInventory:
+    """取得（或创建）指定参数的清单引擎
+
+    同一参数复用同一个引擎，模板只加载一次，帧缓存也在多次运行间共享。
+    """
+    key = (param, max_workers)
+    with _inventories_lock:
+        inventory = _inventories.get(key)
+        if inventory is not None:
+            _inventories.move_to_end(key)
+            return inventory
+    inventory = SceneInventory(param, max_workers)
+    with _inventories_lock:
+        _inventories[key] = inventory
+        while len(_inventories) > INVENTORY_CACHE_SIZE:
+            _inventories.popitem(last=False)
+    return inventory
+
+
+class InventoryMatcher(VisionBase):
+    """查询场景清单的识别器（Pipeline 的 Inventory 识别类型）
+
+    示例:
+        >>> matcher = InventoryMatcher(screen_image, query, inventory, roi)
+        >>> result = matcher.analyze()
+    """
+
+    def __init__(
+        self,
+        image: np.ndarray,
+        param: InventoryQuery,
+        inventory: SceneInventory,
+        roi: Optional[Rect] = None,
+        name: str = "InventoryMatcher"
+    ):
+        super().__init__(image, roi, name)
+        self._param = param
+        self._inventory = inventory
+
+    def analyze(self) -> RecoResult:
+        start_time = time.perf_counter()
+        result = RecoResult(algorithm="Inventory")
+
+        with self.trace_span("inventory scan") as span:
+            snapshot, cached = self._inventory.scan(self._image)
+            if span is not None:
+                span.args['cached'] = cached
+
+        all_results = snapshot.query(self._param.templates, 0.0, self._roi)
+        filtered_results = [r for r in all_results if r.score >= self._param.threshold]
+        all_results = self.sort_results(all_results, self._param.order_by)
+        filtered_results = self.sort_results(filtered_results, self._param.order_by)
+
+        if filtered_results:
+            idx = self.pythonic_index(len(filtered_results), self._param.result_index)
+            if idx is not None:
+                result.best_result = filtered_results[idx]
+
+        result.all_results = all_results
+        result.filtered_results = filtered_results
+        result.cost_ms = (time.perf_counter() - start_time) * 1000
+        return result
@@ -0,0 +1,195 @@
+"""
+画面稳定等待 - WaitFreezes
+
+参考 MAA 的 pre_wait_freezes / post_wait_freezes:
+轮询截图，比较区域内相邻两帧的差异，区域保持静止达到指定时长后立即返回，
+用来替代固定的 pre_delay / post_delay 睡眠。
+
+帧差在缩小后的灰度图上计算，每次比较只需几十微秒。
+"""
+
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+try:
+    import cv2
+    CV_AVAILABLE = True
+except ImportError:
+    CV_AVAILABLE = False
+
+from .types import Rect
+from .clock import Clock
+
+# 计算帧差时的最大宽度（超过则等比缩小）
+SIGNATURE_WIDTH = 160
+
+
+@dataclass(frozen=True)
+class WaitFreezesParam:
+    """画面稳定等待参数"""
+    time: int = 0                   # 区域需要保持静止的时长 (ms)，0 表示不等待
+    roi: Optional[Rect] = None      # 检测区域，None 表示使用节点 ROI（没有则全屏）
+    threshold: float = 0.99         # 相邻两帧相似度高于该值视为静止 (0-1)
+    rate_limit: int = 50            # 截图间隔 (ms)
+    timeout: int = 5000             # 最长等待时间 (ms)，超时后继续执行
+
+    @property
+    def enabled(self) -> bool:
+        return self.time > 0
+
+    @classmethod
+    def from_value(cls, value: Any) -> 'WaitFreezesParam':
+        """解析节点配置
+
+        支持两种写法:
+        - 整数: 静止时长 (ms)，如 "post_wait_freezes": 300
+        - 对象: {"time": 300, "roi": [x, y, w, h], "threshold": 0.99, "rate_limit": 50, "timeout": 5000}
+        """
+        if not value:
+            return cls()
+        if isinstance(value, (int, float)):
+            return cls(time=int(value))
+        if isinstance(value, dict):
+            roi = value.get('roi')
+            return cls(
+                time=int(value.get('time', 1)),
+                roi=Rect.from_list(roi) if roi else None,
+                threshold=float(value.get('threshold', 0.99)),
+                rate_limit=int(value.get('rate_limit', 50)),
+                timeout=int(value.get('timeout', 5000)),
+            )
+        raise ValueError(f"无效的 wait_freezes 配置: {value!r}")
+
+
+@dataclass
+class StabilityResult:
+    """稳定等待结果"""
+    stable: bool = False
+    waited_ms: float = 0.0
+    frames: int = 0
+
+    def to_dict(self) -> dict:
+        return {
+            'stable': self.stable,
+            'waited_ms': round(self.waited_ms, 2),
+            'frames': self.frames,
+        }
+
+
+def frame_signature(image: np.ndarray, roi: Optional[Rect] = None) -> np.ndarray:
+    """提取用于比较的帧特征：ROI 区域缩小后的灰度图（ROI 超出画面的部分被裁掉）"""
+    if roi:
+        roi = roi.clipped(image.shape[1], image.shape[0])
+        if roi:
+            image = image[roi.y:roi.y + roi.height, roi.x:roi.x + roi.width]
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    h, w = image.shape[:2]
+    if w > SIGNATURE_WIDTH:
+        scale = SIGNATURE_WIDTH / w
+        image = cv2.resize(image, (SIGNATURE_WIDTH, max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+    return image
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """两帧特征的相似度 (0-1)，1 表示完全相同"""
+    if a.shape != b.shape:
+        return 0.0
+    return 1.0 - float(cv2.absdiff(a, b).mean()) / 255.0
+
+
+def wait_until_stable(
+    capture_func: Callable[[], np.ndarray],
+    param: WaitFreezesParam,
+    roi: Optional[Rect] = None,
+    clock: Optional[Clock] = None,
+    stop_event: Optional[threading.Event] = None
+) -> StabilityResult:
+    """等待区域画面静止
+
+    Args:
+        capture_func: 截图函数
+        param: 等待参数
+        roi: 默认检测区域（param.roi 优先）
+        clock: 时钟，默认真实时钟
+        stop_event: 置位时立即返回
+
+    Returns:
+        StabilityResult，超时返回 stable=False
+    """
+    clock = clock or Clock()
+    stop_event = stop_event or threading.Event()
+    roi = param.roi or roi
+    result = StabilityResult()
+    if not param.enabled:
+        result.stable = True
+        return result
+
+    begin = clock.now()
+    still_since = begin
+    previous = frame_signature(capture_func(), roi)
+    result.frames = 1
+
+    while True:
+        if clock.wait(param.rate_limit / 1000, stop_event):
+            break
+        current = frame_signature(capture_func(), roi)
+        result.frames += 1
+        now = clock.now()
+        if similarity(previous, current) < param.threshold:
+            still_since = now
+        previous = current
+
+        if (now - still_since) * 1000 >= param.time:
+            result.stable = True
+            break
+        if (now - begin) * 1000 >= param.timeout:
+            break
+
+    result.waited_ms = (clock.now() - begin) * 1000
+    return result
+
+
+def wait_until_changed(
+    capture_func: Callable[[], np.ndarray],
+    baseline: np.ndarray,
+    timeout_ms: int,
+    roi: Optional[Rect] = None,
+    threshold: float = 0.99,
+    rate_limit: int = 100,
+    clock: Optional[Clock] = None,
+    stop_event: Optional[threading.Event] = None,
+    alive: Optional[Callable[[], bool]] = None
+) -> StabilityResult:
+    """等待画面相对 baseline 发生变化（如应用窗口出现）
+
+    Args:
+        baseline: 变化前的帧特征 (frame_signature)
+        alive: 可选的存活检查，返回 False 时立即结束（如被测进程已退出）
+
+    Returns:
+        StabilityResult，stable 字段表示是否检测到变化
+    """
+    clock = clock or Clock()
+    stop_event = stop_event or threading.Event()
+    result = StabilityResult()
+    begin = clock.now()
+
+    while True:
+        current = frame_signature(capture_func(), roi)
+        result.frames += 1
+        if similarity(baseline, current) < threshold:
+            result.stable = True
+            break
+        if alive is not None and not alive():
+            break
+        if (clock.now() - begin) * 1000 >= timeout_ms:
+            break
+        if clock.wait(rate_limit / 1000, stop_event):
+            break
+
+    result.waited_ms = (clock.now() - begin) * 1000
+    return result
@@ -126,8 +126,15 @@ class TemplateMatcher(VisionBase):
         
         # 对每个模板执行匹配
         for i, template in enumerate(self._templates):
+            if self.is_cancelled():
+                break
             threshold = self._get_threshold(i)
-            matches = self._template_match(template)
+            with self.trace_span(
+                f"template[{i}]",
+                size=f"{template.shape[1]}x{template.shape[0]}",
+                threshold=threshold
+            ):
+                matches = self._template_match(template)
             
             # 调试: 输出匹配结果
             if matches:
@@ -200,35 +207,39 @@ class TemplateMatcher(VisionBase):
         best_overall_result = None
         
         for scale in scales:
-            # 缩放模板
-            if scale != 1.0:
-                new_w = max(1, int(template.shape[1] * scale))
-                new_h = max(1, int(template.shape[0] * scale))
-                scaled_template = cv2.resize(template, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
-            else:
-                scaled_template = template
-            
-            h, w = scaled_template.shape[:2]
-            
-            # 检查尺寸
-            if h > image_roi.shape[0] or w > image_roi.shape[1]:
-                continue
-            
-            # 创建掩码（可选）
-            mask = self._create_mask(scaled_template) if self._param.green_mask else None
+            if self.is_cancelled():
+                break
             
-            # 执行模板匹配
-            if mask is not None:
-                matched = cv2.matchTemplate(image_roi, scaled_template, method, mask=mask)
-            else:
-                matched = cv2.matchTemplate(image_roi, scaled_template, method)
-            
-            # 反转分数
-            if invert_score:
-                matched = 1.0 - matched
-            
-            # 使用 minMaxLoc 找最佳匹配点
-            min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(matched)
+            with self.trace_span(f"scale {scale:.2f}", scale=round(float(scale), 3)):
+                # 缩放模板
+                if scale != 1.0:
+                    new_w = max(1, int(template.shape[1] * scale))
+                    new_h = max(1, int(template.shape[0] * scale))
+                    scaled_template = cv2.resize(template, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+                else:
+                    scaled_template = template
+                
+                h, w = scaled_template.shape[:2]
+                
+                # 检查尺寸
+                if h > image_roi.shape[0] or w > image_roi.shape[1]:
+                    continue
+                
+                # 创建掩码（可选）
+                mask = self._create_mask(scaled_template) if self._param.green_mask else None
+                
+                # 执行模板匹配
+                if mask is not None:
+                    matched = cv2.matchTemplate(image_roi, scaled_template, method, mask=mask)
+                else:
+                    matched = cv2.matchTemplate(image_roi, scaled_template, method)
+                
+                # 反转分数
+                if invert_score:
+                    matched = 1.0 - matched
+                
+                # 使用 minMaxLoc 找最佳匹配点
+                min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(matched)
             
             if self._low_score_better:
                 best_score = float(min_val)
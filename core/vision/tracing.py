@@ -0,0 +1,154 @@
+"""
+执行追踪 - Tracer
+
+记录 Pipeline 每一步的耗时 (span)，用于分析时间花在哪里:
+- capture: 截图
+- recognize: 识别（按识别器、模板、缩放比例细分）
+- action: 点击、滑动等输入
+- delay: pre_delay / post_delay / rate_limit 等待
+- io: 模板加载、识别截图保存
+
+导出为 Chrome trace_event JSON，可直接在 chrome://tracing 或 https://ui.perfetto.dev 中打开。
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Any
+
+
+class Span:
+    """一个耗时区间，作为上下文管理器使用；退出前可继续补充 args"""
+
+    __slots__ = ('_tracer', 'name', 'cat', 'args', '_start')
+
+    def __init__(self, tracer: 'Tracer', name: str, cat: str, args: Dict[str, Any]):
+        self._tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self._start = 0.0
+
+    def __enter__(self) -> 'Span':
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args['error'] = str(exc)
+        self._tracer._add_complete(self.name, self.cat, self._start, time.perf_counter(), self.args)
+        return False
+
+
+class Tracer:
+    """线程安全的 span 收集器
+
+    示例:
+        >>> tracer = Tracer("demo")
+        >>> with tracer.span("capture", "capture"):
+        ...     image = capture()
+        >>> tracer.save("trace.json")
+    """
+
+    def __init__(self, name: str = "pipeline"):
+        self.name = name
+        self._origin = time.perf_counter()
+        self._events: List[Dict[str, Any]] = []
+        self._threads: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def span(self, name: str, cat: str, **args) -> Span:
+        """创建一个 span"""
+        return Span(self, name, cat, args)
+
+    def instant(self, name: str, cat: str, **args):
+        """记录一个瞬时事件（如识别命中、超时）"""
+        ts = (time.perf_counter() - self._origin) * 1e6
+        event = {
+            'name': name, 'cat': cat, 'ph': 'i', 's': 't',
+            'ts': round(ts, 3), 'pid': self._pid, 'tid': self._current_tid(),
+            'args': args,
+        }
+        with self._lock:
+            self._events.append(event)
+
+    def _current_tid(self) -> int:
+        thread = threading.current_thread()
+        tid = thread.ident or 0
+        if tid not in self._threads:
+            with self._lock:
+                self._threads[tid] = thread.name
+        return tid
+
+    def _add_complete(self, name: str, cat: str, start: float, end: float, args: Dict[str, Any]):
+        event = {
+            'name': name, 'cat': cat, 'ph': 'X',
+            'ts': round((start - self._origin) * 1e6, 3),
+            'dur': round((end - start) * 1e6, 3),
+            'pid': self._pid, 'tid': self._current_tid(),
+            'args': args,
+        }
+        with self._lock:
+            self._events.append(event)
+
+    @property
+    def events(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._events)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """按类别汇总耗时 (ms)
+
+        只统计每个类别最外层的 span，嵌套的同类 span（如模板内的各缩放比例）不会重复计入。
+        """
+        totals: Dict[str, Dict[str, float]] = {}
+        open_until: Dict[tuple, float] = {}
+        for event in sorted(self.events, key=lambda e: (e['ts'], -e.get('dur', 0))):
+            if event['ph'] != 'X':
+                continue
+            key = (event['cat'], event['tid'])
+            end = event['ts'] + event['dur']
+            if open_until.get(key, -1.0) >= end:
+                continue  # 嵌套在同类 span 中
+            open_until[key] = end
+            item = totals.setdefault(event['cat'], {'count': 0, 'total_ms': 0.0})
+            item['count'] += 1
+            item['total_ms'] += event['dur'] / 1000
+        for item in totals.values():
+            item['total_ms'] = round(item['total_ms'], 3)
+        return totals
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """导出 Chrome trace_event 格式 (Perfetto 同样支持)"""
+        with self._lock:
+            events = list(self._events)
+            threads = dict(self._threads)
+        metadata = [{
+            'name': 'process_name', 'ph': 'M', 'pid': self._pid, 'tid': 0,
+            'args': {'name': self.name},
+        }]
+        for tid, thread_name in threads.items():
+            metadata.append({
+                'name': 'thread_name', 'ph': 'M', 'pid': self._pid, 'tid': tid,
+                'args': {'name': thread_name},
+            })
+        return {
+            'traceEvents': metadata + events,
+            'displayTimeUnit': 'ms',
+        }
+
+    def save(self, path: str) -> str:
+        """写入 trace JSON 文件"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_chrome_trace(), f, ensure_ascii=False, default=_json_default)
+        return path
+
+
+def _json_default(obj: Any):
+    """numpy 标量等无法直接序列化的值"""
+    if hasattr(obj, 'item'):
+        return obj.item()
+    return str(obj)
@@ -5,7 +5,7 @@
 """
 
 from dataclasses import dataclass, field, asdict
-from typing import List, Optional, Any, Tuple, Union
+from typing import Dict, List, Optional, Any, Tuple, Union
 from enum import Enum, auto
 import numpy as np
 
@@ -84,7 +84,49 @@ class Rect:
     
     def is_valid(self) -> bool:
         """判断是否为有效区域"""
-        return self.width > 0 and self.height > 0
+        return bool(self.width > 0 and self.height > 0)
+    
+    def shifted(self, offset: 'Rect') -> 'Rect':
+        """各分量加上偏移量 (MAA 的 roi_offset / target_offset 语义)"""
+        return Rect(
+            x=self.x + offset.x,
+            y=self.y + offset.y,
+            width=self.width + offset.width,
+            height=self.height + offset.height
+        )
+    
+    def expanded(self, dx: int, dy: int) -> 'Rect':
+        """向四周扩展 (dx 为左右各扩展的像素，dy 为上下各扩展的像素)"""
+        return Rect(
+            x=self.x - dx,
+            y=self.y - dy,
+            width=self.width + 2 * dx,
+            height=self.height + 2 * dy
+        )
+    
+    def clipped(self, width: int, height: int) -> 'Rect':
+        """裁剪到 [0, 0, width, height] 范围内"""
+        x1 = min(max(self.x, 0), width)
+        y1 = min(max(self.y, 0), height)
+        x2 = min(max(self.x + self.width, 0), width)
+        y2 = min(max(self.y + self.height, 0), height)
+        return Rect(x=x1, y=y1, width=x2 - x1, height=y2 - y1)
+    
+    def intersection(self, other: 'Rect') -> 'Rect':
+        """与另一个区域的交集（不相交时宽高为 0）"""
+        x1 = max(self.x, other.x)
+        y1 = max(self.y, other.y)
+        x2 = min(self.x + self.width, other.x + other.width)
+        y2 = min(self.y + self.height, other.y + other.height)
+        return Rect(x=x1, y=y1, width=max(0, x2 - x1), height=max(0, y2 - y1))
+    
+    def union(self, other: 'Rect') -> 'Rect':
+        """同时包含两个区域的最小矩形"""
+        x1 = min(self.x, other.x)
+        y1 = min(self.y, other.y)
+        x2 = max(self.x + self.width, other.x + other.width)
+        y2 = max(self.y + self.height, other.y + other.height)
+        return Rect(x=x1, y=y1, width=x2 - x1, height=y2 - y1)
     
     def __bool__(self) -> bool:
         return self.is_valid()
@@ -145,6 +187,7 @@ class RecoResult:
     algorithm: str = ""                 # 使用的算法
     cost_ms: float = 0.0               # 耗时（毫秒）
     debug_image: Optional[np.ndarray] = None  # 调试绘图
+    detail: Dict[str, Any] = field(default_factory=dict)  # 算法相关的附加信息（如级联识别各级统计）
     
     @property
     def success(self) -> bool:
@@ -168,6 +211,7 @@ class RecoResult:
             'cost_ms': self.cost_ms,
             'all_results': [r.to_dict() for r in self.all_results],
             'filtered_results': [r.to_dict() for r in self.filtered_results],
-            'best_result': self.best_result.to_dict() if self.best_result else None
+            'best_result': self.best_result.to_dict() if self.best_result else None,
+            'detail': self.detail
         }
 
@@ -25,6 +25,10 @@ export interface TestCaseDetail {
   case_name: string
   status: 'PASS' | 'FAIL' | 'SKIP'
   message?: string
+  data_tag?: string | null       // 数据驱动测试的数据行
+  duration_ms?: number | null
+  file?: string | null           // 失败/跳过的源码位置
+  line?: number | null
 }
 
 export interface Screenshot {
@@ -49,6 +53,25 @@ export interface TestStatistics {
   unique_tests: number
 }
 
+/** 重复运行的不稳定度统计 */
+export interface TestFlakiness {
+  id: number
+  project_path: string
+  test_name: string
+  function_name: string          // 空字符串表示整个测试可执行文件
+  runs: number
+  passed: number
+  failed: number
+  pass_rate: number
+  flakiness: number              // 0 表示结果一致，1 表示通过和失败各占一半
+  p50_ms: number | null
+  p95_ms: number | null
+  max_ms: number | null
+  failing_cases: Record<string, number>  // 用例 -> 失败次数
+  is_flaky: boolean              // 既有通过也有失败
+  created_at: string
+}
+
 // ==================== API 调用 ====================
 
 async function callPy<T>(fn: string, ...args: unknown[]): Promise<T> {
@@ -92,6 +115,16 @@ export async function getTestStatistics(projectPath: string): Promise<TestStatis
   return callPy<TestStatistics>('get_test_statistics', projectPath)
 }
 
+/**
+ * 获取各测试最近一次重复运行的不稳定度统计（用于在历史中标记不稳定的测试）
+ */
+export async function getTestFlakiness(
+  projectPath: string,
+  testName?: string
+): Promise<{ success: boolean; records?: TestFlakiness[]; error?: string }> {
+  return callPy('get_test_flakiness', projectPath, testName)
+}
+
 /**
  * 清理旧测试记录
  */
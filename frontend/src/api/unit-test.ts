@@ -15,6 +15,95 @@ export interface TestCaseResult {
   name: string
   status: 'PASS' | 'FAIL' | 'SKIP'
   message?: string
+  data_tag?: string | null       // 数据驱动测试的数据行
+  duration_ms?: number | null    // 数据驱动测试按数据行平均分摊函数耗时
+  file?: string | null           // 失败/跳过的源码位置
+  line?: number | null
+}
+
+/** QBENCHMARK 测量后端 */
+export type BenchmarkBackend = 'walltime' | 'tickcounter' | 'eventcounter' | 'callgrind'
+
+export interface BenchmarkResult {
+  function: string
+  data_tag: string | null
+  metric: string                 // WalltimeMilliseconds / CPUTicks / Events / InstructionReads 等
+  value: number                  // 每次迭代的测量值
+  iterations: number
+}
+
+/** benchmark 结果与滚动基线的比较 */
+export interface BenchmarkComparison {
+  function: string
+  data_tag: string | null
+  metric: string
+  value: number
+  baseline: number | null        // 历史不足时为 null
+  change: number | null          // (value - baseline) / baseline
+  samples: number
+  status: 'baseline' | 'stable' | 'regression' | 'improvement'
+}
+
+export interface BenchmarkTrendPoint {
+  value: number
+  iterations: number
+  run_id: number | null
+  created_at: string
+  baseline: number | null
+  change: number | null
+  status: BenchmarkComparison['status']
+}
+
+export interface BenchmarkTrendSeries {
+  function: string
+  data_tag: string | null
+  metric: string
+  points: BenchmarkTrendPoint[]  // 旧的在前
+  latest: BenchmarkTrendPoint | null
+}
+
+/** 根据历史耗时计算的测试超时 */
+export interface TestTimeout {
+  timeout_s: number
+  source: 'history' | 'default'  // 历史不足时使用默认超时（单元测试 30 秒，UI 测试 60 秒）
+  p99_ms: number | null
+  samples: number
+  timeout_streak: number         // 最近连续超时的次数（每次超时时间加倍）
+}
+
+/** 测试超时统计（用于调整超时策略） */
+export interface TestTimeoutStats extends TestTimeout {
+  test_name: string
+  test_type: 'unit' | 'ui'
+  updated_at: string
+  runs: number
+  timeouts: number
+  max_duration_ms: number | null
+  max_ratio: number | null       // 完整运行的耗时与超时之比的最大值
+}
+
+export interface TestTimeoutSummary {
+  success: boolean
+  error?: string
+  policy?: {
+    multiplier: number
+    floor_s: number
+    ceiling_s: number
+    history_window: number
+    min_samples: number
+    defaults_s: Record<'unit' | 'ui', number>
+  }
+  tests?: TestTimeoutStats[]
+}
+
+/** 测试运行环境：offscreen（无显示器）/ xvfb（每个测试独占虚拟显示）/ desktop（当前桌面，同一时间只运行一个） */
+export type EnvProfile = 'offscreen' | 'xvfb' | 'desktop'
+
+export interface TestEnvProfiles {
+  success: boolean
+  error?: string
+  available?: EnvProfile[]                 // 当前系统可用的 profile（按自动选择的顺序）
+  tests?: Record<string, EnvProfile>       // 各测试缓存的 profile
 }
 
 export interface TestResult {
@@ -27,10 +116,124 @@ export interface TestResult {
   duration: string
   output: string
   details: TestCaseResult[]
+  benchmarks?: BenchmarkResult[]                     // QBENCHMARK 结果
+  benchmark_comparisons?: BenchmarkComparison[]      // 与滚动基线的比较（单个测试运行时）
+  benchmark_regressions?: number
+  timeout?: TestTimeout          // 本次运行使用的超时
+  env_profile?: string           // 使用的运行环境（套件中各分片不同时以逗号分隔）
   run_id?: number
   ai_analysis?: string  // AI 分析结果（Markdown 格式）
 }
 
+export interface SuiteTestResult extends TestResult {
+  executable_path: string
+  order: number                  // 调度顺序（按历史耗时从长到短）
+  expected_ms: number | null     // 历史估算耗时，null 表示没有历史
+  start_ms: number
+  cost_ms: number                // 各分片耗时之和
+  wall_ms: number                // 第一个分片开始到最后一个分片结束
+  shards: number                 // 按测试函数拆分的分片数，1 表示未分片
+  cached: boolean                // cached pass：未变化、沿用 run_id 指向的原运行结果
+  timeout_s: number | null       // 每个分片的超时时间
+}
+
+export interface UnitTestSuiteReport {
+  success: boolean
+  error?: string
+  project_path?: string
+  total?: number
+  passed?: number
+  failed?: number
+  cached?: number                // 命中结果缓存（未重新运行）的测试数
+  missing?: string[]             // 可执行文件不存在（未编译）的测试
+  cancelled?: boolean
+  workers?: number
+  wall_ms?: number
+  serial_ms?: number             // 各测试耗时之和
+  speedup?: number
+  results?: SuiteTestResult[]
+}
+
+export interface TestImpact {
+  changed_files: string[]        // 相对项目目录
+  affected: string[]             // 受影响的测试
+  unaffected: string[]
+  skipped: number                // 未受影响的测试数
+  reasons: Record<string, string[]>  // 测试 -> 导致其受影响的改动文件
+  all_tests: boolean             // 改动了 CMakeLists.txt，全部测试受影响
+  cost_ms: number
+}
+
+export interface AffectedTestsReport extends UnitTestSuiteReport {
+  impact?: TestImpact
+  skipped_tests?: number         // 未受影响而跳过的测试数
+}
+
+/** 后台套件任务的 test_result 事件数据 */
+export interface SuiteProgressEvent {
+  result: Omit<SuiteTestResult, 'output'>
+  completed: number
+  total: number
+  passed: number
+  failed: number
+  error: number
+}
+
+/** 后台测试任务的 test_case 事件数据（套件任务额外带 shard） */
+export interface TestCaseEvent {
+  test_name: string
+  shard?: string                 // 分片，如 "2/3"
+  case: TestCaseResult
+}
+
+/** 后台测试任务的 output 事件数据（自上次事件以来的新输出行） */
+export interface TestOutputEvent {
+  test_name: string
+  lines: string[]
+}
+
+/** 一次重复运行的结果 */
+export interface RerunResult {
+  index: number
+  status: 'passed' | 'failed' | 'error'
+  duration_ms: number
+  failed_cases: string[]         // 失败的用例（数据驱动测试为 "函数:数据行"）
+  timed_out: boolean
+}
+
+/** 重复运行报告（不稳定度统计字段见 test-history.ts 的 TestFlakiness） */
+export interface RerunReport {
+  success: boolean
+  error?: string
+  test_name: string
+  function_name: string
+  runs: number                   // 完成的运行次数
+  requested_runs: number
+  workers: number
+  passed: number
+  failed: number
+  pass_rate: number
+  flakiness: number
+  is_flaky: boolean
+  p50_ms: number | null
+  p95_ms: number | null
+  max_ms: number | null
+  failing_cases: Record<string, number>
+  reruns: RerunResult[]
+  env_profile: EnvProfile        // 各次运行使用的运行环境
+  cancelled: boolean
+  cost_ms: number
+}
+
+/** 后台重复运行任务的 rerun_result 事件数据 */
+export interface RerunProgressEvent {
+  run: RerunResult
+  completed: number
+  runs: number
+  passed: number
+  failed: number
+}
+
 // ==================== API 调用 ====================
 
 async function callPy<T>(fn: string, ...args: unknown[]): Promise<T> {
@@ -54,17 +257,212 @@ export async function scanUnitTests(projectPath: string): Promise<UnitTestFile[]
 }
 
 /**
- * 运行单元测试
+ * 运行单元测试（benchmarkBackend 选择 QBENCHMARK 测量后端，regressionThreshold 为回归阈值比例）
+ */
+export async function runUnitTest(
+  executablePath: string,
+  testName: string,
+  projectPath: string,
+  benchmarkBackend?: BenchmarkBackend,
+  regressionThreshold?: number,
+  envProfile: EnvProfile | 'auto' = 'auto'
+): Promise<TestResult> {
+  return callPy<TestResult>('run_unit_test', executablePath, testName, projectPath, benchmarkBackend, regressionThreshold, envProfile)
+}
+
+/**
+ * 在后台运行单元测试，用例结果和输出通过 test_case / output 事件实时推送（用 visual.pollJob 轮询）
  */
-export async function runUnitTest(executablePath: string, testName: string, projectPath: string): Promise<TestResult> {
-  return callPy<TestResult>('run_unit_test', executablePath, testName, projectPath)
+export async function startUnitTestJob(
+  executablePath: string,
+  testName: string,
+  projectPath: string,
+  benchmarkBackend?: BenchmarkBackend,
+  regressionThreshold?: number,
+  envProfile: EnvProfile | 'auto' = 'auto'
+): Promise<{ success: boolean; job_id?: string; error?: string }> {
+  return callPy('start_unit_test_job', executablePath, testName, projectPath, benchmarkBackend, regressionThreshold, envProfile)
 }
 
 /**
- * 运行 UI 测试（含截图记录）
+ * 获取 QBENCHMARK 趋势（每个点附带滚动基线和回归判断）
  */
-export async function runUiTest(executablePath: string, testName: string, projectPath: string): Promise<TestResult> {
-  return callPy<TestResult>('run_ui_test_with_record', executablePath, testName, projectPath)
+export async function getBenchmarkTrend(
+  projectPath: string,
+  testName: string,
+  options: {
+    functionName?: string
+    dataTag?: string
+    metric?: string
+    limit?: number
+    regressionThreshold?: number
+  } = {}
+): Promise<{ success: boolean; series?: BenchmarkTrendSeries[]; error?: string }> {
+  return callPy(
+    'get_benchmark_trend',
+    projectPath,
+    testName,
+    options.functionName,
+    options.dataTag,
+    options.metric,
+    options.limit ?? 50,
+    options.regressionThreshold
+  )
+}
+
+/**
+ * 获取各测试当前的超时及运行统计
+ */
+export async function getTestTimeouts(projectPath: string): Promise<TestTimeoutSummary> {
+  return callPy<TestTimeoutSummary>('get_test_timeouts', projectPath)
+}
+
+/**
+ * 获取可用的运行环境及各测试缓存的 profile
+ */
+export async function getTestEnvProfiles(projectPath: string): Promise<TestEnvProfiles> {
+  return callPy<TestEnvProfiles>('get_test_env_profiles', projectPath)
+}
+
+/**
+ * 指定测试的运行环境（auto 模式下使用），profile 为空时清除缓存、下次运行重新选择
+ */
+export async function setTestEnvProfile(
+  projectPath: string,
+  testName: string,
+  profile?: EnvProfile
+): Promise<{ success: boolean; error?: string }> {
+  return callPy('set_test_env_profile', projectPath, testName, profile)
+}
+
+/**
+ * 获取项目中有 QBENCHMARK 结果的测试
+ */
+export async function getBenchmarkTests(projectPath: string): Promise<{ success: boolean; tests?: string[]; error?: string }> {
+  return callPy('get_benchmark_tests', projectPath)
+}
+
+/**
+ * 并行运行项目的全部单元测试（按历史耗时从长到短调度，耗时测试按函数分片，结果批量记录）
+ * 未变化且上次通过的测试直接返回缓存结果（cached），force 为 true 时全部重新运行
+ * envProfile 为 auto 时每个测试自动选择并缓存运行环境
+ */
+export async function runUnitTestSuite(
+  projectPath: string,
+  maxWorkers?: number,
+  testNames?: string[],
+  shardFunctions: boolean = true,
+  force: boolean = false,
+  envProfile: EnvProfile | 'auto' = 'auto'
+): Promise<UnitTestSuiteReport> {
+  return callPy<UnitTestSuiteReport>('run_unit_test_suite', projectPath, maxWorkers, testNames, shardFunctions, force, envProfile)
+}
+
+/**
+ * 在后台运行单元测试套件，进度通过 test_result / test_case 事件推送（用 visual.pollJob 轮询）
+ */
+export async function startUnitTestSuiteJob(
+  projectPath: string,
+  maxWorkers?: number,
+  testNames?: string[],
+  shardFunctions: boolean = true,
+  force: boolean = false,
+  envProfile: EnvProfile | 'auto' = 'auto'
+): Promise<{ success: boolean; job_id?: string; error?: string }> {
+  return callPy('start_unit_test_suite_job', projectPath, maxWorkers, testNames, shardFunctions, force, envProfile)
+}
+
+/**
+ * 影响分析：找出受改动影响的测试（changedFiles 为空时使用 git diff base）
+ */
+export async function analyzeTestImpact(
+  projectPath: string,
+  changedFiles?: string[],
+  base: string = 'HEAD'
+): Promise<TestImpact & { success: boolean; error?: string }> {
+  return callPy('analyze_test_impact', projectPath, changedFiles, base)
+}
+
+/**
+ * 只运行受改动影响的单元测试
+ */
+export async function runAffectedTests(
+  projectPath: string,
+  changedFiles?: string[],
+  base: string = 'HEAD',
+  maxWorkers?: number,
+  force: boolean = false,
+  envProfile: EnvProfile | 'auto' = 'auto'
+): Promise<AffectedTestsReport> {
+  return callPy<AffectedTestsReport>('run_affected_tests', projectPath, changedFiles, base, maxWorkers, force, envProfile)
+}
+
+/**
+ * 在后台运行受影响的单元测试，事件同 startUnitTestSuiteJob
+ */
+export async function startAffectedTestsJob(
+  projectPath: string,
+  changedFiles?: string[],
+  base: string = 'HEAD',
+  maxWorkers?: number,
+  force: boolean = false,
+  envProfile: EnvProfile | 'auto' = 'auto'
+): Promise<{ success: boolean; job_id?: string; error?: string }> {
+  return callPy('start_affected_tests_job', projectPath, changedFiles, base, maxWorkers, force, envProfile)
+}
+
+/**
+ * 把测试并发重复运行 N 次，统计通过率、耗时分布和不稳定度（结果保存到数据库）
+ */
+export async function rerunUnitTest(
+  executablePath: string,
+  testName: string,
+  projectPath: string,
+  runs: number = 10,
+  functionName?: string,
+  maxWorkers?: number,
+  envProfile: EnvProfile | 'auto' = 'auto'
+): Promise<RerunReport> {
+  return callPy<RerunReport>('rerun_unit_test', executablePath, testName, projectPath, runs, functionName, maxWorkers, envProfile)
+}
+
+/**
+ * 在后台重复运行测试，每次运行结束产生 rerun_result 事件
+ */
+export async function startRerunUnitTestJob(
+  executablePath: string,
+  testName: string,
+  projectPath: string,
+  runs: number = 10,
+  functionName?: string,
+  maxWorkers?: number,
+  envProfile: EnvProfile | 'auto' = 'auto'
+): Promise<{ success: boolean; job_id?: string; error?: string }> {
+  return callPy('start_rerun_unit_test_job', executablePath, testName, projectPath, runs, functionName, maxWorkers, envProfile)
+}
+
+/**
+ * 运行 UI 测试（含截图记录；offscreen 下截图是空白的，默认使用 desktop）
+ */
+export async function runUiTest(
+  executablePath: string,
+  testName: string,
+  projectPath: string,
+  envProfile: EnvProfile = 'desktop'
+): Promise<TestResult> {
+  return callPy<TestResult>('run_ui_test_with_record', executablePath, testName, projectPath, envProfile)
+}
+
+/**
+ * 在后台运行 UI 测试，事件同 startUnitTestJob
+ */
+export async function startUiTestJob(
+  executablePath: string,
+  testName: string,
+  projectPath: string,
+  envProfile: EnvProfile = 'desktop'
+): Promise<{ success: boolean; job_id?: string; error?: string }> {
+  return callPy('start_ui_test_job', executablePath, testName, projectPath, envProfile)
 }
 
 /**
@@ -14,6 +14,7 @@ declare global {
         get_window_info: () => Promise<WindowInfoResult>
         focus_target_window: (windowTitle?: string) => Promise<ApiResult>
         run_stress_test: (iterations: number) => Promise<StressTestResult>
+        benchmark_action_backends: (iterations?: number, batchSize?: number) => Promise<ActionBackendBenchmarkResult>
         execute_ai_command: (command: string) => Promise<AiCommandResult>
         verify_visual_result: (pattern: string) => Promise<VisualVerifyResult>
         set_ai_api_key: (apiKey: string, baseUrl?: string) => Promise<ApiResult>
@@ -24,11 +25,19 @@ declare global {
         click_template: (templatePath: string, threshold?: number, roi?: number[], offset?: number[]) => Promise<ClickTemplateResult>
         wait_for_template: (templatePath: string, threshold?: number, timeout?: number, interval?: number, roi?: number[]) => Promise<WaitTemplateResult>
         run_pipeline: (config: PipelineConfig, entry: string, resourceDir?: string) => Promise<PipelineResult>
-        run_pipeline_from_file: (jsonPath: string, entry: string, resourceDir?: string) => Promise<PipelineResult>
+        run_pipeline_from_file: (jsonPath: string, entry: string, resourceDir?: string, recordDir?: string) => Promise<PipelineResult>
+        run_pipeline_replay: (jsonPath: string, entry: string, source: string, resourceDir?: string, repeat?: number) => Promise<PipelineReplayReport>
         get_vision_capabilities: () => Promise<VisionCapabilities>
         // Pipeline 测试 API
         scan_pipeline_tests: (directory?: string) => Promise<PipelineTestFile[]>
         run_pipeline_test: (pipelinePath: string, entry: string, launchApp?: boolean, resourceDir?: string) => Promise<PipelineTestResult>
+        run_pipeline_batch: (jobs: PipelineBatchJob[], workers?: number, useXvfb?: boolean) => Promise<PipelineBatchReport>
+        // 后台任务 API
+        start_pipeline_job: (config: PipelineConfig, entry: string, resourceDir?: string) => Promise<JobStartResult>
+        start_pipeline_test_job: (pipelinePath: string, entry: string, launchApp?: boolean, resourceDir?: string) => Promise<JobStartResult>
+        poll_job: (jobId: string, cursor?: number) => Promise<JobPollResult<unknown>>
+        cancel_job: (jobId: string) => Promise<ApiResult>
+        list_jobs: () => Promise<JobListResult>
       }
     }
   }
@@ -44,6 +53,8 @@ export interface ApiResult {
 export interface AppLaunchResult extends ApiResult {
   pid?: number
   path?: string
+  ready?: boolean     // 是否检测到窗口出现并绘制完成
+  ready_ms?: number   // 启动到就绪的耗时
 }
 
 export interface ScreenFrameResult extends ApiResult {
@@ -62,6 +73,25 @@ export interface StressTestResult extends ApiResult {
   successful?: number
   failed?: number
   logs?: string[]
+  backend?: string   // 使用的动作后端
+}
+
+export interface ActionLatency {
+  mean: number
+  p50: number
+  max: number
+}
+
+export interface ActionBackendBenchmark {
+  available: boolean
+  error?: string
+  single_ms?: ActionLatency       // 单次调用的延迟
+  batch_event_ms?: ActionLatency  // 批量提交时平均每个事件的延迟
+}
+
+export interface ActionBackendBenchmarkResult extends ApiResult {
+  default?: string | null
+  backends?: Record<string, ActionBackendBenchmark>
 }
 
 export interface AiCommandResult extends ApiResult {
@@ -137,14 +167,23 @@ export interface PipelineNode {
   recognition?: string
   template?: string[]
   threshold?: number[]
-  roi?: number[]
+  roi?: number[] | string        // 节点名：相对该节点最近一次识别到的位置
+  roi_offset?: number[]
+  roi_expand?: number | number[]
+  hot_region?: boolean           // 先在上次命中位置附近搜索，未命中再搜完整 roi（默认 false，仅 Score 排序）
   lower?: number[]
   upper?: number[]
   method?: number
   count?: number
   connected?: boolean
+  order_by?: string              // Inventory: Score / Horizontal / Vertical
+  stages?: CascadeStageConfig[]  // Cascade: 每一级只在上一级的命中区域内运行
+  all_of?: PipelineNode[]        // And: 所有子识别都命中
+  any_of?: PipelineNode[]        // Or: 任一子识别命中
+  box_index?: number             // And: 取第几个子识别的识别框
+  index?: number                 // Inventory: 取排序后的第几个实例，负数从末尾数
   action?: string
-  target?: boolean | number[]
+  target?: boolean | number[] | string
   target_offset?: number[]
   begin?: boolean | number[]
   end?: number[]
@@ -155,10 +194,26 @@ export interface PipelineNode {
   rate_limit?: number
   pre_delay?: number
   post_delay?: number
+  pre_wait_freezes?: number | WaitFreezesConfig
+  post_wait_freezes?: number | WaitFreezesConfig
   inverse?: boolean
   enabled?: boolean
 }
 
+export interface CascadeStageConfig extends PipelineNode {
+  expand?: number                // 命中框向四周扩展的像素，作为下一级的搜索区域
+  max_regions?: number
+  fallback?: boolean             // 只在上一级未命中时运行
+}
+
+export interface WaitFreezesConfig {
+  time?: number
+  roi?: number[]
+  threshold?: number
+  rate_limit?: number
+  timeout?: number
+}
+
 export type PipelineConfig = Record<string, PipelineNode>
 
 export interface PipelineResult extends ApiResult {
@@ -171,9 +226,125 @@ export interface PipelineResult extends ApiResult {
     cost_ms: number
     box?: Rect
     score?: number
+    detail?: Record<string, any>  // 算法附加信息，如 Cascade 的 stages
   }
   cost_ms?: number
   logs?: string[]
+  node_stats?: Record<string, PipelineNodeStats>
+  trace_summary?: Record<string, { count: number; total_ms: number }>
+  trace_file?: string | null
+  inventory?: {
+    templates: number
+    scans: number
+    cache_hits: number
+    scan_ms: number
+    avg_scan_ms: number
+  } | null
+  record_manifest?: string
+}
+
+export interface PipelineNodeStats {
+  name: string
+  attempts: number
+  hits: number
+  timeouts: number
+  reco_ms: number
+  wait_ms: number
+  avg_reco_ms: number
+  avg_wait_ms: number
+  freeze_ms: number
+  hot_attempts: number
+  hot_hits: number
+  hot_hit_rate: number
+  pixels_saved: number
+  learned_attempts: number
+  learned_hits: number
+  learned_hit_rate: number
+  stages: CascadeStageStats[]    // Cascade 节点各级的累计统计
+}
+
+export interface CascadeStageStats {
+  index: number
+  algorithm: string
+  fallback: boolean
+  runs: number
+  skipped: number
+  hits: number
+  cost_ms: number
+  avg_ms: number
+  prune_rate: number             // 本级排除的画面比例
+}
+
+export interface InventoryInstance {
+  box: Rect
+  score: number
+  text: string | null
+  label: string | null
+}
+
+export interface SceneInventoryResult extends ApiResult {
+  frame_hash?: string
+  cost_ms?: number
+  template_count?: number
+  instance_count?: number
+  items?: Record<string, InventoryInstance[]>
+  cached?: boolean
+  stats?: {
+    templates: number
+    missing: number
+    flat: number
+    scans: number
+    cache_hits: number
+    scan_ms: number
+    avg_scan_ms: number
+  }
+}
+
+export interface RoiSuggestion {
+  node: string
+  template: string
+  display: [number, number]
+  samples: number
+  roi: number[] | null
+  current_roi: number[] | null
+  area_ratio: number
+  expected_speedup: number
+}
+
+export interface RoiSuggestionReport extends ApiResult {
+  pipeline?: string
+  suggestions?: RoiSuggestion[]
+  no_history?: string[]
+}
+
+export interface PipelineReplayNodeReport {
+  attempts: number
+  hits: number
+  timeouts: number
+  median_reco_ms: number
+  min_reco_ms: number
+  hot_hit_rate: number
+  pixels_saved: number
+  expected?: number[] | null
+  actual?: number[] | null
+  iou?: number | null
+  correct?: boolean
+}
+
+export interface PipelineReplayReport extends ApiResult {
+  pipeline?: string
+  entry?: string
+  source?: string
+  frame_count?: number
+  repeat?: number
+  executed_nodes?: string[]
+  actions?: Record<string, unknown>[]
+  captures?: number
+  deterministic?: boolean
+  accuracy?: number | null
+  cost_ms?: number[]
+  trace_summary?: Record<string, { count: number; total_ms: number }>
+  nodes?: Record<string, PipelineReplayNodeReport>
 }
 
 export interface VisionCapabilities extends ApiResult {
@@ -201,6 +372,81 @@ export interface PipelineTestResult extends ApiResult {
   pipeline_result?: PipelineResult
 }
 
+export interface PipelineBatchJob {
+  pipeline_path: string
+  entry: string
+  resource_dir?: string
+  launch_app?: boolean
+}
+
+export interface PipelineBatchJobResult extends PipelineBatchJob {
+  job_id: number
+  worker: number
+  display?: string | null
+  success: boolean
+  error?: string | null
+  app_launched: boolean
+  start_ms: number
+  cost_ms: number
+  log_dir?: string | null
+  pipeline_result?: PipelineResult | null
+}
+
+export interface PipelineBatchReport extends ApiResult {
+  total?: number
+  passed?: number
+  failed?: number
+  workers?: number
+  displays?: string[]
+  wall_ms?: number
+  cumulative_ms?: number
+  speedup?: number
+  output_dir?: string
+  results?: PipelineBatchJobResult[]
+}
+
+// ==================== 后台任务 ====================
+
+export type JobStatus = 'pending' | 'running' | 'succeeded' | 'failed' | 'cancelled'
+
+/**
+ * 任务进度事件
+ * Pipeline 任务的事件类型: started / launch / wait / recognized / timeout / action / log / finished
+ */
+export interface JobEvent {
+  seq: number
+  job_id: string
+  type: string
+  time: number
+  data: Record<string, unknown>
+}
+
+export interface JobInfo {
+  job_id: string
+  kind: string
+  params: Record<string, unknown>
+  status: JobStatus
+  error?: string | null
+  created_at: number
+  started_at?: number | null
+  finished_at?: number | null
+}
+
+export interface JobStartResult extends ApiResult {
+  job_id?: string
+}
+
+export interface JobPollResult<T> extends ApiResult, Partial<JobInfo> {
+  events?: JobEvent[]
+  cursor?: number
+  dropped?: number   // 缓冲区已满而丢失的事件数
+  result?: T         // 任务结束后才有
+}
+
+export interface JobListResult extends ApiResult {
+  jobs?: JobInfo[]
+}
+
 /**
  * 通用 Python 调用函数
  */
@@ -240,6 +486,9 @@ export const visual = {
   runStressTest: (iterations: number) => 
     callPy<StressTestResult>('run_stress_test', iterations),
   
+  benchmarkActionBackends: (iterations?: number, batchSize?: number) => 
+    callPy<ActionBackendBenchmarkResult>('benchmark_action_backends', iterations, batchSize),
+  
   executeAiCommand: (command: string) => 
     callPy<AiCommandResult>('execute_ai_command', command),
   
@@ -292,8 +541,26 @@ export const visual = {
   /**
    * 从 JSON 文件运行 Pipeline
    */
-  runPipelineFromFile: (jsonPath: string, entry: string, resourceDir?: string) =>
-    callPy<PipelineResult>('run_pipeline_from_file', jsonPath, entry, resourceDir),
+  runPipelineFromFile: (jsonPath: string, entry: string, resourceDir?: string, recordDir?: string, autoRoi = false) =>
+    callPy<PipelineResult>('run_pipeline_from_file', jsonPath, entry, resourceDir, recordDir, autoRoi),
+  
+  /**
+   * 在录制的帧序列上回放 Pipeline
+   */
+  runPipelineReplay: (jsonPath: string, entry: string, source: string, resourceDir?: string, repeat = 3) =>
+    callPy<PipelineReplayReport>('run_pipeline_replay', jsonPath, entry, source, resourceDir, repeat),
+  
+  /**
+   * 场景清单：一次扫描找出屏幕上所有已知图标的全部实例（画面不变时复用缓存）
+   */
+  scanSceneInventory: (templates: string | string[], resourceDir?: string, threshold = 0.8, roi?: number[]) =>
+    callPy<SceneInventoryResult>('scan_scene_inventory', templates, resourceDir, threshold, roi),
+  
+  /**
+   * 根据历史命中位置为 Pipeline 节点推荐 ROI
+   */
+  suggestPipelineRois: (jsonPath: string, minSamples = 3) =>
+    callPy<RoiSuggestionReport>('suggest_pipeline_rois', jsonPath, minSamples),
   
   /**
    * 获取视觉识别能力信息
@@ -312,8 +579,81 @@ export const visual = {
   /**
    * 运行 Pipeline 测试
    */
-  runPipelineTest: (pipelinePath: string, entry: string, launchApp = true, resourceDir?: string) =>
-    callPy<PipelineTestResult>('run_pipeline_test', pipelinePath, entry, launchApp, resourceDir),
+  runPipelineTest: (pipelinePath: string, entry: string, launchApp = true, resourceDir?: string, autoRoi = false) =>
+    callPy<PipelineTestResult>('run_pipeline_test', pipelinePath, entry, launchApp, resourceDir, autoRoi),
+  
+  /**
+   * 批量并行运行 Pipeline 测试（每个进程独立的 Xvfb 显示）
+   */
+  runPipelineBatch: (jobs: PipelineBatchJob[], workers?: number, useXvfb = true) =>
+    callPy<PipelineBatchReport>('run_pipeline_batch', jobs, workers, useXvfb),
+
+  // ==================== 后台任务 ====================
+
+  /**
+   * 在后台运行 Pipeline，立即返回任务 ID
+   */
+  startPipelineJob: (config: PipelineConfig, entry: string, resourceDir?: string) =>
+    callPy<JobStartResult>('start_pipeline_job', config, entry, resourceDir),
+
+  /**
+   * 在后台运行 Pipeline 测试，立即返回任务 ID
+   */
+  startPipelineTestJob: (pipelinePath: string, entry: string, launchApp = true, resourceDir?: string, autoRoi = false) =>
+    callPy<JobStartResult>('start_pipeline_test_job', pipelinePath, entry, launchApp, resourceDir, autoRoi),
+
+  /**
+   * 增量获取任务事件（cursor 为上次返回的 cursor）
+   */
+  pollJob: <T = PipelineTestResult>(jobId: string, cursor = 0) =>
+    callPy<JobPollResult<T>>('poll_job', jobId, cursor),
+
+  cancelJob: (jobId: string) =>
+    callPy<ApiResult>('cancel_job', jobId),
+
+  listJobs: () =>
+    callPy<JobListResult>('list_jobs'),
+
+  /**
+   * 订阅后端推送的任务事件，返回取消订阅函数
+   */
+  onJobEvent: (callback: (event: JobEvent) => void) => {
+    const listener = (e: Event) => callback((e as CustomEvent<JobEvent>).detail)
+    window.addEventListener('pyjobevent', listener)
+    return () => window.removeEventListener('pyjobevent', listener)
+  },
+
+  /**
+   * 等待任务结束：优先使用推送事件，同时按间隔轮询兜底（推送丢失或不可用时）
+   *
+   * @param onEvent 每个新事件回调一次（按 seq 去重）
+   */
+  waitForJob: async <T = PipelineTestResult>(
+    jobId: string,
+    onEvent?: (event: JobEvent) => void,
+    intervalMs = 1000
+  ): Promise<JobPollResult<T>> => {
+    let cursor = 0
+    const deliver = (event: JobEvent) => {
+      if (event.job_id !== jobId || event.seq <= cursor) return
+      cursor = event.seq
+      onEvent?.(event)
+    }
+    const unsubscribe = visual.onJobEvent(deliver)
+    try {
+      for (;;) {
+        const res = await visual.pollJob<T>(jobId, cursor)
+        if (!res.success) return res
+        res.events?.forEach(deliver)
+        if (res.status === 'succeeded' || res.status === 'failed' || res.status === 'cancelled') {
+          return res
+        }
+        await new Promise(resolve => setTimeout(resolve, intervalMs))
+      }
+    } finally {
+      unsubscribe()
+    }
+  },
 }
 
 export default visual
@@ -1,6 +1,8 @@
 import { useState, useEffect } from 'react'
-import { scanUnitTests, runUnitTest, runUiTest, analyzeTestFailure } from '../api/unit-test'
-import type { UnitTestFile, TestResult } from '../api/unit-test'
+import { scanUnitTests, startUnitTestJob, startUiTestJob, analyzeTestFailure } from '../api/unit-test'
+import type { UnitTestFile, TestResult, TestCaseResult, TestCaseEvent, TestOutputEvent } from '../api/unit-test'
+import { visual } from '../api/visual'
+import type { JobEvent } from '../api/visual'
 import { renderMarkdown } from '../utils/markdown'
 import { TestHistoryPanel } from './TestHistoryPanel'
 
@@ -20,6 +22,10 @@ export function UnitTestPanel({ projectPath, onViewFile }: UnitTestPanelProps) {
   const [analyzing, setAnalyzing] = useState<Set<string>>(new Set())
   const [renderingMarkdown, setRenderingMarkdown] = useState<Set<string>>(new Set())
   const [historyRefreshTrigger, setHistoryRefreshTrigger] = useState(0)
+  // 运行中的后台任务 ID、实时用例结果和输出（按测试名）
+  const [jobIds, setJobIds] = useState<Map<string, string>>(new Map())
+  const [liveCases, setLiveCases] = useState<Map<string, TestCaseResult[]>>(new Map())
+  const [liveOutput, setLiveOutput] = useState<Map<string, string[]>>(new Map())
 
   // 扫描测试
   const handleScan = async () => {
@@ -42,6 +48,9 @@ export function UnitTestPanel({ projectPath, onViewFile }: UnitTestPanelProps) {
     }
 
     setRunning(prev => new Set(prev).add(test.name))
+    setLiveCases(prev => new Map(prev).set(test.name, []))
+    setLiveOutput(prev => new Map(prev).set(test.name, []))
+    setSelectedTest(test.name)
     try {
       console.log('🚀 开始运行测试:', test.name, '项目路径:', projectPath)
 
@@ -49,9 +58,37 @@ export function UnitTestPanel({ projectPath, onViewFile }: UnitTestPanelProps) {
       const isUiTest = test.name.toLowerCase().includes('ui') ||
         test.name.toLowerCase().includes('interaction')
 
-      const result = isUiTest
-        ? await runUiTest(test.executable_path, test.name, projectPath)
-        : await runUnitTest(test.executable_path, test.name, projectPath)
+      // 后台运行，用例结果和输出通过事件实时显示，不必等进程结束
+      const started = isUiTest
+        ? await startUiTestJob(test.executable_path, test.name, projectPath)
+        : await startUnitTestJob(test.executable_path, test.name, projectPath)
+      if (!started.success || !started.job_id) {
+        throw new Error(started.error || '启动任务失败')
+      }
+      const jobId = started.job_id
+      setJobIds(prev => new Map(prev).set(test.name, jobId))
+
+      const appendEvent = (event: JobEvent) => {
+        if (event.type === 'test_case') {
+          const data = event.data as unknown as TestCaseEvent
+          setLiveCases(prev => new Map(prev).set(test.name, [...(prev.get(test.name) || []), data.case]))
+        } else if (event.type === 'output') {
+          const data = event.data as unknown as TestOutputEvent
+          setLiveOutput(prev => new Map(prev).set(test.name, [...(prev.get(test.name) || []), ...data.lines]))
+        }
+      }
+      const job = await visual.waitForJob<TestResult>(jobId, appendEvent)
+      const result: TestResult = job.result || {
+        test_name: test.name,
+        status: 'error',
+        total: 0,
+        passed: 0,
+        failed: 0,
+        skipped: 0,
+        duration: '-',
+        output: job.status === 'cancelled' ? '已取消' : job.error || '测试任务失败',
+        details: [],
+      }
 
       console.log('✅ 测试完成:', test.name, '结果:', result)
       console.log('📝 run_id:', result.run_id)
@@ -71,6 +108,19 @@ export function UnitTestPanel({ projectPath, onViewFile }: UnitTestPanelProps) {
         newSet.delete(test.name)
         return newSet
       })
+      setJobIds(prev => {
+        const newMap = new Map(prev)
+        newMap.delete(test.name)
+        return newMap
+      })
+    }
+  }
+
+  // 取消运行中的测试（结束测试进程）
+  const handleCancel = async (testName: string) => {
+    const jobId = jobIds.get(testName)
+    if (jobId) {
+      await visual.cancelJob(jobId)
     }
   }
 
@@ -134,6 +184,9 @@ export function UnitTestPanel({ projectPath, onViewFile }: UnitTestPanelProps) {
   }, [projectPath])
 
   const selectedResult = selectedTest ? results.get(selectedTest) : null
+  const selectedLive = selectedTest && running.has(selectedTest)
+    ? { cases: liveCases.get(selectedTest) || [], output: liveOutput.get(selectedTest) || [] }
+    : null
   const selectedAnalysis = selectedTest ? aiAnalysis.get(selectedTest) : null
 
   return (
@@ -250,6 +303,15 @@ export function UnitTestPanel({ projectPath, onViewFile }: UnitTestPanelProps) {
                         >
                           {isRunning ? '⏳ 运行中...' : '▶ 运行'}
                         </button>
+                        {isRunning && (
+                          <button
+                            onClick={() => handleCancel(test.name)}
+                            disabled={!jobIds.has(test.name)}
+                            className="px-3 py-1 bg-red-500 text-white rounded hover:bg-red-600 disabled:opacity-50 text-sm"
+                          >
+                            ■ 停止
+                          </button>
+                        )}
                         {result && result.status === 'failed' && (
                           <button
                             onClick={() => handleAnalyze(test)}
@@ -283,8 +345,51 @@ export function UnitTestPanel({ projectPath, onViewFile }: UnitTestPanelProps) {
           )}
         </div>
 
+        {/* 运行中的实时结果 */}
+        {selectedLive && (
+          <div className="bg-white dark:bg-gray-800 rounded-lg shadow-sm p-4">
+            <h3 className="text-lg font-semibold text-gray-800 dark:text-white mb-3">
+              ⏳ 实时结果
+            </h3>
+
+            <div className="space-y-3">
+              {selectedLive.cases.length > 0 && (
+                <div className="space-y-1">
+                  {selectedLive.cases.map((detail, index) => (
+                    <div
+                      key={index}
+                      className={`p-2 rounded text-sm ${detail.status === 'PASS'
+                        ? 'bg-green-50 dark:bg-green-900/20 text-green-800 dark:text-green-400'
+                        : 'bg-red-50 dark:bg-red-900/20 text-red-800 dark:text-red-400'
+                        }`}
+                    >
+                      <div className="flex items-center gap-2">
+                        <span>{detail.status === 'PASS' ? '✓' : '✗'}</span>
+                        <span className="font-medium">
+                          {detail.name}{detail.data_tag ? `(${detail.data_tag})` : ''}
+                        </span>
+                      </div>
+                      {detail.message && (
+                        <div className="ml-6 mt-1 text-xs opacity-75 whitespace-pre-wrap">{detail.message}</div>
+                      )}
+                    </div>
+                  ))}
+                </div>
+              )}
+
+              <div className="bg-gray-900 rounded-lg p-3 max-h-60 overflow-y-auto">
+                {selectedLive.output.map((line, index) => (
+                  <div key={index} className="text-xs font-mono text-gray-300 py-0.5 whitespace-pre-wrap">
+                    {line}
+                  </div>
+                ))}
+              </div>
+            </div>
+          </div>
+        )}
+
         {/* 测试结果详情 */}
-        {selectedResult && (
+        {selectedResult && !selectedLive && (
           <div className="bg-white dark:bg-gray-800 rounded-lg shadow-sm p-4">
             <h3 className="text-lg font-semibold text-gray-800 dark:text-white mb-3">
               📊 测试结果详情
@@ -9,7 +9,8 @@ import type {
   VisualVerifyResult,
   PipelineTestFile,
   PipelineTestResult,
-  GeneratePipelineResult
+  GeneratePipelineResult,
+  JobEvent
 } from '../api/visual'
 
 type SubTab = 'pipeline' | 'ai'
@@ -61,6 +62,9 @@ function PipelineTestPanel() {
   const [selectedEntry, setSelectedEntry] = useState<Map<string, string>>(new Map())
   const [loading, setLoading] = useState(false)
   const [launchApp, setLaunchApp] = useState(true)
+  // 运行中的后台任务 ID 和实时日志（按 pipeline:entry）
+  const [jobIds, setJobIds] = useState<Map<string, string>>(new Map())
+  const [liveLogs, setLiveLogs] = useState<Map<string, string[]>>(new Map())
 
   // 扫描 Pipeline 配置文件
   const handleScan = async () => {
@@ -94,11 +98,27 @@ function PipelineTestPanel() {
 
     const key = `${pipeline.path}:${entry}`
     setRunning(prev => new Set(prev).add(key))
+    setLiveLogs(prev => new Map(prev).set(key, []))
+    setSelectedPipeline(key)
     
     try {
-      const result = await visual.runPipelineTest(pipeline.path, entry, launchApp)
+      // 后台运行，执行过程中通过事件实时显示日志，不阻塞界面
+      const started = await visual.startPipelineTestJob(pipeline.path, entry, launchApp)
+      if (!started.success || !started.job_id) {
+        throw new Error(started.error || '启动任务失败')
+      }
+      const jobId = started.job_id
+      setJobIds(prev => new Map(prev).set(key, jobId))
+
+      const appendLog = (event: JobEvent) => {
+        if (event.type !== 'log') return
+        setLiveLogs(prev => new Map(prev).set(key, [...(prev.get(key) || []), String(event.data.message)]))
+      }
+      const job = await visual.waitForJob<PipelineTestResult>(jobId, appendLog)
+      const result: PipelineTestResult = job.status === 'cancelled'
+        ? { ...job.result, success: false, error: '已取消' }
+        : job.result || { success: false, error: job.error || 'Pipeline 任务失败' }
       setResults(prev => new Map(prev).set(key, result))
-      setSelectedPipeline(key)
     } catch (error) {
       console.error('运行 Pipeline 失败:', error)
       setResults(prev => new Map(prev).set(key, { 
@@ -111,6 +131,19 @@ function PipelineTestPanel() {
         newSet.delete(key)
         return newSet
       })
+      setJobIds(prev => {
+        const newMap = new Map(prev)
+        newMap.delete(key)
+        return newMap
+      })
+    }
+  }
+
+  // 取消运行中的 Pipeline 测试
+  const handleCancel = async (key: string) => {
+    const jobId = jobIds.get(key)
+    if (jobId) {
+      await visual.cancelJob(jobId)
     }
   }
 
@@ -127,6 +160,9 @@ function PipelineTestPanel() {
   }, [])
 
   const selectedResult = selectedPipeline ? results.get(selectedPipeline) : null
+  const selectedLiveLogs = selectedPipeline && running.has(selectedPipeline)
+    ? liveLogs.get(selectedPipeline) || []
+    : null
 
   return (
     <div className="space-y-4">
@@ -235,6 +271,15 @@ function PipelineTestPanel() {
                       >
                         {isRunning ? '⏳ 运行中...' : '▶ 运行'}
                       </button>
+                      {isRunning && (
+                        <button
+                          onClick={() => handleCancel(key)}
+                          disabled={!jobIds.has(key)}
+                          className="px-3 py-1 bg-red-500 text-white rounded hover:bg-red-600 disabled:opacity-50 text-sm font-medium transition-colors whitespace-nowrap"
+                        >
+                          ■ 停止
+                        </button>
+                      )}
                     </div>
                   </div>
                 </div>
@@ -244,8 +289,27 @@ function PipelineTestPanel() {
         )}
       </div>
 
+      {/* 运行中的实时日志 */}
+      {selectedLiveLogs && (
+        <div className="bg-gray-50 dark:bg-gray-900 rounded-lg p-4">
+          <h4 className="text-sm font-semibold text-gray-800 dark:text-white mb-3">
+            ⏳ 实时日志
+          </h4>
+          <div className="bg-gray-900 rounded-lg p-3 max-h-60 overflow-y-auto">
+            {selectedLiveLogs.map((log, index) => (
+              <div
+                key={index}
+                className="text-xs font-mono text-gray-300 py-0.5"
+              >
+                {log}
+              </div>
+            ))}
+          </div>
+        </div>
+      )}
+
       {/* 测试结果详情 */}
-      {selectedResult && (
+      {selectedResult && !selectedLiveLogs && (
         <div className="bg-gray-50 dark:bg-gray-900 rounded-lg p-4">
           <h4 className="text-sm font-semibold text-gray-800 dark:text-white mb-3">
             📊 测试结果详情
@@ -0,0 +1,99 @@
+"""
+测试 QTest 文本输出解析
+
+验证失败用例的详情行（QCOMPARE 的 Actual / Expected）和源码位置都能解析出来，
+逐行输入（实时推送用例结果）时也一样
+"""
+import sys
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, str(Path(__file__).parent))
+
+from core.qt_project.unit_test_runner import QTestLineParser, parse_qtest_output
+
+
+# Qt 6 测试程序的真实输出（QCOMPARE / QVERIFY 失败、跳过）
+QCOMPARE_OUTPUT = """\
+********* Start testing of TestArrow *********
+Config: Using QtTest library 6.5.3, Qt 6.5.3 (x86_64-little_endian-lp64 shared (dynamic) release build; by GCC 13.2.0), ubuntu 24.04
+PASS   : TestArrow::initTestCase()
+FAIL!  : TestArrow::testLength(diagonal) Compared values are not the same
+   Actual   (arrow.length()): 141
+   Expected (expected)      : 142
+   Loc: [/home/dev/diagramscene/tests/tst_arrow.cpp(57)]
+PASS   : TestArrow::testLength(horizontal)
+FAIL!  : TestArrow::testBoundingRect() 'rect.contains(end)' returned FALSE. ()
+   Loc: [/home/dev/diagramscene/tests/tst_arrow.cpp(73)]
+SKIP   : TestArrow::testPaint() requires a display
+   Loc: [/home/dev/diagramscene/tests/tst_arrow.cpp(80)]
+PASS   : TestArrow::cleanupTestCase()
+Totals: 3 passed, 2 failed, 1 skipped, 0 blacklisted, 4ms
+********* Finished testing of TestArrow *********
+"""
+
+
+def _failures(details):
+    return [d for d in details if d.status != 'PASS']
+
+
+def test_qcompare_failure_keeps_location_and_details():
+    """QCOMPARE 失败时 Loc 行在 Actual / Expected 之后，仍能得到源码位置"""
+    result = parse_qtest_output('test_arrow', QCOMPARE_OUTPUT, 1)
+
+    assert result.status == 'failed'
+    assert (result.passed, result.failed, result.skipped) == (3, 2, 1)
+
+    length, bounding, paint = _failures(result.details)
+    assert length.name == 'testLength'
+    assert length.data_tag == 'diagonal'
+    assert length.file == '/home/dev/diagramscene/tests/tst_arrow.cpp'
+    assert length.line == 57
+    assert length.message.splitlines() == [
+        'Compared values are not the same',
+        'Actual   (arrow.length()): 141',
+        'Expected (expected)      : 142',
+    ]
+
+    assert (bounding.file, bounding.line) == ('/home/dev/diagramscene/tests/tst_arrow.cpp', 73)
+    assert bounding.message == "'rect.contains(end)' returned FALSE. ()"
+    assert (paint.status, paint.line) == ('SKIP', 80)
+
+
+def test_streamed_cases_include_location():
+    """逐行输入时，失败用例在 Loc 行到达后才推送，推送的结果已包含源码位置"""
+    streamed = []
+    parser = QTestLineParser(on_case=lambda case: streamed.append((case.name, case.status, case.line)))
+    for line in QCOMPARE_OUTPUT.splitlines():
+        parser.feed(line)
+    parser.finish()
+
+    assert streamed == [
+        ('initTestCase', 'PASS', None),
+        ('testLength', 'FAIL', 57),
+        ('testLength', 'PASS', None),
+        ('testBoundingRect', 'FAIL', 73),
+        ('testPaint', 'SKIP', 80),
+        ('cleanupTestCase', 'PASS', None),
+    ]
+
+
+def test_failure_without_location_is_emitted_on_finish():
+    """输出在 Loc 行之前中断（如崩溃）时，失败用例在输出结束时推送"""
+    streamed = []
+    parser = QTestLineParser(on_case=streamed.append)
+    parser.feed('FAIL!  : TestArrow::testLength(diagonal) Compared values are not the same')
+    parser.feed('   Actual   (arrow.length()): 141')
+    assert streamed == []
+
+    parser.finish()
+    assert len(streamed) == 1
+    assert streamed[0].file is None
+    assert streamed[0].message.endswith('Actual   (arrow.length()): 141')
+
+
+if __name__ == '__main__':
+    test_qcompare_failure_keeps_location_and_details()
+    test_streamed_cases_include_location()
+    test_failure_without_location_is_emitted_on_finish()
+    print("✅ 全部通过")